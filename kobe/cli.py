@@ -244,8 +244,9 @@ def _cmd_show_log_local(args: argparse.Namespace) -> int:
     if not pth.exists():
         print("Je ne sais pas.\nAucun journal encore.")
         return 0
-    for ln in pth.read_text(encoding="utf-8").splitlines()[-args.tail:]:
-        print(ln)
+    from kobe.core.jsonl_tail import tail_lines
+    for ln in tail_lines(pth, args.tail):
+        print(ln.decode("utf-8", errors="replace"))
     return 0
 
 # -----------------------------
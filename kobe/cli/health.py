@@ -4,10 +4,11 @@ from pathlib import Path
 from typing import Dict, Any, Iterable
 import yaml
 
-from kobe.core.risk import RiskConfig
-from kobe.core.scheduler import build_scheduler
-from kobe.core.factors import get_market_snapshot
-from kobe.signals.generator import generate_proposal_from_factors
+from kobe.core.lazy import lazy_callable
+
+# Chargés par les checks eux-mêmes: l'import du CLI reste sous le budget one-shot
+build_scheduler = lazy_callable("kobe.core.scheduler", "build_scheduler")
+get_market_snapshot = lazy_callable("kobe.core.factors", "get_market_snapshot")
 
 OK = "✅"
 KO = "❌"
@@ -32,6 +33,7 @@ def check_cfg_sections(cfg: dict) -> list[dict]:
 
 def check_risk(cfg: dict) -> dict:
     try:
+        from kobe.core.risk import RiskConfig
         rc = RiskConfig(**(cfg.get("risk", {}) or {}))
         ok = rc.max_trade_pct >= rc.max_proposal_pct > 0
         msg = OK if ok else f"{KO} incohérence risk: trade({rc.max_trade_pct}) < proposal({rc.max_proposal_pct})"
@@ -74,6 +76,7 @@ def check_scheduler_construct(cfg: dict) -> dict:
 
 def check_generator_pipeline() -> dict:
     try:
+        from kobe.signals.generator import generate_proposal_from_factors
         snap = get_market_snapshot("BTCUSDC")
         _ = generate_proposal_from_factors(snap)  # None est acceptable
         return {"name":"generator.pipeline", "ok": True, "msg": OK}
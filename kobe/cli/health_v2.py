@@ -3,8 +3,6 @@ import argparse, json
 from kobe.core.secrets import load_env, load_config, merge_env_config, get_mode, get_exchange_keys
 from kobe.core.modes import current_mode, Mode
 from kobe.core.adapter.binance import BinanceAdapter
-from kobe.core.router import place_from_proposal
-from kobe.signals.proposal import Proposal
 
 OK = "✅"
 KO = "❌"
@@ -45,6 +43,8 @@ def run_health_v2() -> int:
         print(f"{WARN} Adapter non accessible.")
 
     try:
+        from kobe.core.router import place_from_proposal
+        from kobe.signals.proposal import Proposal
         demo = Proposal(
             symbol="BTCUSDT", side="long",
             entry=68000, stop=67200, take=69600,
@@ -0,0 +1,138 @@
+"""
+Benchmark du temps d'import des points d'entrée (python -X importtime).
+
+    python -m kobe.cli.import_time                     # entrées one-shot, budget 200 ms
+    python -m kobe.cli.import_time kobe.core.router --top 15
+    python -m kobe.cli.import_time --json
+
+- Chaque module est importé dans un interpréteur neuf, `runs` fois; on garde
+  le meilleur temps cumulé (le bruit machine ne fait qu'ajouter).
+- Le démarrage de l'interpréteur (site, .pth) n'est pas compté: seul
+  l'import du module mesuré l'est.
+- Code retour 1 si un module dépasse le budget ou charge une dépendance
+  lourde (ccxt, telegram, APScheduler...) qui doit rester différée.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+BUDGET_MS = 200.0
+RUNS = 3
+
+# Points d'entrée lancés par cron / runner_v4.sh --once: démarrage < BUDGET_MS
+ONE_SHOT_ENTRYPOINTS = (
+    "kobe.cli.schedule",
+    "kobe.cli.trade",
+    "kobe.cli.health",
+    "kobe.cli.health_v2",
+    "kobe.cli.scan_once_v3",
+    "kobe.cli.report",
+)
+
+# Dépendances chargées au premier usage seulement (cf. kobe.core.lazy)
+HEAVY_MODULES = ("ccxt", "telegram", "apscheduler", "pytz", "httpx", "feedparser", "pydantic")
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Lignes `import time: self | cumulative | module` → [{module, self_us, cumulative_us, depth}]."""
+    rows: List[Dict[str, Any]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # en-tête "self [us] | cumulative | imported package"
+        name = parts[2].rstrip()
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return rows
+
+
+def _run_once(module: str) -> List[Dict[str, Any]]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(_PROJECT_ROOT), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=str(_PROJECT_ROOT), timeout=60,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["?"]
+        raise RuntimeError(f"import {module} a échoué: {tail[0]}")
+    return parse_importtime(proc.stderr)
+
+
+def measure(module: str, runs: int = RUNS, top: int = 10) -> Dict[str, Any]:
+    """Meilleur temps d'import cumulé de `module` sur `runs` interpréteurs neufs."""
+    best: List[Dict[str, Any]] = []
+    best_us = None
+    for _ in range(max(1, runs)):
+        rows = _run_once(module)
+        own = [r for r in rows if r["module"] == module and r["depth"] == 0]
+        total = own[-1]["cumulative_us"] if own else 0
+        if best_us is None or total < best_us:
+            best_us, best = total, rows
+    # Modules importés par `module` (tout ce qui suit l'import de site)
+    start = next((i for i, r in enumerate(best) if r["module"] == "site" and r["depth"] == 0), -1)
+    loaded = [r for r in best[start + 1:]]
+    heavy = sorted({r["module"].split(".")[0] for r in loaded} & set(HEAVY_MODULES))
+    slowest = sorted((r for r in loaded if r["module"] != module), key=lambda r: r["self_us"], reverse=True)
+    return {
+        "module": module,
+        "ms": round((best_us or 0) / 1000, 1),
+        "heavy": heavy,
+        "top": [{"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1)} for r in slowest[:top]],
+    }
+
+
+def check(results: Sequence[Dict[str, Any]], budget_ms: float = BUDGET_MS) -> List[str]:
+    """Violations (budget dépassé, dépendance lourde chargée à l'import)."""
+    errors = []
+    for r in results:
+        if r["ms"] > budget_ms:
+            errors.append(f"{r['module']}: {r['ms']} ms > budget {budget_ms:g} ms")
+        if r["heavy"]:
+            errors.append(f"{r['module']}: import non différé de {', '.join(r['heavy'])}")
+    return errors
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="kobe import-time", description="Temps d'import des points d'entrée (-X importtime).")
+    ap.add_argument("modules", nargs="*", help="Modules à mesurer (défaut: points d'entrée one-shot)")
+    ap.add_argument("--runs", type=int, default=RUNS, help="Interpréteurs neufs par module (meilleur temps)")
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="Budget par module")
+    ap.add_argument("--top", type=int, default=5, help="Imports les plus lents à afficher")
+    ap.add_argument("--json", action="store_true", help="Sortie JSON")
+    return ap
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    results = [measure(m, runs=args.runs, top=args.top) for m in (args.modules or ONE_SHOT_ENTRYPOINTS)]
+    errors = check(results, args.budget_ms)
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "results": results, "errors": errors}, ensure_ascii=False))
+    else:
+        for r in results:
+            flag = "✅" if r["ms"] <= args.budget_ms and not r["heavy"] else "❌"
+            print(f"{flag} {r['module']:<28} {r['ms']:>8.1f} ms")
+            for t in r["top"]:
+                print(f"     {t['self_ms']:>7.1f} ms  {t['module']}")
+        for e in errors:
+            print(f"❌ {e}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,28 @@
 from __future__ import annotations
-import argparse, csv, json
+import argparse, csv, json, os, tempfile
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Tuple, Iterable
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from kobe.core.jsonl_tail import read_appended
+from kobe.core.trade_store import DB_NAME, get_trade_store
 
 POS_LOG_DIR = Path("logs")
+POS_DB_PATH = POS_LOG_DIR / DB_NAME
 POS_CSV_PATH = POS_LOG_DIR / "positions.csv"
 POS_JSONL_PATH = POS_LOG_DIR / "positions.jsonl"
 PNL_CSV_PATH = POS_LOG_DIR / "pnl_daily.csv"
 PNL_JSONL_PATH = POS_LOG_DIR / "pnl_daily.jsonl"
+PNL_SYMBOLS_CSV_PATH = POS_LOG_DIR / "pnl_symbols.csv"
+PNL_SYMBOLS_JSONL_PATH = POS_LOG_DIR / "pnl_symbols.jsonl"
+# High-water mark (seq SQLite / offset JSONL) + agrégats bruts par jour et par symbole
+PNL_STATE_PATH = POS_LOG_DIR / "pnl_state.json"
+STATE_VERSION = 1
+# Lecture de l'historique JSONL par blocs (mémoire constante)
+READ_BLOCK_BYTES = 4 * 1024 * 1024
+
+DAILY_COLS = ["date","trades","wins","losses","win_rate","avg_pnl_usd","total_pnl_usd","equity_usd","drawdown_usd"]
+SYMBOL_COLS = ["symbol","trades","wins","losses","win_rate","avg_pnl_usd","total_pnl_usd"]
 
 def _ensure():
     POS_LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -16,85 +30,182 @@ def _ensure():
 def _utc_date_from_ms(ms: int) -> str:
     return datetime.fromtimestamp(ms/1000, tz=timezone.utc).strftime("%Y-%m-%d")
 
-def _read_positions() -> Iterable[Dict[str, Any]]:
-    # lit JSONL si dispo (source la plus fidèle), sinon CSV
-    if POS_JSONL_PATH.exists():
-        for line in POS_JSONL_PATH.read_text(encoding="utf-8").splitlines():
-            if not line.strip():
-                continue
-            yield json.loads(line)
+def _source_id() -> Tuple[str, Path]:
+    """Source des positions: store SQLite, sinon historique JSONL, sinon CSV."""
+    if POS_DB_PATH.exists():
+        kind, path = "db", POS_DB_PATH
+    elif POS_JSONL_PATH.exists():
+        kind, path = "jsonl", POS_JSONL_PATH
     elif POS_CSV_PATH.exists():
-        with POS_CSV_PATH.open(newline="", encoding="utf-8") as f:
-            for row in csv.DictReader(f):
-                yield row
+        kind, path = "csv", POS_CSV_PATH
     else:
-        return []
-
-def _aggregate_daily(positions: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    daily: Dict[str, Dict[str, Any]] = {}
-    for evt in positions:
-        if str(evt.get("status","")) != "closed":
-            continue
-        try:
-            pnl = float(evt.get("realized_pnl_usd", 0) or 0)
-            ts_close = int(float(evt.get("ts_close") or 0))
-        except Exception:
-            continue
-        if ts_close <= 0:
-            continue
-        day = _utc_date_from_ms(ts_close)
-        d = daily.setdefault(day, {"date": day, "trades": 0, "wins": 0, "losses": 0, "total_pnl_usd": 0.0})
-        d["trades"] += 1
-        d["total_pnl_usd"] += pnl
-        if pnl > 0:
-            d["wins"] += 1
-        elif pnl < 0:
-            d["losses"] += 1
-    # post metrics
-    for d in daily.values():
-        t = max(1, d["trades"])
-        d["win_rate"] = round(100.0 * d["wins"] / t, 2)
-        d["avg_pnl_usd"] = round(d["total_pnl_usd"] / t, 2)
-        d["total_pnl_usd"] = round(d["total_pnl_usd"], 2)
-    return daily
-
-def _write_daily(daily: Dict[str, Dict[str, Any]]) -> None:
+        return "", POS_DB_PATH
+    # L'inode distingue un fichier recréé au même chemin (high-water mark invalide)
+    return f"{kind}:{path}:{path.stat().st_ino}", path
+
+def _empty_state(source: str) -> Dict[str, Any]:
+    return {"version": STATE_VERSION, "source": source, "hwm": 0, "days": {}, "symbols": {}}
+
+def _load_state(source: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(PNL_STATE_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return _empty_state(source)
+    except Exception as e:
+        print(f"[report] état PnL illisible {PNL_STATE_PATH}: {e} (reconstruction)")
+        return _empty_state(source)
+    if state.get("version") != STATE_VERSION or state.get("source") != source:
+        return _empty_state(source)
+    return state
+
+def _save_state(state: Dict[str, Any]) -> None:
+    _ensure()
+    fd, tmp = tempfile.mkstemp(prefix=f".{PNL_STATE_PATH.name}.", dir=str(PNL_STATE_PATH.parent))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, PNL_STATE_PATH)
+
+def _read_new_positions(state: Dict[str, Any], path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Events de positions postérieurs au high-water mark `state["hwm"]`
+    (seq SQLite ou offset JSONL), mis à jour au fil de la lecture.
+    Si la source a reculé (troncature / purge), l'état est remis à zéro.
+    """
+    kind = state["source"].split(":", 1)[0]
+    if kind == "db":
+        store = get_trade_store(path)
+        if store.max_seq("positions") < state["hwm"]:
+            state.update(_empty_state(state["source"]))
+        for seq, evt in store.rows_since("positions", state["hwm"]):
+            state["hwm"] = seq
+            yield evt
+    elif kind == "jsonl":
+        while True:
+            records, offset, truncated = read_appended(path, state["hwm"], READ_BLOCK_BYTES)
+            if truncated:
+                state.update(_empty_state(state["source"]))
+            elif offset == state["hwm"]:
+                return
+            state["hwm"] = offset
+            yield from records
+    elif kind == "csv":
+        # Export CSV sans position de reprise fiable: relu en entier.
+        state.update(_empty_state(state["source"]))
+        with path.open(newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+def _bump(stats: Dict[str, Any], pnl: float) -> None:
+    stats["trades"] += 1
+    stats["pnl"] += pnl
+    if pnl > 0:
+        stats["wins"] += 1
+    elif pnl < 0:
+        stats["losses"] += 1
+
+def _apply(state: Dict[str, Any], evt: Dict[str, Any]) -> Optional[str]:
+    """Ajoute une position fermée aux agrégats (jour, symbole). Retourne le jour touché."""
+    if str(evt.get("status", "")) != "closed":
+        return None
+    try:
+        pnl = float(evt.get("realized_pnl_usd", 0) or 0)
+        ts_close = int(float(evt.get("ts_close") or 0))
+    except Exception:
+        return None
+    if ts_close <= 0:
+        return None
+    day = _utc_date_from_ms(ts_close)
+    symbol = str(evt.get("symbol") or "?")
+    _bump(state["days"].setdefault(day, {"trades": 0, "wins": 0, "losses": 0, "pnl": 0.0}), pnl)
+    _bump(state["symbols"].setdefault(symbol, {"trades": 0, "wins": 0, "losses": 0, "pnl": 0.0}), pnl)
+    return day
+
+def _metrics(stats: Dict[str, Any]) -> Dict[str, Any]:
+    t = max(1, stats["trades"])
+    return {
+        "trades": stats["trades"],
+        "wins": stats["wins"],
+        "losses": stats["losses"],
+        "win_rate": round(100.0 * stats["wins"] / t, 2),
+        "avg_pnl_usd": round(stats["pnl"] / t, 2),
+        "total_pnl_usd": round(stats["pnl"], 2),
+    }
+
+def _daily_rows(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Lignes quotidiennes + courbe d'equity (PnL cumulé) et drawdown depuis le plus haut."""
+    rows = []
+    equity = peak = 0.0
+    for day in sorted(state["days"]):
+        stats = state["days"][day]
+        equity += stats["pnl"]
+        peak = max(peak, equity)
+        row = {"date": day, **_metrics(stats)}
+        row["equity_usd"] = round(equity, 2)
+        row["drawdown_usd"] = round(equity - peak, 2)
+        rows.append(row)
+    return rows
+
+def _symbol_rows(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"symbol": sym, **_metrics(state["symbols"][sym])} for sym in sorted(state["symbols"])]
+
+def _write_rows(rows: List[Dict[str, Any]], cols: List[str], jsonl_path: Path, csv_path: Path) -> None:
     _ensure()
-    # Écrit/écrase des snapshots complets (idempotent)
-    rows = sorted(daily.values(), key=lambda r: r["date"])
-    # JSONL
-    PNL_JSONL_PATH.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + ("\n" if rows else ""), encoding="utf-8")
-    # CSV
-    cols = ["date","trades","wins","losses","win_rate","avg_pnl_usd","total_pnl_usd"]
-    with PNL_CSV_PATH.open("w", newline="", encoding="utf-8") as f:
+    # Écrit/écrase des snapshots complets (idempotent, une ligne par jour / symbole)
+    jsonl_path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows) + ("\n" if rows else ""), encoding="utf-8")
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=cols)
         w.writeheader()
         for r in rows:
             w.writerow({k: r.get(k, "") for k in cols})
 
-def run_report(print_last: bool = True) -> Tuple[int, float]:
-    positions = list(_read_positions())
-    daily = _aggregate_daily(positions)
-    _write_daily(daily)
+def update_report(rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Met à jour les agrégats PnL depuis le high-water mark (seules les positions
+    fermées depuis le dernier passage sont lues) puis régénère les vues:
+    pnl_daily.* (avec equity/drawdown) et pnl_symbols.*.
+    Retourne {"daily": [...], "symbols": [...], "touched_days": [...]}.
+    """
+    source, path = _source_id()
+    state = _empty_state(source) if rebuild else _load_state(source)
+    touched = set()
+    if source:
+        for evt in _read_new_positions(state, path):
+            day = _apply(state, evt)
+            if day is not None:
+                touched.add(day)
+    # L'état est persisté AVANT les vues: un arrêt entre les deux ne compte
+    # jamais deux fois une position, les vues sont régénérées au passage suivant.
+    try:
+        _save_state(state)
+    except Exception as e:
+        print(f"[report] écriture de l'état PnL impossible {PNL_STATE_PATH}: {e}")
+    daily = _daily_rows(state)
+    symbols = _symbol_rows(state)
+    _write_rows(daily, DAILY_COLS, PNL_JSONL_PATH, PNL_CSV_PATH)
+    _write_rows(symbols, SYMBOL_COLS, PNL_SYMBOLS_JSONL_PATH, PNL_SYMBOLS_CSV_PATH)
+    return {"daily": daily, "symbols": symbols, "touched_days": sorted(touched)}
+
+def run_report(print_last: bool = True, rebuild: bool = False) -> Tuple[int, float]:
+    daily = update_report(rebuild=rebuild)["daily"]
     if not daily:
         if print_last:
             print("ℹ️ Aucun trade fermé — pas de PnL quotidien.")
         return 0, 0.0
-    last_day = sorted(daily.keys())[-1]
-    d = daily[last_day]
+    d = daily[-1]
     if print_last:
-        print(f"📊 PnL {last_day}: trades={d['trades']} | win_rate={d['win_rate']}% | total={d['total_pnl_usd']}$ | avg={d['avg_pnl_usd']}$")
+        print(f"📊 PnL {d['date']}: trades={d['trades']} | win_rate={d['win_rate']}% | total={d['total_pnl_usd']}$ | avg={d['avg_pnl_usd']}$"
+              f" | equity={d['equity_usd']}$ | drawdown={d['drawdown_usd']}$")
     return d["trades"], d["total_pnl_usd"]
 
 def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(prog="kobe report", description="KobeCrypto — Reporting quotidien (PnL)")
     ap.add_argument("--quiet", action="store_true", help="N'affiche pas le résumé en console")
+    ap.add_argument("--rebuild", action="store_true", help="Ignore le high-water mark et réagrège tout l'historique")
     return ap
 
 def main(argv=None) -> int:
     ap = build_parser()
     args = ap.parse_args(argv)
-    run_report(print_last=not args.quiet)
+    run_report(print_last=not args.quiet, rebuild=args.rebuild)
     return 0
 
 if __name__ == "__main__":
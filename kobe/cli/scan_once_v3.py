@@ -1,5 +1,4 @@
 import os, json, argparse, datetime as dt, re
-import httpx
 from kobe.llm.deepseek_client import chat_complete_json
 
 BINANCE_BASE = "https://api.binance.com"
@@ -12,6 +11,7 @@ def load_envfile(path):
             k,v=line.split("=",1); os.environ[k]=v
 
 def fetch_24h(symbol):
+    import httpx
     url=f"{BINANCE_BASE}/api/v3/ticker/24hr"
     with httpx.Client(timeout=10.0) as c:
         r=c.get(url, params={"symbol":symbol})
@@ -72,6 +72,7 @@ def send_telegram(text: str):
         return {"sent": False, "reason":"missing_env"}
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {"chat_id": chat_id, "text": text, "parse_mode":"Markdown"}
+    import httpx
     with httpx.Client(timeout=10.0) as c:
         r=c.post(url, json=payload)
         try:
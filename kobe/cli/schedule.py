@@ -1,5 +1,4 @@
 from __future__ import annotations
-from kobe.core.trailing_stop import process_trailing_stops
 # --- V4 fallback helpers (top-level, only if missing) ---
 try:
     send_message_v4
@@ -29,7 +28,6 @@ from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote as _q
 from urllib.request import urlopen
-from kobe.execution.proposal import build_spot_proposal
 
 
 # --- V4 hardened Telegram sender (inline, ASCII only) ---
@@ -79,22 +77,30 @@ def send_message_v4(text: str, parse_mode: str="Markdown", dryrun: bool=None) ->
     return {"status":"sent","message_id": resp["result"]["message_id"]}
 
 from kobe.core.scheduler import build_scheduler, run_news_job
-from kobe.core.notify import Notifier, TelegramConfig
 from kobe.core.factors import get_market_snapshot
-from kobe.signals.generator import generate_proposal_from_factors
-from kobe.signals.proposal import format_proposal_for_telegram
 from kobe.llm.signal_review import review_signal
 from kobe.core.journal import log_proposal
 from kobe.logs import log_decision
-from kobe.core.risk import validate_proposal, RiskConfig
-from kobe.core.trade_alerts import send_trade, send_execution_event
-from kobe.core.router import place_from_proposal
-from apscheduler.triggers.interval import IntervalTrigger
-from pytz import UTC
 from kobe.cli.report import run_report
-from apscheduler.triggers.cron import CronTrigger
+from kobe.core.lazy import lazy_callable
+
+# Chargés au premier usage: `--once` / DEMO n'importent ni pydantic, ni telegram,
+# ni le router (APScheduler / pytz: importés dans main, mode scheduler seulement)
+Notifier = lazy_callable("kobe.core.notify", "Notifier")
+TelegramConfig = lazy_callable("kobe.core.notify", "TelegramConfig")
+generate_proposal_from_factors = lazy_callable("kobe.signals.generator", "generate_proposal_from_factors")
+format_proposal_for_telegram = lazy_callable("kobe.signals.proposal", "format_proposal_for_telegram")
+validate_proposal = lazy_callable("kobe.core.risk", "validate_proposal")
+RiskConfig = lazy_callable("kobe.core.risk", "RiskConfig")
+send_trade = lazy_callable("kobe.core.trade_alerts", "send_trade")
+send_execution_event = lazy_callable("kobe.core.trade_alerts", "send_execution_event")
+place_from_proposals = lazy_callable("kobe.core.router", "place_from_proposals")
 
 LOCK_PATH = "/tmp/kobe_runner.lock"
+# Rafraîchissement des vues CSV/JSONL de logs/trades.db (orders, positions, proposals)
+VIEWS_EXPORT_MIN = int(os.getenv("KOBE_VIEWS_EXPORT_MIN", "15"))
+# Valorisation des positions ouvertes (live et paper) du tracker de portefeuille
+PORTFOLIO_PRICE_S = int(os.getenv("KOBE_PORTFOLIO_PRICE_S", "15"))
 HEARTBEAT_MIN = int(os.getenv("HEARTBEAT_MIN", "0"))  # SOP V4: heartbeat désactivé par défaut (opt-in via env)
 TELEGRAM_DRYRUN = os.getenv("TELEGRAM_DRYRUN", "0") == "1"
 
@@ -149,19 +155,12 @@ def load_cfg(path: str = "config.yaml") -> dict:
     with p.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def run_auto_proposal_job(
-    symbol: str = "BTCUSDC",   # V4: défaut USDC
+def _prepare_auto_proposal(
+    symbol: str,
     risk_cfg: RiskConfig | None = None,
-    notifier: Notifier | None = None,
-    trades_alerts_enabled: bool = False,
     referee_enabled: bool = False,
-) -> bool:
-    """Génère automatiquement une proposal à partir des facteurs mock et renvoie True si un signal a été produit/envoyé.
-
-    V4: en mode LIVE + alerts activées, tente une exécution via le router
-    (place_from_proposal) puis envoie un message d'exécution. En modes non-LIVE
-    ou si pas de notifier, reste en simple signal.
-    """
+):
+    """Proposal auto du symbole (facteurs, referee, risk guard) journalisée, ou None si aucun signal retenu."""
     snapshot = get_market_snapshot(symbol)
     p = generate_proposal_from_factors(snapshot)
     if not p:
@@ -178,7 +177,7 @@ def run_auto_proposal_job(
             )
         except Exception:
             pass
-        return False
+        return None
 
     # Referee DeepSeek optionnel au-dessus des algos déterministes.
     if referee_enabled:
@@ -228,7 +227,7 @@ def run_auto_proposal_job(
         if decision == "skip":
             # Le referee juge le setup trop fragile → on abandonne ce signal.
             print(f"[auto_proposal] signal rejeté par referee LLM: {comment}")
-            return False
+            return None
 
         if comment:
             # On enrichit les raisons avec le commentaire du referee
@@ -266,25 +265,31 @@ def run_auto_proposal_job(
                 )
             except Exception:
                 pass
-            return False
+            return None
 
     # Log de la proposal brute
     log_proposal(p.model_dump())
+    return p
 
+def _deliver_auto_proposal(
+    symbol: str,
+    p,
+    placed=None,
+    notifier: Notifier | None = None,
+    trades_alerts_enabled: bool = False,
+) -> bool:
+    """
+    Journalise et notifie une proposal du tick; `placed` = (mode, evt) renvoyé
+    par le router, l'exception levée pour cette proposal, ou None (pas d'exécution).
+    """
     # Message "signal" historique
     msg = format_proposal_for_telegram(p, balance_usd=10000.0, leverage=2.0)
 
-    # V4: tentative d'exécution auto via router si alerts activées + notifier présent
+    # V4: résultat de l'exécution groupée du tick (cf. run_auto_proposals_job)
     evt: dict | None = None
     if trades_alerts_enabled and notifier is not None:
-        try:
-            mode, evt = place_from_proposal(
-                p,
-                balance_usd=10000.0,
-                leverage=2.0,
-            )
-        except Exception as e:
-            print(f"[auto_proposal] erreur execution auto via router: {e}")
+        if isinstance(placed, Exception):
+            print(f"[auto_proposal] erreur execution auto via router: {placed}")
             try:
                 log_decision(
                     {
@@ -300,7 +305,7 @@ def run_auto_proposal_job(
                         },
                         "execution": {
                             "status": "error",
-                            "error": str(e),
+                            "error": str(placed),
                         },
                         "meta": {
                             "strategy_version": "v4.3-dev",
@@ -309,7 +314,8 @@ def run_auto_proposal_job(
                 )
             except Exception:
                 pass
-            evt = None
+        elif placed is not None:
+            mode, evt = placed
 
     if trades_alerts_enabled and notifier is not None:
         # Si une exécution (ou au moins un plan) a été produite, on envoie le message d'exécution
@@ -430,6 +436,78 @@ def run_auto_proposal_job(
         pass
     return True
 
+def run_auto_proposals_job(
+    symbols,
+    risk_cfg: RiskConfig | None = None,
+    notifier: Notifier | None = None,
+    trades_alerts_enabled: bool = False,
+    referee_enabled: bool = False,
+) -> list:
+    """Tick auto_proposal: une proposal par symbole, exécutées en un seul lot, puis notifiées.
+
+    V4: en mode LIVE + alerts activées, les proposals du tick passent ensemble
+    par le router (place_from_proposals: solde lu une fois et réservé par
+    proposal, envois simultanés) puis chacune reçoit son message d'exécution.
+    En modes non-LIVE ou si pas de notifier, reste en simple signal.
+    Renvoie les symboles pour lesquels un signal a été produit/envoyé.
+    """
+    ready = []
+    for sym in symbols:
+        try:
+            p = _prepare_auto_proposal(sym, risk_cfg, referee_enabled=referee_enabled)
+        except Exception as e:
+            print(f"[auto_proposal] erreur pour {sym}: {e}")
+            continue
+        if p is not None:
+            ready.append((sym, p))
+
+    placed = [None] * len(ready)
+    if ready and trades_alerts_enabled and notifier is not None:
+        try:
+            placed = place_from_proposals([p for _, p in ready], balance_usd=10000.0, leverage=2.0)
+        except Exception as e:
+            placed = [e] * len(ready)
+
+    produced = []
+    for (sym, p), res in zip(ready, placed):
+        try:
+            if _deliver_auto_proposal(sym, p, res, notifier, trades_alerts_enabled):
+                produced.append(sym)
+        except Exception as e:
+            print(f"[auto_proposal] erreur pour {sym}: {e}")
+    return produced
+
+def run_auto_proposal_job(
+    symbol: str = "BTCUSDC",   # V4: défaut USDC
+    risk_cfg: RiskConfig | None = None,
+    notifier: Notifier | None = None,
+    trades_alerts_enabled: bool = False,
+    referee_enabled: bool = False,
+) -> bool:
+    """Génère automatiquement une proposal à partir des facteurs mock et renvoie True si un signal a été produit/envoyé."""
+    return bool(run_auto_proposals_job([symbol], risk_cfg, notifier, trades_alerts_enabled,
+                                       referee_enabled=referee_enabled))
+
+def _start_user_stream():
+    """
+    Flux user data Binance (fills TP/SL temps réel → clôtures, index des ordres),
+    démarré seulement si des clés API live sont configurées (env / .env).
+    Renvoie le flux à arrêter en fin de scheduler, ou None.
+    """
+    from kobe.core.secrets import load_env
+
+    env = load_env()
+    if not (env.get("BINANCE_API_KEY", "").strip() and env.get("BINANCE_API_SECRET", "").strip()):
+        print("[user_stream] clés Binance absentes: flux user data non démarré")
+        return None
+    from kobe.execution.user_stream import UserDataStream
+
+    try:
+        return UserDataStream().start()
+    except Exception as e:
+        print(f"[user_stream] démarrage impossible: {e}")
+        return None
+
 def _parse_hhmm(s: str) -> tuple[int, int]:
     parts = str(s).strip().split(":")
     h = int(parts[0]) if parts and parts[0] else 0
@@ -442,6 +520,7 @@ def main(argv=None):
     # --- V4 DEMO PROPOSAL (dry-run) ---
     import os
     if os.getenv("DEMO_PROPOSAL","0") == "1":
+        from kobe.execution.proposal import build_spot_proposal
         reasons = [
             "Trend H4 haussier",
             "Breakout MA20",
@@ -491,11 +570,6 @@ def main(argv=None):
     max_items = news_cfg.get("max_items_per_run", 6)
     enabled_hours_utc = scheduler_cfg.get("enabled_hours_utc", list(range(7,22)))
     interval_minutes = int(os.getenv("SCAN_INTERVAL_MIN", str(scheduler_cfg.get("interval_minutes", 10))))
-    risk_cfg_dict = cfg.get("risk", {}) or {}
-    try:
-        risk_cfg = RiskConfig(**risk_cfg_dict)
-    except Exception:
-        risk_cfg = RiskConfig()  # défauts sûrs
 
     reporting_daily_cfg = cfg.get("reporting", {}).get("daily", {})
     daily_enabled = bool(reporting_daily_cfg.get("enabled", True))
@@ -530,6 +604,22 @@ def main(argv=None):
             run_news_job(feeds, keywords, max_items, enabled_hours_utc, notifier, use_telegram_for_news=False)
             return 0
 
+        from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.interval import IntervalTrigger
+        from pytz import UTC
+        from kobe.core.executor import POS_LOG_DIR
+        from kobe.core.portfolio import refresh_prices, start_portfolio, stop_portfolio
+        from kobe.core.trade_store import DB_NAME, export_views
+        from kobe.core.trailing_stop import process_trailing_stops
+        from kobe.execution.exchange_filters import get_exchange_filters
+        from kobe.execution.signing import get_server_clock
+
+        risk_cfg_dict = cfg.get("risk", {}) or {}
+        try:
+            risk_cfg = RiskConfig(**risk_cfg_dict)
+        except Exception:
+            risk_cfg = RiskConfig()  # défauts sûrs
+
         # Scheduler pour news + job auto_proposal
         sched = build_scheduler(
             interval_minutes, feeds, keywords, max_items, enabled_hours_utc,
@@ -566,25 +656,28 @@ def main(argv=None):
             return aligned
 
         def _auto_job():
-            # Parcourt tous les symboles configurés (BTCUSDC, ETHUSDC, SOLUSDC, etc.)
+            # Tous les symboles configurés (BTCUSDC, ETHUSDC, SOLUSDC, etc.) hors cooldown,
+            # routés en un seul lot (solde partagé entre les proposals du tick)
+            due = []
             for sym in symbols:
                 if not _cooldown_ok(sym):
                     print(f"[cooldown] skip {sym} (COOLDOWN_MIN={COOLDOWN_MIN})")
                     continue
-                try:
-                    produced = run_auto_proposal_job(
-                        sym,
-                        risk_cfg,
-                        notifier,
-                        trades_alerts_enabled,
-                        referee_enabled=referee_enabled,
-                    )
-                except Exception as e:
-                    print(f"[auto_proposal] erreur pour {sym}: {e}")
-                    continue
+                due.append(sym)
+            try:
+                produced = run_auto_proposals_job(
+                    due,
+                    risk_cfg,
+                    notifier,
+                    trades_alerts_enabled,
+                    referee_enabled=referee_enabled,
+                )
+            except Exception as e:
+                print(f"[auto_proposal] erreur: {e}")
+                return
 
-                if produced:
-                    _mark_sent(sym)
+            for sym in produced:
+                _mark_sent(sym)
 
         first_run = _next_aligned(_now_utc(), interval_minutes)
         print(f"🪩 Alignement activé — premier tick à {first_run.strftime('%H:%M:%S UTC')} (interval={interval_minutes}m)")
@@ -612,6 +705,50 @@ def main(argv=None):
         if daily_enabled:
             sched.add_job(lambda: run_report(notifier), trigger=CronTrigger(hour=_daily_hr, minute=_daily_min, timezone=UTC))
 
+        # Filtres exchangeInfo (stepSize / tickSize / minNotional): chargés au démarrage
+        # puis rafraîchis sur TTL; les chemins d'ordres ne lisent que le cache.
+        filters = get_exchange_filters()
+        filters.ensure_fresh(block=True)
+        sched.add_job(
+            filters.ensure_fresh,
+            trigger=_I(seconds=max(60, int(filters.ttl_s // 4)), timezone=UTC),
+            kwargs={"block": True},
+            id="exchange_filters_job"
+        )
+
+        # Écart d'horloge avec le serveur Binance mesuré en continu (timestamps signés)
+        get_server_clock(os.getenv("BINANCE_BASE_URL", "https://api.binance.com")).start()
+
+        # PnL temps réel (kill-switch journalier): amorcé depuis trades.db, positions ouvertes
+        # valorisées en masse (ticker/price) toutes les PORTFOLIO_PRICE_S secondes;
+        # snapshot republié pour rester frais côté autres process.
+        portfolio = start_portfolio(db_path=POS_LOG_DIR / DB_NAME)
+        if PORTFOLIO_PRICE_S > 0:
+            refresh_prices()
+            sched.add_job(
+                refresh_prices,
+                trigger=_I(seconds=PORTFOLIO_PRICE_S, timezone=UTC),
+                id="portfolio_prices_job"
+            )
+        sched.add_job(
+            portfolio.publish,
+            trigger=_I(seconds=30, timezone=UTC),
+            kwargs={"force": True},
+            id="portfolio_snapshot_job"
+        )
+
+        # Vues d'export orders/positions/proposals (.csv/.jsonl) depuis le trade store
+        if VIEWS_EXPORT_MIN > 0:
+            sched.add_job(
+                export_views,
+                trigger=_I(minutes=VIEWS_EXPORT_MIN, timezone=UTC),
+                args=(POS_LOG_DIR / DB_NAME, POS_LOG_DIR),
+                id="trade_views_job"
+            )
+
+        # Fills temps réel (clôture des positions sur TP/SL, statuts d'ordres)
+        user_stream = _start_user_stream()
+
         # Règle de sécurité Module 4 : Job Trailing Stop
         sched.add_job(
             process_trailing_stops, 
@@ -626,7 +763,9 @@ def main(argv=None):
             while True:
                 time.sleep(1)
         finally:
-            pass
+            if user_stream is not None:
+                user_stream.stop()
+            stop_portfolio()
 
     except Exception as e:
         _tg_send_from_cfg(tg_cfg, f"❗️Runner crash: `{type(e).__name__}` — {e}")
@@ -1,11 +1,6 @@
 from __future__ import annotations
 import argparse, sys, os
 from typing import List
-from kobe.signals.proposal import Proposal
-from kobe.core.router import place_from_proposal
-from kobe.core.risk import RiskConfig
-from kobe.core.trade_alerts import send_execution_event
-from kobe.core.notify import Notifier, TelegramConfig
 
 def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(
@@ -32,6 +27,13 @@ def main(argv: List[str] | None = None) -> int:
         print("❌  Trois raisons minimum sont requises (--reason ...)")
         return 1
 
+    # Imports différés: pydantic, router, telegram seulement après validation des arguments
+    from kobe.signals.proposal import Proposal
+    from kobe.core.router import place_from_proposal
+    from kobe.core.risk import RiskConfig
+    from kobe.core.trade_alerts import send_execution_event
+    from kobe.core.notify import Notifier, TelegramConfig
+
     try:
         p = Proposal(
             symbol=args.symbol,
@@ -47,6 +47,11 @@ def append_event(event: dict) -> None:
     JSONL_PATH.parent.mkdir(parents=True, exist_ok=True)
     with JSONL_PATH.open("a", encoding="utf-8") as f:
         f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    try:
+        from kobe.core.journal_index import refresh
+        refresh(JSONL_PATH)
+    except Exception:
+        pass
 
     # CSV (nouveau, DoD v0)
     CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -79,15 +84,12 @@ def _parse_ts(ts):
 def _iter_events_today(path: pathlib.Path) -> Iterable[dict]:
     if not path.exists():
         return []
+    from kobe.core.jsonl_tail import iter_records
+
     today = datetime.now(timezone.utc).date()
     out = []
-    for line in path.read_text(encoding="utf-8").splitlines():
-        if not line.strip():
-            continue
-        try:
-            rec = json.loads(line)
-        except Exception:
-            continue
+    # Lecture en flux: mémoire bornée par les events du jour, pas par le journal
+    for rec in iter_records(path):
         dt = _parse_ts(rec.get("ts"))
         if dt and dt.date() == today:
             out.append(rec)
@@ -122,8 +124,11 @@ if __name__ == "__main__":
     # Affiche un aperçu du journal si demandé
     if args.tail and JSONL_PATH.exists():
         print(f"[show-log] dernières {args.tail} lignes :")
-        for ln in JSONL_PATH.read_text(encoding="utf-8").splitlines()[-args.tail:]:
-            print(ln)
+        from kobe.core.jsonl_tail import tail_lines
+
+        # Lecture à rebours depuis la fin: instantané même sur un gros journal
+        for ln in tail_lines(JSONL_PATH, args.tail):
+            print(ln.decode("utf-8", errors="replace"))
 
     if args.pnl_today:
         total, n = pnl_today()
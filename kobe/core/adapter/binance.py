@@ -1,5 +1,4 @@
 from __future__ import annotations
-import ccxt
 from typing import Any, Dict, List, Optional
 
 from kobe.core.adapter.base import (
@@ -9,6 +8,11 @@ from kobe.core.adapter.base import (
     NetworkError,
 )
 
+def _ccxt():
+    # ccxt coûte ~0.5 s à l'import: chargé à la première instanciation seulement
+    import ccxt
+    return ccxt
+
 class BinanceAdapter(Exchange):
     """
     Implémentation de l'interface Exchange pour Binance utilisant CCXT.
@@ -22,7 +26,7 @@ class BinanceAdapter(Exchange):
         self.testnet = testnet
         
         # Initialisation du client CCXT pour Binance
-        self.client = ccxt.binance({
+        self.client = _ccxt().binance({
             'apiKey': api_key or '',
             'secret': api_secret or '',
             'enableRateLimit': True,  # Sécurité pour ne pas se faire bannir par Binance
@@ -46,6 +50,7 @@ class BinanceAdapter(Exchange):
 
     def _handle_error(self, e: Exception) -> None:
         """Traduit les exceptions CCXT vers les exceptions internes de base.py."""
+        ccxt = _ccxt()
         if isinstance(e, ccxt.AuthenticationError):
             raise AuthenticationError(f"Problème d'authentification Binance: {str(e)}")
         elif isinstance(e, ccxt.NetworkError):
@@ -1,28 +1,24 @@
 from __future__ import annotations
-import csv, json, time
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from kobe.signals.proposal import Proposal, position_size
 from kobe.core.adapter.base import Exchange, ExchangeError
+from kobe.core.portfolio import on_position_event
+from kobe.core.position_book import STOP_UPDATE_EVENT, get_position_book
+from kobe.core.trade_store import DB_NAME, POSITIONS_COLS, get_trade_store
 
 POS_LOG_DIR = Path("logs")
+# Vues d'export (cf. export_positions) — le store de référence est logs/trades.db
 POS_CSV_PATH = POS_LOG_DIR / "positions.csv"
 POS_JSONL_PATH = POS_LOG_DIR / "positions.jsonl"
 
 # Nous ajoutons "mode" (live/paper) et "exchange_order_id" pour tracer les vrais trades
-CSV_COLS = [
-    "ts_open", "ts_close", "id", "mode",
-    "symbol", "side",
-    "entry", "stop", "take",
-    "qty", "leverage",
-    "exit_price", "reason",
-    "realized_pnl_usd", "status",
-    "risk_pct", "size_pct", "exchange_order_id"
-]
-
-def _ensure():
-    POS_LOG_DIR.mkdir(parents=True, exist_ok=True)
+CSV_COLS = POSITIONS_COLS
+
+def _db_path() -> Path:
+    return POS_LOG_DIR / DB_NAME
 
 def _ms() -> int:
     return int(time.time() * 1000)
@@ -31,18 +27,38 @@ def _gen_id(p: Proposal, mode: str) -> str:
     return f"pos-{mode}-{p.symbol.lower()}-{_ms()}"
 
 def _append_row(evt: Dict[str, Any]) -> None:
-    _ensure()
-    # Sauvegarde JSONL
-    with POS_JSONL_PATH.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(evt, ensure_ascii=False) + "\n")
-    
-    # Sauvegarde CSV
-    write_header = not POS_CSV_PATH.exists()
-    with POS_CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=CSV_COLS)
-        if write_header:
-            w.writeheader()
-        w.writerow({k: evt.get(k, "") for k in CSV_COLS})
+    get_trade_store(_db_path()).append("positions", evt)
+    # Suivi PnL temps réel (no-op si aucun tracker n'est démarré)
+    on_position_event(evt)
+
+def export_positions() -> int:
+    """Régénère les vues positions.csv / positions.jsonl depuis le store."""
+    store = get_trade_store(_db_path())
+    store.export_jsonl("positions", POS_JSONL_PATH)
+    return store.export_csv("positions", POS_CSV_PATH)
+
+def _book():
+    return get_position_book(_db_path())
+
+def get_open_positions(symbol: Optional[str] = None, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Positions ouvertes (carnet mémoire, filtrable par symbole et/ou mode)."""
+    return _book().open_positions(symbol=symbol, mode=mode)
+
+def get_position(pos_id: str) -> Optional[Dict[str, Any]]:
+    """Position ouverte par id (None si inconnue ou fermée)."""
+    return _book().get(pos_id)
+
+def update_position_stop(pos_id: str, new_stop: float) -> Optional[Dict[str, Any]]:
+    """
+    Met à jour le stop d'une position ouverte.
+    Ajoute un event compact {"event": "stop_update", ...} à la table positions
+    (pas de réécriture) et renvoie la position à jour.
+    """
+    if _book().get(pos_id) is None:
+        return None
+    evt = {"ts": _ms(), "event": STOP_UPDATE_EVENT, "id": str(pos_id), "stop": float(new_stop)}
+    _append_row(evt)
+    return _book().get(pos_id)
 
 def simulate_open(p: Proposal, balance_usd: float, leverage: float = 1.0) -> Dict[str, Any]:
     """Ouvre une position simulée (Paper Trading)."""
@@ -6,13 +6,18 @@ kobe.core.feed — WebSocket public Binance Spot (aggTrade).
        - limit: nombre max de ticks (si fourni)
        - stop_after(tick)->bool: si True, ferme immédiatement (prioritaire)
 """
-import argparse, json, ssl
+import argparse, json, os, ssl
 from dataclasses import dataclass
 from typing import Callable, Optional
 from websocket import WebSocketApp
 
 BASE = "wss://stream.binance.com:9443/ws"
 
+def _base() -> str:
+    # BINANCE_WS_BASE (ex: exchange local kobe.execution.mock_exchange), même variable que user_stream
+    env = os.getenv("BINANCE_WS_BASE", "").rstrip("/")
+    return f"{env}/ws" if env else BASE
+
 @dataclass
 class Tick:
     symbol: str
@@ -35,7 +40,7 @@ def subscribe_agg_trade(symbol: str,
                         on_tick: Optional[Callable[[Tick], None]] = None,
                         stop_after: Optional[Callable[[Tick], bool]] = None):
     stream = f"{symbol.lower()}@aggTrade"
-    url = f"{BASE}/{stream}"
+    url = f"{_base()}/{stream}"
     counter = {"n": 0}
     on_tick = on_tick or (lambda t: None)
 
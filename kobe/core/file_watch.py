@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+# Masque inotify (cf. <sys/inotify.h>): écritures, créations et renommages
+# entrants dans le dossier surveillé.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (+ nom sur `len` octets)
+
+# Période de scrutation du mode dégradé (sans inotify)
+DEFAULT_POLL_S = 0.5
+
+# Sentinelle renvoyée par wait() quand on ne sait pas quels fichiers ont changé
+# (débordement de la file inotify): l'appelant doit tout revérifier.
+UNKNOWN = "*"
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        init1 = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    init1.argtypes = [ctypes.c_int]
+    init1.restype = ctypes.c_int
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    add_watch.restype = ctypes.c_int
+    return init1, add_watch
+
+
+class DirWatcher:
+    """
+    Attente passive des changements dans un dossier de logs.
+
+    - Linux: inotify (via ctypes, sans dépendance) sur le dossier; `wait()`
+      bloque dans select() et ne consomme aucun CPU tant que rien n'est écrit.
+    - Ailleurs (ou si inotify est indisponible / épuisé): scrutation par stat()
+      du dossier (créations) et des fichiers suivis (taille, mtime) toutes les
+      `poll_s` secondes.
+
+    `wait(timeout)` retourne l'ensemble des noms de fichiers modifiés/créés
+    (vide si timeout, `{UNKNOWN}` si l'information a été perdue).
+    """
+
+    def __init__(self, directory: Path | str, poll_s: float = DEFAULT_POLL_S, use_inotify: bool = True):
+        self.directory = Path(directory)
+        self.poll_s = poll_s
+        self._fd: Optional[int] = None
+        self._buf = b""
+        # Mode scrutation: signature du dossier et des fichiers suivis
+        self._dir_sig: Optional[Tuple[int, int]] = None
+        self._names: Set[str] = set()
+        self._file_sigs: Dict[str, Optional[Tuple[int, int]]] = {}
+        if use_inotify:
+            self._fd = self._open_inotify()
+        if self._fd is None:
+            self._dir_sig = self._stat_sig(self.directory)
+            self._names = self._listdir()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "poll"
+
+    def _open_inotify(self) -> Optional[int]:
+        funcs = _load_inotify()
+        if funcs is None:
+            return None
+        init1, add_watch = funcs
+        fd = init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if add_watch(fd, os.fsencode(str(self.directory)), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            print(f"[file_watch] inotify indisponible sur {self.directory}: {os.strerror(err)} (scrutation)")
+            return None
+        return fd
+
+    @staticmethod
+    def _stat_sig(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _listdir(self) -> Set[str]:
+        try:
+            return set(os.listdir(self.directory))
+        except OSError:
+            return set()
+
+    def track(self, name: str) -> None:
+        """Fichier dont les écritures doivent réveiller `wait()` en mode scrutation."""
+        if self._fd is None and name not in self._file_sigs:
+            self._file_sigs[name] = self._stat_sig(self.directory / name)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        if self._fd is not None:
+            return self._wait_inotify(timeout)
+        return self._wait_poll(timeout)
+
+    def _wait_inotify(self, timeout: Optional[float]) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._buf += data
+        pos = 0
+        buf = self._buf
+        while pos + _EVENT.size <= len(buf):
+            _, mask, _, length = _EVENT.unpack_from(buf, pos)
+            end = pos + _EVENT.size + length
+            if end > len(buf):
+                break
+            if mask & _IN_Q_OVERFLOW:
+                changed.add(UNKNOWN)
+            name = buf[pos + _EVENT.size:end].rstrip(b"\0")
+            if name:
+                changed.add(os.fsdecode(name))
+            pos = end
+        self._buf = buf[pos:]
+        return changed
+
+    def _poll_once(self) -> Set[str]:
+        changed: Set[str] = set()
+        dir_sig = self._stat_sig(self.directory)
+        if dir_sig != self._dir_sig:
+            # Le dossier a changé (création/suppression): un listdir, rare.
+            self._dir_sig = dir_sig
+            names = self._listdir()
+            changed |= names - self._names
+            self._names = names
+        for name, sig in self._file_sigs.items():
+            cur = self._stat_sig(self.directory / name)
+            if cur != sig:
+                self._file_sigs[name] = cur
+                changed.add(name)
+        return changed
+
+    def _wait_poll(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._poll_once()
+            if changed:
+                return changed
+            if deadline is None:
+                delay = self.poll_s
+            else:
+                delay = min(self.poll_s, deadline - time.monotonic())
+                if delay <= 0:
+                    return set()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def __enter__(self) -> "DirWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,38 +1,34 @@
 #!/usr/bin/env python3
 from pathlib import Path
-import json, csv, time
+import json, time
+
+from kobe.core import journal_index
+from kobe.core.trade_store import DB_NAME, PROPOSALS_COLS, get_trade_store
 
 LOG_DIR = Path("logs")
 JSONL_PATH = LOG_DIR / "journal.jsonl"
-CSV_PATH = LOG_DIR / "journal.csv"
-CSV_COLS = ["ts","type","source","symbol","side","entry","stop","risk_pct","result"]
+# Les proposals vivent dans la table `proposals` de logs/trades.db;
+# proposals.csv / proposals.jsonl sont des vues d'export (cf. export_proposals).
+PROPOSALS_CSV_PATH = LOG_DIR / "proposals.csv"
+PROPOSALS_JSONL_PATH = LOG_DIR / "proposals.jsonl"
 
 def _ensure():
     LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 import uuid
 
-CSV_COLS = [
-    "ts",
-    "signal_id",
-    "symbol",
-    "side",
-    "entry",
-    "stop",
-    "take",
-    "risk_pct",
-    "size_pct",
-    "result",
-    "reasons",
-]
+CSV_COLS = PROPOSALS_COLS
+
+def _proposals_store():
+    return get_trade_store(LOG_DIR / DB_NAME)
 
 def log_proposal(proposal: dict, result: str = "pending"):
     """
-    Enregistre une proposition de trade dans les journaux CSV et JSONL.
+    Enregistre une proposition de trade dans le trade store (table `proposals`)
+    et dans le journal JSONL (lu par `kobe show-log`).
     - proposal: dict issu d'un Proposal.model_dump()
     - result: "pending" | "executed" | "cancelled" | "hit_tp" | "hit_sl"
     """
-    _ensure()
     ts = int(time.time() * 1000)
     signal_id = proposal.get("signal_id") or f"p-{uuid.uuid4().hex[:8]}"
     evt = {
@@ -48,15 +44,26 @@ def log_proposal(proposal: dict, result: str = "pending"):
         "result": result,
         "reasons": "; ".join(proposal.get("reasons", [])),
     }
+    _proposals_store().append("proposals", evt)
+    append_event(evt)
+    return evt
+
+def export_proposals() -> int:
+    """Régénère les vues proposals.csv / proposals.jsonl depuis le store."""
+    store = _proposals_store()
+    store.export_jsonl("proposals", PROPOSALS_JSONL_PATH)
+    return store.export_csv("proposals", PROPOSALS_CSV_PATH)
 
-    # JSONL
+def append_event(evt: dict) -> dict:
+    """
+    Ajoute un event brut (signal, decision, paper...) au journal JSONL
+    et met à jour l'index journalier (cf. kobe.core.journal_index).
+    - ts (epoch ms) ajouté si absent, pour que l'event soit daté dans l'index.
+    """
+    _ensure()
+    evt = dict(evt)
+    evt.setdefault("ts", int(time.time() * 1000))
     with JSONL_PATH.open("a", encoding="utf-8") as f:
         f.write(json.dumps(evt, ensure_ascii=False) + "\n")
-
-    # CSV
-    write_header = not CSV_PATH.exists()
-    with CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=CSV_COLS)
-        if write_header:
-            w.writeheader()
-        w.writerow({k: evt.get(k, "") for k in CSV_COLS})
+    journal_index.refresh(JSONL_PATH)
+    return evt
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Index journalier du journal JSONL (logs/journal.jsonl).
+
+Sidecar `journal_index.json` à côté du journal:
+    {"version": 1, "offset": <octets indexés>, "days": {"2025-11-27": {"signal": 1, ...}}}
+
+- `append_event` (kobe.core.journal) met l'index à jour à chaque écriture.
+- Les lectures ne coûtent qu'un `stat()` tant que le journal n'a pas bougé;
+  si des lignes ont été ajoutées hors `append_event`, seuls les octets
+  nouveaux (depuis `offset`) sont relus.
+- Outil offline: `python -m kobe.core.journal_index --rebuild`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from kobe.core.jsonl_tail import read_appended
+
+INDEX_VERSION = 1
+INDEX_NAME = "journal_index.json"
+# Taille max des blocs relus à chaque passe de rattrapage
+CATCH_UP_BLOCK_BYTES = 4 * 1024 * 1024
+
+_LOCK = threading.RLock()
+# Cache mémoire par chemin de journal: {"offset": int, "days": {...}}
+_CACHE: Dict[str, Dict[str, Any]] = {}
+
+
+def parse_ts(ts):
+    """Parse un ts journal (epoch s/ms ou ISO 8601, 'Z' supporté) en datetime UTC."""
+    if ts is None:
+        return None
+    try:
+        # int/float epoch (ms ou s)
+        if isinstance(ts, (int, float)):
+            if ts > 1e12:  # ms
+                return datetime.fromtimestamp(ts/1000.0, tz=timezone.utc)
+            return datetime.fromtimestamp(ts, tz=timezone.utc)
+        # ISO 8601 (avec 'Z' supportée)
+        if isinstance(ts, str):
+            s = ts.replace("Z", "+00:00") if ts.endswith("Z") else ts
+            dt = datetime.fromisoformat(s)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.astimezone(timezone.utc)
+    except Exception:
+        return None
+    return None
+
+
+def index_path_for(journal_path: Path) -> Path:
+    return Path(journal_path).with_name(INDEX_NAME)
+
+
+def _empty() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "offset": 0, "days": {}}
+
+
+def _load(journal_path: Path) -> Dict[str, Any]:
+    key = str(journal_path)
+    idx = _CACHE.get(key)
+    if idx is not None:
+        return idx
+    try:
+        idx = json.loads(index_path_for(journal_path).read_text(encoding="utf-8"))
+        if not isinstance(idx, dict) or idx.get("version") != INDEX_VERSION:
+            idx = _empty()
+    except Exception:
+        idx = _empty()
+    _CACHE[key] = idx
+    return idx
+
+
+def _save(journal_path: Path, idx: Dict[str, Any]) -> None:
+    path = index_path_for(journal_path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(idx, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        # L'index n'est qu'un accélérateur: on ne bloque jamais le journal.
+        print(f"[journal_index] écriture impossible {path}: {e}")
+
+
+def _count(idx: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    dt = parse_ts(rec.get("ts"))
+    if dt is None:
+        return
+    day = idx["days"].setdefault(dt.date().isoformat(), {})
+    t = str(rec.get("type") or "unknown")
+    day[t] = day.get(t, 0) + 1
+
+
+def _catch_up(journal_path: Path, idx: Dict[str, Any]) -> bool:
+    """Indexe les lignes ajoutées depuis `offset`. Retourne True si l'index a changé."""
+    changed = False
+    while True:
+        offset = int(idx.get("offset", 0))
+        # Lecture par blocs: mémoire constante même pour une reconstruction complète
+        records, new_offset, truncated = read_appended(journal_path, offset, CATCH_UP_BLOCK_BYTES)
+        if truncated:
+            # Journal tronqué / remplacé: on repart de zéro.
+            idx.clear()
+            idx.update(_empty())
+        elif new_offset == offset:
+            return changed
+        for rec in records:
+            _count(idx, rec)
+        idx["offset"] = new_offset
+        changed = True
+
+
+def refresh(journal_path: Path) -> Dict[str, Any]:
+    """Synchronise l'index (mémoire + sidecar) avec le journal et le retourne."""
+    journal_path = Path(journal_path)
+    with _LOCK:
+        idx = _load(journal_path)
+        if _catch_up(journal_path, idx):
+            _save(journal_path, idx)
+        return idx
+
+
+def count_for_day(journal_path: Path, day: date, event_type: str) -> int:
+    """Nombre d'events `event_type` journalisés pour la date UTC `day`."""
+    idx = refresh(journal_path)
+    return int((idx["days"].get(day.isoformat()) or {}).get(event_type, 0))
+
+
+def rebuild_index(journal_path: Path) -> Dict[str, Any]:
+    """Reconstruit l'index complet depuis le JSONL (outil offline)."""
+    journal_path = Path(journal_path)
+    with _LOCK:
+        idx = _empty()
+        _CACHE[str(journal_path)] = idx
+        if journal_path.exists():
+            _catch_up(journal_path, idx)
+        _save(journal_path, idx)
+        return idx
+
+
+def main(argv: Optional[list] = None) -> int:
+    from kobe.core.journal import JSONL_PATH
+
+    ap = argparse.ArgumentParser(prog="python -m kobe.core.journal_index",
+                                 description="Index journalier du journal JSONL (clamp O(1)).")
+    ap.add_argument("--journal", default=str(JSONL_PATH), help="Chemin du journal JSONL (def: logs/journal.jsonl)")
+    ap.add_argument("--rebuild", action="store_true", help="Reconstruit l'index depuis zéro")
+    args = ap.parse_args(argv)
+
+    path = Path(args.journal)
+    idx = rebuild_index(path) if args.rebuild else refresh(path)
+    print(f"[journal_index] {index_path_for(path)} — offset={idx['offset']} jours={len(idx['days'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
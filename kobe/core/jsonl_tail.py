@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Taille des blocs lus à rebours depuis la fin du fichier (tail_lines)
+TAIL_BLOCK_BYTES = 64 * 1024
+
+
+def _decode(raw: bytes) -> Optional[Dict[str, Any]]:
+    if not raw.strip():
+        return None
+    try:
+        rec = json.loads(raw)
+    except Exception:
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+def read_appended_lines(path: Path, offset: int, max_bytes: Optional[int] = None) -> Tuple[List[bytes], int, bool]:
+    """
+    Variante brute de `read_appended`: lignes COMPLÈTES (bytes, sans '\\n')
+    ajoutées depuis `offset`, sans décodage JSON.
+
+    Retourne (lines, new_offset, truncated) avec la même sémantique d'offset
+    et de troncature que `read_appended`. `max_bytes` borne la lecture (gros
+    fichiers lus par blocs: rappeler tant que l'offset avance); une ligne plus
+    longue que le bloc est lue en entier.
+    """
+    path = Path(path)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return [], 0, offset > 0
+    truncated = size < offset
+    if truncated:
+        offset = 0
+    if size == offset:
+        return [], offset, truncated
+
+    with path.open("rb") as f:
+        f.seek(offset)
+        if max_bytes is None or size - offset <= max_bytes:
+            chunk = f.read(size - offset)
+        else:
+            chunk = f.read(max_bytes)
+            if b"\n" not in chunk:
+                chunk += f.read(size - offset - max_bytes)
+    end = chunk.rfind(b"\n") + 1
+    return chunk[:end].splitlines(), offset + end, truncated
+
+
+def read_appended(path: Path, offset: int, max_bytes: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, bool]:
+    """
+    Lit uniquement les lignes JSONL ajoutées depuis `offset` (en octets).
+
+    Retourne (records, new_offset, truncated):
+    - records: dicts décodés (lignes vides / corrompues ignorées),
+    - new_offset: position juste après la dernière ligne COMPLÈTE lue
+      (une ligne en cours d'écriture sera relue au prochain appel),
+    - truncated: True si le fichier est plus petit que `offset` (rotation/troncature);
+      la lecture repart alors du début et l'appelant doit réinitialiser son état.
+
+    Un seul stat() si rien n'a changé. `max_bytes`: cf. `read_appended_lines`.
+    """
+    lines, new_offset, truncated = read_appended_lines(path, offset, max_bytes)
+    records = [rec for rec in map(_decode, lines) if rec is not None]
+    return records, new_offset, truncated
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Lecture complète en flux (mémoire constante): dicts décodés, lignes vides / corrompues ignorées."""
+    with Path(path).open("rb") as f:
+        for raw in f:
+            rec = _decode(raw)
+            if rec is not None:
+                yield rec
+
+
+def tail_lines(path: Path, n: int, block_size: int = TAIL_BLOCK_BYTES) -> List[bytes]:
+    """
+    Les `n` dernières lignes non vides (bytes, sans '\\n'), dans l'ordre du fichier.
+
+    Lecture par blocs à rebours depuis la fin: le coût dépend de la taille des
+    n dernières lignes, pas de celle du fichier.
+    """
+    if n <= 0:
+        return []
+    lines: List[bytes] = []
+    head = b""
+    with Path(path).open("rb") as f:
+        pos = f.seek(0, 2)
+        while pos > 0 and len(lines) < n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            parts = (f.read(step) + head).split(b"\n")
+            # parts[0] peut être une ligne coupée par le bloc: complétée au tour suivant
+            head = parts[0]
+            for part in reversed(parts[1:]):
+                if part.strip():
+                    lines.append(part)
+                    if len(lines) >= n:
+                        break
+    if pos == 0 and len(lines) < n and head.strip():
+        lines.append(head)
+    lines.reverse()
+    return lines
+
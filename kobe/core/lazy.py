@@ -0,0 +1,46 @@
+"""
+Imports différés (au premier usage) pour les dépendances lourdes.
+
+Les points d'entrée one-shot (cron, `--once`, DEMO) ne doivent pas payer à
+l'import ccxt, telegram, APScheduler, pydantic ou httpx s'ils ne s'en
+servent pas. `lazy_callable` garde le nom au niveau module (monkeypatch,
+`module.nom` restent valides) et n'importe la cible qu'au premier appel.
+Budget vérifié par `python -m kobe.cli.import_time`.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any, Optional
+
+
+class LazyCallable:
+    """Fonction ou classe `module:name` importée au premier appel / accès d'attribut."""
+
+    __slots__ = ("_module", "_name", "_target")
+
+    def __init__(self, module: str, name: str) -> None:
+        self._module = module
+        self._name = name
+        self._target: Optional[Any] = None
+
+    def resolve(self) -> Any:
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("__"):  # introspection (inspect, copy...): pas d'import
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self) -> str:
+        state = "chargé" if self._target is not None else "différé"
+        return f"<lazy {self._module}.{self._name} ({state})>"
+
+
+def lazy_callable(module: str, name: str) -> Any:
+    """Proxy appelable vers `module.name`, importé au premier usage."""
+    return LazyCallable(module, name)
@@ -2,7 +2,6 @@ from __future__ import annotations
 import time, hashlib
 from dataclasses import dataclass
 from typing import List, Optional
-import feedparser
 
 @dataclass
 class NewsItem:
@@ -21,6 +20,8 @@ def fetch_news(feeds: List[str],
     Récupère des actus depuis des flux RSS, filtre par mots-clés (optionnel),
     déduplique et renvoie jusqu'à max_items items triés du plus récent au plus ancien.
     """
+    import feedparser  # import différé: inutile hors job news
+
     keywords = [k.lower() for k in (keywords_any or [])]
     out: List[NewsItem] = []
 
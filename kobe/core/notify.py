@@ -1,7 +1,6 @@
 from __future__ import annotations
 from typing import Optional
 from pydantic import BaseModel
-from telegram import Bot
 import asyncio
 
 class TelegramConfig(BaseModel):
@@ -10,8 +9,17 @@ class TelegramConfig(BaseModel):
 
 class Notifier:
     def __init__(self, tg: TelegramConfig):
-        self.bot = Bot(token=tg.bot_token)
+        self.bot_token = tg.bot_token
         self.chat_id = tg.chat_id
+        self._bot = None
+
+    @property
+    def bot(self):
+        """Client telegram créé au premier envoi (~0.2 s d'import évités sinon)."""
+        if self._bot is None:
+            from telegram import Bot
+            self._bot = Bot(token=self.bot_token)
+        return self._bot
 
     async def send(self, text: str, disable_web_page_preview: bool = True) -> None:
         """Envoie un message Telegram (python-telegram-bot v21 est async)."""
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Suivi temps réel du portefeuille: PnL réalisé / latent, par position et global.
+
+- Alimenté par les events de positions (ouvertures / clôtures écrites par
+  kobe.core.executor) et par les prix (ticks aggTrade de kobe.core.feed ou
+  prix en masse: `refresh_prices()` interroge /api/v3/ticker/price pour tous
+  les symboles ouverts, paper compris; job périodique du scheduler).
+- Un tick coûte O(1): par symbole on garde la quantité signée et le coût signé
+  des positions ouvertes, le latent vaut `qty_signée * prix - coût_signé`.
+  Le détail par position n'est calculé qu'à la demande (snapshot).
+- PnL du jour (UTC): réalisé du jour + variation du latent depuis 00:00 UTC.
+  Au changement de jour, le mark de chaque position ouverte devient sa base
+  (`day_base`); une position ouverte dans la journée part de son prix d'entrée.
+  Une position reprise au démarrage et ouverte un jour précédent reprend la
+  base du snapshot fichier du jour, sinon le premier prix observé.
+- Snapshots publiés aux abonnés (au plus toutes les `publish_interval_s`
+  sur les ticks, immédiatement sur une ouverture / clôture) et, si configuré,
+  dans un fichier JSON atomique (logs/portfolio.json) lisible par les autres
+  process.
+- Alimente le kill-switch journalier: `current_daily_loss_eur()` remplace la
+  lecture manuelle de KOBE_DAILY_LOSS_EUR (qui reste une surcharge possible).
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from kobe.core.trade_store import get_trade_store
+
+SNAPSHOT_PATH = Path("logs") / "portfolio.json"
+# Intervalle minimal entre deux snapshots déclenchés par des ticks
+DEFAULT_PUBLISH_INTERVAL_S = 1.0
+# Au-delà, un snapshot fichier est jugé périmé (process tracker arrêté)
+SNAPSHOT_MAX_AGE_S = 120.0
+# Conversion du PnL (quote USD/USDC) vers l'EUR du kill-switch
+_USD_EUR_ENV = "KOBE_USD_EUR_RATE"
+_DAILY_LOSS_ENV = "KOBE_DAILY_LOSS_EUR"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _utc_day(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _day_start_ms(day: str) -> int:
+    return int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _usd_eur_rate() -> float:
+    try:
+        return float(os.getenv(_USD_EUR_ENV, "") or 1.0)
+    except ValueError:
+        return 1.0
+
+
+def _sign(pos: Mapping[str, Any]) -> float:
+    return -1.0 if str(pos.get("side")) == "short" else 1.0
+
+
+class _SymbolBook:
+    __slots__ = ("qty", "cost", "base_qty", "base_cost", "price", "unrealized", "unrealized_day", "ids")
+
+    def __init__(self) -> None:
+        self.qty = 0.0        # somme des qty signées (+long / -short)
+        self.cost = 0.0       # somme des qty signées * prix d'entrée
+        self.base_qty = 0.0   # idem, positions dont la base du jour est connue
+        self.base_cost = 0.0  # somme des qty signées * base du jour
+        self.price: Optional[float] = None
+        self.unrealized = 0.0
+        self.unrealized_day = 0.0
+        self.ids: Dict[str, Dict[str, Any]] = {}
+
+    def mark(self) -> float:
+        return self.qty * self.price - self.cost if self.price is not None else 0.0
+
+    def mark_day(self) -> float:
+        return self.base_qty * self.price - self.base_cost if self.price is not None else 0.0
+
+    def set_base(self, pos: Dict[str, Any], base: float) -> None:
+        sign = _sign(pos)
+        if pos.get("day_base") is not None:
+            self.base_qty -= sign * pos["qty"]
+            self.base_cost -= sign * pos["qty"] * pos["day_base"]
+        pos["day_base"] = base
+        self.base_qty += sign * pos["qty"]
+        self.base_cost += sign * pos["qty"] * base
+
+    def resolve_pending(self) -> None:
+        """Positions reprises sans base du jour: le premier prix observé en tient lieu."""
+        for pos in self.ids.values():
+            if pos.get("day_base") is None:
+                self.set_base(pos, self.price)
+
+
+class PortfolioTracker:
+    """PnL réalisé du jour (UTC) + latent des positions ouvertes, mis à jour en continu."""
+
+    def __init__(
+        self,
+        publish_interval_s: float = DEFAULT_PUBLISH_INTERVAL_S,
+        snapshot_path: Optional[Path | str] = None,
+        clock: Callable[[], int] = _now_ms,
+    ):
+        self.publish_interval_s = publish_interval_s
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._books: Dict[str, _SymbolBook] = {}
+        self._unrealized = 0.0
+        self._unrealized_day = 0.0
+        self._day = _utc_day(clock())
+        self._next_day_ms = _day_start_ms(self._day) + 86_400_000
+        self._realized_day = 0.0
+        self._realized_total = 0.0
+        self._trades_day = 0
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._last_publish = 0.0
+
+    # --- Fills / positions ---
+    def _book(self, symbol: str) -> _SymbolBook:
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = _SymbolBook()
+        return book
+
+    def _roll_day(self, now_ms: int) -> None:
+        if now_ms < self._next_day_ms:
+            return
+        self._day = _utc_day(now_ms)
+        self._next_day_ms = _day_start_ms(self._day) + 86_400_000
+        self._realized_day = 0.0
+        self._trades_day = 0
+        # Le latent du jour repart de zéro: chaque mark courant devient la base du jour
+        for book in self._books.values():
+            if book.price is None:
+                continue
+            for pos in book.ids.values():
+                book.set_base(pos, book.price)
+            book.unrealized_day = 0.0
+        self._unrealized_day = 0.0
+
+    def _add_open(self, evt: Dict[str, Any], day_base: Optional[float] = None) -> None:
+        """Ajoute une position; `day_base` None = base du jour inconnue (premier prix observé)."""
+        try:
+            qty = float(evt["qty"])
+            entry = float(evt["entry"])
+        except (KeyError, TypeError, ValueError):
+            return
+        sign = _sign(evt)
+        book = self._book(str(evt.get("symbol", "")))
+        pid = str(evt["id"])
+        if pid in book.ids:
+            return
+        pos = book.ids[pid] = {"id": pid, "side": evt.get("side"), "qty": qty, "entry": entry,
+                               "mode": evt.get("mode"), "ts_open": evt.get("ts_open"), "day_base": None}
+        book.qty += sign * qty
+        book.cost += sign * qty * entry
+        if day_base is not None:
+            book.set_base(pos, day_base)
+        if book.price is None:
+            book.price = entry
+        self._remark(book)
+
+    def _remove_open(self, symbol: str, pid: str) -> Optional[Dict[str, Any]]:
+        book = self._books.get(symbol)
+        pos = book.ids.pop(pid, None) if book else None
+        if pos is None:
+            return None
+        sign = _sign(pos)
+        book.qty -= sign * pos["qty"]
+        book.cost -= sign * pos["qty"] * pos["entry"]
+        if pos["day_base"] is not None:
+            book.base_qty -= sign * pos["qty"]
+            book.base_cost -= sign * pos["qty"] * pos["day_base"]
+        if not book.ids:
+            # Évite la dérive flottante des sommes une fois le symbole à plat
+            book.qty = book.cost = book.base_qty = book.base_cost = 0.0
+        self._remark(book)
+        return pos
+
+    def _remark(self, book: _SymbolBook) -> None:
+        new = book.mark()
+        self._unrealized += new - book.unrealized
+        book.unrealized = new
+        new = book.mark_day()
+        self._unrealized_day += new - book.unrealized_day
+        book.unrealized_day = new
+
+    def _set_price(self, book: _SymbolBook, price: float) -> None:
+        book.price = float(price)
+        book.resolve_pending()
+        self._remark(book)
+
+    def on_position_event(self, evt: Dict[str, Any]) -> None:
+        """Event de la table positions: ouverture, clôture (stop_update ignoré)."""
+        pid = evt.get("id")
+        if not pid:
+            return
+        status = str(evt.get("status", ""))
+        with self._lock:
+            self._roll_day(self._clock())
+            if status == "open":
+                try:
+                    entry = float(evt["entry"])
+                except (KeyError, TypeError, ValueError):
+                    return
+                self._add_open(evt, day_base=entry)
+            elif status == "closed":
+                pos = self._remove_open(str(evt.get("symbol", "")), str(pid))
+                try:
+                    pnl = float(evt.get("realized_pnl_usd") or 0.0)
+                    ts_close = int(float(evt.get("ts_close") or 0)) or self._clock()
+                except (TypeError, ValueError):
+                    return
+                self._realized_total += pnl
+                if _utc_day(ts_close) == self._day:
+                    # Part déjà courue avant 00:00 UTC (entrée -> base du jour): hors PnL du jour
+                    if pos is not None and pos["day_base"] is not None:
+                        pnl -= _sign(pos) * pos["qty"] * (pos["day_base"] - pos["entry"])
+                    self._realized_day += pnl
+                    self._trades_day += 1
+            else:
+                return
+        self.publish(force=True)
+
+    def _snapshot_bases(self) -> Dict[str, float]:
+        """Bases du jour publiées par le snapshot fichier précédent (même jour UTC)."""
+        if self.snapshot_path is None:
+            return {}
+        try:
+            snap = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            if snap.get("day") != self._day:
+                return {}
+            return {str(p["id"]): float(p["day_base"]) for p in snap.get("positions", [])
+                    if p.get("day_base") is not None}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+
+    def load_store(self, db_path: Path | str) -> None:
+        """Amorce le suivi depuis le trade store: positions ouvertes + réalisé du jour."""
+        from kobe.core.position_book import get_position_book
+
+        store = get_trade_store(db_path)
+        with self._lock:
+            self._roll_day(self._clock())
+            day_start = _day_start_ms(self._day)
+            bases = self._snapshot_bases()
+            for pos in get_position_book(db_path).open_positions():
+                try:
+                    today = int(float(pos.get("ts_open") or 0)) >= day_start
+                    base = float(pos["entry"]) if today else bases.get(str(pos.get("id")))
+                except (KeyError, TypeError, ValueError):
+                    base = None
+                self._add_open(pos, day_base=base)
+            for evt in store.query("positions", "status = ? AND ts_close >= ?",
+                                   ("closed", _day_start_ms(self._day))):
+                self._realized_day += float(evt.get("realized_pnl_usd") or 0.0)
+                self._trades_day += 1
+
+    # --- Prix ---
+    def on_price(self, symbol: str, price: float) -> None:
+        """Nouveau prix pour `symbol`: O(1) quel que soit le nombre de positions."""
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        with self._lock:
+            self._roll_day(self._clock())
+            self._set_price(book, price)
+        self.publish()
+
+    def on_tick(self, tick: Any) -> None:
+        """Adaptateur pour kobe.core.feed.subscribe_agg_trade(on_tick=...)."""
+        self.on_price(tick.symbol, tick.price)
+
+    def on_prices(self, prices: Mapping[str, float]) -> None:
+        """Mise à jour en masse (cache de tickers): un seul snapshot publié."""
+        with self._lock:
+            self._roll_day(self._clock())
+            for symbol, price in prices.items():
+                book = self._books.get(symbol)
+                if book is not None:
+                    self._set_price(book, price)
+        self.publish()
+
+    # --- Lecture ---
+    def open_symbols(self) -> List[str]:
+        with self._lock:
+            return sorted(symbol for symbol, book in self._books.items() if book.ids)
+
+    @property
+    def unrealized_usd(self) -> float:
+        return self._unrealized
+
+    def daily_pnl_usd(self) -> float:
+        """PnL du jour UTC: réalisé du jour + variation du latent depuis 00:00 UTC."""
+        with self._lock:
+            self._roll_day(self._clock())
+            return self._realized_day + self._unrealized_day
+
+    def daily_pnl_eur(self) -> float:
+        return self.daily_pnl_usd() * _usd_eur_rate()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            self._roll_day(now)
+            positions = []
+            for symbol, book in self._books.items():
+                for pos in book.ids.values():
+                    upnl = _sign(pos) * pos["qty"] * (book.price - pos["entry"]) if book.price is not None else 0.0
+                    positions.append({**pos, "symbol": symbol, "price": book.price,
+                                      "unrealized_pnl_usd": round(upnl, 6)})
+            positions.sort(key=lambda p: (p.get("ts_open") or 0, p["id"]))
+            daily = self._realized_day + self._unrealized_day
+            return {
+                "ts": now,
+                "day": self._day,
+                "positions": positions,
+                "open_positions": len(positions),
+                "unrealized_pnl_usd": round(self._unrealized, 6),
+                "unrealized_pnl_day_usd": round(self._unrealized_day, 6),
+                "realized_pnl_day_usd": round(self._realized_day, 6),
+                "realized_pnl_total_usd": round(self._realized_total, 6),
+                "trades_day": self._trades_day,
+                "daily_pnl_usd": round(daily, 6),
+                "daily_pnl_eur": round(daily * _usd_eur_rate(), 6),
+            }
+
+    # --- Publication ---
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self._subscribers.append(callback)
+
+    def publish(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Publie un snapshot (abonnés + fichier), limité à un par `publish_interval_s` hors `force`."""
+        now = time.monotonic()
+        if not force and now - self._last_publish < self.publish_interval_s:
+            return None
+        self._last_publish = now
+        if not self._subscribers and self.snapshot_path is None:
+            return None
+        snap = self.snapshot()
+        for cb in list(self._subscribers):
+            try:
+                cb(snap)
+            except Exception as e:
+                print(f"[portfolio] abonné en erreur: {e}")
+        if self.snapshot_path is not None:
+            _write_snapshot(self.snapshot_path, snap)
+        return snap
+
+
+def _write_snapshot(path: Path, snap: Dict[str, Any]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        # Le snapshot fichier n'est qu'une vue: on ne casse jamais le suivi.
+        print(f"[portfolio] écriture du snapshot impossible {path}: {e}")
+
+
+# --- Tracker du process + kill-switch ---
+_TRACKER: Optional[PortfolioTracker] = None
+_TRACKER_LOCK = threading.Lock()
+
+
+def get_portfolio() -> Optional[PortfolioTracker]:
+    return _TRACKER
+
+
+def start_portfolio(
+    db_path: Optional[Path | str] = None,
+    snapshot_path: Optional[Path | str] = SNAPSHOT_PATH,
+    publish_interval_s: float = DEFAULT_PUBLISH_INTERVAL_S,
+) -> PortfolioTracker:
+    """Installe le tracker du process (amorcé depuis `db_path` si fourni)."""
+    global _TRACKER
+    with _TRACKER_LOCK:
+        tracker = PortfolioTracker(publish_interval_s=publish_interval_s, snapshot_path=snapshot_path)
+        if db_path is not None and Path(db_path).exists():
+            tracker.load_store(db_path)
+        _TRACKER = tracker
+    tracker.publish(force=True)
+    return tracker
+
+
+def stop_portfolio() -> None:
+    global _TRACKER
+    with _TRACKER_LOCK:
+        _TRACKER = None
+
+
+def on_position_event(evt: Dict[str, Any]) -> None:
+    """Hook appelé à chaque event de position écrit (no-op sans tracker actif)."""
+    tracker = _TRACKER
+    if tracker is not None:
+        tracker.on_position_event(evt)
+
+
+def on_price(symbol: str, price: float) -> None:
+    """Prix observé ailleurs (trailing stop, scan...): no-op sans tracker actif."""
+    tracker = _TRACKER
+    if tracker is not None:
+        tracker.on_price(symbol, price)
+
+
+def refresh_prices(fetch: Optional[Callable[[List[str]], Mapping[str, Any]]] = None) -> int:
+    """
+    Marque toutes les positions ouvertes du tracker (live et paper) au prix courant.
+
+    `fetch(symbols) -> {symbol: réponse ticker/price}`; par défaut une seule requête
+    BinanceSpot.get_prices. Retourne le nombre de symboles valorisés.
+    """
+    tracker = _TRACKER
+    if tracker is None:
+        return 0
+    symbols = tracker.open_symbols()
+    if not symbols:
+        return 0
+    if fetch is None:
+        from kobe.execution.binance_spot import BinanceSpot
+
+        fetch = BinanceSpot().get_prices
+    prices: Dict[str, float] = {}
+    for symbol, info in fetch(symbols).items():
+        try:
+            prices[symbol] = float(info["price"])
+        except (KeyError, TypeError, ValueError):
+            print(f"[portfolio] prix indisponible pour {symbol}: {info}")
+    if prices:
+        tracker.on_prices(prices)
+    return len(prices)
+
+
+def _snapshot_daily_eur(path: Path) -> Optional[float]:
+    try:
+        snap = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    try:
+        if (_now_ms() - int(snap["ts"])) / 1000 > SNAPSHOT_MAX_AGE_S or snap.get("day") != _utc_day(_now_ms()):
+            return None
+        return float(snap["daily_pnl_eur"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def current_daily_loss_eur(snapshot_path: Path | str = SNAPSHOT_PATH) -> float:
+    """
+    PnL du jour en EUR pour le kill-switch (valeur négative = perte).
+
+    Source: tracker du process, sinon snapshot fichier récent d'un autre process.
+    KOBE_DAILY_LOSS_EUR, si défini, reste pris en compte (surcharge manuelle):
+    on retient la valeur la plus pénalisante.
+    """
+    values: List[float] = []
+    tracker = _TRACKER
+    if tracker is not None:
+        values.append(tracker.daily_pnl_eur())
+    else:
+        snap = _snapshot_daily_eur(Path(snapshot_path))
+        if snap is not None:
+            values.append(snap)
+    env = os.getenv(_DAILY_LOSS_ENV)
+    if env:
+        try:
+            values.append(float(env))
+        except ValueError:
+            pass
+    return min(values) if values else 0.0
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from kobe.core.trade_store import TradeStore, get_trade_store
+
+# Event compact ajouté au journal des positions lors d'une mise à jour du stop
+STOP_UPDATE_EVENT = "stop_update"
+
+
+class PositionBook:
+    """
+    Carnet en mémoire des positions OUVERTES, reconstruit depuis la table
+    `positions` du trade store (SQLite).
+
+    - Au premier accès, les events sont rejoués (open → close → stop_update).
+    - Ensuite, seules les lignes insérées depuis la dernière lecture sont relues
+      (requête indexée sur la clé primaire `seq`).
+    - Index par id, par symbole et par mode (paper/live).
+    """
+
+    def __init__(self, store: TradeStore):
+        self.store = store
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_mode: Dict[str, Set[str]] = {}
+
+    # --- Application des events ---
+    def _index(self, pos: Dict[str, Any]) -> None:
+        pid = str(pos["id"])
+        self._by_id[pid] = pos
+        self._by_symbol.setdefault(str(pos.get("symbol", "")), set()).add(pid)
+        self._by_mode.setdefault(str(pos.get("mode", "")), set()).add(pid)
+
+    def _unindex(self, pid: str) -> None:
+        pos = self._by_id.pop(pid, None)
+        if pos is None:
+            return
+        self._by_symbol.get(str(pos.get("symbol", "")), set()).discard(pid)
+        self._by_mode.get(str(pos.get("mode", "")), set()).discard(pid)
+
+    def _apply(self, evt: Dict[str, Any]) -> None:
+        pid = evt.get("id")
+        if not pid:
+            return
+        pid = str(pid)
+        if evt.get("event") == STOP_UPDATE_EVENT:
+            pos = self._by_id.get(pid)
+            if pos is not None and evt.get("stop") is not None:
+                pos["stop"] = float(evt["stop"])
+            return
+        status = str(evt.get("status", ""))
+        if status == "open":
+            self._index(dict(evt))
+        elif status == "closed":
+            self._unindex(pid)
+
+    def refresh(self) -> None:
+        """Rejoue les events insérés depuis la dernière lecture."""
+        with self._lock:
+            for seq, evt in self.store.rows_since("positions", self._seq):
+                self._apply(evt)
+                self._seq = seq
+
+    # --- Lookups ---
+    def get(self, pos_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            pos = self._by_id.get(str(pos_id))
+            return dict(pos) if pos is not None else None
+
+    def open_positions(self, symbol: Optional[str] = None, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            ids: Optional[Set[str]] = None
+            if symbol is not None:
+                ids = set(self._by_symbol.get(symbol, ()))
+            if mode is not None:
+                by_mode = self._by_mode.get(mode, set())
+                ids = (ids & by_mode) if ids is not None else set(by_mode)
+            if ids is None:
+                ids = set(self._by_id)
+            rows = [dict(self._by_id[i]) for i in ids]
+        rows.sort(key=lambda p: (p.get("ts_open") or 0, p["id"]))
+        return rows
+
+
+_BOOKS: Dict[str, PositionBook] = {}
+_BOOKS_LOCK = threading.Lock()
+
+
+def get_position_book(path: Path | str) -> PositionBook:
+    """Retourne le carnet partagé (un par base trades.db)."""
+    key = str(Path(path))
+    with _BOOKS_LOCK:
+        book = _BOOKS.get(key)
+        if book is None:
+            book = PositionBook(get_trade_store(key))
+            _BOOKS[key] = book
+        return book
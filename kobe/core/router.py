@@ -1,7 +1,7 @@
 from __future__ import annotations
-import csv, json, time, os
+import asyncio, time, os
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 from kobe.signals.proposal import Proposal, position_size
 from kobe.core.risk import validate_proposal, RiskConfig
@@ -9,38 +9,39 @@ from kobe.core.executor import simulate_open
 from kobe.core.secrets import load_env, load_config, merge_env_config, get_exchange_keys
 from kobe.core.modes import current_mode, Mode
 from kobe.execution.binance_spot import BinanceSpot
-from kobe.core.adapter.binance import BinanceAdapter
+from kobe.execution.client_ids import client_order_id, proposal_key
+from kobe.execution.exchange_filters import symbol_filters
+from kobe.execution.order_state import ORDER_INDEX, OrderStatus
+from kobe.core.lazy import lazy_callable
 from kobe.logs.execution_logger import ExecutionStatus, log_execution_result
+from kobe.core.trade_store import DB_NAME, ORDERS_COLS, get_trade_store
 
-# Journal des ordres (papier & testnet)
+# Journal des ordres (papier & testnet) — table `orders` de logs/trades.db.
+# orders.csv / orders.jsonl ne sont plus que des vues d'export (cf. export_orders).
 ORDERS_LOG_DIR = Path("logs")
 ORDERS_CSV_PATH = ORDERS_LOG_DIR / "orders.csv"
 ORDERS_JSONL_PATH = ORDERS_LOG_DIR / "orders.jsonl"
 
-CSV_COLS = [
-    "ts", "mode", "symbol", "side", "qty", "price",
-    "router_action", "exchange", "order_id", "status",
-    "risk_pct", "size_pct",
-]
+CSV_COLS = ORDERS_COLS
 
-def _ensure_dirs():
-    ORDERS_LOG_DIR.mkdir(parents=True, exist_ok=True)
+# Dépendances lourdes (ccxt, httpx) importées au premier ordre TESTNET / LIVE groupé
+BinanceAdapter = lazy_callable("kobe.core.adapter.binance", "BinanceAdapter")
+AsyncBinanceSpot = lazy_callable("kobe.execution.binance_spot_async", "AsyncBinanceSpot")
+
+def _orders_store():
+    return get_trade_store(ORDERS_LOG_DIR / DB_NAME)
 
 def _ts_ms() -> int:
     return int(time.time() * 1000)
 
 def _append_order(evt: Dict[str, Any]) -> None:
-    _ensure_dirs()
-    # JSONL
-    with ORDERS_JSONL_PATH.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(evt, ensure_ascii=False) + "\n")
-    # CSV
-    write_header = not ORDERS_CSV_PATH.exists()
-    with ORDERS_CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=CSV_COLS)
-        if write_header:
-            w.writeheader()
-        w.writerow({k: evt.get(k, "") for k in CSV_COLS})
+    _orders_store().append("orders", evt)
+
+def export_orders() -> int:
+    """Régénère les vues orders.csv / orders.jsonl depuis le store."""
+    store = _orders_store()
+    store.export_jsonl("orders", ORDERS_JSONL_PATH)
+    return store.export_csv("orders", ORDERS_CSV_PATH)
 
 def _build_evt(
     mode: Mode, p: Proposal, qty: float, price: float, action: str,
@@ -61,6 +62,12 @@ def _build_evt(
         "size_pct": float(p.size_pct),
     }
 
+_ORDER_STATE_EXEC = {
+    OrderStatus.REJECTED: ExecutionStatus.EXCHANGE_ERROR,
+    OrderStatus.CANCELED: ExecutionStatus.CANCELLED,
+    OrderStatus.EXPIRED: ExecutionStatus.CANCELLED,
+}
+
 def _log_execution_from_evt(mode: Mode, p: Proposal, qty: float, evt: Dict[str, Any]) -> None:
     """Pont entre le journal 'orders' historique et le nouveau execution_logger.
 
@@ -79,11 +86,15 @@ def _log_execution_from_evt(mode: Mode, p: Proposal, qty: float, evt: Dict[str,
         upper = raw_status.upper()
         exec_status = ExecutionStatus.SUCCESS
 
-        if upper == "TOO_SMALL":
+        order_state = OrderStatus.from_binance(evt.get("order_state"))
+        if order_state is not None:
+            # Statut typé de l'index des ordres: prioritaire sur le texte libre
+            exec_status = _ORDER_STATE_EXEC.get(order_state, ExecutionStatus.SUCCESS)
+        elif upper == "TOO_SMALL":
             exec_status = ExecutionStatus.TOO_SMALL
         elif upper.startswith("ERR:") or "HTTP" in upper or "ERROR" in upper:
             exec_status = ExecutionStatus.EXCHANGE_ERROR
-        elif upper.startswith("KILL_SWITCH"):
+        elif upper.startswith("KILL_SWITCH") or upper in ("ENTRY_LIVE", "DUPLICATE"):
             exec_status = ExecutionStatus.REJECTED
 
         log_execution_result(
@@ -105,22 +116,8 @@ def _log_execution_from_evt(mode: Mode, p: Proposal, qty: float, evt: Dict[str,
         # On ne veut jamais casser la chaîne d'exécution
         return
 
-def place_from_proposal(
-    p: Proposal,
-    *,
-    balance_usd: float,
-    leverage: float = 1.0,
-    cfg_path: str = "config.yaml",
-    risk_cfg: Optional[RiskConfig] = None,
-) -> Tuple[Mode, Dict[str, Any]]:
-    """
-    Route une Proposal selon le mode courant :
-    - PAPER  : simulate_open() (journal positions) + journal 'orders'
-    - TESTNET: adapter.create_order() (mock Binance) + journal 'orders'
-    - LIVE   : BinanceSpot.create_order() (réel, via API spot) + journal 'orders'
-    Renvoie (mode, event_dict)
-    """
-    # Chargement config + mode
+def _routing_context(cfg_path: str, risk_cfg: Optional[RiskConfig]):
+    """Config + mode courant + plafonds de risque: (env, cfg, mode, rcfg, notional min LIVE)."""
     env = load_env()
     cfg = merge_env_config(env, load_config(cfg_path))
     mode = current_mode(cfg)
@@ -132,26 +129,52 @@ def place_from_proposal(
     # Notional minimum souhaité pour qu'un trade LIVE soit vraiment "tradable".
     # Par défaut 5 USDC, override possible dans config.risk.min_live_notional_usd.
     min_live_notional = float(risk_cfg_dict.get("min_live_notional_usd", 5.0))
+    return env, cfg, mode, rcfg, min_live_notional
 
-    # Si on est en LIVE, on remplace le balance_usd simulé par le solde réel USDC du compte Binance.
-    if mode == Mode.LIVE:
-        try:
-            ex_bal = BinanceSpot()
-            acc = ex_bal.check_account()
-            quote = env.get("QUOTE_ASSET", "USDC")
-            free = None
-            for b in acc.get("balances", []):
-                if b.get("asset") == quote:
-                    try:
-                        free = float(b.get("free", "0") or 0.0)
-                    except (TypeError, ValueError):
-                        free = 0.0
-                    break
-            if free is not None and free > 0:
-                balance_usd = free
-        except Exception:
-            # En cas d'erreur de récupération du solde, on garde balance_usd tel quel
-            pass
+def _free_quote_balance(acc: Any, env: Dict[str, str]) -> Optional[float]:
+    """Solde libre de l'actif de cotation (QUOTE_ASSET, USDC par défaut) dans /api/v3/account."""
+    quote = env.get("QUOTE_ASSET", "USDC")
+    for b in acc.get("balances", []):
+        if b.get("asset") == quote:
+            try:
+                return float(b.get("free", "0") or 0.0)
+            except (TypeError, ValueError):
+                return 0.0
+    return None
+
+def _min_notional(p: Proposal, min_live_notional: float) -> float:
+    """Notional minimum LIVE: config, ou filtre NOTIONAL du symbole (cache exchangeInfo) s'il est plus strict."""
+    filters = symbol_filters(p.symbol)
+    if filters is not None:
+        return max(min_live_notional, float(filters.min_notional))
+    return min_live_notional
+
+def _reserve_or_skip(
+    mode: Mode, p: Proposal, qty: float, available_usd: float, min_live_notional: float,
+) -> Tuple[float, Optional[Dict[str, Any]]]:
+    """
+    Plafonne le notional de la proposal au solde encore disponible (déjà
+    diminué des proposals précédentes du même tick). Retourne (qty, evt)
+    avec evt non-None si le reste ne permet plus un trade tradable.
+    """
+    entry = float(p.entry)
+    if qty * entry <= available_usd:
+        return qty, None
+    capped = max(0.0, available_usd) / entry
+    filters = symbol_filters(p.symbol)
+    if filters is not None:
+        capped = filters.round_qty(capped)
+    if capped * entry < _min_notional(p, min_live_notional):
+        return qty, _build_evt(mode, p, qty, price=p.entry, action="skip_no_balance", exchange="binance_spot",
+                               order_id="", status="NO_BALANCE")
+    return capped, None
+
+def _size_or_skip(
+    mode: Mode, p: Proposal, balance_usd: float, leverage: float,
+    rcfg: RiskConfig, min_live_notional: float,
+) -> Tuple[float, Optional[Dict[str, Any]]]:
+    """Risk guard + sizing. Retourne (qty, evt) avec evt non-None si le trade est écarté."""
+    min_live_notional = _min_notional(p, min_live_notional)
 
     # Risk guard
     validate_proposal(p, rcfg, is_proposal=False)  # on exécute => comparer au plafond 'trade'
@@ -193,17 +216,79 @@ def place_from_proposal(
                     order_id="",
                     status="TOO_SMALL",
                 )
-                _append_order(evt)
-                _log_execution_from_evt(mode, p, qty, evt)
-                return mode, evt
+                return qty, evt
+    return qty, None
+
+def _live_entry_evt(mode: Mode, p: Proposal, qty: float) -> Optional[Dict[str, Any]]:
+    """
+    Evt de skip si l'entrée de cette proposal a déjà été envoyée (même
+    newClientOrderId, non rejetée) ou si une entrée est encore vivante sur le
+    symbole (index des ordres); sinon None.
+    """
+    sent = ORDER_INDEX.get(p.symbol, client_order_id=_entry_client_id(p))
+    if sent is not None and sent.status is not OrderStatus.REJECTED:
+        return _build_evt(mode, p, qty, price=p.entry, action="skip_duplicate", exchange="binance_spot",
+                          order_id=str(sent.order_id or sent.client_order_id), status="DUPLICATE")
+    live = ORDER_INDEX.live(p.symbol, kind="entry")
+    if not live:
+        return None
+    return _build_evt(mode, p, qty, price=p.entry, action="skip_entry_live", exchange="binance_spot",
+                      order_id=str(live[0].order_id or live[0].client_order_id), status="ENTRY_LIVE")
+
+def _entry_client_id(p: Proposal) -> str:
+    # Même proposal => même newClientOrderId d'entrée (create_order ou plan)
+    return client_order_id(proposal_key(p), "entry")
+
+def _with_order_state(evt: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+    """Ajoute le statut typé de l'ordre (index des ordres) à un evt du journal 'orders'."""
+    if evt.get("order_id"):
+        rec = ORDER_INDEX.get(symbol, order_id=evt["order_id"])
+        if rec is not None:
+            evt["order_state"] = rec.status.value
+    return evt
+
+def _finish(mode: Mode, p: Proposal, qty: float, evt: Dict[str, Any]) -> Tuple[Mode, Dict[str, Any]]:
+    _append_order(evt)
+    _log_execution_from_evt(mode, p, qty, evt)
+    return mode, evt
+
+def place_from_proposal(
+    p: Proposal,
+    *,
+    balance_usd: float,
+    leverage: float = 1.0,
+    cfg_path: str = "config.yaml",
+    risk_cfg: Optional[RiskConfig] = None,
+) -> Tuple[Mode, Dict[str, Any]]:
+    """
+    Route une Proposal selon le mode courant :
+    - PAPER  : simulate_open() (journal positions) + journal 'orders'
+    - TESTNET: adapter.create_order() (mock Binance) + journal 'orders'
+    - LIVE   : BinanceSpot.create_order() (réel, via API spot) + journal 'orders'
+    Renvoie (mode, event_dict)
+    """
+    # Chargement config + mode
+    env, cfg, mode, rcfg, min_live_notional = _routing_context(cfg_path, risk_cfg)
+
+    # Si on est en LIVE, on remplace le balance_usd simulé par le solde réel USDC du compte Binance.
+    if mode == Mode.LIVE:
+        try:
+            free = _free_quote_balance(BinanceSpot().check_account(), env)
+            if free is not None and free > 0:
+                balance_usd = free
+        except Exception:
+            # En cas d'erreur de récupération du solde, on garde balance_usd tel quel
+            pass
+
+    qty, skip_evt = _size_or_skip(mode, p, balance_usd, leverage, rcfg, min_live_notional)
+    if skip_evt is not None:
+        return _finish(mode, p, qty, skip_evt)
 
     if mode == Mode.PAPER:
         # simulateur local
         open_evt = simulate_open(p, balance_usd=balance_usd, leverage=leverage)
         evt = _build_evt(mode, p, qty, price=p.entry, action="simulate_open", exchange="paper", status="OPENED")
-        _append_order(evt)
-        _log_execution_from_evt(mode, p, qty, evt)
-        return mode, evt
+        return _finish(mode, p, qty, evt)
 
     if mode == Mode.TESTNET:
         keys = get_exchange_keys(cfg, "binance")
@@ -215,181 +300,230 @@ def place_from_proposal(
             mode, p, qty, price=od.get("price", 0.0), action="create_order",
             exchange="binance", order_id=str(od.get("id", "")), status=str(od.get("status",""))
         )
-        _append_order(evt)
-        _log_execution_from_evt(mode, p, qty, evt)
-        return mode, evt
+        return _finish(mode, p, qty, evt)
 
     if mode == Mode.LIVE:
+        # Une entrée encore en attente sur ce symbole: pas de doublon
+        live_evt = _live_entry_evt(mode, p, qty)
+        if live_evt is not None:
+            return _finish(mode, p, qty, live_evt)
+
         # Exécution réelle via BinanceSpot (spot)
         ex = BinanceSpot()
         side = "BUY" if p.side == "long" else "SELL"
 
-        # Feature flag : exécution du plan complet (entry + TP + SL).
-        # Par défaut, on conserve le comportement historique (create_order).
-        execute_plan_flag_raw = env.get("EXECUTE_ORDER_PLAN") or os.getenv("KOBE_EXECUTE_PLAN")
-        execute_plan_flag = str(execute_plan_flag_raw).lower() in ("1", "true", "yes")
-
-        if execute_plan_flag:
-            # Prix spot actuel (fallback sur entry si indisponible)
-            price_info = ex.get_price(p.symbol)
-            if isinstance(price_info, dict) and "price" in price_info:
-                try:
-                    price = float(price_info["price"])
-                except (TypeError, ValueError):
-                    price = float(p.entry)
-            else:
-                price = float(p.entry)
-
-            plan = None
-            try:
-                plan = ex.build_order_plan(
-                    symbol=p.symbol,
-                    side=side,
-                    quantity=qty,
-                    entry_price=p.entry,
-                    take_price=p.take,
-                    stop_price=p.stop,
-                    order_type="MARKET",
-                )
-            except Exception:
-                # En cas d'erreur de construction du plan, on journalise et on retombe
-                # sur le chemin create_order() classique pour ne rien casser.
-                plan_evt = {
-                    "ts": _ts_ms(),
-                    "mode": mode.value,
-                    "symbol": p.symbol,
-                    "side": p.side,
-                    "qty": float(qty),
-                    "price": float(p.entry),
-                    "router_action": "order_plan_error",
-                    "exchange": "binance_spot",
-                    "order_id": "",
-                    "status": "PLAN_ERROR",
-                    "risk_pct": float(p.risk_pct),
-                    "size_pct": float(p.size_pct),
-                }
-                _append_order(plan_evt)
-                execute_plan_flag = False  # fallback
-
-            if execute_plan_flag and plan and plan.get("valid"):
+        if _execute_plan_enabled(env):
+            price = _price_or_entry(ex.get_price(p.symbol), p)
+            plan = _build_plan(mode, p, qty, side, ex)
+            if plan is not None and plan.get("valid"):
                 # journal du plan avant exécution
-                plan_evt = {
-                    "ts": _ts_ms(),
-                    "mode": mode.value,
-                    "symbol": p.symbol,
-                    "side": p.side,
-                    "qty": float(qty),
-                    "price": float(p.entry),
-                    "router_action": "order_plan_execute",
-                    "exchange": "binance_spot",
-                    "order_id": "",
-                    "status": "PLAN_EXECUTE",
-                    "risk_pct": float(p.risk_pct),
-                    "size_pct": float(p.size_pct),
-                    "order_plan": plan,
-                }
-                _append_order(plan_evt)
-
+                _append_order(_plan_evt(mode, p, qty, "order_plan_execute", "PLAN_EXECUTE", plan))
                 od = ex.execute_order_plan(plan)
-                order_id = ""
-                status = "UNKNOWN"
-                action = "execute_order_plan"
-                if isinstance(od, dict):
-                    if od.get("error") == "kill_switch":
-                        status = "KILL_SWITCH"
-                        action = "kill_switch_blocked_plan"
-                    elif "error" in od:
-                        err = od.get("error")
-                        msg = od.get("message", "")
-                        status = f"ERR:{err}:{msg}"
-                    else:
-                        orders = od.get("orders") or {}
-                        entry_resp = orders.get("entry") or {}
-                        if isinstance(entry_resp, dict):
-                            order_id = str(entry_resp.get("orderId", ""))
-                            status = str(entry_resp.get("status", "NEW"))
-                        else:
-                            status = "OK"
-
-                evt = _build_evt(
-                    mode, p, qty, price=price, action=action,
-                    exchange="binance_spot", order_id=order_id, status=status
-                )
-                _append_order(evt)
-                _log_execution_from_evt(mode, p, qty, evt)
-                return mode, evt
-
+                return _finish(mode, p, qty, _plan_result_evt(mode, p, qty, price, od))
             # fallback si plan invalide ou erreur : on garde l'ancien chemin
-            # (pas de return ici, on laisse tomber dans le bloc suivant)
 
         # Ancien comportement LIVE (par défaut / fallback)
-        # Prix spot actuel (fallback sur entry si indisponible)
-        price_info = ex.get_price(p.symbol)
-        if isinstance(price_info, dict) and "price" in price_info:
-            try:
-                price = float(price_info["price"])
-            except (TypeError, ValueError):
-                price = float(p.entry)
-        else:
-            price = float(p.entry)
+        price = _price_or_entry(ex.get_price(p.symbol), p)
+        od = ex.create_order(p.symbol, side, qty, take_price=p.take, stop_price=p.stop,
+                             client_order_id=_entry_client_id(p))
+        _record_plan_only(mode, p, qty, side, ex)
+        return _finish(mode, p, qty, _order_result_evt(mode, p, qty, price, od))
 
-        od = ex.create_order(p.symbol, side, qty, take_price=p.take, stop_price=p.stop)
+    raise RuntimeError("Mode inconnu pour place_from_proposal.")
 
-        # --- V4: construction du plan complet entry/TP/SL (sans exécution) ---
+def place_from_proposals(
+    proposals: List[Proposal],
+    *,
+    balance_usd: float,
+    leverage: float = 1.0,
+    cfg_path: str = "config.yaml",
+    risk_cfg: Optional[RiskConfig] = None,
+) -> List[Any]:
+    """
+    Route plusieurs Proposals du même tick.
+
+    - LIVE: envoi simultané sur tous les symboles (AsyncBinanceSpot, débit borné
+      par le limiteur partagé), solde du compte lu une seule fois puis réservé
+      proposal par proposal (dans l'ordre de la liste) avant l'envoi.
+    - PAPER / TESTNET: place_from_proposal() une par une (local, sans réseau).
+    Renvoie une liste alignée sur `proposals`: (mode, event_dict), ou l'exception
+    levée pour cette proposal (ex: risk guard) sans bloquer les autres.
+    """
+    env, cfg, mode, rcfg, min_live_notional = _routing_context(cfg_path, risk_cfg)
+    if mode != Mode.LIVE:
+        out: List[Any] = []
+        for p in proposals:
+            try:
+                out.append(place_from_proposal(p, balance_usd=balance_usd, leverage=leverage,
+                                               cfg_path=cfg_path, risk_cfg=risk_cfg))
+            except Exception as e:
+                out.append(e)
+        return out
+    return asyncio.run(_aplace_live(proposals, env, mode, rcfg, min_live_notional, balance_usd, leverage))
+
+async def _aplace_live(proposals, env, mode, rcfg, min_live_notional, balance_usd, leverage) -> List[Any]:
+    async with AsyncBinanceSpot() as ex:
         try:
-            plan = ex.build_order_plan(
-                symbol=p.symbol,
-                side=side,
-                quantity=qty,
-                entry_price=p.entry,
-                take_price=p.take,
-                stop_price=p.stop,
-                order_type="MARKET",
-            )
-            plan_evt = {
-                "ts": _ts_ms(),
-                "mode": mode.value,
-                "symbol": p.symbol,
-                "side": p.side,
-                "qty": float(qty),
-                "price": float(p.entry),
-                "router_action": "order_plan_built",
-                "exchange": "binance_spot",
-                "order_id": "",
-                "status": "PLAN_ONLY",
-                "risk_pct": float(p.risk_pct),
-                "size_pct": float(p.size_pct),
-                "order_plan": plan,
-            }
-            _append_order(plan_evt)
+            free = _free_quote_balance(await ex.check_account(), env)
+            if free is not None and free > 0:
+                balance_usd = free
         except Exception:
             pass
 
-        order_id = ""
-        status = "UNKNOWN"
-        action = "create_order"
-        if isinstance(od, dict):
-            # Cas particulier : kill-switch journalier activé côté exécuteur
-            if od.get("error") == "kill_switch":
-                status = "KILL_SWITCH"
-                action = "kill_switch_blocked"
-            elif "error" in od:
-                err = od.get("error")
-                msg = od.get("message", "")
-                status = f"ERR:{err}:{msg}"
-            else:
-                order_id = str(od.get("orderId", ""))
-                status = str(od.get("status", "NEW"))
+        # Dimensionnement séquentiel avant l'envoi concurrent: chaque proposal
+        # réserve son notional, la suivante ne voit que le solde restant.
+        sized: List[Any] = []
+        available = balance_usd
+        for p in proposals:
+            try:
+                qty, skip_evt = _size_or_skip(mode, p, available, leverage, rcfg, min_live_notional)
+                if skip_evt is None:
+                    skip_evt = _live_entry_evt(mode, p, qty)
+                if skip_evt is None:
+                    qty, skip_evt = _reserve_or_skip(mode, p, qty, available, min_live_notional)
+            except Exception as e:
+                sized.append(e)
+                continue
+            if skip_evt is None:
+                available -= qty * float(p.entry)
+            sized.append((p, qty, skip_evt))
+
+        async def one(item):
+            if isinstance(item, Exception):
+                raise item
+            p, qty, skip_evt = item
+            if skip_evt is not None:
+                return _finish(mode, p, qty, skip_evt)
+            side = "BUY" if p.side == "long" else "SELL"
+            if _execute_plan_enabled(env):
+                price = _price_or_entry(await ex.get_price(p.symbol), p)
+                plan = _build_plan(mode, p, qty, side, ex)
+                if plan is not None and plan.get("valid"):
+                    _append_order(_plan_evt(mode, p, qty, "order_plan_execute", "PLAN_EXECUTE", plan))
+                    od = await ex.execute_order_plan(plan)
+                    return _finish(mode, p, qty, _plan_result_evt(mode, p, qty, price, od))
+            price = _price_or_entry(await ex.get_price(p.symbol), p)
+            od = await ex.create_order(p.symbol, side, qty, take_price=p.take, stop_price=p.stop,
+                                       client_order_id=_entry_client_id(p))
+            _record_plan_only(mode, p, qty, side, ex)
+            return _finish(mode, p, qty, _order_result_evt(mode, p, qty, price, od))
+
+        return list(await asyncio.gather(*(one(item) for item in sized), return_exceptions=True))
+
+def _execute_plan_enabled(env: Dict[str, str]) -> bool:
+    # Feature flag : exécution du plan complet (entry + TP + SL).
+    # Par défaut, on conserve le comportement historique (create_order).
+    execute_plan_flag_raw = env.get("EXECUTE_ORDER_PLAN") or os.getenv("KOBE_EXECUTE_PLAN")
+    return str(execute_plan_flag_raw).lower() in ("1", "true", "yes")
+
+def _price_or_entry(price_info: Any, p: Proposal) -> float:
+    """Prix spot actuel (fallback sur entry si indisponible)."""
+    if isinstance(price_info, dict) and "price" in price_info:
+        try:
+            return float(price_info["price"])
+        except (TypeError, ValueError):
+            return float(p.entry)
+    return float(p.entry)
+
+def _plan_evt(mode: Mode, p: Proposal, qty: float, action: str, status: str,
+              plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    evt = {
+        "ts": _ts_ms(),
+        "mode": mode.value,
+        "symbol": p.symbol,
+        "side": p.side,
+        "qty": float(qty),
+        "price": float(p.entry),
+        "router_action": action,
+        "exchange": "binance_spot",
+        "order_id": "",
+        "status": status,
+        "risk_pct": float(p.risk_pct),
+        "size_pct": float(p.size_pct),
+    }
+    if plan is not None:
+        evt["order_plan"] = plan
+    return evt
 
-        evt = _build_evt(
-            mode, p, qty, price=price, action=action,
-            exchange="binance_spot", order_id=order_id, status=status
+def _build_plan(mode: Mode, p: Proposal, qty: float, side: str, ex: Any) -> Optional[Dict[str, Any]]:
+    try:
+        return ex.build_order_plan(
+            symbol=p.symbol,
+            side=side,
+            quantity=qty,
+            entry_price=p.entry,
+            take_price=p.take,
+            stop_price=p.stop,
+            order_type="MARKET",
+            client_key=proposal_key(p),
         )
-        _append_order(evt)
-        _log_execution_from_evt(mode, p, qty, evt)
-        return mode, evt
+    except Exception:
+        # En cas d'erreur de construction du plan, on journalise et on retombe
+        # sur le chemin create_order() classique pour ne rien casser.
+        _append_order(_plan_evt(mode, p, qty, "order_plan_error", "PLAN_ERROR"))
+        return None
 
-    raise RuntimeError("Mode inconnu pour place_from_proposal.")
+def _record_plan_only(mode: Mode, p: Proposal, qty: float, side: str, ex: Any) -> None:
+    # --- V4: construction du plan complet entry/TP/SL (sans exécution) ---
+    try:
+        plan = ex.build_order_plan(
+            symbol=p.symbol,
+            side=side,
+            quantity=qty,
+            entry_price=p.entry,
+            take_price=p.take,
+            stop_price=p.stop,
+            order_type="MARKET",
+        )
+        _append_order(_plan_evt(mode, p, qty, "order_plan_built", "PLAN_ONLY", plan))
+    except Exception:
+        pass
+
+def _plan_result_evt(mode: Mode, p: Proposal, qty: float, price: float, od: Any) -> Dict[str, Any]:
+    order_id = ""
+    status = "UNKNOWN"
+    action = "execute_order_plan"
+    if isinstance(od, dict):
+        if od.get("error") == "kill_switch":
+            status = "KILL_SWITCH"
+            action = "kill_switch_blocked_plan"
+        elif "error" in od:
+            err = od.get("error")
+            msg = od.get("message", "")
+            status = f"ERR:{err}:{msg}"
+        else:
+            orders = od.get("orders") or {}
+            entry_resp = orders.get("entry") or {}
+            if isinstance(entry_resp, dict):
+                order_id = str(entry_resp.get("orderId", ""))
+                status = str(entry_resp.get("status", "NEW"))
+            else:
+                status = "OK"
+    return _with_order_state(_build_evt(
+        mode, p, qty, price=price, action=action,
+        exchange="binance_spot", order_id=order_id, status=status
+    ), p.symbol)
+
+def _order_result_evt(mode: Mode, p: Proposal, qty: float, price: float, od: Any) -> Dict[str, Any]:
+    order_id = ""
+    status = "UNKNOWN"
+    action = "create_order"
+    if isinstance(od, dict):
+        # Cas particulier : kill-switch journalier activé côté exécuteur
+        if od.get("error") == "kill_switch":
+            status = "KILL_SWITCH"
+            action = "kill_switch_blocked"
+        elif "error" in od:
+            err = od.get("error")
+            msg = od.get("message", "")
+            status = f"ERR:{err}:{msg}"
+        else:
+            order_id = str(od.get("orderId", ""))
+            status = str(od.get("status", "NEW"))
+    return _with_order_state(_build_evt(
+        mode, p, qty, price=price, action=action,
+        exchange="binance_spot", order_id=order_id, status=status
+    ), p.symbol)
 
 if __name__ == "__main__":
     # Smoke test simple (PAPER par défaut si MODE non défini dans .env)
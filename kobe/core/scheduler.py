@@ -2,13 +2,13 @@ from __future__ import annotations
 import sys
 import asyncio
 from datetime import datetime, timezone
-from typing import Sequence, Optional
-
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from typing import TYPE_CHECKING, Sequence, Optional
 
 from .news import fetch_news
-from .notify import Notifier  # facultatif dans ce module
+
+if TYPE_CHECKING:  # APScheduler / telegram: importés seulement par build_scheduler / Notifier
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from .notify import Notifier
 
 def _utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -66,6 +66,9 @@ def build_scheduler(
     Crée un scheduler qui déclenche toutes les `interval_minutes` et
     contrôle la fenêtre horaire en UTC à l'intérieur du job.
     """
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
     sched = BlockingScheduler()
     trigger = IntervalTrigger(minutes=int(interval_minutes))
     sched.add_job(
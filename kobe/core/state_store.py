@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Portée "globale" quand l'état ne dépend pas d'un symbole précis.
+ANY_SYMBOL = "*"
+
+
+class StateStore:
+    """
+    Petit magasin d'état persistant (JSON) partagé par les stratégies.
+
+    - Le fichier est lu UNE seule fois (au premier accès), puis l'état vit en mémoire.
+    - Les écritures sont atomiques (fichier temporaire + os.replace) et n'ont lieu
+      que si la valeur change réellement.
+    - L'état est rangé par stratégie puis par symbole:
+        {"<strategy>": {"<symbol>": {"<key>": <value>, ...}}}
+    - Toutes les opérations sont protégées par un verrou (usage multi-thread OK).
+    - Ancien format plat ({"last_date": ...} au premier niveau): si
+      `legacy_strategy` est fourni, ces clés sont migrées sous
+      {legacy_strategy: {"*": {...}}} au chargement (et persistées).
+    """
+
+    def __init__(self, path: Path | str, legacy_strategy: Optional[str] = None):
+        self.path = Path(path)
+        self.legacy_strategy = legacy_strategy
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+
+    # --- Chargement / persistance ---
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                data = {}
+            self._data = data if isinstance(data, dict) else {}
+            if self._migrate_legacy(self._data):
+                self._flush()
+        return self._data
+
+    def _migrate_legacy(self, data: Dict[str, Any]) -> bool:
+        """Range les valeurs plates du premier niveau sous legacy_strategy / ANY_SYMBOL."""
+        if not self.legacy_strategy:
+            return False
+        flat = [k for k, v in data.items() if not isinstance(v, dict)]
+        if not flat:
+            return False
+        scope = data.get(self.legacy_strategy)
+        if not isinstance(scope, dict):
+            scope = data[self.legacy_strategy] = {}
+        slot = scope.setdefault(ANY_SYMBOL, {})
+        for key in flat:
+            # Une valeur déjà rangée au nouveau format reste prioritaire
+            slot.setdefault(key, data[key])
+            del data[key]
+        return True
+
+    def _flush(self) -> None:
+        """Écrit l'état complet de façon atomique (tmp + rename)."""
+        data = self._data or {}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=str(self.path.parent))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except Exception:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except Exception as e:
+            # L'état reste valide en mémoire: on ne casse jamais la stratégie pour un souci disque.
+            print(f"[state_store] écriture impossible {self.path}: {e}")
+
+    # --- API ---
+    def get(self, strategy: str, key: str, default: Any = None, symbol: str = ANY_SYMBOL) -> Any:
+        with self._lock:
+            scope = self._load().get(strategy) or {}
+            return (scope.get(symbol) or {}).get(key, default)
+
+    def set(self, strategy: str, key: str, value: Any, symbol: str = ANY_SYMBOL) -> bool:
+        """Met à jour une valeur. Retourne True si l'état a changé (et a été persisté)."""
+        with self._lock:
+            data = self._load()
+            slot = data.setdefault(strategy, {}).setdefault(symbol, {})
+            if key in slot and slot[key] == value:
+                return False
+            slot[key] = value
+            self._flush()
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copie (profonde via JSON) de l'état courant, utile pour debug/tests."""
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    def reload(self) -> None:
+        """Force une relecture du fichier au prochain accès."""
+        with self._lock:
+            self._data = None
+
+
+_STORES: Dict[str, StateStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_state_store(path: Path | str, legacy_strategy: Optional[str] = None) -> StateStore:
+    """Retourne l'instance partagée (une par chemin) du StateStore."""
+    key = str(Path(path).expanduser())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = StateStore(key, legacy_strategy=legacy_strategy)
+            _STORES[key] = store
+        elif legacy_strategy and not store.legacy_strategy:
+            store.legacy_strategy = legacy_strategy
+            store.reload()  # migration au prochain accès (les écritures sont déjà sur disque)
+        return store
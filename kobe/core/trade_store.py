@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Store SQLite unique pour les journaux de trading (ordres, positions, proposals).
+
+- Remplace les écritures parallèles CSV + JSONL à chaque event.
+- WAL + synchronous=NORMAL: une écriture = un INSERT, sans réouverture de fichier.
+- `batch()` regroupe plusieurs events dans une seule transaction.
+- Index sur ts / symbol / status (+ id pour les positions).
+- CSV/JSONL restent disponibles comme vues d'export (réécrites atomiquement,
+  rafraîchies par le scheduler toutes les KOBE_VIEWS_EXPORT_MIN minutes):
+    python -m kobe.core.trade_store export [--db logs/trades.db] [--out-dir logs]
+- Import d'un historique JSONL existant:
+    python -m kobe.core.trade_store import positions logs/positions.jsonl
+  fait automatiquement, une seule fois par table (marqueur en base, retenté
+  tant qu'il échoue), pour les journaux orders / positions / proposals
+  (journal.jsonl) présents à côté (JSONL, sinon CSV).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DB_NAME = "trades.db"
+
+# Colonnes "plates" par table (ordre = colonnes des exports CSV historiques).
+# L'event complet est toujours conservé en JSON dans la colonne `data`.
+ORDERS_COLS = [
+    "ts", "mode", "symbol", "side", "qty", "price",
+    "router_action", "exchange", "order_id", "status",
+    "risk_pct", "size_pct",
+]
+POSITIONS_COLS = [
+    "ts_open", "ts_close", "id", "mode",
+    "symbol", "side",
+    "entry", "stop", "take",
+    "qty", "leverage",
+    "exit_price", "reason",
+    "realized_pnl_usd", "status",
+    "risk_pct", "size_pct", "exchange_order_id"
+]
+PROPOSALS_COLS = [
+    "ts",
+    "signal_id",
+    "symbol",
+    "side",
+    "entry",
+    "stop",
+    "take",
+    "risk_pct",
+    "size_pct",
+    "result",
+    "reasons",
+]
+
+TABLES: Dict[str, List[str]] = {
+    "orders": ORDERS_COLS,
+    "positions": POSITIONS_COLS,
+    "proposals": PROPOSALS_COLS,
+}
+# Journaux d'avant trades.db (même dossier), repris une fois par table (marqueur
+# dans `_meta`); les proposals sont filtrées du journal brut par leur signal_id.
+LEGACY_FILES: Dict[str, tuple] = {
+    "orders": ("orders.jsonl", "orders.csv"),
+    "positions": ("positions.jsonl", "positions.csv"),
+    "proposals": ("journal.jsonl", "journal.csv"),
+}
+_LEGACY_KEYS: Dict[str, str] = {"proposals": "signal_id"}
+# Délai avant une nouvelle tentative de reprise après un échec
+LEGACY_RETRY_S = 60.0
+# Index secondaires (en plus de ts/symbol/status communs à toutes les tables)
+_EXTRA_INDEXES: Dict[str, List[str]] = {
+    "positions": ["id"],
+}
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _csv_value(v: str) -> Any:
+    """Valeur d'un export CSV historique: nombre si possible, sinon texte."""
+    for cast in (int, float):
+        try:
+            return cast(v)
+        except ValueError:
+            pass
+    return v
+
+
+@contextmanager
+def _atomic_open(path: Path, **kwargs: Any) -> Iterator[Any]:
+    """Fichier écrit à côté puis renommé: un lecteur ne voit jamais une vue partielle."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _columns(table: str) -> List[str]:
+    cols = TABLES[table]
+    # `ts` = instant d'écriture de l'event (toujours présent pour l'index temporel)
+    return cols if "ts" in cols else ["ts"] + cols
+
+
+class TradeStore:
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._legacy_pending = set(LEGACY_FILES)
+        self._legacy_retry_at = 0.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level="DEFERRED")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._import_legacy()
+
+    def _init_schema(self) -> None:
+        with self._lock:
+            for table in TABLES:
+                cols = ", ".join(f"{_q(c)}" for c in _columns(table))
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_q(table)} "
+                    f"(seq INTEGER PRIMARY KEY AUTOINCREMENT, {cols}, data TEXT NOT NULL)"
+                )
+                for col in ["ts", "symbol", "status"] + _EXTRA_INDEXES.get(table, []):
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_q(f'ix_{table}_{col}')} ON {_q(table)} ({_q(col)})"
+                    )
+            self._conn.execute('CREATE TABLE IF NOT EXISTS "_meta" (key TEXT PRIMARY KEY, value TEXT)')
+            self._conn.commit()
+
+    # --- Écriture ---
+    @contextmanager
+    def batch(self) -> Iterator["TradeStore"]:
+        """
+        Regroupe les append() du bloc dans une seule transaction.
+
+        Commit à la sortie du bloc le plus externe; une exception annule
+        toute la transaction (rollback) puis est relancée.
+        """
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.rollback()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.commit()
+
+    def append_many(self, table: str, events: Sequence[Dict[str, Any]]) -> None:
+        # Reprise en échec: retentée hors transaction englobante (rollback propre)
+        if self._legacy_pending and self._depth == 0 and time.monotonic() >= self._legacy_retry_at:
+            self._import_legacy()
+        self._insert(table, events)
+
+    def _insert(self, table: str, events: Sequence[Dict[str, Any]]) -> None:
+        cols = _columns(table)
+        sql = (
+            f"INSERT INTO {_q(table)} ({', '.join(_q(c) for c in cols)}, data) "
+            f"VALUES ({', '.join('?' for _ in cols)}, ?)"
+        )
+        now = int(time.time() * 1000)
+        rows = []
+        for evt in events:
+            vals = []
+            for c in cols:
+                v = evt.get(c, "")
+                if c == "ts" and v in ("", None):
+                    v = now
+                vals.append(v if isinstance(v, (int, float, str)) or v is None else json.dumps(v, ensure_ascii=False))
+            rows.append(vals + [json.dumps(evt, ensure_ascii=False)])
+        with self.batch():
+            self._conn.executemany(sql, rows)
+
+    def append(self, table: str, evt: Dict[str, Any]) -> None:
+        self.append_many(table, [evt])
+
+    # --- Lecture ---
+    def query(
+        self,
+        table: str,
+        where: str = "",
+        params: Sequence[Any] = (),
+        order_by: str = "seq",
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Events (dicts complets) filtrés par une clause SQL sur les colonnes indexées."""
+        sql = f"SELECT data FROM {_q(table)}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def rows_since(self, table: str, seq: int) -> List[tuple]:
+        """(seq, event) des lignes insérées après `seq` (lecture incrémentale)."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT seq, data FROM {_q(table)} WHERE seq > ? ORDER BY seq", (int(seq),)
+            ).fetchall()
+        return [(int(s), json.loads(d)) for s, d in rows]
+
+    def max_seq(self, table: str) -> int:
+        with self._lock:
+            row = self._conn.execute(f"SELECT MAX(seq) FROM {_q(table)}").fetchone()
+        return int(row[0] or 0)
+
+    # --- Vues d'export ---
+    def export_jsonl(self, table: str, path: Path | str) -> int:
+        n = 0
+        with self._lock, _atomic_open(Path(path)) as f:
+            for (data,) in self._conn.execute(f"SELECT data FROM {_q(table)} ORDER BY seq"):
+                f.write(data + "\n")
+                n += 1
+        return n
+
+    def export_csv(self, table: str, path: Path | str) -> int:
+        cols = TABLES[table]
+        n = 0
+        with self._lock, _atomic_open(Path(path), newline="") as f:
+            w = csv.writer(f)
+            w.writerow(cols)
+            sql = f"SELECT {', '.join(_q(c) for c in cols)} FROM {_q(table)} ORDER BY seq"
+            for row in self._conn.execute(sql):
+                w.writerow(["" if v is None else v for v in row])
+                n += 1
+        return n
+
+    def import_jsonl(self, table: str, path: Path | str) -> int:
+        """Importe un journal JSONL historique (lignes corrompues ignorées)."""
+        events = _read_jsonl(Path(path))
+        if events:
+            self.append_many(table, events)
+        return len(events)
+
+    def import_csv(self, table: str, path: Path | str) -> int:
+        """Importe un export CSV historique (cellules vides ignorées)."""
+        events = _read_csv(Path(path))
+        if events:
+            self.append_many(table, events)
+        return len(events)
+
+    # --- Reprise des journaux d'avant la base ---
+    def _import_legacy(self) -> None:
+        """
+        Reprend, par table, le journal JSONL (sinon CSV) d'avant la base, puis
+        pose le marqueur `legacy_import:<table>` dans la même transaction.
+        Les events déjà présents (même JSON) ne sont pas réinsérés; un échec
+        est retenté au plus tôt LEGACY_RETRY_S secondes plus tard.
+        """
+        with self._lock:
+            for table in sorted(self._legacy_pending):
+                marker = f"legacy_import:{table}"
+                if self._conn.execute('SELECT 1 FROM "_meta" WHERE key = ?', (marker,)).fetchone():
+                    self._legacy_pending.discard(table)
+                    continue
+                legacy = next((self.path.parent / n for n in LEGACY_FILES[table]
+                               if (self.path.parent / n).exists()), None)
+                try:
+                    with self.batch():
+                        n = self._import_legacy_file(table, legacy) if legacy is not None else 0
+                        self._conn.execute('INSERT INTO "_meta" (key, value) VALUES (?, ?)',
+                                           (marker, json.dumps({"source": str(legacy or ""), "events": n})))
+                except Exception as e:
+                    self._legacy_retry_at = time.monotonic() + LEGACY_RETRY_S
+                    print(f"[trade_store] import de {legacy} impossible (nouvel essai plus tard): {e}")
+                    continue
+                self._legacy_pending.discard(table)
+                if n:
+                    print(f"[trade_store] {n} events importés dans {table} depuis {legacy}")
+
+    def _import_legacy_file(self, table: str, path: Path) -> int:
+        events = _read_jsonl(path) if path.suffix == ".jsonl" else _read_csv(path)
+        key = _LEGACY_KEYS.get(table)
+        if key is not None:
+            events = [e for e in events if e.get(key)]
+        seen = {d for (d,) in self._conn.execute(f"SELECT data FROM {_q(table)}")}
+        events = [e for e in events if json.dumps(e, ensure_ascii=False) not in seen]
+        if events:
+            self._insert(table, events)
+        return len(events)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    events = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                evt = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(evt, dict):
+                events.append(evt)
+    return events
+
+
+def _read_csv(path: Path) -> List[Dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        return [{k: _csv_value(v) for k, v in row.items() if k and v not in ("", None)}
+                for row in csv.DictReader(f)]
+
+
+_STORES: Dict[str, TradeStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_trade_store(path: Path | str) -> TradeStore:
+    """Retourne le store partagé (une connexion par fichier)."""
+    key = str(Path(path))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = TradeStore(key)
+            _STORES[key] = store
+        return store
+
+
+def export_views(db_path: Path | str, out_dir: Path | str) -> Dict[str, int]:
+    """Écrit <table>.csv et <table>.jsonl pour chaque table dans out_dir."""
+    store = get_trade_store(db_path)
+    out = Path(out_dir)
+    counts = {}
+    for table in TABLES:
+        store.export_jsonl(table, out / f"{table}.jsonl")
+        counts[table] = store.export_csv(table, out / f"{table}.csv")
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m kobe.core.trade_store",
+                                 description="Store SQLite des ordres/positions/proposals (exports CSV/JSONL).")
+    ap.add_argument("--db", default=str(Path("logs") / DB_NAME), help="Chemin de la base (def: logs/trades.db)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_exp = sub.add_parser("export", help="Exporte chaque table en CSV + JSONL")
+    p_exp.add_argument("--out-dir", default="logs", help="Dossier de sortie (def: logs)")
+    p_imp = sub.add_parser("import", help="Importe un journal JSONL historique dans une table")
+    p_imp.add_argument("table", choices=sorted(TABLES))
+    p_imp.add_argument("jsonl")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        counts = export_views(args.db, args.out_dir)
+        for table, n in counts.items():
+            print(f"[trade_store] {table}: {n} lignes → {Path(args.out_dir) / table}.csv/.jsonl")
+        return 0
+    n = get_trade_store(args.db).import_jsonl(args.table, args.jsonl)
+    print(f"[trade_store] {n} events importés dans {args.table}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
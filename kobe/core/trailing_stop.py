@@ -1,86 +1,113 @@
+import asyncio
 import time
-from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.binance_spot import _log_executor_event
+from kobe.execution.binance_spot_async import AsyncBinanceSpot
+from kobe.execution.exchange_filters import symbol_filters
+from kobe.execution.order_state import ORDER_INDEX
 from kobe.core.executor import get_open_positions, update_position_stop
+from kobe.core.portfolio import on_price
+
+
+def _round_stop(symbol, price):
+    """Arrondi au tickSize du symbole (cache exchangeInfo), 2 décimales à défaut."""
+    filters = symbol_filters(symbol)
+    return filters.round_price(price) if filters is not None else round(price, 2)
+
+
+def _compute_new_stop(symbol, side, entry, current_stop, current_price):
+    """Règle mathématique : activation à +1.5% de profit, stop suit à 1%."""
+    new_stop = current_stop
+    if side == "long":
+        profit_pct = (current_price - entry) / entry
+        if profit_pct >= 0.015:
+            calculated_stop = current_price * 0.99
+            if calculated_stop > current_stop:
+                new_stop = _round_stop(symbol, calculated_stop)
+    else: # short
+        profit_pct = (entry - current_price) / entry
+        if profit_pct >= 0.015:
+            calculated_stop = current_price * 1.01
+            if calculated_stop < current_stop or current_stop == 0:
+                new_stop = _round_stop(symbol, calculated_stop)
+    return new_stop
+
+
+def _parse_price(symbol, price_info):
+    if not isinstance(price_info, dict) or "error" in price_info:
+        return None
+    try:
+        price = float(price_info["price"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    on_price(symbol, price)
+    return price
+
+
+async def _trail_one(ex, pos, current_price):
+    symbol = pos["symbol"]
+    side = pos["side"]
+    current_stop = float(pos["stop"])
+    new_stop = _compute_new_stop(symbol, side, float(pos["entry"]), current_stop, current_price)
+    if new_stop == current_stop:
+        return None
+
+    print(f"🔄 Trailing Stop {symbol} : Remontée du stop {current_stop} -> {new_stop} (Prix actuel: {current_price})")
+    close_side = "SELL" if side == "long" else "BUY"
+    # Remplacement atomique du seul stop (le TP reste en place)
+    res = await ex.replace_stop_order(symbol, close_side, float(pos["qty"]), new_stop,
+                                      take=float(pos.get("take") or 0))
+    if res["status"] == "ok":
+        update_position_stop(pos["id"], new_stop)
+    else:
+        print(f"[trailing_stop] remplacement du stop {symbol} échoué: {res.get('response')}")
+    return {"id": pos["id"], "symbol": symbol, "new_stop": new_stop, **{k: res[k] for k in ("status", "method", "exposure_ms")}}
+
 
 def process_trailing_stops():
     """
     Parcourt les positions ouvertes et ajuste dynamiquement le Stop Loss sur Binance
     si le prix évolue en notre faveur.
+
+    Prix récupérés une fois par symbole, remplacements envoyés en parallèle
+    (client async, débit borné par le limiteur partagé); retourne (et journalise)
+    les métriques du cycle: durée, stops remplacés, exposition max.
     """
-    positions = get_open_positions()
+    positions = [p for p in get_open_positions() if p.get("mode") == "live"]  # paper ignoré
     if not positions:
-        return
-
-    ex = BinanceSpot()
-
-    for pos in positions:
-        # On ignore le paper trading pour l'API Binance
-        if pos.get("mode") != "live":
-            continue
-
-        symbol = pos["symbol"]
-        side = pos["side"]
-        entry = float(pos["entry"])
-        current_stop = float(pos["stop"])
-        take = float(pos.get("take", 0))
-        qty = float(pos["qty"])
-
-        # 1. Obtenir le prix actuel
-        price_info = ex.get_price(symbol)
-        if "error" in price_info:
-            continue
-        
-        current_price = float(price_info["price"])
-        new_stop = current_stop
-        
-        # 2. Règle mathématique : Activation à +1.5% de profit, stop suit à 1%
-        if side == "long":
-            profit_pct = (current_price - entry) / entry
-            if profit_pct >= 0.015:
-                calculated_stop = current_price * 0.99
-                if calculated_stop > current_stop:
-                    # Arrondi à 2 décimales pour respecter le format prix de Binance (BTC/ETH/SOL)
-                    new_stop = round(calculated_stop, 2) 
-        else: # short
-            profit_pct = (entry - current_price) / entry
-            if profit_pct >= 0.015:
-                calculated_stop = current_price * 1.01
-                if calculated_stop < current_stop or current_stop == 0:
-                    new_stop = round(calculated_stop, 2)
-
-        # 3. Application si le Stop doit être remonté
-        if new_stop != current_stop:
-            print(f"🔄 Trailing Stop {symbol} : Remontée du stop {current_stop} -> {new_stop} (Prix actuel: {current_price})")
-
-            # A. Nettoyage : Annuler tous les anciens ordres liés à ce trade (TP et SL)
-            ex._signed_delete("/api/v3/openOrders", {"symbol": symbol})
-            
-            # Pause de 500ms pour garantir que Binance a bien libéré le capital verrouillé
-            time.sleep(0.5) 
-
-            close_side = "SELL" if side == "long" else "BUY"
-
-            # B. Replacer le Take Profit initial
-            if take > 0:
-                ex._signed_post("/api/v3/order", {
-                    "symbol": symbol,
-                    "side": close_side,
-                    "type": "LIMIT",
-                    "timeInForce": "GTC",
-                    "quantity": qty,
-                    "price": take
-                })
-
-            # C. Placer le nouveau Stop Loss actualisé
-            ex._signed_post("/api/v3/order", {
-                "symbol": symbol,
-                "side": close_side,
-                "type": "STOP_LOSS_LIMIT",
-                "timeInForce": "GTC",
-                "quantity": qty,
-                "price": new_stop,
-                "stopPrice": new_stop
-            })
-
-            # D. Sauvegarde dans le journal
-            update_position_stop(pos["id"], new_stop)
\ No newline at end of file
+        return None
+    return asyncio.run(_process(positions))
+
+
+async def _process(positions):
+    t0 = time.perf_counter()
+    async with AsyncBinanceSpot() as ex:
+        symbols = sorted({p["symbol"] for p in positions})
+        prices = {s: _parse_price(s, info) for s, info in (await ex.get_prices(symbols)).items()}
+        todo = [pos for pos in positions if prices.get(pos["symbol"]) is not None]
+        results = await asyncio.gather(*(_trail_one(ex, pos, prices[pos["symbol"]]) for pos in todo),
+                                       return_exceptions=True)
+
+    updates = []
+    for res in results:
+        if isinstance(res, Exception):
+            print(f"[trailing_stop] erreur: {res}")
+        elif res is not None:
+            updates.append(res)
+
+    exposures = [u["exposure_ms"] for u in updates]
+    metrics = {
+        "ts": int(time.time() * 1000),
+        "kind": "trailing_cycle",
+        "positions": len(positions),
+        "updated": sum(1 for u in updates if u["status"] == "ok"),
+        "failed": sum(1 for u in updates if u["status"] != "ok"),
+        "cycle_ms": round((time.perf_counter() - t0) * 1000, 3),
+        "exposure_ms_max": max(exposures) if exposures else 0.0,
+        "updates": updates,
+        "live_orders": ORDER_INDEX.summary(),
+    }
+    _log_executor_event(metrics)
+    if updates:
+        print(f"[trailing_stop] cycle {metrics['cycle_ms']:.0f} ms, {metrics['updated']} stop(s) remplacé(s), "
+              f"exposition max {metrics['exposure_ms_max']:.0f} ms")
+    return metrics
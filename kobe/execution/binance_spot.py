@@ -1,6 +1,15 @@
 from __future__ import annotations
-import os, hmac, time, hashlib, urllib.parse, urllib.request, urllib.error, json
+import os, time, urllib.parse, urllib.request, urllib.error, json
 from decimal import Decimal, ROUND_DOWN
+from functools import lru_cache
+
+from kobe.core.portfolio import current_daily_loss_eur
+from kobe.execution.client_ids import client_order_id, new_client_key
+from kobe.execution.exchange_filters import symbol_filters
+from kobe.execution.order_state import ORDER_INDEX
+from kobe.execution.rate_limit import REQUEST_LIMITER, limiters_for
+from kobe.execution.signing import RequestSigner, get_server_clock, is_clock_error
+from kobe.logs.sink import get_file_sink
 
 def _log_executor_event(event: dict, path: str | None = None) -> None:
     """
@@ -11,14 +20,100 @@ def _log_executor_event(event: dict, path: str | None = None) -> None:
     """
     try:
         log_path = path or os.getenv("KOBE_EXECUTOR_LOG", "logs/executor.jsonl")
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8") as f:
-            json.dump(event, f, ensure_ascii=False)
-            f.write("\n")
+        # Handle partagé (dossier créé une fois, fichier gardé ouvert)
+        get_file_sink(log_path).write(json.dumps(event, ensure_ascii=False))
     except Exception:
         # On ne doit jamais faire planter l'exécuteur à cause de la journalisation
         return
 
+# Envoi d'ordres rejouable (newClientOrderId): timeout court, puis recherche de
+# l'ordre par son id avant tout renvoi (jamais de second envoi "à l'aveugle").
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+ORDER_TIMEOUT_S = _env_float("KOBE_ORDER_TIMEOUT_S", 2.0)
+ORDER_SUBMIT_ATTEMPTS = 3
+ORDER_LOOKUP_DELAY_S = 0.2
+# Codes Binance: ordre / liste inexistant, doublon d'id client sur un ordre ouvert
+_ORDER_MISSING_CODES = (-2013, -2011)
+_MISSING = object()
+
+
+@lru_cache(maxsize=1)
+def _config_lot_step() -> float:
+    """lot_step de config.yaml, lu une seule fois par process (repli: 0.001)."""
+    try:
+        from kobe.core.secrets import load_config
+        return float(load_config("config.yaml").get("lot_step", 0.001))
+    except Exception:
+        return 0.001
+
+
+def _round_quantity(symbol, quantity, filters=None) -> Decimal:
+    """Quantité arrondie vers le bas au stepSize.
+
+    Priorité: filtre LOT_SIZE du symbole (cache exchangeInfo), puis KOBE_LOT_STEP,
+    puis lot_step de config.yaml.
+    """
+    filters = filters or symbol_filters(symbol)
+    if filters is not None and Decimal(filters.step_size) > 0:
+        return Decimal(str(filters.round_qty(quantity)))
+    step_val = _config_lot_step()
+    step_cfg = os.getenv("KOBE_LOT_STEP")
+    if step_cfg:
+        try:
+            step_val = float(step_cfg)
+        except ValueError:
+            pass
+    return Decimal(str(quantity)).quantize(Decimal(str(step_val)), rounding=ROUND_DOWN)
+
+
+def _round_price(price, filters=None) -> float:
+    """Prix arrondi au tickSize du symbole si connu (sinon inchangé)."""
+    if filters is not None and Decimal(filters.tick_size) > 0:
+        return filters.round_price(price)
+    return float(price)
+
+
+def _is_ack(resp) -> bool:
+    """Réponse exchange acceptée (dict sans clé 'error'); None = mode dry / pas de clés."""
+    return isinstance(resp, dict) and "error" not in resp and resp.get("code") is None
+
+
+def _is_retryable(resp) -> bool:
+    """Échec transitoire (exception, 5xx): à retenter; un 4xx (-2010...) est définitif."""
+    if not isinstance(resp, dict) or _is_ack(resp):
+        return False
+    code = resp.get("error")
+    return not (isinstance(code, int) and 400 <= code < 500)
+
+
+def _exit_params(symbol, close_side, qty_float, order_type, price, client_id=None) -> dict:
+    params = {
+        "symbol": symbol,
+        "side": close_side,
+        "type": order_type,
+        "quantity": qty_float,
+    }
+    if client_id:
+        params["newClientOrderId"] = client_id
+    try:
+        if price is not None:
+            price_val = float(price)
+            params["price"] = price_val
+            if order_type == "STOP_LOSS_LIMIT":
+                params["stopPrice"] = price_val
+            params["timeInForce"] = "GTC"
+    except (TypeError, ValueError):
+        # On laisse Binance renvoyer une erreur si le prix est invalide.
+        pass
+    return params
+
+
 class BinanceSpot:
     """
     Squelette dry-run: expose check_account() pour valider la signature
@@ -33,62 +128,126 @@ class BinanceSpot:
         self.secret = (secret or os.getenv("BINANCE_API_SECRET", "")).strip()
         self.base = os.getenv("BINANCE_BASE_URL", "https://api.binance.com").rstrip("/")
 
+    def _signer(self) -> RequestSigner:
+        # Clé HMAC initialisée une fois par client
+        signer = getattr(self, "_request_signer", None)
+        if signer is None:
+            signer = self._request_signer = RequestSigner(self.secret)
+        return signer
+
+    def _signed_request(self, method, path, params=None, timeout=8):
+        """Requête SIGNED (recvWindow + timestamp corrigé de l'écart serveur).
+
+        Une erreur -1021 (horloge hors fenêtre) déclenche une resynchronisation
+        puis un seul rejeu; les autres HTTPError remontent à l'appelant.
+        """
+        clock = get_server_clock(self.base)
+        headers = {"X-MBX-APIKEY": self.key}
+        for attempt in (0, 1):
+            for limiter in limiters_for(method, path):
+                limiter.acquire()
+            query = self._signer().build(params, clock.now_ms())
+            req = urllib.request.Request(f"{self.base}{path}?{query}", method=method, headers=headers)
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as r:
+                    return json.loads(r.read().decode("utf-8"))
+            except urllib.error.HTTPError as e:
+                body = e.read().decode("utf-8")
+                if attempt == 0 and is_clock_error(body) and clock.sync() is not None:
+                    continue
+                e.body = body
+                raise
+
     def _signed_get(self, path, params=None, timeout=8):
         # Mode dry si aucune clé: ne rien imprimer, laisser l'appelant décider.
         if not self.key or not self.secret:
             return None
-        params = dict(params or {})
-        params["timestamp"] = int(time.time() * 1000)
-        query = urllib.parse.urlencode(params)
-        sig = hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-        url = f"{self.base}{path}?{query}&signature={sig}"
-        req = urllib.request.Request(url, headers={"X-MBX-APIKEY": self.key})
-        with urllib.request.urlopen(req, timeout=timeout) as r:
-            return json.loads(r.read().decode("utf-8"))
+        return self._signed_request("GET", path, params, timeout)
 
     def check_account(self):
         """Appel SIGNED simple pour vérifier permissions (si clés set)."""
         return self._signed_get("/api/v3/account", {})
 
     def _signed_post(self, path, params=None, timeout=8):
-        """POST signé simple (pour create_order)."""
+        """POST signé simple (pour create_order); rejouable si la requête porte un id client."""
         if not self.key or not self.secret:
             return None
-        params = dict(params or {})
-        params["timestamp"] = int(time.time() * 1000)
-        query = urllib.parse.urlencode(params)
-        sig = hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-        url = f"{self.base}{path}?{query}&signature={sig}"
-        req = urllib.request.Request(
-            url,
-            method="POST",
-            headers={"X-MBX-APIKEY": self.key}
-        )
+        cid = _client_id_of(path, params)
+        if cid is not None:
+            return self._submit_idempotent(path, params, cid)
         try:
-            with urllib.request.urlopen(req, timeout=timeout) as r:
-                return json.loads(r.read().decode("utf-8"))
+            return self._signed_request("POST", path, params, timeout)
         except urllib.error.HTTPError as e:
-            return {"error": e.code, "message": e.read().decode("utf-8")}
+            return {"error": e.code, "message": e.body}
         except Exception as e:
             return {"error": "exception", "message": str(e)}
-        
+
+    def _submit_idempotent(self, path, params, cid):
+        """
+        Envoi d'ordre sûr à rejouer (timeout court ORDER_TIMEOUT_S).
+
+        - Rejet 4xx: définitif, retourné tel quel (rien n'a été créé).
+        - Timeout / erreur réseau / 5xx / doublon: issue inconnue => recherche
+          de l'ordre par son id client; trouvé => réponse "recovered", absent
+          (-2013) => nouvel envoi avec le même id, introuvable faute de réponse
+          => erreur outcome="unknown" (aucun renvoi: risque de double exécution).
+        - Ordre MARKET absent (-2013): jamais renvoyé. L'envoi d'origine peut
+          encore être traité après la recherche, et un ordre exécuté ne bloque
+          plus son id client: renvoyer pourrait exécuter deux fois. Erreur
+          outcome="unknown", l'issue réelle arrive par le flux user data.
+        """
+        last = None
+        for _ in range(ORDER_SUBMIT_ATTEMPTS):
+            try:
+                return self._signed_request("POST", path, params, ORDER_TIMEOUT_S)
+            except urllib.error.HTTPError as e:
+                last = {"error": e.code, "message": e.body}
+                if not _outcome_unknown(e.code, e.body):
+                    return last
+            except Exception as e:
+                last = {"error": "exception", "message": str(e)}
+            found = self._lookup_submitted(path, params, cid)
+            if found is None or (found is _MISSING and not _resubmittable(params)):
+                return {**last, "clientOrderId": cid, "outcome": "unknown"}
+            if found is not _MISSING:
+                return _recovered(path, found)
+        return last
+
+    def _lookup_submitted(self, path, params, cid):
+        """Ordre (ou liste) par id client: dict, _MISSING si absent, None si indéterminé."""
+        lookup_path, lookup_params = _lookup_request(path, params, cid)
+        for attempt in range(ORDER_SUBMIT_ATTEMPTS):
+            time.sleep(ORDER_LOOKUP_DELAY_S * (attempt + 1))
+            try:
+                return self._signed_request("GET", lookup_path, lookup_params, ORDER_TIMEOUT_S)
+            except urllib.error.HTTPError as e:
+                if _error_code(e.body) in _ORDER_MISSING_CODES:
+                    return _MISSING
+            except Exception:
+                pass
+        return None
+
     def _signed_delete(self, path, params=None, timeout=8):
         """DELETE signé pour annuler des ordres (ex: annuler le Stop Loss existant)."""
         if not self.key or not self.secret:
             return None
-        params = dict(params or {})
-        params["timestamp"] = int(time.time() * 1000)
-        query = urllib.parse.urlencode(params)
-        sig = hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-        url = f"{self.base}{path}?{query}&signature={sig}"
-        req = urllib.request.Request(
-            url,
-            method="DELETE",
-            headers={"X-MBX-APIKEY": self.key}
-        )
+        try:
+            return self._signed_request("DELETE", path, params, timeout)
+        except urllib.error.HTTPError as e:
+            return {"error": e.code, "message": e.body}
+        except Exception as e:
+            return {"error": "exception", "message": str(e)}
+
+    def _api_key_request(self, method, path, params=None, timeout=8):
+        """Requête authentifiée par la seule clé API, sans signature (ex: userDataStream)."""
+        if not self.key:
+            return None
+        query = urllib.parse.urlencode(params or {})
+        url = f"{self.base}{path}" + (f"?{query}" if query else "")
+        req = urllib.request.Request(url, method=method, headers={"X-MBX-APIKEY": self.key})
         try:
             with urllib.request.urlopen(req, timeout=timeout) as r:
-                return json.loads(r.read().decode("utf-8"))
+                return json.loads(r.read().decode("utf-8") or "{}")
         except urllib.error.HTTPError as e:
             return {"error": e.code, "message": e.read().decode("utf-8")}
         except Exception as e:
@@ -97,13 +256,30 @@ class BinanceSpot:
     def get_price(self, symbol: str):
         """Prix spot simple via /api/v3/ticker/price."""
         url = f"{self.base}/api/v3/ticker/price?symbol={symbol}"
+        REQUEST_LIMITER.acquire()
         try:
             with urllib.request.urlopen(url, timeout=5) as r:
                 return json.loads(r.read().decode("utf-8"))
         except Exception as e:
             return {"error": "exception", "message": str(e)}
 
-    def build_order_plan(self, symbol, side, quantity, entry_price, take_price=None, stop_price=None, order_type="MARKET"):
+    def get_prices(self, symbols):
+        """Prix de plusieurs symboles en une requête (/api/v3/ticker/price?symbols=[...]): {symbol: réponse}."""
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        query = urllib.parse.urlencode({"symbols": json.dumps(symbols, separators=(",", ":"))})
+        REQUEST_LIMITER.acquire()
+        try:
+            with urllib.request.urlopen(f"{self.base}/api/v3/ticker/price?{query}", timeout=5) as r:
+                rows = json.loads(r.read().decode("utf-8"))
+        except Exception as e:
+            return {s: {"error": "exception", "message": str(e)} for s in symbols}
+        by_symbol = {row.get("symbol"): row for row in rows if isinstance(row, dict)} if isinstance(rows, list) else {}
+        return {s: by_symbol.get(s, {"error": "missing", "message": f"prix absent pour {s}"}) for s in symbols}
+
+    def build_order_plan(self, symbol, side, quantity, entry_price, take_price=None, stop_price=None, order_type="MARKET",
+                         client_key=None):
         """
         Construire un plan d'ordres (entry/TP/SL) sans exécuter quoi que ce soit.
 
@@ -113,38 +289,30 @@ class BinanceSpot:
           - entry: ordre d'entrée (actuellement type=order_type, ex: MARKET)
           - take_profit: LIMIT @ take_price (si fourni)
           - stop_loss: STOP_LIMIT @ stop_price (si fourni)
-        """
-        # Normalisation de la quantité pour respecter le LOT_SIZE (stepSize).
-        # On réutilise la même logique que dans create_order, en la dupliquant
-        # ici pour ne pas dépendre d'effets de bord réseau.
-        step_cfg = os.getenv("KOBE_LOT_STEP")
-        try:
-            from kobe.core.secrets import load_config
-            cfg = load_config("config.yaml")
-            step_val = cfg.get("lot_step", 0.001)
-        except Exception:
-            step_val = 0.001
 
-        if step_cfg:
-            try:
-                step_val = float(step_cfg)
-            except ValueError:
-                pass
-
-        step = Decimal(str(step_val))
-        qty_dec = Decimal(str(quantity))
-
-        qty_rounded = qty_dec.quantize(step, rounding=ROUND_DOWN)
+        client_key (ex: kobe.execution.client_ids.proposal_key(p)) fixe les
+        newClientOrderId des ordres du plan: un même plan renvoyé ne crée pas
+        de doublon. Sans clé, une clé aléatoire est tirée à l'exécution.
+        """
+        # Normalisation de la quantité pour respecter le LOT_SIZE (stepSize du
+        # symbole si connu, sinon lot_step global), sans effet de bord réseau.
+        filters = symbol_filters(symbol)
+        qty_rounded = _round_quantity(symbol, quantity, filters)
 
         # Si après arrondi la quantité est <= 0, on signale un plan invalide.
-        if qty_rounded <= 0:
+        reason = "too_small" if qty_rounded <= 0 else None
+        if reason is None and filters is not None:
+            # minQty / minNotional connus: on refuse ici plutôt qu'après un aller-retour rejeté
+            reason = filters.check(float(qty_rounded), float(entry_price))
+            reason = "too_small" if reason == "min_qty" else reason
+        if reason is not None:
             return {
                 "symbol": symbol,
                 "side": side,
                 "qty_original": float(quantity),
                 "qty_rounded": float(qty_rounded),
                 "valid": False,
-                "reason": "too_small",
+                "reason": reason,
             }
 
         plan = {
@@ -155,7 +323,7 @@ class BinanceSpot:
             "order_type": order_type,
             "entry": {
                 "type": order_type,
-                "price": float(entry_price),
+                "price": _round_price(entry_price, filters),
             },
             "take_profit": None,
             "stop_loss": None,
@@ -164,15 +332,18 @@ class BinanceSpot:
         if take_price is not None:
             plan["take_profit"] = {
                 "type": "LIMIT",
-                "price": float(take_price),
+                "price": _round_price(take_price, filters),
             }
 
         if stop_price is not None:
             plan["stop_loss"] = {
                 "type": "STOP_LIMIT",
-                "price": float(stop_price),
+                "price": _round_price(stop_price, filters),
             }
 
+        if client_key is not None:
+            plan["client_key"] = client_key
+
         plan["valid"] = True
         return plan
 
@@ -191,113 +362,31 @@ class BinanceSpot:
         - On suppose un flux LONG classique (side=BUY) : les ordres de sortie
           (TP/SL) sont des SELL de la même quantité. Pour side=SELL, la méthode
           utilise l'inverse (BUY) pour la clôture.
+        - Les sorties ne partent qu'après acquittement de l'entrée: TP + SL en
+          une seule liste OCO (quantité verrouillée une fois), jambe seule en
+          ordre simple. Un échec transitoire (réseau / 5xx) est retenté une
+          fois, un rejet 4xx (ex: -2010) est définitif. Le résultat "protection" décrit l'état final
+          (protected / partial / unprotected / entry_failed) et la latence
+          entrée → protection, aussi journalisés dans executor.jsonl.
         """
         ts = int(time.time() * 1000)
+        error, qty_float = _check_plan(plan, ts)
+        if error is not None:
+            return error
 
-        symbol = plan.get("symbol")
-        side = plan.get("side")
-        qty = plan.get("qty_rounded")
-        is_valid = plan.get("valid", False)
-
-        # Validation minimale du plan reçu.
-        if not is_valid or not symbol or not side or qty is None:
-            ev = {
-                "ts": ts,
-                "symbol": symbol,
-                "side": side,
-                "qty_rounded": float(qty) if qty is not None else None,
-                "status": "plan_invalid",
-                "reason": "missing_fields_or_not_valid",
-            }
-            _log_executor_event(ev)
-            return {
-                "error": "invalid_plan",
-                "message": "order plan is invalid or incomplete",
-                "event": ev,
-            }
-
-        try:
-            qty_float = float(qty)
-        except (TypeError, ValueError):
-            qty_float = 0.0
-
-        if qty_float <= 0:
-            ev = {
-                "ts": ts,
-                "symbol": symbol,
-                "side": side,
-                "qty_rounded": qty_float,
-                "status": "plan_invalid",
-                "reason": "non_positive_quantity",
-            }
-            _log_executor_event(ev)
-            return {
-                "error": "invalid_plan",
-                "message": "non-positive quantity in order plan",
-                "event": ev,
-            }
-
-        # Kill-switch journalier basé sur la perte en EUR (copie de create_order).
-        max_daily_loss_env = os.getenv("MAX_DAILY_LOSS_EUR")
-        try:
-            max_daily_loss = float(max_daily_loss_env) if max_daily_loss_env else 0.0
-        except ValueError:
-            max_daily_loss = 0.0
-
-        current_daily_loss_env = os.getenv("KOBE_DAILY_LOSS_EUR")
-        try:
-            current_daily_loss = float(current_daily_loss_env) if current_daily_loss_env else 0.0
-        except ValueError:
-            current_daily_loss = 0.0
-
-        if max_daily_loss > 0 and current_daily_loss <= -max_daily_loss:
-            ev = {
-                "ts": ts,
-                "symbol": symbol,
-                "side": side,
-                "qty_rounded": qty_float,
-                "status": "kill_switch_blocked_plan",
-                "max_daily_loss_eur": max_daily_loss,
-                "current_daily_loss_eur": current_daily_loss,
-            }
-            _log_executor_event(ev)
-            return {
-                "error": "kill_switch",
-                "message": "Daily loss limit exceeded, refusing to execute order plan.",
-                "event": ev,
-            }
-
-        # Construction des ordres d'après le plan.
+        symbol, side = plan["symbol"], plan["side"]
         orders_resp: dict[str, object] = {
             "entry": None,
             "take_profit": None,
             "stop_loss": None,
         }
+        key = plan.get("client_key") or new_client_key()
+        order_type, entry_params = _entry_params(plan, qty_float, key)
 
-        # Ordre d'entrée (type par défaut = plan["order_type"] ou MARKET).
-        entry_info = plan.get("entry") or {}
-        order_type = entry_info.get("type", plan.get("order_type", "MARKET"))
-
-        entry_params = {
-            "symbol": symbol,
-            "side": side,
-            "type": order_type,
-            "quantity": qty_float,
-        }
-
-        # Pour un LIMIT d'entrée, on utilise le prix d'entry du plan.
-        if order_type == "LIMIT":
-            price = entry_info.get("price")
-            if price is not None:
-                try:
-                    entry_params["price"] = float(price)
-                    entry_params["timeInForce"] = "GTC"
-                except (TypeError, ValueError):
-                    # Si le prix est invalide, on laisse Binance répondre une erreur.
-                    pass
-
+        t_start = time.perf_counter()
         resp_entry = self._signed_post("/api/v3/order", entry_params)
-        ev_entry = {
+        t_entry = time.perf_counter()
+        _log_executor_event({
             "ts": ts,
             "kind": "entry",
             "symbol": symbol,
@@ -306,170 +395,185 @@ class BinanceSpot:
             "qty_rounded": qty_float,
             "params": entry_params,
             "response": resp_entry,
-        }
-        _log_executor_event(ev_entry)
+        })
+        _track(resp_entry, entry_params, "entry")
         orders_resp["entry"] = resp_entry
 
-        # Pour les ordres de sortie, on inverse le side (BUY → SELL, SELL → BUY).
-        side_upper = str(side).upper()
-        close_side = "SELL" if side_upper == "BUY" else "BUY"
-
-        # Take-profit : LIMIT @ price, quantité complète.
-        tp_info = plan.get("take_profit")
-        if tp_info is not None:
-            tp_price = tp_info.get("price")
-            tp_params = {
-                "symbol": symbol,
-                "side": close_side,
-                "type": "LIMIT",
-                "quantity": qty_float,
-            }
-            try:
-                if tp_price is not None:
-                    tp_params["price"] = float(tp_price)
-                    tp_params["timeInForce"] = "GTC"
-            except (TypeError, ValueError):
-                # On laisse Binance renvoyer une erreur si le prix est invalide.
-                pass
-
-            resp_tp = self._signed_post("/api/v3/order", tp_params)
-            ev_tp = {
-                "ts": ts,
-                "kind": "take_profit",
-                "symbol": symbol,
-                "side": close_side,
-                "qty_rounded": qty_float,
-                "params": tp_params,
-                "response": resp_tp,
-            }
-            _log_executor_event(ev_tp)
-            orders_resp["take_profit"] = resp_tp
-
-        # Stop-loss : STOP_LOSS_LIMIT @ price/stopPrice, quantité complète.
-        sl_info = plan.get("stop_loss")
-        if sl_info is not None:
-            sl_price = sl_info.get("price")
-            sl_params = {
-                "symbol": symbol,
-                "side": close_side,
-                "type": "STOP_LOSS_LIMIT",
-                "quantity": qty_float,
-            }
-            try:
-                if sl_price is not None:
-                    price_val = float(sl_price)
-                    sl_params["price"] = price_val
-                    sl_params["stopPrice"] = price_val
-                    sl_params["timeInForce"] = "GTC"
-            except (TypeError, ValueError):
-                # Même logique: Binance renverra une erreur si le prix est invalide.
-                pass
+        close_side, legs = _exit_legs(plan, qty_float, key)
+
+        # Les sorties ne partent qu'une fois l'entrée acquittée par l'exchange.
+        if not legs:
+            protection = {"status": "no_exit_legs", "legs": {}}
+        elif not _is_ack(resp_entry):
+            protection = {"status": "entry_failed", "legs": {k: "skipped" for k in legs}}
+        elif len(legs) == 2:
+            protection = self._place_oco(ts, symbol, close_side, qty_float, legs, orders_resp)
+        else:
+            (kind, params), = legs.items()
+            resp = self._send_exit_leg(ts, kind, symbol, close_side, qty_float, params)
+            orders_resp[kind] = resp
+            protection = _legs_protection({kind: resp})
+
+        return _finish_plan(plan, orders_resp, protection, ts, t_start, t_entry, qty_float)
+
+    def _send_exit_leg(self, ts, kind, symbol, close_side, qty_float, params, path="/api/v3/order") -> dict:
+        resp = self._signed_post(path, params)
+        if _is_retryable(resp):
+            # Une seule nouvelle tentative: erreur réseau / 5xx transitoire.
+            _log_leg(ts, kind, symbol, close_side, qty_float, params, resp, retry=True)
+            resp = self._signed_post(path, params)
+        _log_leg(ts, kind, symbol, close_side, qty_float, params, resp)
+        return resp
 
-            resp_sl = self._signed_post("/api/v3/order", sl_params)
-            ev_sl = {
-                "ts": ts,
-                "kind": "stop_loss",
-                "symbol": symbol,
-                "side": close_side,
-                "qty_rounded": qty_float,
-                "params": sl_params,
-                "response": resp_sl,
-            }
-            _log_executor_event(ev_sl)
-            orders_resp["stop_loss"] = resp_sl
+    def _place_oco(self, ts, symbol, close_side, qty_float, legs, orders_resp) -> dict:
+        """
+        TP + SL en une seule liste OCO (un seul POST, quantité verrouillée une fois).
 
-        return {
-            "plan": plan,
-            "orders": orders_resp,
-        }
+        En spot, la première jambe posée verrouille la quantité: deux ordres
+        séparés => le second est rejeté (-2010) et la position reste sans stop.
+        """
+        params = _oco_params(symbol, close_side, qty_float, legs)
+        resp = self._send_exit_leg(ts, "oco", symbol, close_side, qty_float, params, path="/api/v3/orderList/oco")
+        orders_resp["oco"] = resp
+        return _oco_protection(resp, legs)
 
-    def create_order(self, symbol, side, quantity, order_type="MARKET", take_price=None, stop_price=None):
+    def _find_stop_order(self, symbol, close_side):
+        """Ordre stop ouvert pour ce symbole/side (None si absent ou API indisponible)."""
+        try:
+            orders = self._signed_get("/api/v3/openOrders", {"symbol": symbol})
+        except Exception:
+            return None
+        _reconcile(symbol, orders)
+        return _pick_stop_order(orders, close_side)
+
+    def replace_stop_order(self, symbol, close_side, qty, new_stop, take=None) -> dict:
+        """Remplacer le stop d'une position sans fenêtre de découverture côté client.
+
+        - SL simple: POST /api/v3/order/cancelReplace (annulation + nouvel ordre
+          en un seul appel, STOP_ON_FAILURE: si l'annulation échoue, rien n'est posé).
+          Le TP n'est pas touché.
+        - SL membre d'une liste OCO: annulation de la liste puis, seulement si
+          l'annulation est acquittée, ré-émission immédiate de l'OCO (TP =
+          `take` ou jambe limite de la liste + nouveau stop), sans pause.
+        - Aucun stop trouvé: simple pose du nouveau stop.
+
+        Le stop courant est lu dans l'index des ordres (kobe.execution.order_state)
+        s'il le connaît; sinon, ou si l'exchange refuse cet ordre (périmé), via
+        GET /api/v3/openOrders.
+
+        Retourne {"status": ok|failed, "method": ..., "exposure_ms": ..., "response": ...};
+        exposure_ms = durée maximale pendant laquelle la position a pu rester sans stop.
+        """
+        ts = int(time.time() * 1000)
+        t0 = time.perf_counter()
+        current = _known_stop_order(symbol, close_side)
+        if current is not None:
+            method, ok, resp = self._replace_stop(ts, symbol, close_side, qty, new_stop, take, current)
+            if ok:
+                return _finish_stop_replace(ts, symbol, close_side, qty, new_stop, method, ok, resp, t0)
+            # Stop de l'index périmé (exécuté / annulé sans event reçu): relecture REST
+            ORDER_INDEX.forget(symbol, current["orderId"])
+        current = self._find_stop_order(symbol, close_side)
+        method, ok, resp = self._replace_stop(ts, symbol, close_side, qty, new_stop, take, current)
+        return _finish_stop_replace(ts, symbol, close_side, qty, new_stop, method, ok, resp, t0)
+
+    def _replace_stop(self, ts, symbol, close_side, qty, new_stop, take, current):
+        """Un essai de remplacement: (méthode, ok, réponse)."""
+        method, legs = _stop_replace_method(symbol, close_side, qty, new_stop, take, current)
+        if method in ("oco_reissue", "oco_cancel_new"):
+            cancel = self._signed_delete("/api/v3/orderList",
+                                         {"symbol": symbol, "orderListId": current["orderListId"]})
+            _track(cancel)
+            if not _is_ack(cancel):
+                # Liste non annulée (déjà exécutée / inconnue): rien n'est reposé
+                return method, False, cancel
+        if method == "oco_reissue":
+            orders_resp: dict[str, object] = {}
+            ok = self._place_oco(ts, symbol, close_side, qty, legs, orders_resp)["status"] == "protected"
+            resp = orders_resp.get("oco")
+        elif method == "cancel_replace":
+            resp = self._signed_post("/api/v3/order/cancelReplace", _cancel_replace_params(legs["stop_loss"], current))
+            ok = _is_ack(resp)
+        else:
+            resp = self._signed_post("/api/v3/order", legs["stop_loss"])
+            ok = _is_ack(resp)
+        return method, ok, resp
+
+    def create_order(self, symbol, side, quantity, order_type="MARKET", take_price=None, stop_price=None,
+                     client_order_id=None):
         """
         Exécuter un ordre spot réel:
           side: BUY ou SELL
           order_type: MARKET (par défaut)
           quantity: quantité base (ex: 0.01 BTC)
+          client_order_id: newClientOrderId (déterministe côté appelant pour
+          un envoi idempotent; aléatoire sinon)
         """
-        # Kill-switch journalier basé sur la perte en EUR.
-        #
-        # MAX_DAILY_LOSS_EUR : limite journalière (en EUR) configurée via l'env
-        # KOBE_DAILY_LOSS_EUR : perte courante du jour (en EUR, valeur négative)
-        max_daily_loss_env = os.getenv("MAX_DAILY_LOSS_EUR")
-        try:
-            max_daily_loss = float(max_daily_loss_env) if max_daily_loss_env else 0.0
-        except ValueError:
-            max_daily_loss = 0.0
+        error, params = _prepare_order(symbol, side, quantity, order_type, client_order_id)
+        if error is not None:
+            return error
 
-        current_daily_loss_env = os.getenv("KOBE_DAILY_LOSS_EUR")
-        try:
-            current_daily_loss = float(current_daily_loss_env) if current_daily_loss_env else 0.0
-        except ValueError:
-            current_daily_loss = 0.0
+        resp = self._signed_post("/api/v3/order", params)
+        _log_order(symbol, side, quantity, order_type, take_price, stop_price, params, resp)
+        return resp
 
-        # Si la perte courante est <= -MAX_DAILY_LOSS_EUR, on bloque tout nouvel ordre.
-        if max_daily_loss > 0 and current_daily_loss <= -max_daily_loss:
-            ev = {
-                "ts": int(time.time() * 1000),
-                "symbol": symbol,
-                "side": side,
-                "qty_original": float(quantity),
-                "order_type": order_type,
-                "status": "kill_switch_blocked",
-                "max_daily_loss_eur": max_daily_loss,
-                "current_daily_loss_eur": current_daily_loss,
-            }
-            _log_executor_event(ev)
-            return {
-                "error": "kill_switch",
-                "message": "Daily loss limit exceeded, refusing new orders.",
-            }
+    def cancel_order(self, symbol, order_id):
+        """Annuler un ordre précis (DELETE /api/v3/order)."""
+        resp = self._signed_delete("/api/v3/order", {"symbol": symbol, "orderId": order_id})
+        _track(resp)
+        return resp
 
-        # Normalisation de la quantité pour respecter le LOT_SIZE (stepSize).
-        # On utilise le step défini dans la config (config.yaml: lot_step), avec
-        # un fallback conservateur à 0.001 si absent.
-        step_cfg = os.getenv("KOBE_LOT_STEP")
-        try:
-            from kobe.core.secrets import load_config
-            cfg = load_config("config.yaml")
-            step_val = cfg.get("lot_step", 0.001)
-        except Exception:
-            step_val = 0.001
 
-        if step_cfg:
-            try:
-                step_val = float(step_cfg)
-            except ValueError:
-                pass
+# --- Logique commune aux clients synchrone et asynchrone -----------------------
 
-        step = Decimal(str(step_val))
-        qty_dec = Decimal(str(quantity))
+def _daily_loss_block():
+    """(limite, perte courante) si le kill-switch journalier bloque, sinon None.
 
-        # On arrondit toujours à l'inférieur pour ne jamais dépasser la taille calculée
-        qty_rounded = qty_dec.quantize(step, rounding=ROUND_DOWN)
+    MAX_DAILY_LOSS_EUR : limite journalière (en EUR) configurée via l'env
+    KOBE_DAILY_LOSS_EUR : perte courante du jour (en EUR, valeur négative),
+                          désormais alimentée par kobe.core.portfolio
+    """
+    max_daily_loss_env = os.getenv("MAX_DAILY_LOSS_EUR")
+    try:
+        max_daily_loss = float(max_daily_loss_env) if max_daily_loss_env else 0.0
+    except ValueError:
+        max_daily_loss = 0.0
 
-        # Sécurité: si après arrondi la quantité est <= 0, on ne tente pas l'ordre
-        if qty_rounded <= 0:
-            ev = {
-                "ts": int(time.time() * 1000),
-                "symbol": symbol,
-                "side": side,
-                "qty_original": float(quantity),
-                "qty_rounded": float(qty_rounded),
-                "order_type": order_type,
-                "status": "too_small",
-            }
-            _log_executor_event(ev)
-            return {"error": "too_small", "message": f"quantity {quantity} too small after lot-size rounding"}
+    # PnL du jour suivi par le tracker de portefeuille (KOBE_DAILY_LOSS_EUR = surcharge)
+    current_daily_loss = current_daily_loss_eur()
 
-        params = {
+    # Si la perte courante est <= -MAX_DAILY_LOSS_EUR, on bloque tout nouvel ordre.
+    if max_daily_loss > 0 and current_daily_loss <= -max_daily_loss:
+        return max_daily_loss, current_daily_loss
+    return None
+
+
+def _prepare_order(symbol, side, quantity, order_type, client_id=None):
+    """Kill-switch + arrondi LOT_SIZE: (erreur, None) ou (None, params de l'ordre)."""
+    blocked = _daily_loss_block()
+    if blocked is not None:
+        ev = {
+            "ts": int(time.time() * 1000),
             "symbol": symbol,
             "side": side,
-            "type": order_type,
-            "quantity": float(qty_rounded),
+            "qty_original": float(quantity),
+            "order_type": order_type,
+            "status": "kill_switch_blocked",
+            "max_daily_loss_eur": blocked[0],
+            "current_daily_loss_eur": blocked[1],
         }
+        _log_executor_event(ev)
+        return {
+            "error": "kill_switch",
+            "message": "Daily loss limit exceeded, refusing new orders.",
+        }, None
 
-        resp = self._signed_post("/api/v3/order", params)
+    # Normalisation de la quantité pour respecter le LOT_SIZE (stepSize).
+    # Toujours à l'inférieur pour ne jamais dépasser la taille calculée.
+    qty_rounded = _round_quantity(symbol, quantity)
 
+    # Sécurité: si après arrondi la quantité est <= 0, on ne tente pas l'ordre
+    if qty_rounded <= 0:
         ev = {
             "ts": int(time.time() * 1000),
             "symbol": symbol,
@@ -477,11 +581,342 @@ class BinanceSpot:
             "qty_original": float(quantity),
             "qty_rounded": float(qty_rounded),
             "order_type": order_type,
-            "take_price": float(take_price) if take_price is not None else None,
-            "stop_price": float(stop_price) if stop_price is not None else None,
-            "params": params,
-            "response": resp,
+            "status": "too_small",
         }
         _log_executor_event(ev)
+        return {"error": "too_small", "message": f"quantity {quantity} too small after lot-size rounding"}, None
+
+    return None, {
+        "symbol": symbol,
+        "side": side,
+        "type": order_type,
+        "quantity": float(qty_rounded),
+        "newClientOrderId": client_id or client_order_id(new_client_key(), "entry"),
+    }
+
+
+def _log_order(symbol, side, quantity, order_type, take_price, stop_price, params, resp) -> None:
+    _log_executor_event({
+        "ts": int(time.time() * 1000),
+        "symbol": symbol,
+        "side": side,
+        "qty_original": float(quantity),
+        "qty_rounded": params["quantity"],
+        "order_type": order_type,
+        "take_price": float(take_price) if take_price is not None else None,
+        "stop_price": float(stop_price) if stop_price is not None else None,
+        "params": params,
+        "response": resp,
+    })
+    _track(resp, params, "entry")
+
+
+def _client_id_of(path, params):
+    """Id client d'une requête de création d'ordre (None: pas d'envoi idempotent)."""
+    if not params:
+        return None
+    if path == "/api/v3/orderList/oco":
+        return params.get("listClientOrderId")
+    if path in ("/api/v3/order", "/api/v3/order/cancelReplace"):
+        return params.get("newClientOrderId")
+    return None
+
+
+def _lookup_request(path, params, cid):
+    if path == "/api/v3/orderList/oco":
+        return "/api/v3/orderList", {"origClientOrderId": cid}
+    return "/api/v3/order", {"symbol": params.get("symbol"), "origClientOrderId": cid}
+
+
+def _error_code(body):
+    try:
+        return json.loads(body).get("code")
+    except Exception:
+        return None
 
-        return resp
+
+def _outcome_unknown(status, body) -> bool:
+    """Issue inconnue côté exchange: 5xx, ou doublon d'id (ordre déjà reçu)."""
+    return status >= 500 or "duplicate order" in str(body).lower()
+
+
+def _resubmittable(params) -> bool:
+    """Renvoi sûr après un "introuvable": ordres qui restent ouverts (id client réservé), pas MARKET."""
+    return str((params or {}).get("type", "")).upper() != "MARKET"
+
+
+def _recovered(path, found) -> dict:
+    """Ordre retrouvé par id client, au format de la réponse de la requête d'origine."""
+    if path == "/api/v3/order/cancelReplace":
+        return {"cancelResult": "SUCCESS", "newOrderResult": "SUCCESS", "newOrderResponse": found,
+                "recovered": True}
+    return {**found, "recovered": True}
+
+
+def _track(resp, params=None, kind=None) -> None:
+    """Réponse REST d'un ordre → index des ordres (jamais bloquant pour l'exécution)."""
+    try:
+        ORDER_INDEX.on_response(resp, params, kind)
+    except Exception as e:
+        print(f"[binance_spot] index des ordres: {e}")
+
+
+def _reconcile(symbol, orders) -> None:
+    if isinstance(orders, list):
+        try:
+            ORDER_INDEX.reconcile(symbol, orders)
+        except Exception as e:
+            print(f"[binance_spot] index des ordres: {e}")
+
+
+def _known_stop_order(symbol, close_side):
+    """Stop vivant connu de l'index (forme openOrders), sans aller-retour REST; sinon None."""
+    for rec in ORDER_INDEX.live(symbol, kind="stop_loss", side=close_side):
+        if rec.order_id is not None:
+            siblings = [o.to_open_order() for o in ORDER_INDEX.live(symbol, kind="take_profit", side=close_side)]
+            return _with_list_take(rec.to_open_order(), siblings)
+    return None
+
+
+def _check_plan(plan: dict, ts: int):
+    """Validation du plan + kill-switch: (erreur, qty) avec erreur=None si le plan peut partir."""
+    symbol = plan.get("symbol")
+    side = plan.get("side")
+    qty = plan.get("qty_rounded")
+    is_valid = plan.get("valid", False)
+
+    # Validation minimale du plan reçu.
+    if not is_valid or not symbol or not side or qty is None:
+        ev = {
+            "ts": ts,
+            "symbol": symbol,
+            "side": side,
+            "qty_rounded": float(qty) if qty is not None else None,
+            "status": "plan_invalid",
+            "reason": "missing_fields_or_not_valid",
+        }
+        _log_executor_event(ev)
+        return {
+            "error": "invalid_plan",
+            "message": "order plan is invalid or incomplete",
+            "event": ev,
+        }, 0.0
+
+    try:
+        qty_float = float(qty)
+    except (TypeError, ValueError):
+        qty_float = 0.0
+
+    if qty_float <= 0:
+        ev = {
+            "ts": ts,
+            "symbol": symbol,
+            "side": side,
+            "qty_rounded": qty_float,
+            "status": "plan_invalid",
+            "reason": "non_positive_quantity",
+        }
+        _log_executor_event(ev)
+        return {
+            "error": "invalid_plan",
+            "message": "non-positive quantity in order plan",
+            "event": ev,
+        }, qty_float
+
+    # Kill-switch journalier basé sur la perte en EUR (même règle que create_order).
+    blocked = _daily_loss_block()
+    if blocked is not None:
+        ev = {
+            "ts": ts,
+            "symbol": symbol,
+            "side": side,
+            "qty_rounded": qty_float,
+            "status": "kill_switch_blocked_plan",
+            "max_daily_loss_eur": blocked[0],
+            "current_daily_loss_eur": blocked[1],
+        }
+        _log_executor_event(ev)
+        return {
+            "error": "kill_switch",
+            "message": "Daily loss limit exceeded, refusing to execute order plan.",
+            "event": ev,
+        }, qty_float
+
+    return None, qty_float
+
+
+def _entry_params(plan: dict, qty_float: float, key: str):
+    """Ordre d'entrée (type par défaut = plan["order_type"] ou MARKET)."""
+    entry_info = plan.get("entry") or {}
+    order_type = entry_info.get("type", plan.get("order_type", "MARKET"))
+
+    params = {
+        "symbol": plan["symbol"],
+        "side": plan["side"],
+        "type": order_type,
+        "quantity": qty_float,
+        "newClientOrderId": client_order_id(key, "entry"),
+    }
+
+    # Pour un LIMIT d'entrée, on utilise le prix d'entry du plan.
+    if order_type == "LIMIT":
+        price = entry_info.get("price")
+        if price is not None:
+            try:
+                params["price"] = float(price)
+                params["timeInForce"] = "GTC"
+            except (TypeError, ValueError):
+                # Si le prix est invalide, on laisse Binance répondre une erreur.
+                pass
+    return order_type, params
+
+
+def _exit_legs(plan: dict, qty_float: float, key: str):
+    """(close_side, {"take_profit": params, "stop_loss": params}) d'après le plan."""
+    symbol = plan["symbol"]
+    # Pour les ordres de sortie, on inverse le side (BUY → SELL, SELL → BUY).
+    close_side = "SELL" if str(plan["side"]).upper() == "BUY" else "BUY"
+
+    legs: dict[str, dict] = {}
+    tp_info = plan.get("take_profit")
+    if tp_info is not None:
+        legs["take_profit"] = _exit_params(symbol, close_side, qty_float, "LIMIT", tp_info.get("price"),
+                                           client_order_id(key, "take_profit"))
+    sl_info = plan.get("stop_loss")
+    if sl_info is not None:
+        legs["stop_loss"] = _exit_params(symbol, close_side, qty_float, "STOP_LOSS_LIMIT", sl_info.get("price"),
+                                         client_order_id(key, "stop_loss"))
+    return close_side, legs
+
+
+def _log_leg(ts, kind, symbol, close_side, qty_float, params, resp, retry=False) -> None:
+    ev = {"ts": ts, "kind": kind, "symbol": symbol, "side": close_side,
+          "qty_rounded": qty_float, "params": params, "response": resp}
+    if retry:
+        ev["retry"] = True
+    else:
+        _track(resp, params, kind)
+    _log_executor_event(ev)
+
+
+def _legs_protection(results: dict) -> dict:
+    status = {kind: ("ok" if _is_ack(resp) else "failed") for kind, resp in results.items()}
+    failed = [k for k, v in status.items() if v == "failed"]
+    if not failed:
+        overall = "protected"
+    elif "stop_loss" in failed:
+        # Position sans stop sur l'exchange: à traiter en priorité par l'appelant.
+        overall = "unprotected"
+    else:
+        overall = "partial"
+    return {"status": overall, "legs": status, "failed_legs": failed}
+
+
+def _oco_params(symbol, close_side, qty_float, legs) -> dict:
+    tp, sl = legs["take_profit"], legs["stop_loss"]
+    limit_leg = {"Type": "LIMIT_MAKER", "Price": tp.get("price")}
+    stop_leg = {"Type": "STOP_LOSS_LIMIT", "Price": sl.get("price"),
+                "StopPrice": sl.get("stopPrice"), "TimeInForce": "GTC"}
+    # Sortie d'un long (SELL): TP au-dessus du prix, SL en dessous; l'inverse pour un short.
+    above, below = (limit_leg, stop_leg) if close_side == "SELL" else (stop_leg, limit_leg)
+    params = {"symbol": symbol, "side": close_side, "quantity": qty_float}
+    # Ids client des jambes repris des ordres simples; id de liste dérivé du SL
+    tp_id, sl_id = tp.get("newClientOrderId"), sl.get("newClientOrderId")
+    if tp_id and sl_id:
+        limit_leg["ClientOrderId"], stop_leg["ClientOrderId"] = tp_id, sl_id
+        params["listClientOrderId"] = client_order_id(sl_id, "oco")
+    for prefix, leg in (("above", above), ("below", below)):
+        for k, v in leg.items():
+            if v is not None:
+                params[f"{prefix}{k}"] = v
+    return params
+
+
+def _oco_protection(resp, legs) -> dict:
+    ok = _is_ack(resp)
+    return {
+        "status": "protected" if ok else "unprotected",
+        "mode": "oco",
+        "legs": {k: ("ok" if ok else "failed") for k in legs},
+        "failed_legs": [] if ok else list(legs),
+    }
+
+
+def _finish_plan(plan, orders_resp, protection, ts, t_start, t_entry, qty_float) -> dict:
+    """Latences entrée / entrée → protection, event "protection" et résultat final."""
+    t_done = time.perf_counter()
+    protection["entry_ms"] = round((t_entry - t_start) * 1000, 3)
+    if protection["status"] in ("protected", "partial", "unprotected"):
+        protection["entry_to_protected_ms"] = round((t_done - t_entry) * 1000, 3)
+    _log_executor_event({
+        "ts": ts,
+        "kind": "protection",
+        "symbol": plan["symbol"],
+        "side": plan["side"],
+        "qty_rounded": qty_float,
+        **protection,
+    })
+    return {
+        "plan": plan,
+        "orders": orders_resp,
+        "protection": protection,
+    }
+
+
+def _pick_stop_order(orders, close_side):
+    for o in orders or []:
+        if o.get("type") in ("STOP_LOSS_LIMIT", "STOP_LOSS") and o.get("side") == close_side:
+            return _with_list_take(o, orders)
+    return None
+
+
+def _with_list_take(stop, orders):
+    """Stop membre d'une OCO: prix de la jambe limite de la même liste en "listTakePrice"."""
+    list_id = int(stop.get("orderListId", -1))
+    if list_id == -1:
+        return stop
+    for o in orders or []:
+        if (int(o.get("orderListId", -1)) == list_id and o.get("orderId") != stop.get("orderId")
+                and o.get("type") in ("LIMIT_MAKER", "LIMIT")):
+            try:
+                return {**stop, "listTakePrice": float(o.get("price"))}
+            except (TypeError, ValueError):
+                break
+    return stop
+
+
+def _stop_replace_method(symbol, close_side, qty, new_stop, take, current):
+    """Stratégie de remplacement du stop: (méthode, jambes à poser)."""
+    # Clé: stop remplacé + nouveau niveau (un rejeu du même remplacement garde ses ids)
+    replaced = "" if current is None else f"{current.get('orderListId', -1)}:{current.get('orderId')}"
+    key = f"stop|{symbol}|{close_side}|{replaced}|{new_stop!r}"
+    legs = {"stop_loss": _exit_params(symbol, close_side, qty, "STOP_LOSS_LIMIT", new_stop,
+                                      client_order_id(key, "stop_loss"))}
+    if current is None:
+        return "new", legs
+    if int(current.get("orderListId", -1)) == -1:
+        return "cancel_replace", legs
+    # Stop d'une OCO: la liste verrouille la quantité, elle doit être annulée
+    # avant toute pose; TP = jambe limite de la liste si l'appelant n'en donne pas.
+    take = take or current.get("listTakePrice")
+    if take:
+        tp = _exit_params(symbol, close_side, qty, "LIMIT", take, client_order_id(key, "take_profit"))
+        return "oco_reissue", {"take_profit": tp, **legs}
+    return "oco_cancel_new", legs
+
+
+def _cancel_replace_params(sl_params, current) -> dict:
+    return {**sl_params, "cancelReplaceMode": "STOP_ON_FAILURE", "cancelOrderId": current.get("orderId")}
+
+
+def _finish_stop_replace(ts, symbol, close_side, qty, new_stop, method, ok, resp, t0) -> dict:
+    result = {
+        "status": "ok" if ok else "failed",
+        "method": method,
+        "exposure_ms": round((time.perf_counter() - t0) * 1000, 3),
+        "response": resp,
+    }
+    _track(resp, kind="stop_loss")
+    _log_executor_event({"ts": ts, "kind": "stop_replace", "symbol": symbol, "side": close_side,
+                         "qty_rounded": qty, "new_stop": new_stop, **result})
+    return result
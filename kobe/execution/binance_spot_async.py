@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Client spot Binance asynchrone (httpx.AsyncClient), pendant de BinanceSpot.
+
+- Même surface que BinanceSpot: get_price, check_account, create_order,
+  cancel_order, build_order_plan, execute_order_plan, replace_stop_order;
+  mêmes règles (kill-switch, arrondis exchangeInfo, protection TP/SL, journal
+  executor.jsonl) via les helpers communs de kobe.execution.binance_spot.
+- Plusieurs symboles partent en même temps (asyncio.gather) sur une seule
+  connexion HTTP/1.1 keep-alive par hôte; le débit reste borné par les seaux
+  partagés de kobe.execution.rate_limit (communs avec le client synchrone).
+- Signature / horloge serveur: RequestSigner + ServerClock, rejeu unique sur -1021.
+- Ordres avec id client: envoi rejouable (cf. BinanceSpot._submit_idempotent).
+- Un client est lié à sa boucle: `async with AsyncBinanceSpot() as ex: ...`.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from kobe.execution.binance_spot import (
+    _MISSING,
+    _ORDER_MISSING_CODES,
+    ORDER_LOOKUP_DELAY_S,
+    ORDER_SUBMIT_ATTEMPTS,
+    ORDER_TIMEOUT_S,
+    BinanceSpot,
+    _cancel_replace_params,
+    _check_plan,
+    _client_id_of,
+    _entry_params,
+    _error_code,
+    _exit_legs,
+    _finish_plan,
+    _finish_stop_replace,
+    _is_ack,
+    _is_retryable,
+    _known_stop_order,
+    _legs_protection,
+    _log_executor_event,
+    _log_leg,
+    _log_order,
+    _lookup_request,
+    _oco_params,
+    _oco_protection,
+    _outcome_unknown,
+    _pick_stop_order,
+    _prepare_order,
+    _reconcile,
+    _recovered,
+    _resubmittable,
+    _stop_replace_method,
+    _track,
+)
+from kobe.execution.client_ids import new_client_key
+from kobe.execution.order_state import ORDER_INDEX
+from kobe.execution.rate_limit import REQUEST_LIMITER, limiters_for
+from kobe.execution.signing import RequestSigner, get_server_clock, is_clock_error
+
+
+class AsyncBinanceSpot:
+    """Client async; mode dry (None) si aucune clé, comme BinanceSpot."""
+
+    def __init__(self, key=None, secret=None, base=None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 timeout: float = 8):
+        self.key = (key or os.getenv("BINANCE_API_KEY", "")).strip()
+        self.secret = (secret or os.getenv("BINANCE_API_SECRET", "")).strip()
+        self.base = (base or os.getenv("BINANCE_BASE_URL", "https://api.binance.com")).rstrip("/")
+        self._signer = RequestSigner(self.secret) if self.secret else None
+        self._client = httpx.AsyncClient(base_url=self.base, timeout=timeout, transport=transport,
+                                         headers={"X-MBX-APIKEY": self.key} if self.key else None)
+
+    async def __aenter__(self) -> "AsyncBinanceSpot":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # --- transport ------------------------------------------------------------
+    async def _signed_request(self, method, path, params=None, timeout=None):
+        """Requête SIGNED; HTTPStatusError remonte (sauf -1021: resynchro + un rejeu)."""
+        clock = get_server_clock(self.base)
+        for attempt in (0, 1):
+            for limiter in limiters_for(method, path):
+                await limiter.acquire_async()
+            query = self._signer.build(params, clock.now_ms())
+            if timeout is None:
+                r = await self._client.request(method, f"{path}?{query}")
+            else:
+                r = await self._client.request(method, f"{path}?{query}", timeout=timeout)
+            if r.status_code < 400:
+                return r.json()
+            if attempt == 0 and is_clock_error(r.text):
+                # GET /api/v3/time bloquant: hors de la boucle
+                if await asyncio.to_thread(clock.sync) is not None:
+                    continue
+            r.raise_for_status()
+
+    async def _signed_get(self, path, params=None):
+        if not self.key or not self.secret:
+            return None
+        return await self._signed_request("GET", path, params)
+
+    async def _signed_write(self, method, path, params=None):
+        if not self.key or not self.secret:
+            return None
+        try:
+            return await self._signed_request(method, path, params)
+        except httpx.HTTPStatusError as e:
+            return {"error": e.response.status_code, "message": e.response.text}
+        except Exception as e:
+            return {"error": "exception", "message": str(e)}
+
+    async def _signed_post(self, path, params=None):
+        cid = _client_id_of(path, params)
+        if cid is not None and self.key and self.secret:
+            return await self._submit_idempotent(path, params, cid)
+        return await self._signed_write("POST", path, params)
+
+    async def _submit_idempotent(self, path, params, cid):
+        """Cf. BinanceSpot._submit_idempotent."""
+        last = None
+        for _ in range(ORDER_SUBMIT_ATTEMPTS):
+            try:
+                return await self._signed_request("POST", path, params, ORDER_TIMEOUT_S)
+            except httpx.HTTPStatusError as e:
+                last = {"error": e.response.status_code, "message": e.response.text}
+                if not _outcome_unknown(e.response.status_code, e.response.text):
+                    return last
+            except Exception as e:
+                last = {"error": "exception", "message": str(e)}
+            found = await self._lookup_submitted(path, params, cid)
+            if found is None or (found is _MISSING and not _resubmittable(params)):
+                return {**last, "clientOrderId": cid, "outcome": "unknown"}
+            if found is not _MISSING:
+                return _recovered(path, found)
+        return last
+
+    async def _lookup_submitted(self, path, params, cid):
+        lookup_path, lookup_params = _lookup_request(path, params, cid)
+        for attempt in range(ORDER_SUBMIT_ATTEMPTS):
+            await asyncio.sleep(ORDER_LOOKUP_DELAY_S * (attempt + 1))
+            try:
+                return await self._signed_request("GET", lookup_path, lookup_params, ORDER_TIMEOUT_S)
+            except httpx.HTTPStatusError as e:
+                if _error_code(e.response.text) in _ORDER_MISSING_CODES:
+                    return _MISSING
+            except Exception:
+                pass
+        return None
+
+    async def _signed_delete(self, path, params=None):
+        return await self._signed_write("DELETE", path, params)
+
+    # --- lecture ---------------------------------------------------------------
+    async def check_account(self):
+        return await self._signed_get("/api/v3/account", {})
+
+    async def get_price(self, symbol: str):
+        await REQUEST_LIMITER.acquire_async()
+        try:
+            r = await self._client.get("/api/v3/ticker/price", params={"symbol": symbol}, timeout=5)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"error": "exception", "message": str(e)}
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, Any]:
+        """Prix de plusieurs symboles en parallèle: {symbol: réponse}."""
+        symbols = list(symbols)
+        return dict(zip(symbols, await asyncio.gather(*(self.get_price(s) for s in symbols))))
+
+    # --- ordres ----------------------------------------------------------------
+    def build_order_plan(self, *args, **kwargs):
+        """Purement déclaratif (aucun appel réseau): identique à BinanceSpot."""
+        return BinanceSpot.build_order_plan(self, *args, **kwargs)
+
+    async def create_order(self, symbol, side, quantity, order_type="MARKET", take_price=None, stop_price=None,
+                           client_order_id=None):
+        error, params = _prepare_order(symbol, side, quantity, order_type, client_order_id)
+        if error is not None:
+            return error
+        resp = await self._signed_post("/api/v3/order", params)
+        _log_order(symbol, side, quantity, order_type, take_price, stop_price, params, resp)
+        return resp
+
+    async def cancel_order(self, symbol, order_id):
+        resp = await self._signed_delete("/api/v3/order", {"symbol": symbol, "orderId": order_id})
+        _track(resp)
+        return resp
+
+    async def execute_order_plan(self, plan: dict):
+        """Entrée, puis TP + SL en liste OCO (ou jambe seule) une fois l'entrée acquittée."""
+        ts = int(time.time() * 1000)
+        error, qty_float = _check_plan(plan, ts)
+        if error is not None:
+            return error
+
+        symbol, side = plan["symbol"], plan["side"]
+        orders_resp: dict[str, object] = {"entry": None, "take_profit": None, "stop_loss": None}
+        key = plan.get("client_key") or new_client_key()
+        order_type, entry_params = _entry_params(plan, qty_float, key)
+
+        t_start = time.perf_counter()
+        resp_entry = await self._signed_post("/api/v3/order", entry_params)
+        t_entry = time.perf_counter()
+        _log_executor_event({"ts": ts, "kind": "entry", "symbol": symbol, "side": side, "order_type": order_type,
+                             "qty_rounded": qty_float, "params": entry_params, "response": resp_entry})
+        _track(resp_entry, entry_params, "entry")
+        orders_resp["entry"] = resp_entry
+
+        close_side, legs = _exit_legs(plan, qty_float, key)
+        if not legs:
+            protection = {"status": "no_exit_legs", "legs": {}}
+        elif not _is_ack(resp_entry):
+            protection = {"status": "entry_failed", "legs": {k: "skipped" for k in legs}}
+        elif len(legs) == 2:
+            protection = await self._place_oco(ts, symbol, close_side, qty_float, legs, orders_resp)
+        else:
+            (kind, params), = legs.items()
+            resp = await self._send_exit_leg(ts, kind, symbol, close_side, qty_float, params)
+            orders_resp[kind] = resp
+            protection = _legs_protection({kind: resp})
+
+        return _finish_plan(plan, orders_resp, protection, ts, t_start, t_entry, qty_float)
+
+    async def _send_exit_leg(self, ts, kind, symbol, close_side, qty_float, params, path="/api/v3/order"):
+        resp = await self._signed_post(path, params)
+        if _is_retryable(resp):
+            _log_leg(ts, kind, symbol, close_side, qty_float, params, resp, retry=True)
+            resp = await self._signed_post(path, params)
+        _log_leg(ts, kind, symbol, close_side, qty_float, params, resp)
+        return resp
+
+    async def _place_oco(self, ts, symbol, close_side, qty_float, legs, orders_resp) -> dict:
+        params = _oco_params(symbol, close_side, qty_float, legs)
+        resp = await self._send_exit_leg(ts, "oco", symbol, close_side, qty_float, params,
+                                         path="/api/v3/orderList/oco")
+        orders_resp["oco"] = resp
+        return _oco_protection(resp, legs)
+
+    async def replace_stop_order(self, symbol, close_side, qty, new_stop, take=None) -> dict:
+        """Cf. BinanceSpot.replace_stop_order (cancelReplace / ré-émission OCO / nouveau stop)."""
+        ts = int(time.time() * 1000)
+        t0 = time.perf_counter()
+        current = _known_stop_order(symbol, close_side)
+        if current is not None:
+            method, ok, resp = await self._replace_stop(ts, symbol, close_side, qty, new_stop, take, current)
+            if ok:
+                return _finish_stop_replace(ts, symbol, close_side, qty, new_stop, method, ok, resp, t0)
+            ORDER_INDEX.forget(symbol, current["orderId"])
+        current = await self._find_stop_order(symbol, close_side)
+        method, ok, resp = await self._replace_stop(ts, symbol, close_side, qty, new_stop, take, current)
+        return _finish_stop_replace(ts, symbol, close_side, qty, new_stop, method, ok, resp, t0)
+
+    async def _find_stop_order(self, symbol, close_side):
+        try:
+            orders = await self._signed_get("/api/v3/openOrders", {"symbol": symbol})
+        except Exception:
+            return None
+        _reconcile(symbol, orders)
+        return _pick_stop_order(orders, close_side)
+
+    async def _replace_stop(self, ts, symbol, close_side, qty, new_stop, take, current):
+        method, legs = _stop_replace_method(symbol, close_side, qty, new_stop, take, current)
+        if method in ("oco_reissue", "oco_cancel_new"):
+            cancel = await self._signed_delete("/api/v3/orderList",
+                                               {"symbol": symbol, "orderListId": current["orderListId"]})
+            _track(cancel)
+            if not _is_ack(cancel):
+                return method, False, cancel
+        if method == "oco_reissue":
+            orders_resp: dict[str, object] = {}
+            ok = (await self._place_oco(ts, symbol, close_side, qty, legs, orders_resp))["status"] == "protected"
+            resp = orders_resp.get("oco")
+        elif method == "cancel_replace":
+            resp = await self._signed_post("/api/v3/order/cancelReplace",
+                                           _cancel_replace_params(legs["stop_loss"], current))
+            ok = _is_ack(resp)
+        else:
+            resp = await self._signed_post("/api/v3/order", legs["stop_loss"])
+            ok = _is_ack(resp)
+        return method, ok, resp
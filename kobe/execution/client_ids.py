@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Identifiants client d'ordres (newClientOrderId) déterministes.
+
+- Un identifiant par proposal et par jambe (entrée, TP, SL, liste OCO): un
+  rejeu de la même requête (timeout, 5xx, relance du job) porte le même id.
+  Binance refuse un doublon tant que l'ordre est ouvert, et
+  GET /api/v3/order?origClientOrderId= retrouve l'issue d'une requête dont
+  la réponse a été perdue (cf. BinanceSpot._submit_idempotent).
+- Format: kobe-<jambe>-<empreinte sha256>, 32 caractères, dans l'alphabet
+  autorisé par Binance (^[.A-Z:/a-z0-9_-]{1,36}$).
+"""
+from __future__ import annotations
+
+import hashlib
+import secrets
+from typing import Any
+
+PREFIX = "kobe"
+DIGEST_LEN = 24
+_LEG_TAGS = {
+    "entry": "en",
+    "take_profit": "tp",
+    "stop_loss": "sl",
+    "oco": "oc",
+}
+
+
+def proposal_key(p: Any) -> str:
+    """Identité stable d'une Proposal (niveaux + horodatage de création)."""
+    created = getattr(p, "created_at", None)
+    created = created.isoformat() if created is not None else ""
+    return f"{p.symbol}|{p.side}|{p.entry!r}|{p.stop!r}|{p.take!r}|{created}"
+
+
+def new_client_key() -> str:
+    """Clé aléatoire pour un plan / ordre construit hors proposal."""
+    return secrets.token_hex(12)
+
+
+def client_order_id(key: str, leg: str) -> str:
+    """newClientOrderId de la jambe `leg` pour la clé `key` (même entrée => même id)."""
+    tag = _LEG_TAGS.get(leg, leg[:2])
+    digest = hashlib.sha256(f"{key}|{leg}".encode("utf-8")).hexdigest()[:DIGEST_LEN]
+    return f"{PREFIX}-{tag}-{digest}"
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Cache des filtres d'échange Binance (LOT_SIZE, PRICE_FILTER, NOTIONAL) par symbole.
+
+- Chargé une fois depuis un snapshot local (logs/exchange_info.json) ou depuis
+  /api/v3/exchangeInfo, puis gardé en mémoire: `get(symbol)` est un accès dict O(1).
+- Rafraîchi sur TTL par `ensure_fresh()`: premier chargement synchrone, ensuite
+  en tâche de fond (un seul rafraîchissement à la fois), le cache courant restant
+  servi pendant ce temps. Les chemins d'ordres (build_order_plan, create_order,
+  trailing stop) ne font jamais d'appel réseau: ils lisent le cache.
+- Snapshot écrit atomiquement (mkstemp + os.replace) avec les seuls filtres utiles,
+  pour que les autres process (CLI, scheduler) en profitent sans refetch.
+- Symbole inconnu: None, l'appelant garde ses valeurs de repli (lot_step config).
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+SNAPSHOT_PATH = Path("logs") / "exchange_info.json"
+# Les filtres bougent rarement: un rafraîchissement par heure suffit
+EXCHANGE_INFO_TTL_S = 3600.0
+_TTL_ENV = "KOBE_EXCHANGE_INFO_TTL_S"
+
+
+@dataclass(frozen=True)
+class SymbolFilters:
+    symbol: str
+    step_size: str = "0"
+    min_qty: str = "0"
+    max_qty: str = "0"
+    tick_size: str = "0"
+    min_price: str = "0"
+    min_notional: str = "0"
+
+    @classmethod
+    def from_exchange(cls, info: Dict[str, Any]) -> "SymbolFilters":
+        """Construit les filtres depuis une entrée `symbols[]` de exchangeInfo."""
+        kw: Dict[str, str] = {}
+        for f in info.get("filters", []):
+            ftype = f.get("filterType")
+            if ftype == "LOT_SIZE":
+                kw.update(step_size=f.get("stepSize", "0"), min_qty=f.get("minQty", "0"),
+                          max_qty=f.get("maxQty", "0"))
+            elif ftype == "PRICE_FILTER":
+                kw.update(tick_size=f.get("tickSize", "0"), min_price=f.get("minPrice", "0"))
+            elif ftype in ("NOTIONAL", "MIN_NOTIONAL"):
+                kw["min_notional"] = f.get("minNotional", "0")
+        return cls(symbol=info["symbol"], **kw)
+
+    def round_qty(self, qty: float) -> float:
+        """Quantité arrondie au stepSize, toujours vers le bas (jamais au-delà du sizing)."""
+        return float(_quantize(qty, self.step_size, ROUND_DOWN))
+
+    def round_price(self, price: float) -> float:
+        """Prix arrondi au tickSize le plus proche."""
+        return float(_quantize(price, self.tick_size, ROUND_HALF_UP))
+
+    def check(self, qty: float, price: Optional[float] = None) -> Optional[str]:
+        """Raison de rejet prévisible par l'exchange (None si l'ordre passe les filtres)."""
+        q = Decimal(str(qty))
+        if q <= 0 or q < Decimal(self.min_qty):
+            return "min_qty"
+        if Decimal(self.max_qty) > 0 and q > Decimal(self.max_qty):
+            return "max_qty"
+        if price is not None and q * Decimal(str(price)) < Decimal(self.min_notional):
+            return "min_notional"
+        return None
+
+
+def _quantize(value: float, step: str, rounding) -> Decimal:
+    d = Decimal(str(value))
+    s = Decimal(step)
+    if s <= 0:
+        return d
+    # stepSize/tickSize Binance: "0.00100000" -> on arrondit en multiples de step
+    return ((d / s).to_integral_value(rounding=rounding) * s).normalize()
+
+
+def _ttl_s() -> float:
+    try:
+        return float(os.getenv(_TTL_ENV, "") or EXCHANGE_INFO_TTL_S)
+    except ValueError:
+        return EXCHANGE_INFO_TTL_S
+
+
+def fetch_exchange_info(base: Optional[str] = None, timeout: float = 10) -> Dict[str, Any]:
+    """GET public /api/v3/exchangeInfo (aucune clé requise)."""
+    base = (base or os.getenv("BINANCE_BASE_URL", "https://api.binance.com")).rstrip("/")
+    with urllib.request.urlopen(f"{base}/api/v3/exchangeInfo", timeout=timeout) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+class ExchangeFilters:
+    """Filtres par symbole en mémoire, adossés à un snapshot JSON et à exchangeInfo."""
+
+    def __init__(
+        self,
+        snapshot_path: Optional[Path | str] = None,
+        ttl_s: Optional[float] = None,
+        fetch: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> None:
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else SNAPSHOT_PATH
+        self.ttl_s = _ttl_s() if ttl_s is None else float(ttl_s)
+        self._fetch = fetch or fetch_exchange_info
+        self._symbols: Dict[str, SymbolFilters] = {}
+        self.fetched_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Thread] = None
+
+    # --- lecture -------------------------------------------------------------
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+                self._symbols = {s: SymbolFilters(**f) for s, f in data.get("symbols", {}).items()}
+                self.fetched_at = float(data.get("fetched_at", 0.0))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[exchange_filters] snapshot illisible ({self.snapshot_path}): {e}")
+            self._loaded = True
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        """Filtres du symbole (None si inconnus): jamais d'appel réseau."""
+        self._ensure_loaded()
+        return self._symbols.get(symbol)
+
+    def is_stale(self) -> bool:
+        self._ensure_loaded()
+        return not self._symbols or time.time() - self.fetched_at > self.ttl_s
+
+    # --- rafraîchissement ----------------------------------------------------
+    def refresh(self) -> int:
+        """Recharge exchangeInfo, met à jour le cache et le snapshot. Retourne le nb de symboles."""
+        info = self._fetch()
+        symbols = {s["symbol"]: SymbolFilters.from_exchange(s) for s in info.get("symbols", []) if s.get("symbol")}
+        fetched_at = time.time()
+        with self._lock:
+            self._symbols = symbols
+            self.fetched_at = fetched_at
+            self._loaded = True
+        self._write_snapshot(symbols, fetched_at)
+        return len(symbols)
+
+    def _write_snapshot(self, symbols: Dict[str, SymbolFilters], fetched_at: float) -> None:
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {"fetched_at": fetched_at, "symbols": {s: asdict(f) for s, f in symbols.items()}}
+            fd, tmp = tempfile.mkstemp(dir=str(self.snapshot_path.parent), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.snapshot_path)
+        except Exception as e:
+            print(f"[exchange_filters] écriture snapshot échouée: {e}")
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[exchange_filters] rafraîchissement exchangeInfo échoué: {e}")
+
+    def ensure_fresh(self, block: Optional[bool] = None) -> None:
+        """Rafraîchit si le TTL est dépassé.
+
+        block=None: synchrone si le cache est vide, sinon en arrière-plan.
+        """
+        if not self.is_stale():
+            return
+        if block is None:
+            block = not self._symbols
+        if block:
+            self._refresh_quietly()
+            return
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return
+            self._refreshing = threading.Thread(target=self._refresh_quietly, daemon=True,
+                                                name="kobe-exchange-info")
+            self._refreshing.start()
+
+
+_REGISTRY: Dict[str, ExchangeFilters] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_exchange_filters(snapshot_path: Optional[Path | str] = None) -> ExchangeFilters:
+    """Cache partagé par chemin de snapshot (un seul chargement par process)."""
+    key = str(Path(snapshot_path) if snapshot_path else SNAPSHOT_PATH)
+    with _REGISTRY_LOCK:
+        cache = _REGISTRY.get(key)
+        if cache is None:
+            cache = _REGISTRY[key] = ExchangeFilters(snapshot_path=key)
+        return cache
+
+
+def symbol_filters(symbol: str) -> Optional[SymbolFilters]:
+    """Raccourci: filtres de `symbol` dans le cache par défaut."""
+    return get_exchange_filters().get(symbol)
@@ -0,0 +1,824 @@
+#!/usr/bin/env python3
+"""
+Exchange Binance spot local (mock) pour tests de charge et de latence.
+
+- MatchingEngine: carnet d'ordres du compte (MARKET, LIMIT, LIMIT_MAKER,
+  STOP_LOSS, STOP_LOSS_LIMIT, listes OCO, cancelReplace), soldes free/locked,
+  bougies 1m et prix courant, le tout piloté par des ticks rejoués (aggTrade
+  enregistrés ou synthétiques). Liquidité infinie: un ordre exécutable est
+  rempli en entier, au prix limite (maker) ou au dernier prix (taker).
+- MockBinanceServer: REST (ThreadingHTTPServer) + WebSocket (websockets sync)
+  exposant les endpoints utilisés par BinanceSpot / AsyncBinanceSpot /
+  UserDataStream / feed / fetch_klines:
+    GET  /api/v3/ping|time|exchangeInfo|klines|ticker/price|ticker/24hr
+    GET  /api/v3/account|openOrders|order|orderList              (SIGNED)
+    POST /api/v3/order|order/cancelReplace|orderList/oco          (SIGNED)
+    DELETE /api/v3/order|openOrders|orderList                     (SIGNED)
+    POST|PUT|DELETE /api/v3/userDataStream                        (clé API)
+    WS   /ws/<listenKey> (executionReport, outboundAccountPosition)
+    WS   /ws/<symbol>@aggTrade (ticks rejoués)
+- Latence configurable (fixe + gigue), injection d'erreurs (aléatoire avec
+  graine, ou file d'erreurs ciblées par chemin), réponses retardées après
+  traitement (réponse perdue côté client), vérification optionnelle de
+  la signature et de recvWindow, décalage d'horloge serveur simulé, compteurs
+  de requêtes pour les benchmarks.
+
+Usage:
+  python -m kobe.execution.mock_exchange --ticks ticks.jsonl --port 8090 --latency-ms 20
+  BINANCE_BASE_URL=http://127.0.0.1:8090 BINANCE_WS_BASE=ws://127.0.0.1:8091 ...
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from kobe.core.feed import Tick, parse_agg_trade
+
+QUOTE_ASSETS = ("USDC", "USDT", "FDUSD", "BTC", "EUR")
+DEFAULT_BALANCES = {"USDC": 10_000.0}
+DEFAULT_FILTERS = {"step_size": "0.00001", "tick_size": "0.01", "min_notional": "5"}
+_INTERVAL_MIN = {"m": 1, "h": 60, "d": 1440, "w": 10080}
+
+
+class MockError(Exception):
+    """Erreur au format Binance ({"code": ..., "msg": ...}) avec son statut HTTP."""
+
+    def __init__(self, code: int, msg: str, status: int = 400) -> None:
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+def _split(symbol: str) -> Tuple[str, str]:
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[: -len(quote)], quote
+    raise MockError(-1121, "Invalid symbol.")
+
+
+def _symbols_param(raw: str) -> List[str]:
+    """Paramètre `symbols` (liste JSON, ex. ["BTCUSDC","ETHUSDC"])."""
+    try:
+        symbols = json.loads(raw)
+    except ValueError:
+        symbols = None
+    if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+        raise MockError(-1100, "Illegal characters found in parameter 'symbols'.")
+    return symbols
+
+
+def _fmt(x: float) -> str:
+    return f"{x:.8f}"
+
+
+@dataclass
+class _Order:
+    symbol: str
+    order_id: int
+    client_id: str
+    side: str
+    type: str
+    qty: float
+    price: float
+    stop_price: float
+    time_in_force: str
+    ts: int
+    order_list_id: int = -1
+    status: str = "NEW"
+    executed_qty: float = 0.0
+    cum_quote: float = 0.0
+    triggered: bool = False
+    lock_asset: str = ""
+    lock_amt: float = 0.0
+
+    def to_api(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol, "orderId": self.order_id, "orderListId": self.order_list_id,
+            "clientOrderId": self.client_id, "price": _fmt(self.price), "origQty": _fmt(self.qty),
+            "executedQty": _fmt(self.executed_qty), "cummulativeQuoteQty": _fmt(self.cum_quote),
+            "status": self.status, "timeInForce": self.time_in_force, "type": self.type,
+            "side": self.side, "stopPrice": _fmt(self.stop_price), "time": self.ts,
+            "updateTime": self.ts, "isWorking": self.status == "NEW",
+        }
+
+
+@dataclass
+class _SymbolState:
+    price: Optional[float] = None
+    candles: Dict[int, List[float]] = field(default_factory=dict)  # open_time -> [o, h, l, c, v]
+    resting: Dict[int, _Order] = field(default_factory=dict)
+
+
+class MatchingEngine:
+    """Compte unique + carnet des ordres ouverts, exécutés au fil des ticks."""
+
+    def __init__(
+        self,
+        balances: Optional[Dict[str, float]] = None,
+        filters: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._list_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self.balances: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])  # asset -> [free, locked]
+        for asset, amt in (balances if balances is not None else DEFAULT_BALANCES).items():
+            self.balances[asset][0] = float(amt)
+        self.filters = dict(filters or {})
+        self.symbols: Dict[str, _SymbolState] = defaultdict(_SymbolState)
+        self.orders: Dict[int, _Order] = {}
+        self.lists: Dict[int, List[int]] = {}  # listes OCO actives
+        self.list_info: Dict[int, Tuple[str, str, List[int]]] = {}  # id -> (symbol, id client, ordres)
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.tick_listeners: List[Callable[[Tick], None]] = []
+
+    # --- événements ------------------------------------------------------------
+    def _emit(self, msg: Dict[str, Any]) -> None:
+        for cb in list(self.listeners):
+            try:
+                cb(msg)
+            except Exception as e:
+                print(f"[mock_exchange] listener en erreur: {e}")
+
+    def _report(self, o: _Order, exec_type: str, last_qty: float = 0.0, last_price: float = 0.0) -> None:
+        now = int(time.time() * 1000)
+        self._emit({
+            "e": "executionReport", "E": now, "s": o.symbol, "c": o.client_id, "S": o.side, "o": o.type,
+            "f": o.time_in_force, "q": _fmt(o.qty), "p": _fmt(o.price), "P": _fmt(o.stop_price),
+            "x": exec_type, "X": o.status, "r": "NONE", "i": o.order_id, "l": _fmt(last_qty),
+            "z": _fmt(o.executed_qty), "L": _fmt(last_price), "n": "0", "N": None, "T": now,
+            "t": next(self._trade_ids) if exec_type == "TRADE" else -1, "Z": _fmt(o.cum_quote),
+            "g": o.order_list_id,
+        })
+        base, quote = _split(o.symbol)
+        self._emit({"e": "outboundAccountPosition", "E": now, "u": now, "B": [
+            {"a": a, "f": _fmt(self.balances[a][0]), "l": _fmt(self.balances[a][1])} for a in (base, quote)
+        ]})
+
+    # --- soldes ------------------------------------------------------------------
+    def _lock_funds(self, o: _Order, price: float) -> None:
+        base, quote = _split(o.symbol)
+        asset, amt = (quote, o.qty * price) if o.side == "BUY" else (base, o.qty)
+        bal = self.balances[asset]
+        if bal[0] + 1e-12 < amt:
+            raise MockError(-2010, "Account has insufficient balance for requested action.")
+        bal[0] -= amt
+        bal[1] += amt
+        o.lock_asset, o.lock_amt = asset, amt
+
+    def _release(self, o: _Order) -> None:
+        if o.lock_amt:
+            bal = self.balances[o.lock_asset]
+            bal[0] += o.lock_amt
+            bal[1] -= o.lock_amt
+            o.lock_amt = 0.0
+
+    def _fill(self, o: _Order, price: float) -> None:
+        # OCO: l'autre jambe est annulée avant (libère le solde verrouillé commun)
+        if o.order_list_id != -1:
+            for oid in self.lists.pop(o.order_list_id, []):
+                other = self.orders[oid]
+                if other is not o and other.status == "NEW":
+                    self._cancel(other)
+        self._release(o)
+        base, quote = _split(o.symbol)
+        notional = o.qty * price
+        src, dst = (self.balances[quote], self.balances[base]) if o.side == "BUY" else \
+            (self.balances[base], self.balances[quote])
+        spend, get = (notional, o.qty) if o.side == "BUY" else (o.qty, notional)
+        if src[0] + 1e-9 < spend:
+            o.status = "EXPIRED"
+            self.symbols[o.symbol].resting.pop(o.order_id, None)
+            self._report(o, "EXPIRED")
+            return
+        src[0] -= spend
+        dst[0] += get
+        o.executed_qty, o.cum_quote, o.status = o.qty, notional, "FILLED"
+        self.symbols[o.symbol].resting.pop(o.order_id, None)
+        self._report(o, "TRADE", o.qty, price)
+
+    def _cancel(self, o: _Order) -> None:
+        self._release(o)
+        o.status = "CANCELED"
+        self.symbols[o.symbol].resting.pop(o.order_id, None)
+        self._report(o, "CANCELED")
+
+    # --- ordres ------------------------------------------------------------------
+    def _marketable(self, o: _Order, price: float) -> bool:
+        return price <= o.price if o.side == "BUY" else price >= o.price
+
+    def _stop_hit(self, o: _Order, price: float) -> bool:
+        return price >= o.stop_price if o.side == "BUY" else price <= o.stop_price
+
+    def _new(self, p: Dict[str, Any], order_list_id: int = -1, lock: bool = True) -> _Order:
+        symbol = str(p.get("symbol", ""))
+        _split(symbol)
+        otype = str(p.get("type", "")).upper()
+        side = str(p.get("side", "")).upper()
+        if side not in ("BUY", "SELL"):
+            raise MockError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        try:
+            qty = float(p.get("quantity", 0))
+            price = float(p.get("price", 0) or 0)
+            stop = float(p.get("stopPrice", 0) or 0)
+        except (TypeError, ValueError):
+            raise MockError(-1100, "Illegal characters found in a parameter.")
+        if qty <= 0:
+            raise MockError(-1013, "Invalid quantity.")
+        if otype in ("LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT") and price <= 0:
+            raise MockError(-1013, "Invalid price.")
+        if otype in ("STOP_LOSS", "STOP_LOSS_LIMIT") and stop <= 0:
+            raise MockError(-1013, "Invalid stop price.")
+        if otype not in ("MARKET", "LIMIT", "LIMIT_MAKER", "STOP_LOSS", "STOP_LOSS_LIMIT"):
+            raise MockError(-1116, "Invalid orderType.")
+        state = self.symbols[symbol]
+        last = state.price
+        client_id = p.get("newClientOrderId")
+        if client_id and any(o.client_id == client_id for o in state.resting.values()):
+            raise MockError(-2010, "Duplicate order sent.")
+        if otype in ("MARKET", "STOP_LOSS") and last is None:
+            raise MockError(-1013, "Market is closed.")
+        min_notional = float(self.filters.get(symbol, DEFAULT_FILTERS).get("min_notional", 0))
+        ref = price or last or 0.0
+        if ref and qty * ref < min_notional:
+            raise MockError(-1013, "Filter failure: NOTIONAL")
+        if otype == "LIMIT_MAKER" and last is not None and \
+                (last <= price if side == "BUY" else last >= price):
+            raise MockError(-2010, "Order would immediately match and take.")
+
+        now = int(time.time() * 1000)
+        order_id = next(self._ids)
+        client_id = str(client_id or f"mock-{order_id}")
+        o = _Order(symbol=symbol, order_id=order_id, client_id=client_id,
+                   side=side, type=otype, qty=qty, price=price, stop_price=stop,
+                   time_in_force=str(p.get("timeInForce", "GTC")), ts=now, order_list_id=order_list_id)
+        if lock:
+            self._lock_funds(o, price or last or 0.0)
+        self.orders[o.order_id] = o
+        self._report(o, "NEW")
+        if otype == "MARKET":
+            self._fill(o, last)
+        elif otype in ("LIMIT", "LIMIT_MAKER") and last is not None and self._marketable(o, last):
+            self._fill(o, last)
+        else:
+            state.resting[o.order_id] = o
+        return o
+
+    def new_order(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return self._new(p).to_api()
+
+    def _get(self, p: Dict[str, Any]) -> _Order:
+        o = None
+        if p.get("orderId") not in (None, ""):
+            o = self.orders.get(int(p["orderId"]))
+        elif p.get("origClientOrderId"):
+            o = next((x for x in self.orders.values() if x.client_id == p["origClientOrderId"]), None)
+        if o is None or o.symbol != p.get("symbol"):
+            raise MockError(-2013, "Order does not exist.")
+        return o
+
+    def query_order(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return self._get(p).to_api()
+
+    def cancel_order(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            o = self._get(p)
+            if o.status != "NEW":
+                raise MockError(-2011, "Unknown order sent.")
+            if o.order_list_id != -1:
+                return self._cancel_list(o.order_list_id)
+            self._cancel(o)
+            return o.to_api()
+
+    def cancel_open_orders(self, p: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            out = []
+            for o in list(self.symbols[str(p.get("symbol"))].resting.values()):
+                if o.status == "NEW":
+                    self._cancel(o)
+                    out.append(o.to_api())
+            self.lists = {k: v for k, v in self.lists.items() if any(self.orders[i].status == "NEW" for i in v)}
+            return out
+
+    def open_orders(self, p: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            symbol = p.get("symbol")
+            states = [self.symbols[symbol]] if symbol else list(self.symbols.values())
+            return [o.to_api() for st in states for o in st.resting.values()]
+
+    def cancel_replace(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        """Annulation + nouvel ordre atomiques (sous le même verrou)."""
+        with self._lock:
+            cancel = {"symbol": p.get("symbol"), "orderId": p.get("cancelOrderId"),
+                      "origClientOrderId": p.get("cancelOrigClientOrderId")}
+            old = self._get(cancel)
+            if old.status != "NEW":
+                raise MockError(-2021, "Order cancel-replace failed.")
+            self._cancel(old)
+            new_params = {k: v for k, v in p.items() if not k.startswith("cancel")}
+            try:
+                new = self._new(new_params)
+            except MockError as e:
+                raise MockError(-2021, f"Order cancel-replace partially failed: {e.msg}")
+            return {"cancelResult": "SUCCESS", "newOrderResult": "SUCCESS",
+                    "cancelResponse": old.to_api(), "newOrderResponse": new.to_api()}
+
+    def new_oco(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        """Liste OCO (above/below): quantité verrouillée une seule fois pour les deux jambes."""
+        with self._lock:
+            list_client_id = p.get("listClientOrderId")
+            if list_client_id and any(self.list_info[i][1] == list_client_id for i in self.lists):
+                raise MockError(-2010, "Duplicate order sent.")
+            list_id = next(self._list_ids)
+            list_client_id = str(list_client_id or f"mock-list-{list_id}")
+            common = {"symbol": p.get("symbol"), "side": p.get("side"), "quantity": p.get("quantity")}
+            legs = []
+            for i, prefix in enumerate(("above", "below")):
+                leg = dict(common, type=p.get(f"{prefix}Type"), price=p.get(f"{prefix}Price"),
+                           stopPrice=p.get(f"{prefix}StopPrice"), timeInForce=p.get(f"{prefix}TimeInForce", "GTC"),
+                           newClientOrderId=p.get(f"{prefix}ClientOrderId"))
+                try:
+                    legs.append(self._new(leg, order_list_id=list_id, lock=(i == 0)))
+                except MockError:
+                    for o in legs:
+                        self._cancel(o)
+                    raise
+                if legs[-1].status == "FILLED":
+                    break
+            self.lists[list_id] = [o.order_id for o in legs if o.status == "NEW"]
+            self.list_info[list_id] = (str(common["symbol"]), list_client_id, [o.order_id for o in legs])
+            return {"orderListId": list_id, "listClientOrderId": list_client_id, "contingencyType": "OCO",
+                    "listStatusType": "EXEC_STARTED", "symbol": common["symbol"],
+                    "orderReports": [o.to_api() for o in legs]}
+
+    def query_order_list(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        """GET /api/v3/orderList par orderListId ou origClientOrderId."""
+        with self._lock:
+            if p.get("orderListId") not in (None, ""):
+                list_id = int(p["orderListId"])
+            else:
+                list_id = next((i for i, info in self.list_info.items() if info[1] == p.get("origClientOrderId")), -1)
+            info = self.list_info.get(list_id)
+            if info is None:
+                raise MockError(-2013, "Order list does not exist.")
+            symbol, list_client_id, ids = info
+            return {"orderListId": list_id, "listClientOrderId": list_client_id, "contingencyType": "OCO",
+                    "listStatusType": "EXEC_STARTED" if list_id in self.lists else "ALL_DONE", "symbol": symbol,
+                    "orders": [{"symbol": symbol, "orderId": i, "clientOrderId": self.orders[i].client_id}
+                               for i in ids]}
+
+    def _cancel_list(self, list_id: int) -> Dict[str, Any]:
+        ids = self.lists.pop(list_id, None)
+        if ids is None:
+            raise MockError(-2011, "Unknown order list sent.")
+        reports = []
+        for oid in ids:
+            o = self.orders[oid]
+            if o.status == "NEW":
+                self._cancel(o)
+            reports.append(o.to_api())
+        return {"orderListId": list_id, "listStatusType": "ALL_DONE", "orderReports": reports}
+
+    def cancel_order_list(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return self._cancel_list(int(p.get("orderListId", -1)))
+
+    def account(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"canTrade": True, "accountType": "SPOT", "balances": [
+                {"asset": a, "free": _fmt(f), "locked": _fmt(lk)} for a, (f, lk) in sorted(self.balances.items())
+            ]}
+
+    # --- marché ------------------------------------------------------------------
+    def on_tick(self, tick: Tick) -> None:
+        with self._lock:
+            state = self.symbols[tick.symbol]
+            state.price = tick.price
+            minute = tick.ts // 60_000 * 60_000
+            c = state.candles.get(minute)
+            if c is None:
+                state.candles[minute] = [tick.price, tick.price, tick.price, tick.price, tick.qty]
+            else:
+                c[1] = max(c[1], tick.price)
+                c[2] = min(c[2], tick.price)
+                c[3] = tick.price
+                c[4] += tick.qty
+            for o in list(state.resting.values()):
+                if o.status != "NEW":
+                    continue
+                if o.type in ("STOP_LOSS", "STOP_LOSS_LIMIT") and not o.triggered:
+                    if not self._stop_hit(o, tick.price):
+                        continue
+                    o.triggered = True
+                    if o.type == "STOP_LOSS":
+                        self._fill(o, tick.price)
+                        continue
+                if self._marketable(o, tick.price):
+                    self._fill(o, o.price)
+        for cb in list(self.tick_listeners):
+            try:
+                cb(tick)
+            except Exception as e:
+                print(f"[mock_exchange] tick listener en erreur: {e}")
+
+    def price(self, symbol: str) -> Dict[str, Any]:
+        with self._lock:
+            last = self.symbols[symbol].price if symbol in self.symbols else None
+        if last is None:
+            raise MockError(-1121, "Invalid symbol.")
+        return {"symbol": symbol, "price": _fmt(last)}
+
+    def klines(self, symbol: str, interval: str = "1m", limit: int = 500) -> List[List[Any]]:
+        try:
+            minutes = int(interval[:-1]) * _INTERVAL_MIN[interval[-1]]
+        except (KeyError, ValueError):
+            raise MockError(-1120, "Invalid interval.")
+        width = minutes * 60_000
+        with self._lock:
+            candles = sorted(self.symbols[symbol].candles.items()) if symbol in self.symbols else []
+        buckets: Dict[int, List[float]] = {}
+        for t, (o, h, low, c, v) in candles:
+            key = t // width * width
+            b = buckets.get(key)
+            if b is None:
+                buckets[key] = [o, h, low, c, v]
+            else:
+                b[1], b[2], b[3], b[4] = max(b[1], h), min(b[2], low), c, b[4] + v
+        rows = sorted(buckets.items())[-int(limit):]
+        return [[t, _fmt(o), _fmt(h), _fmt(low), _fmt(c), _fmt(v), t + width - 1, _fmt(v * c), 0, "0", "0", "0"]
+                for t, (o, h, low, c, v) in rows]
+
+    def ticker_24hr(self, symbol: Optional[str] = None) -> Any:
+        with self._lock:
+            names = [symbol] if symbol else [s for s, st in self.symbols.items() if st.price is not None]
+            out = []
+            for s in names:
+                st = self.symbols.get(s)
+                if st is None or st.price is None:
+                    raise MockError(-1121, "Invalid symbol.")
+                rows = sorted(st.candles.items())
+                horizon = rows[-1][0] - 86_400_000 if rows else 0
+                rows = [r for t, r in rows if t > horizon]
+                open_ = rows[0][0] if rows else st.price
+                out.append({"symbol": s, "lastPrice": _fmt(st.price), "openPrice": _fmt(open_),
+                            "priceChangePercent": f"{(st.price / open_ - 1) * 100:.3f}" if open_ else "0",
+                            "highPrice": _fmt(max((r[1] for r in rows), default=st.price)),
+                            "lowPrice": _fmt(min((r[2] for r in rows), default=st.price)),
+                            "volume": _fmt(sum(r[4] for r in rows)),
+                            "quoteVolume": _fmt(sum(r[4] * r[3] for r in rows))})
+        return out[0] if symbol else out
+
+    def exchange_info(self) -> Dict[str, Any]:
+        with self._lock:
+            names = sorted(set(self.symbols) | set(self.filters))
+        out = []
+        for s in names:
+            f = {**DEFAULT_FILTERS, **self.filters.get(s, {})}
+            base, quote = _split(s)
+            out.append({"symbol": s, "status": "TRADING", "baseAsset": base, "quoteAsset": quote, "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": f["tick_size"], "maxPrice": "1000000", "tickSize": f["tick_size"]},
+                {"filterType": "LOT_SIZE", "minQty": f["step_size"], "maxQty": "9000", "stepSize": f["step_size"]},
+                {"filterType": "NOTIONAL", "minNotional": f["min_notional"], "applyMinToMarket": True},
+            ]})
+        return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": out}
+
+    def replay(self, ticks: Iterable[Tick], speed: float = 0.0) -> int:
+        """Rejoue des ticks; speed=0: au plus vite, sinon temps réel / speed."""
+        n = 0
+        prev_ts = None
+        for t in ticks:
+            if speed > 0 and prev_ts is not None and t.ts > prev_ts:
+                time.sleep((t.ts - prev_ts) / 1000 / speed)
+            prev_ts = t.ts
+            self.on_tick(t)
+            n += 1
+        return n
+
+
+def load_ticks(path: str) -> Iterator[Tick]:
+    """Ticks JSONL: messages aggTrade bruts ({"s","p","q","T","m"}) ou {"symbol","price","qty","ts"}."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            msg = json.loads(line)
+            if "s" in msg:
+                yield parse_agg_trade(msg)
+            else:
+                yield Tick(symbol=msg["symbol"], price=float(msg["price"]), qty=float(msg.get("qty", 0)),
+                           ts=int(msg["ts"]), is_buyer_maker=bool(msg.get("is_buyer_maker", False)))
+
+
+class MockBinanceServer:
+    """Serveur REST + WS autour d'un MatchingEngine (threads démons)."""
+
+    def __init__(
+        self,
+        engine: Optional[MatchingEngine] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ws_port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        api_secret: Optional[str] = None,
+        clock_skew_ms: int = 0,
+    ) -> None:
+        self.engine = engine or MatchingEngine()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.api_secret = api_secret
+        self.clock_skew_ms = clock_skew_ms
+        self._rng = random.Random(seed)
+        self._faults: Deque[Tuple[str, int, int, str]] = deque()
+        self._delays: Deque[Tuple[str, float]] = deque()
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.listen_keys: set = set()
+        self._user_conns: set = set()
+        self._tick_conns: Dict[str, set] = defaultdict(set)
+        self._host, self._port, self._ws_port = host, port, ws_port
+        self._http: Optional[ThreadingHTTPServer] = None
+        self._ws = None
+        self.engine.listeners.append(self._broadcast_user)
+        self.engine.tick_listeners.append(self._broadcast_tick)
+
+    # --- cycle de vie ------------------------------------------------------------
+    def start(self) -> "MockBinanceServer":
+        from websockets.sync.server import serve
+
+        self._http = ThreadingHTTPServer((self._host, self._port), self._handler_class())
+        self._http.daemon_threads = True
+        self._ws = serve(self._ws_handler, self._host, self._ws_port)
+        for target in (self._http.serve_forever, self._ws.serve_forever):
+            threading.Thread(target=target, daemon=True, name="kobe-mock-exchange").start()
+        return self
+
+    def stop(self) -> None:
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+        if self._ws is not None:
+            self._ws.shutdown()
+
+    def __enter__(self) -> "MockBinanceServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self._host}:{self._http.server_address[1]}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self._host}:{self._ws.socket.getsockname()[1]}"
+
+    # --- injection de fautes -----------------------------------------------------
+    def inject_error(self, path: str = "", status: int = 503, code: int = -1001,
+                     msg: str = "Internal error; unable to process your request. Please try again.",
+                     times: int = 1) -> None:
+        """Les `times` prochaines requêtes dont le chemin commence par `path` échouent."""
+        with self._lock:
+            for _ in range(times):
+                self._faults.append((path, status, code, msg))
+
+    def inject_delay(self, path: str = "", delay_ms: float = 1000.0, times: int = 1) -> None:
+        """
+        Les `times` prochaines requêtes sur `path` sont traitées puis répondues
+        après `delay_ms`: avec un timeout client plus court, la réponse est
+        perdue alors que l'ordre existe (cas du rejeu idempotent).
+        """
+        with self._lock:
+            for _ in range(times):
+                self._delays.append((path, delay_ms / 1000))
+
+    def _delay_for(self, path: str) -> float:
+        with self._lock:
+            for i, (prefix, delay) in enumerate(self._delays):
+                if path.startswith(prefix):
+                    del self._delays[i]
+                    return delay
+        return 0.0
+
+    def _fault_for(self, path: str) -> Optional[Tuple[int, int, str]]:
+        with self._lock:
+            for i, (prefix, status, code, msg) in enumerate(self._faults):
+                if path.startswith(prefix):
+                    del self._faults[i]
+                    return status, code, msg
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return 503, -1001, "Internal error; unable to process your request. Please try again."
+            delay = (self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)) / 1000
+        if delay > 0:
+            time.sleep(delay)
+        return None
+
+    # --- WebSocket ---------------------------------------------------------------
+    def _ws_handler(self, conn) -> None:
+        name = conn.request.path.rsplit("/", 1)[-1]
+        if name.lower().endswith("@aggtrade"):
+            group = self._tick_conns[name.split("@")[0].upper()]
+        elif name in self.listen_keys:
+            group = self._user_conns
+        else:
+            conn.close(1008, "unknown stream")
+            return
+        group.add(conn)
+        try:
+            for _ in conn:
+                pass
+        except Exception:
+            pass
+        finally:
+            group.discard(conn)
+
+    def _send_all(self, conns: set, msg: Dict[str, Any]) -> None:
+        data = json.dumps(msg)
+        for conn in list(conns):
+            try:
+                conn.send(data)
+            except Exception:
+                conns.discard(conn)
+
+    def _broadcast_user(self, msg: Dict[str, Any]) -> None:
+        self._send_all(self._user_conns, msg)
+
+    def _broadcast_tick(self, t: Tick) -> None:
+        conns = self._tick_conns.get(t.symbol)
+        if conns:
+            self._send_all(conns, {"e": "aggTrade", "E": t.ts, "s": t.symbol, "p": _fmt(t.price),
+                                   "q": _fmt(t.qty), "T": t.ts, "m": t.is_buyer_maker})
+
+    # --- REST --------------------------------------------------------------------
+    def _check_signature(self, query: str, params: Dict[str, str]) -> None:
+        payload, sep, sig = query.rpartition("&signature=")
+        if not sep:
+            raise MockError(-1102, "Mandatory parameter 'signature' was not sent, was empty/null, or malformed.")
+        if self.api_secret is not None:
+            expected = hmac.new(self.api_secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+            if sig != expected:
+                raise MockError(-1022, "Signature for this request is not valid.")
+        try:
+            ts = int(params["timestamp"])
+        except (KeyError, ValueError):
+            raise MockError(-1102, "Mandatory parameter 'timestamp' was not sent, was empty/null, or malformed.")
+        server_now = int(time.time() * 1000) + self.clock_skew_ms
+        recv_window = int(params.get("recvWindow", 5000))
+        if ts > server_now + 1000 or server_now - ts > recv_window:
+            raise MockError(-1021, "Timestamp for this request is outside of the recvWindow.")
+
+    def _route(self, method: str, path: str, query: str) -> Any:
+        params = dict(urllib.parse.parse_qsl(query))
+        e = self.engine
+        public = {
+            ("GET", "/api/v3/ping"): lambda: {},
+            ("GET", "/api/v3/time"): lambda: {"serverTime": int(time.time() * 1000) + self.clock_skew_ms},
+            ("GET", "/api/v3/exchangeInfo"): e.exchange_info,
+            ("GET", "/api/v3/ticker/price"): lambda: (
+                [e.price(s) for s in _symbols_param(params["symbols"])] if "symbols" in params
+                else e.price(params.get("symbol", ""))
+            ),
+            ("GET", "/api/v3/ticker/24hr"): lambda: e.ticker_24hr(params.get("symbol")),
+            ("GET", "/api/v3/klines"): lambda: e.klines(params.get("symbol", ""), params.get("interval", "1m"),
+                                                        int(params.get("limit", 500))),
+        }
+        if (method, path) in public:
+            return public[(method, path)]()
+        if path == "/api/v3/userDataStream":
+            return self._user_data_stream(method, params)
+        signed = {
+            ("GET", "/api/v3/account"): e.account,
+            ("GET", "/api/v3/openOrders"): lambda: e.open_orders(params),
+            ("GET", "/api/v3/order"): lambda: e.query_order(params),
+            ("GET", "/api/v3/orderList"): lambda: e.query_order_list(params),
+            ("POST", "/api/v3/order"): lambda: e.new_order(params),
+            ("POST", "/api/v3/order/cancelReplace"): lambda: e.cancel_replace(params),
+            ("POST", "/api/v3/orderList/oco"): lambda: e.new_oco(params),
+            ("DELETE", "/api/v3/order"): lambda: e.cancel_order(params),
+            ("DELETE", "/api/v3/openOrders"): lambda: e.cancel_open_orders(params),
+            ("DELETE", "/api/v3/orderList"): lambda: e.cancel_order_list(params),
+        }
+        fn = signed.get((method, path))
+        if fn is None:
+            raise MockError(-1000, f"Unsupported endpoint {method} {path}", status=404)
+        self._check_signature(query, params)
+        return fn()
+
+    def _user_data_stream(self, method: str, params: Dict[str, str]) -> Dict[str, Any]:
+        if method == "POST":
+            key = f"mock{random.getrandbits(64):016x}"
+            self.listen_keys.add(key)
+            return {"listenKey": key}
+        key = params.get("listenKey", "")
+        if key not in self.listen_keys:
+            raise MockError(-1125, "This listenKey does not exist.")
+        if method == "DELETE":
+            self.listen_keys.discard(key)
+        return {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self) -> None:
+                path, _, query = self.path.partition("?")
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = self.rfile.read(length).decode("utf-8")
+                    query = f"{query}&{body}" if query else body
+                with server._lock:
+                    server.requests[(self.command, path)] += 1
+                fault = server._fault_for(path)
+                try:
+                    if fault is not None:
+                        raise MockError(fault[1], fault[2], status=fault[0])
+                    status, body = 200, server._route(self.command, path, query)
+                except MockError as err:
+                    status, body = err.status, {"code": err.code, "msg": err.msg}
+                except Exception as err:
+                    status, body = 500, {"code": -1000, "msg": str(err)}
+                data = json.dumps(body).encode()
+                delay = server._delay_for(path) if fault is None else 0.0
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    self.close_connection = True  # client parti (timeout)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def _parse_balances(items: List[str]) -> Dict[str, float]:
+    out = {}
+    for item in items:
+        asset, _, amt = item.partition("=")
+        out[asset.upper()] = float(amt)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="kobe.execution.mock_exchange", description="Exchange Binance spot local")
+    ap.add_argument("--ticks", help="fichier JSONL de ticks à rejouer (aggTrade ou symbol/price/qty/ts)")
+    ap.add_argument("--speed", type=float, default=1.0, help="vitesse de rejeu (0 = au plus vite)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8090)
+    ap.add_argument("--ws-port", type=int, default=8091)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--secret", default=None, help="vérifie les signatures avec ce secret")
+    ap.add_argument("--balance", action="append", default=[], help="ASSET=montant (répétable)")
+    args = ap.parse_args(argv)
+
+    engine = MatchingEngine(balances=_parse_balances(args.balance) or None)
+    srv = MockBinanceServer(engine, host=args.host, port=args.port, ws_port=args.ws_port,
+                            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            error_rate=args.error_rate, seed=args.seed, api_secret=args.secret).start()
+    print(f"[mock_exchange] REST {srv.http_url}  WS {srv.ws_url}")
+    try:
+        if args.ticks:
+            n = engine.replay(load_ticks(args.ticks), speed=args.speed)
+            print(f"[mock_exchange] {n} ticks rejoués")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
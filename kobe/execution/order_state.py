@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Cycle de vie des ordres Binance spot: machine à états typée + index mémoire.
+
+- OrderStatus: NEW → PARTIALLY_FILLED → FILLED / CANCELED / REJECTED / EXPIRED.
+  Une transition non prévue (ex: ack REST "NEW" reçu après l'executionReport
+  "FILLED") est ignorée; la quantité exécutée ne fait que croître.
+- OrderIndex: ordres indexés par (symbol, orderId), par clientOrderId et par
+  symbole pour les ordres vivants; alimenté par les réponses REST (ordre
+  simple, liste OCO, cancelReplace, annulations, openOrders) et par les
+  executionReport du flux user data.
+- ORDER_INDEX: index partagé du process (clients sync / async, user_stream,
+  router, trailing stop) — "qu'est-ce qui est vivant ?" sans relire les journaux.
+  Les ordres terminés restent consultables dans une fenêtre bornée.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Ordres terminés conservés pour les lookups (FIFO)
+DONE_MAX = 4096
+
+
+class OrderStatus(str, Enum):
+    NEW = "NEW"
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELED = "CANCELED"
+    REJECTED = "REJECTED"
+    EXPIRED = "EXPIRED"
+
+    @property
+    def is_terminal(self) -> bool:
+        return self not in (OrderStatus.NEW, OrderStatus.PARTIALLY_FILLED)
+
+    @classmethod
+    def from_binance(cls, raw: Any) -> Optional["OrderStatus"]:
+        """Statut Binance ("X" / "status") → OrderStatus (None si inconnu)."""
+        raw = str(raw or "").upper()
+        if raw in ("PENDING_NEW", "PENDING_CANCEL"):
+            return cls.NEW
+        if raw == "EXPIRED_IN_MATCH":
+            return cls.EXPIRED
+        try:
+            return cls(raw)
+        except ValueError:
+            return None
+
+
+_TRANSITIONS = {
+    OrderStatus.NEW: {OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED, OrderStatus.CANCELED,
+                      OrderStatus.REJECTED, OrderStatus.EXPIRED},
+    OrderStatus.PARTIALLY_FILLED: {OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED,
+                                   OrderStatus.CANCELED, OrderStatus.EXPIRED},
+}
+
+
+def order_kind(order_type: str, default: Optional[str] = None) -> Optional[str]:
+    """Rôle d'un ordre d'après son type (LIMIT / MARKET: `default`, fourni par l'appelant)."""
+    order_type = str(order_type or "").upper()
+    if order_type in ("STOP_LOSS", "STOP_LOSS_LIMIT"):
+        return "stop_loss"
+    if order_type in ("TAKE_PROFIT", "TAKE_PROFIT_LIMIT", "LIMIT_MAKER"):
+        return "take_profit"
+    return default
+
+
+def _f(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class TrackedOrder:
+    symbol: str
+    client_order_id: str
+    side: str = ""
+    type: str = ""
+    kind: Optional[str] = None
+    order_id: Optional[int] = None
+    order_list_id: int = -1
+    status: OrderStatus = OrderStatus.NEW
+    orig_qty: float = 0.0
+    executed_qty: float = 0.0
+    cum_quote: float = 0.0
+    price: float = 0.0
+    stop_price: float = 0.0
+    reason: Optional[str] = None
+    created_ms: int = 0
+    updated_ms: int = 0
+
+    @property
+    def is_live(self) -> bool:
+        return not self.status.is_terminal
+
+    @property
+    def avg_price(self) -> float:
+        return self.cum_quote / self.executed_qty if self.executed_qty > 0 else 0.0
+
+    def to_open_order(self) -> Dict[str, Any]:
+        """Forme GET /api/v3/openOrders (pour les helpers de binance_spot)."""
+        return {"symbol": self.symbol, "orderId": self.order_id, "orderListId": self.order_list_id,
+                "clientOrderId": self.client_order_id, "side": self.side, "type": self.type,
+                "origQty": self.orig_qty, "price": self.price, "stopPrice": self.stop_price,
+                "status": self.status.value}
+
+
+class OrderIndex:
+    """Index mémoire thread-safe des ordres du compte."""
+
+    def __init__(self, done_max: int = DONE_MAX) -> None:
+        self._lock = threading.RLock()
+        self._by_id: Dict[Tuple[str, int], TrackedOrder] = {}
+        self._by_client: Dict[str, TrackedOrder] = {}
+        self._live: Dict[str, Dict[str, TrackedOrder]] = {}
+        self._done: Deque[TrackedOrder] = deque()
+        self.done_max = done_max
+
+    # --- Mises à jour ------------------------------------------------------------
+    def _find(self, symbol: str, order_id: Any, client_id: str) -> Optional[TrackedOrder]:
+        try:
+            rec = self._by_id.get((symbol, int(order_id)))
+        except (TypeError, ValueError):
+            rec = None
+        if rec is not None:
+            return rec
+        rec = self._by_client.get(client_id) if client_id else None
+        if rec is None or rec.symbol != symbol:
+            return None
+        # Même clientOrderId mais autre orderId: ordre distinct (id réutilisé)
+        if rec.order_id is not None and order_id not in (None, "", -1) and str(rec.order_id) != str(order_id):
+            return None
+        return rec
+
+    def _upsert(self, symbol: str, client_id: str, order_id: Any, status: Optional[OrderStatus],
+                executed_qty: Optional[float] = None, cum_quote: Optional[float] = None,
+                ts: Optional[int] = None, **fields: Any) -> Optional[TrackedOrder]:
+        if not symbol or not (client_id or order_id not in (None, "", -1)):
+            return None
+        now = ts or int(time.time() * 1000)
+        rec = self._find(symbol, order_id, client_id)
+        if rec is None:
+            rec = TrackedOrder(symbol=symbol, client_order_id=client_id or f"id-{order_id}",
+                               status=status or OrderStatus.NEW, created_ms=now, updated_ms=now)
+            self._by_client[rec.client_order_id] = rec
+            if rec.is_live:
+                self._live.setdefault(symbol, {})[rec.client_order_id] = rec
+            else:
+                self._retire(rec)
+            status = None
+        if order_id not in (None, "", -1) and rec.order_id is None:
+            rec.order_id = int(order_id)
+            self._by_id[(symbol, rec.order_id)] = rec
+        for k, v in fields.items():
+            # Les champs descriptifs ne sont complétés que s'ils manquent
+            if v not in (None, "", 0, 0.0, -1) and getattr(rec, k) in (None, "", 0, 0.0, -1):
+                setattr(rec, k, v)
+        if executed_qty is not None and executed_qty >= rec.executed_qty:
+            rec.executed_qty = executed_qty
+            rec.cum_quote = max(rec.cum_quote, cum_quote or 0.0)
+        if status is not None and status in _TRANSITIONS.get(rec.status, ()):
+            rec.status = status
+            if status.is_terminal:
+                self._live.get(symbol, {}).pop(rec.client_order_id, None)
+                self._retire(rec)
+        rec.updated_ms = max(rec.updated_ms, now)
+        return rec
+
+    def _retire(self, rec: TrackedOrder) -> None:
+        self._done.append(rec)
+        while len(self._done) > self.done_max:
+            old = self._done.popleft()
+            if self._by_client.get(old.client_order_id) is old:
+                del self._by_client[old.client_order_id]
+            if old.order_id is not None and self._by_id.get((old.symbol, old.order_id)) is old:
+                del self._by_id[(old.symbol, old.order_id)]
+
+    def _ingest_order(self, o: Dict[str, Any], kind: Optional[str], ts: Optional[int]) -> None:
+        otype = str(o.get("type", ""))
+        self._upsert(
+            str(o.get("symbol", "")), str(o.get("clientOrderId", "")), o.get("orderId"),
+            OrderStatus.from_binance(o.get("status")),
+            executed_qty=_f(o.get("executedQty")), cum_quote=_f(o.get("cummulativeQuoteQty")),
+            ts=int(o.get("updateTime") or o.get("transactTime") or ts or 0) or None,
+            side=str(o.get("side", "")), type=otype, kind=order_kind(otype, kind),
+            order_list_id=int(o.get("orderListId", -1)), orig_qty=_f(o.get("origQty")),
+            price=_f(o.get("price")), stop_price=_f(o.get("stopPrice")),
+        )
+
+    def on_response(self, resp: Any, params: Optional[Dict[str, Any]] = None,
+                    kind: Optional[str] = None) -> None:
+        """
+        Réponse REST d'un ordre: ack simple, liste OCO (orderReports),
+        cancelReplace (cancelResponse / newOrderResponse) ou liste d'ordres.
+        Une erreur n'est indexée (REJECTED) que si la requête portait un
+        newClientOrderId.
+        """
+        with self._lock:
+            if isinstance(resp, list):
+                for o in resp:
+                    if isinstance(o, dict):
+                        self._ingest_order(o, kind, None)
+                return
+            if not isinstance(resp, dict):
+                return
+            if "error" in resp or "code" in resp:
+                if resp.get("outcome") == "unknown":
+                    return  # issue inconnue (réponse perdue): ni vivant ni rejeté
+                params = params or {}
+                client_id = str(params.get("newClientOrderId", "") or "")
+                if client_id:
+                    otype = str(params.get("type", ""))
+                    self._upsert(str(params.get("symbol", "")), client_id, None, OrderStatus.REJECTED,
+                                 side=str(params.get("side", "")), type=otype, kind=order_kind(otype, kind),
+                                 orig_qty=_f(params.get("quantity")), reason=str(resp.get("message") or resp))
+                return
+            if "cancelResponse" in resp or "newOrderResponse" in resp:
+                for key in ("cancelResponse", "newOrderResponse"):
+                    sub = resp.get(key)
+                    if isinstance(sub, dict) and "code" not in sub:
+                        self.on_response(sub, kind=kind)
+                return
+            if isinstance(resp.get("orderReports"), list):
+                for o in resp["orderReports"]:
+                    if isinstance(o, dict):
+                        self._ingest_order(o, kind, resp.get("transactionTime"))
+                return
+            if "symbol" in resp and ("orderId" in resp or "clientOrderId" in resp):
+                self._ingest_order(resp, kind, None)
+
+    def on_execution_report(self, msg: Dict[str, Any]) -> Optional[TrackedOrder]:
+        """executionReport brut du flux user data."""
+        status = OrderStatus.from_binance(msg.get("X"))
+        # Sur une annulation, "c" est l'id de la requête d'annulation, "C" l'id d'origine
+        client_id = str(msg.get("C") or msg.get("c") or "")
+        otype = str(msg.get("o", ""))
+        with self._lock:
+            rec = self._upsert(
+                str(msg.get("s", "")), client_id, msg.get("i"), status,
+                executed_qty=_f(msg.get("z")), cum_quote=_f(msg.get("Z")),
+                ts=int(msg.get("E") or msg.get("T") or 0) or None,
+                side=str(msg.get("S", "")), type=otype, kind=order_kind(otype),
+                order_list_id=int(msg["g"]) if msg.get("g") is not None else -1,
+                orig_qty=_f(msg.get("q")), price=_f(msg.get("p")), stop_price=_f(msg.get("P")),
+                reason=None if msg.get("r") in (None, "NONE") else str(msg.get("r")),
+            )
+            return replace(rec) if rec is not None else None
+
+    def reconcile(self, symbol: str, open_orders: Iterable[Dict[str, Any]]) -> List[TrackedOrder]:
+        """
+        Aligne les ordres vivants d'un symbole sur GET /api/v3/openOrders.
+        Les ordres absents côté exchange sont retirés (issue inconnue ici: le
+        flux user data la fournira); retourne ces ordres retirés.
+        """
+        open_orders = [o for o in open_orders or [] if isinstance(o, dict)]
+        with self._lock:
+            for o in open_orders:
+                self._ingest_order(o, None, None)
+            seen = {int(o["orderId"]) for o in open_orders if o.get("orderId") is not None}
+            gone = [rec for rec in self._live.get(symbol, {}).values()
+                    if rec.order_id is not None and rec.order_id not in seen]
+            for rec in gone:
+                self._forget(rec)
+            return gone
+
+    def _forget(self, rec: TrackedOrder) -> None:
+        self._live.get(rec.symbol, {}).pop(rec.client_order_id, None)
+        if self._by_client.get(rec.client_order_id) is rec:
+            del self._by_client[rec.client_order_id]
+        if rec.order_id is not None and self._by_id.get((rec.symbol, rec.order_id)) is rec:
+            del self._by_id[(rec.symbol, rec.order_id)]
+
+    def forget(self, symbol: str, order_id: Any = None, client_order_id: str = "") -> None:
+        """Retire un ordre connu pour périmé (ex: id refusé par l'exchange)."""
+        with self._lock:
+            rec = self._find(symbol, order_id, client_order_id)
+            if rec is not None:
+                self._forget(rec)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+            self._by_client.clear()
+            self._live.clear()
+            self._done.clear()
+
+    # --- Lecture -------------------------------------------------------------------
+    def get(self, symbol: str = "", order_id: Any = None, client_order_id: str = "") -> Optional[TrackedOrder]:
+        with self._lock:
+            if not symbol and client_order_id:
+                rec = self._by_client.get(client_order_id)
+            else:
+                rec = self._find(symbol, order_id, client_order_id)
+            return replace(rec) if rec is not None else None
+
+    def live(self, symbol: Optional[str] = None, kind: Optional[str] = None,
+             side: Optional[str] = None) -> List[TrackedOrder]:
+        """Ordres vivants (NEW / PARTIALLY_FILLED), les plus anciens d'abord."""
+        with self._lock:
+            books = [self._live.get(symbol, {})] if symbol is not None else list(self._live.values())
+            rows = [replace(rec) for book in books for rec in book.values()
+                    if (kind is None or rec.kind == kind) and (side is None or rec.side == side)]
+        rows.sort(key=lambda r: (r.created_ms, r.client_order_id))
+        return rows
+
+    def summary(self) -> Dict[str, Any]:
+        """Compteurs des ordres vivants: total, par symbole et par rôle."""
+        by_symbol: Dict[str, int] = {}
+        by_kind: Dict[str, int] = {}
+        rows = self.live()
+        for r in rows:
+            by_symbol[r.symbol] = by_symbol.get(r.symbol, 0) + 1
+            by_kind[r.kind or "other"] = by_kind.get(r.kind or "other", 0) + 1
+        return {"live": len(rows), "by_symbol": by_symbol, "by_kind": by_kind}
+
+
+ORDER_INDEX = OrderIndex()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Limiteur de débit partagé entre les clients Binance (synchrone et asynchrone).
+
+- Seau à jetons avec réservation: `reserve()` décompte un jeton sous verrou et
+  renvoie le délai d'attente (jetons négatifs = file d'attente). Aucun objet
+  asyncio n'est conservé: le même limiteur sert depuis plusieurs threads et
+  plusieurs boucles (asyncio.run par cycle).
+- Deux seaux par process: requêtes REST (poids ~1200/min côté Binance) et
+  nouveaux ordres (10/s). Un ordre consomme un jeton dans chacun.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+REQUESTS_PER_S = 20.0
+REQUESTS_BURST = 40
+ORDERS_PER_S = 10.0
+ORDERS_BURST = 10
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+class RateLimiter:
+    """Seau à jetons: `rate` jetons/s, capacité `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Réserve un jeton et retourne l'attente (s) avant de pouvoir l'utiliser."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+REQUEST_LIMITER = RateLimiter(_env_float("KOBE_BINANCE_REQ_PER_S", REQUESTS_PER_S), REQUESTS_BURST)
+ORDER_LIMITER = RateLimiter(_env_float("KOBE_BINANCE_ORDERS_PER_S", ORDERS_PER_S), ORDERS_BURST)
+
+
+def limiters_for(method: str, path: str):
+    """Seaux à consommer pour une requête (nouvel ordre = requête + ordre)."""
+    if method == "POST" and path.startswith("/api/v3/order"):
+        return (REQUEST_LIMITER, ORDER_LIMITER)
+    return (REQUEST_LIMITER,)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Signature des requêtes SIGNED Binance et synchronisation de l'horloge serveur.
+
+- RequestSigner: l'objet HMAC-SHA256 est initialisé une fois avec la clé
+  secrète (padding ipad/opad déjà calculé); chaque requête ne paie qu'un
+  `.copy()` + update sur la query. La query est construite en une passe
+  (params + recvWindow + timestamp + signature), sans copie du dict.
+- ServerClock: mesure l'écart horloge locale / serveur via GET /api/v3/time
+  (milieu de l'aller-retour), rafraîchi en tâche de fond; `now_ms()` fournit
+  le timestamp corrigé. Sur une erreur -1021 (timestamp hors recvWindow),
+  l'appelant resynchronise et rejoue une seule fois.
+- `python -m kobe.execution.signing --bench N`: micro-benchmark du coût de
+  signature (ancien chemin urlencode + hmac.new vs chemin mis en cache).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# Fenêtre de validité côté serveur (Binance: 5000 par défaut, 60000 max)
+RECV_WINDOW_MS = 5000
+_RECV_WINDOW_ENV = "KOBE_RECV_WINDOW_MS"
+CLOCK_SYNC_INTERVAL_S = 300.0
+# Codes Binance: -1021 = timestamp hors recvWindow / en avance sur le serveur
+CLOCK_ERROR_CODES = (-1021,)
+
+_SAFE = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_.-~")
+
+
+def _recv_window_ms() -> int:
+    try:
+        return int(os.getenv(_RECV_WINDOW_ENV, "") or RECV_WINDOW_MS)
+    except ValueError:
+        return RECV_WINDOW_MS
+
+
+def _encode(params: Optional[Mapping[str, Any]]) -> str:
+    """urlencode sans détour pour les valeurs courantes (symboles, nombres, enums)."""
+    if not params:
+        return ""
+    parts = []
+    for k, v in params.items():
+        s = v if isinstance(v, str) else str(v)
+        if not _SAFE.issuperset(s):
+            s = urllib.parse.quote_plus(s)
+        parts.append(f"{k}={s}")
+    return "&".join(parts)
+
+
+class RequestSigner:
+    """HMAC-SHA256 pré-initialisé: signe une query en un copy() + update()."""
+
+    __slots__ = ("_mac", "recv_window_ms")
+
+    def __init__(self, secret: str, recv_window_ms: Optional[int] = None) -> None:
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        self.recv_window_ms = _recv_window_ms() if recv_window_ms is None else int(recv_window_ms)
+
+    def sign(self, query: str) -> str:
+        mac = self._mac.copy()
+        mac.update(query.encode())
+        return mac.hexdigest()
+
+    def build(self, params: Optional[Mapping[str, Any]], timestamp_ms: int) -> str:
+        """Query complète prête à envoyer: params&recvWindow=..&timestamp=..&signature=.."""
+        tail = f"recvWindow={self.recv_window_ms}&timestamp={timestamp_ms}"
+        base = _encode(params)
+        query = f"{base}&{tail}" if base else tail
+        return f"{query}&signature={self.sign(query)}"
+
+
+def is_clock_error(body: Any) -> bool:
+    """Réponse d'erreur Binance liée au décalage d'horloge (-1021)."""
+    if isinstance(body, (bytes, str)):
+        try:
+            body = json.loads(body)
+        except Exception:
+            return False
+    return isinstance(body, dict) and body.get("code") in CLOCK_ERROR_CODES
+
+
+def fetch_server_time(base: str, timeout: float = 5) -> int:
+    with urllib.request.urlopen(f"{base}/api/v3/time", timeout=timeout) as r:
+        return int(json.loads(r.read().decode("utf-8"))["serverTime"])
+
+
+class ServerClock:
+    """Écart mesuré entre horloge locale et serveur (ms), rafraîchi en arrière-plan."""
+
+    def __init__(
+        self,
+        base: str,
+        fetch: Optional[Callable[[], int]] = None,
+        interval_s: float = CLOCK_SYNC_INTERVAL_S,
+    ) -> None:
+        self.base = base.rstrip("/")
+        self._fetch = fetch or (lambda: fetch_server_time(self.base))
+        self.interval_s = float(interval_s)
+        self.offset_ms = 0
+        self.rtt_ms: Optional[float] = None
+        self.synced_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000) + self.offset_ms
+
+    def sync(self) -> Optional[int]:
+        """Mesure l'écart (milieu de l'aller-retour). Retourne l'offset, None en cas d'échec."""
+        try:
+            t0 = time.time()
+            server_ms = self._fetch()
+            t1 = time.time()
+        except Exception as e:
+            print(f"[signing] synchro horloge serveur échouée: {e}")
+            return None
+        with self._lock:
+            self.offset_ms = int(server_ms - (t0 + t1) * 500)
+            self.rtt_ms = round((t1 - t0) * 1000, 3)
+            self.synced_at = t1
+        return self.offset_ms
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.interval_s)
+
+    def start(self) -> "ServerClock":
+        """Synchro immédiate puis toutes les `interval_s` secondes (thread démon)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="kobe-server-clock")
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2)
+
+
+_CLOCKS: Dict[str, ServerClock] = {}
+_CLOCKS_LOCK = threading.Lock()
+
+
+def get_server_clock(base: str) -> ServerClock:
+    """Horloge partagée par URL de base (offset commun à tous les clients du process)."""
+    key = base.rstrip("/")
+    with _CLOCKS_LOCK:
+        clock = _CLOCKS.get(key)
+        if clock is None:
+            clock = _CLOCKS[key] = ServerClock(key)
+        return clock
+
+
+def bench(n: int = 100_000) -> Dict[str, float]:
+    """Coût moyen (µs) d'une signature: ancien chemin vs RequestSigner."""
+    secret = "x" * 64
+    params = {"symbol": "BTCUSDC", "side": "SELL", "type": "STOP_LOSS_LIMIT", "quantity": 0.01234,
+              "price": 67201.0, "stopPrice": 67201.0, "timeInForce": "GTC"}
+    ts = int(time.time() * 1000)
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        p = dict(params)
+        p["timestamp"] = ts
+        query = urllib.parse.urlencode(p)
+        sig = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        _ = f"{query}&signature={sig}"
+    legacy = time.perf_counter() - t0
+
+    signer = RequestSigner(secret)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        signer.build(params, ts)
+    cached = time.perf_counter() - t0
+
+    return {
+        "n": n,
+        "legacy_us": round(legacy / n * 1e6, 3),
+        "cached_us": round(cached / n * 1e6, 3),
+        "speedup": round(legacy / cached, 2) if cached else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="kobe.execution.signing")
+    ap.add_argument("--bench", type=int, default=100_000, help="nombre de signatures mesurées")
+    args = ap.parse_args(argv)
+    print(json.dumps(bench(args.bench), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
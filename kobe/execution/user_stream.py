@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+kobe.execution.user_stream — flux "user data" Binance Spot (fills en temps réel).
+
+- Cycle de vie du listenKey: création (POST /api/v3/userDataStream),
+  keep-alive périodique (PUT, toutes les 30 min par défaut), suppression (DELETE)
+  à l'arrêt.
+- WebSocket `<ws_base>/ws/<listenKey>` (websocket-client, comme kobe.core.feed),
+  reconnexion avec backoff exponentiel; `listenKeyExpired` ou keep-alive refusé
+  => nouveau listenKey puis reconnexion.
+- Chaque `executionReport` est:
+    * journalisé dans logs/executions (stage="fill"),
+    * appliqué au carnet de positions: un TP / SL (ordre de sortie) FILLED
+      clôture la position live ouverte correspondante au prix moyen d'exécution,
+    * appliqué à l'index des ordres (kobe.execution.order_state).
+
+Démarré / arrêté par le scheduler (kobe.cli.schedule) quand des clés API
+live sont configurées. Demo: python -m kobe.execution.user_stream --print
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from websocket import WebSocketApp
+
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.order_state import ORDER_INDEX
+from kobe.logs.execution_logger import ExecutionEvent, ExecutionStatus, log_execution_event
+
+LISTEN_KEY_PATH = "/api/v3/userDataStream"
+DEFAULT_WS_BASE = "wss://stream.binance.com:9443"
+# Binance expire un listenKey après 60 min sans keep-alive
+KEEPALIVE_S = 30 * 60
+RECONNECT_MIN_S = 1.0
+RECONNECT_MAX_S = 60.0
+# Fenêtre de déduplication des exécutions (orderId, tradeId / statut)
+_SEEN_MAX = 4096
+
+# executionReport.X → statut Kobe
+_STATUS_MAP = {
+    "NEW": ExecutionStatus.SUCCESS,
+    "PARTIALLY_FILLED": ExecutionStatus.SUCCESS,
+    "FILLED": ExecutionStatus.SUCCESS,
+    "CANCELED": ExecutionStatus.CANCELLED,
+    "EXPIRED": ExecutionStatus.CANCELLED,
+    "EXPIRED_IN_MATCH": ExecutionStatus.CANCELLED,
+    "REJECTED": ExecutionStatus.EXCHANGE_ERROR,
+}
+
+
+def _f(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_execution_report(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """executionReport brut (clés courtes Binance) → dict lisible."""
+    cum_qty = _f(msg.get("z"))
+    cum_quote = _f(msg.get("Z"))
+    order_type = str(msg.get("o", ""))
+    if order_type in ("STOP_LOSS", "STOP_LOSS_LIMIT"):
+        kind = "stop_loss"
+    elif order_type in ("TAKE_PROFIT", "TAKE_PROFIT_LIMIT", "LIMIT_MAKER"):
+        kind = "take_profit"
+    else:
+        kind = None  # LIMIT / MARKET: entrée ou TP, résolu selon les positions ouvertes
+    return {
+        "ts_ms": int(msg.get("T") or msg.get("E") or 0),
+        "symbol": str(msg.get("s", "")),
+        "side": str(msg.get("S", "")),
+        "order_type": order_type,
+        "order_kind": kind,
+        "order_id": msg.get("i"),
+        "client_order_id": msg.get("c"),
+        "exec_type": str(msg.get("x", "")),
+        "status": str(msg.get("X", "")),
+        "qty": _f(msg.get("q")),
+        "price": _f(msg.get("p")),
+        "stop_price": _f(msg.get("P")),
+        "last_qty": _f(msg.get("l")),
+        "last_price": _f(msg.get("L")),
+        "cum_qty": cum_qty,
+        "avg_price": cum_quote / cum_qty if cum_qty > 0 else _f(msg.get("L")),
+        "commission": _f(msg.get("n")),
+        "commission_asset": msg.get("N"),
+        "trade_id": msg.get("t"),
+        "reject_reason": msg.get("r"),
+    }
+
+
+def _log_fill(rep: Dict[str, Any], raw: Dict[str, Any]) -> None:
+    ts = datetime.fromtimestamp(rep["ts_ms"] / 1000, tz=timezone.utc) if rep["ts_ms"] else datetime.now(timezone.utc)
+    status = _STATUS_MAP.get(rep["status"], ExecutionStatus.SUCCESS)
+    log_execution_event(ExecutionEvent(
+        ts=ts.isoformat(),
+        symbol=rep["symbol"],
+        side=rep["side"],
+        exchange="binance_spot",
+        mode="live",
+        stage="fill",
+        status=status.name,
+        order_kind=rep["order_kind"],
+        qty=rep["cum_qty"] or rep["qty"],
+        error=rep["reject_reason"] if status is ExecutionStatus.EXCHANGE_ERROR else None,
+        response_payload=raw,
+        meta={k: rep[k] for k in ("order_id", "client_order_id", "exec_type", "status",
+                                  "order_type", "avg_price", "last_qty", "last_price")},
+    ))
+
+
+def apply_to_positions(rep: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Ordre de sortie FILLED → clôture de la position live ouverte sur le symbole
+    (celle dont la quantité correspond, sinon la plus ancienne).
+    Retourne l'event de clôture, ou None si rien n'a été clôturé.
+    """
+    from kobe.core.executor import get_open_positions, simulate_close
+
+    # Les entrées Kobe sont des MARKET; les sorties des LIMIT (TP) / STOP_LOSS_LIMIT (SL).
+    if rep["status"] != "FILLED" or rep["order_type"] == "MARKET":
+        return None
+    closing_side = {"SELL": "long", "BUY": "short"}.get(rep["side"].upper())
+    candidates = [p for p in get_open_positions(symbol=rep["symbol"], mode="live") if p.get("side") == closing_side]
+    # L'ordre d'entrée lui-même (même orderId) n'est pas une sortie
+    candidates = [p for p in candidates if str(p.get("exchange_order_id")) != str(rep["order_id"])]
+    if not candidates:
+        return None
+    qty = rep["cum_qty"]
+    pos = next((p for p in candidates if abs(_f(p.get("qty")) - qty) <= 1e-9 * max(1.0, qty)), candidates[0])
+    if rep["order_kind"] is None:
+        rep["order_kind"] = "take_profit" if rep["order_type"] == "LIMIT" else "exit"
+    return simulate_close(pos, rep["avg_price"], reason=rep["order_kind"])
+
+
+class UserDataStream:
+    """
+    Écoute du flux user data en tâche de fond (thread daemon).
+
+    `on_event(kind, payload)` (optionnel) reçoit chaque message décodé
+    ("executionReport", "outboundAccountPosition", ...) après traitement.
+    """
+
+    def __init__(
+        self,
+        client: Optional[BinanceSpot] = None,
+        ws_base: Optional[str] = None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        keepalive_s: float = KEEPALIVE_S,
+        reconnect_min_s: float = RECONNECT_MIN_S,
+        reconnect_max_s: float = RECONNECT_MAX_S,
+        apply_fills: bool = True,
+    ):
+        self.client = client or BinanceSpot()
+        self.ws_base = (ws_base or os.getenv("BINANCE_WS_BASE", DEFAULT_WS_BASE)).rstrip("/")
+        self.on_event = on_event
+        self.keepalive_s = keepalive_s
+        self.reconnect_min_s = reconnect_min_s
+        self.reconnect_max_s = reconnect_max_s
+        self.apply_fills = apply_fills
+        self.listen_key: Optional[str] = None
+        self.connects = 0
+        self._stop = threading.Event()
+        self._ws: Optional[WebSocketApp] = None
+        self._opened = False
+        self._threads: list = []
+        self._seen: Set[Tuple[Any, Any, Any]] = set()
+        self._seen_order: Deque[Tuple[Any, Any, Any]] = deque()
+
+    # --- listenKey ---
+    def _new_listen_key(self) -> Optional[str]:
+        resp = self.client._api_key_request("POST", LISTEN_KEY_PATH)
+        if isinstance(resp, dict) and resp.get("listenKey"):
+            return str(resp["listenKey"])
+        print(f"[user_stream] création du listenKey impossible: {resp}")
+        return None
+
+    def _keepalive_loop(self) -> None:
+        while not self._stop.wait(self.keepalive_s):
+            key = self.listen_key
+            if not key:
+                continue
+            resp = self.client._api_key_request("PUT", LISTEN_KEY_PATH, {"listenKey": key})
+            if isinstance(resp, dict) and "error" in resp:
+                # Clé expirée / inconnue: on force une reconnexion avec une nouvelle clé
+                print(f"[user_stream] keep-alive refusé: {resp}")
+                self._reset_key()
+
+    def _reset_key(self) -> None:
+        self.listen_key = None
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    # --- Messages ---
+    def _dedupe(self, rep: Dict[str, Any]) -> bool:
+        key = (rep["order_id"], rep["trade_id"], rep["status"])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._seen_order.append(key)
+        if len(self._seen_order) > _SEEN_MAX:
+            self._seen.discard(self._seen_order.popleft())
+        return True
+
+    def handle_message(self, message: str) -> None:
+        try:
+            msg = json.loads(message)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(msg, dict):
+            return
+        # Flux combiné éventuel: {"stream": ..., "data": {...}}
+        if "data" in msg and isinstance(msg["data"], dict):
+            msg = msg["data"]
+        kind = str(msg.get("e", ""))
+        if kind == "listenKeyExpired":
+            print("[user_stream] listenKey expiré, reconnexion")
+            self._reset_key()
+        elif kind == "executionReport":
+            rep = parse_execution_report(msg)
+            if not self._dedupe(rep):
+                return
+            try:
+                ORDER_INDEX.on_execution_report(msg)
+            except Exception as e:
+                print(f"[user_stream] index des ordres: {e}")
+            closed = None
+            if self.apply_fills:
+                try:
+                    closed = apply_to_positions(rep)
+                except Exception as e:
+                    print(f"[user_stream] mise à jour des positions impossible: {e}")
+            _log_fill(rep, msg)
+            if closed is not None:
+                msg = {**msg, "_closed_position": closed.get("id")}
+        if self.on_event is not None:
+            try:
+                self.on_event(kind, msg)
+            except Exception as e:
+                print(f"[user_stream] callback en erreur: {e}")
+
+    # --- Boucle de connexion ---
+    def _run(self) -> None:
+        delay = self.reconnect_min_s
+        while not self._stop.is_set():
+            if not self.listen_key:
+                self.listen_key = self._new_listen_key()
+            if self.listen_key:
+                self._opened = False
+                self._ws = WebSocketApp(
+                    f"{self.ws_base}/ws/{self.listen_key}",
+                    on_open=lambda ws: self._on_open(),
+                    on_message=lambda ws, m: self.handle_message(m),
+                    on_error=lambda ws, e: print(f"[user_stream] ERROR: {e}"),
+                )
+                self._ws.run_forever(ping_interval=60, ping_timeout=20)
+                self._ws = None
+                if self._opened:
+                    delay = self.reconnect_min_s
+            if self._stop.wait(delay):
+                break
+            delay = min(self.reconnect_max_s, delay * 2)
+
+    def _on_open(self) -> None:
+        self._opened = True
+        self.connects += 1
+
+    def start(self) -> "UserDataStream":
+        self._stop.clear()
+        for target in (self._run, self._keepalive_loop):
+            t = threading.Thread(target=target, name=f"user_stream{target.__name__}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.keep_running = False
+            # close() depuis un autre thread ne réveille pas le select() de lecture
+            # (attente jusqu'à ping_timeout) et concurrence son teardown: shutdown()
+            # du socket brut le débloque, le thread de lecture ferme lui-même.
+            raw = getattr(ws.sock, "sock", None)
+            if raw is not None:
+                try:
+                    raw.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            else:
+                ws.close()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        if self.listen_key:
+            self.client._api_key_request("DELETE", LISTEN_KEY_PATH, {"listenKey": self.listen_key})
+            self.listen_key = None
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Flux user data Binance Spot (fills temps réel)")
+    ap.add_argument("--print", action="store_true", help="Imprime chaque message reçu")
+    args = ap.parse_args(argv)
+
+    stream = UserDataStream(on_event=(lambda k, m: print(f"[user_stream] {k}: {json.dumps(m)}")) if args.print else None)
+    stream.start()
+    try:
+        stream._stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
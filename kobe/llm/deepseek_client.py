@@ -1,5 +1,4 @@
 import os, json, pathlib
-import httpx
 
 PRICING_IN  = float(os.getenv("DEEPSEEK_INPUT_EUR_PER_MTOK", "0.5"))
 PRICING_OUT = float(os.getenv("DEEPSEEK_OUTPUT_EUR_PER_MTOK","1.0"))
@@ -8,8 +7,7 @@ MODEL       = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 API_KEY     = os.getenv("DEEPSEEK_API_KEY")
 BASE_URL    = "https://api.deepseek.com"
 
-BILLING = pathlib.Path("logs/deepseek_billing.json")
-BILLING.parent.mkdir(parents=True, exist_ok=True)
+BILLING = pathlib.Path("logs/deepseek_billing.json")  # dossier créé au premier enregistrement
 
 def _load_bill():
     if BILLING.exists():
@@ -20,6 +18,7 @@ def _load_bill():
     return {"eur_spent": 0.0, "calls": 0}
 
 def _save_bill(d):
+    BILLING.parent.mkdir(parents=True, exist_ok=True)
     BILLING.write_text(json.dumps(d, indent=2))
 
 def _est_cost(in_tok, out_tok):
@@ -83,6 +82,8 @@ def chat_complete_json(prompt: str, max_tokens: int = 256, temperature: float =
         "stream": False
     }
 
+    import httpx  # import différé: chargé seulement pour un appel réel (clé + budget OK)
+
     try:
         with httpx.Client(timeout=30.0) as c:
             r = c.post(f"{BASE_URL}/chat/completions", headers=headers, json=payload)
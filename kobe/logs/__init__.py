@@ -1,3 +1,3 @@
 """Paquet de logging structuré des décisions (V4.3)."""
 
-from .decision_logger import log_decision  # re-export minimal
+from .decision_logger import log_decision, flush_decisions  # re-export minimal
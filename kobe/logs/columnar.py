@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Encodage colonnaire compact des logs de décisions (optionnel).
+
+Format `YYYY-MM-DD_decisions.kcol`: une suite de chunks autonomes, chacun
+contenant un lot d'events du jour. Un chunk = en-tête JSON + colonnes
+compressées (zlib):
+
+- `ts`    : int64, microsecondes epoch UTC (ts ISO UTC ou naïf; la chaîne
+            d'origine reste dans `extra` si elle ne se relit pas à l'identique)
+- `str`   : index uint32 dans un dictionnaire de valeurs (symbol, stage, setup id...)
+- `num`   : float64 (NaN = absent) — setup.quality, proposal.*, timeframes.*
+- `extra` : reste de l'event (JSON) non couvert par les colonnes
+
+La conversion est sans perte: `to-jsonl` redonne les mêmes events que le JSONL
+(ordre des clés mis à part). Les chunks s'ajoutent en fin de fichier, le
+writer asynchrone peut donc écrire directement en colonnaire
+(KOBE_DECISION_FORMAT=columnar).
+
+Outils:
+    python -m kobe.logs.columnar compact [--log-dir logs/decisions] [--keep-jsonl]
+    python -m kobe.logs.columnar to-jsonl logs/decisions/2025-11-27_decisions.kcol [--out ...]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+COLUMNAR_SUFFIX = "_decisions.kcol"
+JSONL_SUFFIX = "_decisions.jsonl"
+
+_CHUNK_MAGIC = b"KC1"
+_HEADER = struct.Struct("<3sI")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US_PER_DAY = 86_400_000_000
+_TS_MISSING = -(2 ** 63)
+
+# Schéma fixe: chemins (dans l'event) encodés en colonnes.
+STR_PATHS: List[Tuple[str, ...]] = [
+    ("symbol",),
+    ("decision_stage",),
+    ("source",),
+    ("stage",),
+    ("reason",),
+    ("setup", "id"),
+    ("setup", "side"),
+    ("context", "regime", "trend"),
+    ("context", "regime", "volatility"),
+    ("meta", "strategy_id"),
+    ("meta", "strategy_version"),
+    ("referee", "decision"),
+    ("referee", "mode"),
+]
+NUM_PATHS: List[Tuple[str, ...]] = [
+    ("setup", "quality"),
+    ("proposal", "entry"),
+    ("proposal", "stop"),
+    ("proposal", "take"),
+    ("proposal", "risk_pct"),
+    ("referee", "confidence"),
+]
+# Les features numériques de context.timeframes.<tf>.<clé> sont découvertes par chunk.
+_TF_PREFIX = ("context", "timeframes")
+
+
+def col_name(path: Sequence[str]) -> str:
+    return ".".join(path)
+
+
+def _path_of(name: str) -> Tuple[str, ...]:
+    return tuple(name.split("."))
+
+
+# ---------------------------------------------------------------------------
+# Helpers d'encodage
+# ---------------------------------------------------------------------------
+
+def _le(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _from_le(typecode: str, raw: bytes) -> array:
+    a = array(typecode)
+    a.frombytes(raw)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def _ts_to_us(value: Any) -> Optional[int]:
+    """ts ISO UTC (ou naïf) → µs epoch; None pour un autre fuseau (le jour local diffère)."""
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00") if value.endswith("Z") else value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif dt.utcoffset() != timedelta(0):
+        return None
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _us_to_ts(us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+def _is_float(v: Any) -> bool:
+    # Seuls les floats finis sont mis en colonne: int / bool / NaN restent en JSON (sans perte).
+    return type(v) is float and math.isfinite(v)
+
+
+def _pop_leaf(d: Dict[str, Any], path: Sequence[str], accept) -> Any:
+    """Retire d[path] si accept(valeur); élague les dicts vidés par ce retrait."""
+    parents = []
+    cur: Any = d
+    for k in path[:-1]:
+        nxt = cur.get(k) if isinstance(cur, dict) else None
+        if not isinstance(nxt, dict):
+            return None
+        parents.append((cur, k))
+        cur = nxt
+    if not isinstance(cur, dict) or path[-1] not in cur or not accept(cur[path[-1]]):
+        return None
+    value = cur.pop(path[-1])
+    while parents and not cur:
+        parent, k = parents.pop()
+        del parent[k]
+        cur = parent
+    return value
+
+
+def _set_leaf(d: Dict[str, Any], path: Sequence[str], value: Any) -> None:
+    cur = d
+    for k in path[:-1]:
+        nxt = cur.get(k)
+        if not isinstance(nxt, dict):
+            nxt = {}
+            cur[k] = nxt
+        cur = nxt
+    cur[path[-1]] = value
+
+
+def _tf_paths(events: Iterable[Dict[str, Any]]) -> List[Tuple[str, ...]]:
+    seen: Dict[Tuple[str, ...], None] = {}
+    for evt in events:
+        tfs = (evt.get("context") or {}).get("timeframes") if isinstance(evt.get("context"), dict) else None
+        if not isinstance(tfs, dict):
+            continue
+        for tf, feats in tfs.items():
+            if not isinstance(feats, dict):
+                continue
+            for k, v in feats.items():
+                if _is_float(v) and "." not in tf and "." not in k:
+                    seen.setdefault(_TF_PREFIX + (tf, k), None)
+    return list(seen)
+
+
+# ---------------------------------------------------------------------------
+# Écriture
+# ---------------------------------------------------------------------------
+
+def encode_chunk(events: Sequence[Dict[str, Any]]) -> bytes:
+    """Encode un lot d'events (dicts JSON-sérialisables) en un chunk colonnaire."""
+    # Normalisation identique au JSONL (default=str), puis copie de travail mutable.
+    rows = [json.loads(json.dumps(e, ensure_ascii=False, default=str)) for e in events]
+    num_paths = NUM_PATHS + _tf_paths(rows)
+
+    ts_col = array("q")
+    str_cols = {p: array("I") for p in STR_PATHS}
+    str_dicts: Dict[Tuple[str, ...], Dict[str, int]] = {p: {} for p in STR_PATHS}
+    num_cols = {p: array("d") for p in num_paths}
+    extras: List[str] = []
+
+    for row in rows:
+        us = _ts_to_us(row.get("ts"))
+        if us is not None and _us_to_ts(us) == row["ts"]:
+            # Forme canonique: la colonne suffit. Sinon la chaîne reste dans extra.
+            del row["ts"]
+        ts_col.append(_TS_MISSING if us is None else us)
+        for p in STR_PATHS:
+            v = _pop_leaf(row, p, lambda x: isinstance(x, str))
+            if v is None:
+                str_cols[p].append(0)
+            else:
+                dct = str_dicts[p]
+                str_cols[p].append(dct.setdefault(v, len(dct) + 1))
+        for p in num_paths:
+            v = _pop_leaf(row, p, _is_float)
+            num_cols[p].append(math.nan if v is None else v)
+        extras.append(json.dumps(row, ensure_ascii=False, separators=(",", ":")) if row else "")
+
+    cols: List[Tuple[str, str, bytes]] = [("ts", "ts", _le(ts_col))]
+    for p in STR_PATHS:
+        if str_dicts[p]:
+            cols.append((col_name(p), "str", _le(str_cols[p])))
+    for p in num_paths:
+        if any(not math.isnan(x) for x in num_cols[p]):
+            cols.append((col_name(p), "num", _le(num_cols[p])))
+    cols.append(("extra", "extra", "\n".join(extras).encode("utf-8")))
+
+    blobs = [zlib.compress(raw, 6) for _, _, raw in cols]
+    header = {
+        "n": len(rows),
+        "cols": [[name, kind, len(blob)] for (name, kind, _), blob in zip(cols, blobs)],
+        "dicts": {col_name(p): list(d) for p, d in str_dicts.items() if d},
+    }
+    hdr = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(_CHUNK_MAGIC, len(hdr)) + hdr + b"".join(blobs)
+
+
+def append_events(path: Path | str, events: Sequence[Dict[str, Any]], fsync: bool = False) -> None:
+    """Ajoute un chunk en fin de fichier .kcol (écriture unique, append-only)."""
+    if not events:
+        return
+    payload = encode_chunk(events)
+    with open(path, "ab") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_events(path: Path | str, events: Sequence[Dict[str, Any]]) -> None:
+    """Écrit un fichier .kcol d'un seul chunk, de manière atomique."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    with os.fdopen(fd, "wb") as f:
+        if events:
+            f.write(encode_chunk(events))
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Lecture
+# ---------------------------------------------------------------------------
+
+class Chunk:
+    """Chunk décodé à la demande: seules les colonnes lues sont décompressées."""
+
+    def __init__(self, header: Dict[str, Any], blobs: Dict[str, Tuple[str, bytes]]):
+        self.n: int = int(header["n"])
+        self._dicts: Dict[str, List[str]] = header.get("dicts") or {}
+        self._blobs = blobs
+        self._cache: Dict[str, List[Any]] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._blobs)
+
+    def column(self, name: str) -> List[Any]:
+        """Valeurs Python de la colonne (None si absente pour la ligne)."""
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+        if name not in self._blobs:
+            values: List[Any] = [None] * self.n
+        else:
+            kind, blob = self._blobs[name]
+            raw = zlib.decompress(blob)
+            if kind == "ts":
+                values = [None if us == _TS_MISSING else us for us in _from_le("q", raw)]
+            elif kind == "str":
+                lookup = [None] + self._dicts.get(name, [])
+                values = [lookup[i] for i in _from_le("I", raw)]
+            elif kind == "num":
+                values = [None if x != x else x for x in _from_le("d", raw)]
+            else:
+                values = raw.decode("utf-8").split("\n") if self.n else []
+        self._cache[name] = values
+        return values
+
+    def day_ordinals(self) -> List[Optional[int]]:
+        """Jour UTC (date.toordinal) de chaque ligne, sans parser de chaîne ISO."""
+        base = _EPOCH.date().toordinal()
+        return [None if us is None else base + us // _US_PER_DAY for us in self.column("ts")]
+
+    def event(self, i: int) -> Dict[str, Any]:
+        """Reconstruit l'event complet de la ligne i."""
+        extra = self.column("extra")[i]
+        evt: Dict[str, Any] = json.loads(extra) if extra else {}
+        us = self.column("ts")[i]
+        if us is not None and "ts" not in evt:
+            evt["ts"] = _us_to_ts(us)
+        for n in self._blobs:
+            if n in ("ts", "extra"):
+                continue
+            v = self.column(n)[i]
+            if v is not None:
+                _set_leaf(evt, _path_of(n), v)
+        return evt
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.n):
+            yield self.event(i)
+
+
+def iter_chunks(path: Path | str, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[Chunk, int]]:
+    """(chunk, offset de fin) des chunks complets entre `offset` et `end` (def: EOF).
+
+    Un chunk incomplet en fin de fichier (écriture en cours) n'est pas lu:
+    on s'arrête et l'appelant peut réessayer depuis le dernier offset.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read() if end is None else f.read(max(0, end - offset))
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        magic, hlen = _HEADER.unpack_from(data, pos)
+        if magic != _CHUNK_MAGIC:
+            raise ValueError(f"{path}: chunk invalide à l'offset {offset + pos}")
+        start = pos + _HEADER.size
+        if start + hlen > len(data):
+            return
+        header = json.loads(data[start:start + hlen])
+        cur = start + hlen
+        blobs: Dict[str, Tuple[str, bytes]] = {}
+        for name, kind, size in header["cols"]:
+            blobs[name] = (kind, data[cur:cur + size])
+            cur += size
+        if cur > len(data):
+            return
+        pos = cur
+        yield Chunk(header, blobs), offset + pos
+
+
+def read_events(path: Path | str) -> Iterator[Dict[str, Any]]:
+    for chunk, _ in iter_chunks(path):
+        yield from chunk.events()
+
+
+def read_columns(path: Path | str, names: Sequence[str]) -> Dict[str, List[Any]]:
+    """Lit uniquement les colonnes demandées (+ '_day' = ordinal du jour UTC)."""
+    out: Dict[str, List[Any]] = {n: [] for n in names}
+    for chunk, _ in iter_chunks(path):
+        for n in names:
+            out[n].extend(chunk.day_ordinals() if n == "_day" else chunk.column(n))
+    return out
+
+
+def day_from_filename(path: Path | str) -> Optional[date]:
+    """2025-11-27_decisions.{jsonl,kcol} → date(2025, 11, 27)."""
+    try:
+        return date.fromisoformat(Path(path).name.split("_decisions", 1)[0])
+    except ValueError:
+        return None
+
+
+def iter_decision_files(log_dir: Path) -> Iterator[Path]:
+    """Fichiers de décisions (JSONL et colonnaires) triés par nom."""
+    if not log_dir.exists():
+        return
+    files = list(log_dir.glob("*" + JSONL_SUFFIX)) + list(log_dir.glob("*" + COLUMNAR_SUFFIX))
+    for p in sorted(files):
+        if p.is_file():
+            yield p
+
+
+def iter_file_events(path: Path) -> Iterator[Dict[str, Any]]:
+    """Events d'un fichier de décisions, quel que soit son format (lignes corrompues ignorées)."""
+    if path.name.endswith(COLUMNAR_SUFFIX):
+        yield from read_events(path)
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                evt = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(evt, dict):
+                yield evt
+
+
+# ---------------------------------------------------------------------------
+# Conversions
+# ---------------------------------------------------------------------------
+
+def columnar_to_jsonl(src: Path | str, dst: Path | str) -> int:
+    n = 0
+    with open(dst, "w", encoding="utf-8") as f:
+        for evt in read_events(src):
+            f.write(json.dumps(evt, ensure_ascii=False, default=str) + "\n")
+            n += 1
+    return n
+
+
+def compact_day(log_dir: Path, day: date, keep_jsonl: bool = False) -> int:
+    """Fusionne JSONL + chunks existants du jour en un seul chunk .kcol."""
+    jsonl = log_dir / f"{day.isoformat()}{JSONL_SUFFIX}"
+    kcol = log_dir / f"{day.isoformat()}{COLUMNAR_SUFFIX}"
+    events: List[Dict[str, Any]] = []
+    if kcol.exists():
+        events.extend(read_events(kcol))
+    if jsonl.exists():
+        events.extend(iter_file_events(jsonl))
+    write_events(kcol, events)
+    if jsonl.exists() and not keep_jsonl:
+        jsonl.unlink()
+    return len(events)
+
+
+def compact_dir(log_dir: Path, keep_jsonl: bool = False, include_today: bool = False) -> Dict[str, int]:
+    """Compacte tous les jours terminés (le jour UTC courant est laissé au writer)."""
+    today = datetime.now(timezone.utc).date()
+    days = sorted({d for d in (day_from_filename(p) for p in iter_decision_files(log_dir)) if d is not None})
+    out: Dict[str, int] = {}
+    for d in days:
+        if d >= today and not include_today:
+            continue
+        out[d.isoformat()] = compact_day(log_dir, d, keep_jsonl=keep_jsonl)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m kobe.logs.columnar",
+                                 description="Format colonnaire compact des logs de décisions.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_c = sub.add_parser("compact", help="Convertit les jours terminés en segments .kcol")
+    p_c.add_argument("--log-dir", default="logs/decisions")
+    p_c.add_argument("--keep-jsonl", action="store_true", help="Conserve les fichiers JSONL source")
+    p_c.add_argument("--include-today", action="store_true", help="Compacte aussi le jour UTC courant")
+    p_j = sub.add_parser("to-jsonl", help="Réexporte un segment .kcol en JSONL")
+    p_j.add_argument("src")
+    p_j.add_argument("--out", default=None, help="Def: même nom en _decisions.jsonl")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compact":
+        log_dir = Path(args.log_dir)
+        for day, n in compact_dir(log_dir, keep_jsonl=args.keep_jsonl, include_today=args.include_today).items():
+            print(f"[columnar] {day}: {n} events → {log_dir / (day + COLUMNAR_SUFFIX)}")
+        return 0
+
+    src = Path(args.src)
+    out = Path(args.out) if args.out else src.with_name(src.name.replace(COLUMNAR_SUFFIX, JSONL_SUFFIX))
+    n = columnar_to_jsonl(src, out)
+    print(f"[columnar] {n} events → {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
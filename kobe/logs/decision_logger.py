@@ -1,40 +1,220 @@
 from __future__ import annotations
 
+import atexit
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Mapping
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from kobe.logs.sink import JsonlSink, get_sink
 
 # Permet éventuellement de surcharger l'emplacement des logs via une variable d'environnement.
 _LOGS_DIR_ENV = "KOBE_LOGS_DIR"
 
+# Réglages de l'écrivain asynchrone (lus au démarrage du thread):
+# - KOBE_DECISION_QUEUE_MAX : taille max de la file (au-delà: event abandonné, jamais bloquant)
+# - KOBE_DECISION_FLUSH_S   : intervalle max entre deux écritures disque (secondes)
+# - KOBE_DECISION_FSYNC     : "none" (def.) | "batch" (fsync après chaque lot)
+# - KOBE_DECISION_SYNC=1    : écriture synchrone (scripts / debug)
+# - KOBE_DECISION_FORMAT    : "jsonl" (def.) | "columnar" (chunks .kcol, cf. kobe.logs.columnar)
+_QUEUE_MAX_ENV = "KOBE_DECISION_QUEUE_MAX"
+_FLUSH_S_ENV = "KOBE_DECISION_FLUSH_S"
+_FSYNC_ENV = "KOBE_DECISION_FSYNC"
+_SYNC_ENV = "KOBE_DECISION_SYNC"
+_FORMAT_ENV = "KOBE_DECISION_FORMAT"
+
+DEFAULT_QUEUE_MAX = 10_000
+DEFAULT_FLUSH_S = 0.5
+MAX_BATCH = 512
+
+
+# Dossier par défaut: racine du projet / logs / decisions, résolu une seule fois.
+# Ce fichier est kobe/logs/decision_logger.py → parents[2] ≈ racine du repo.
+_DEFAULT_DECISIONS_DIR = Path(__file__).resolve().parents[2] / "logs" / "decisions"
+DECISIONS_PATTERN = "%Y-%m-%d_decisions.jsonl"
+
+
+def _decisions_dir() -> Path:
+    # Si l'utilisateur définit KOBE_LOGS_DIR, on respecte ce chemin.
+    base_dir = os.getenv(_LOGS_DIR_ENV)
+    return Path(base_dir) if base_dir else _DEFAULT_DECISIONS_DIR
+
+
+def _decisions_sink() -> JsonlSink:
+    return get_sink(_decisions_dir(), DECISIONS_PATTERN)
+
 
 def _get_decisions_log_path(ts: datetime | None = None) -> Path:
     """
     Retourne le chemin vers le fichier JSONL des décisions pour la date donnée.
-    Crée le dossier logs/decisions si nécessaire.
+    Le dossier logs/decisions est créé à la première utilisation du sink.
     """
-    if ts is None:
-        ts = datetime.now(timezone.utc)
+    return _decisions_sink().path_for(ts)
 
-    # Si l'utilisateur définit KOBE_LOGS_DIR, on respecte ce chemin.
-    base_dir = os.getenv(_LOGS_DIR_ENV)
-    if base_dir:
-        base = Path(base_dir)
-    else:
-        # Par défaut: racine du projet / logs / decisions
-        # Ce fichier est kobe/logs/decision_logger.py → parents[2] ≈ racine du repo.
-        base = Path(__file__).resolve().parents[2] / "logs" / "decisions"
 
-    try:
-        base.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
-        # On ne casse jamais le runner pour un problème de dossier de logs.
-        print(f"[decision_logger] impossible de créer le dossier de logs {base}: {e}")
+def _write_batch(items: List[Tuple[datetime, Dict[str, Any]]], fsync: bool = False) -> None:
+    """Sérialise et écrit un lot d'events: un write() par fichier du jour."""
+    if os.getenv(_FORMAT_ENV, "jsonl").strip().lower() == "columnar":
+        _write_batch_columnar(items, fsync=fsync)
+        return
+    sink = _decisions_sink()
+    by_day: Dict[str, Tuple[datetime, List[str]]] = {}
+    for ts_dt, data in items:
+        try:
+            line = json.dumps(data, ensure_ascii=False, default=str)
+        except Exception as e:
+            print(f"[decision_logger] event non sérialisable ignoré: {e}")
+            continue
+        ts_utc = ts_dt.astimezone(timezone.utc)
+        by_day.setdefault(ts_utc.strftime("%Y-%m-%d"), (ts_utc, []))[1].append(line)
+
+    for ts_utc, lines in by_day.values():
+        try:
+            sink.write_lines(lines, ts_utc, fsync=fsync)
+        except Exception as e:
+            # On log l'erreur mais on ne casse pas la boucle d'appel.
+            print(f"[decision_logger] erreur lors de l'écriture dans {sink.path_for(ts_utc)}: {e}")
+
+
+def _write_batch_columnar(items: List[Tuple[datetime, Dict[str, Any]]], fsync: bool = False) -> None:
+    """Variante colonnaire: un chunk .kcol par fichier du jour et par lot."""
+    from kobe.logs import columnar
 
-    filename = ts.strftime("%Y-%m-%d_decisions.jsonl")
-    return base / filename
+    base = _decisions_dir()
+    by_day: Dict[str, List[Dict[str, Any]]] = {}
+    for ts_dt, data in items:
+        by_day.setdefault(ts_dt.astimezone(timezone.utc).strftime("%Y-%m-%d"), []).append(data)
+    for day, events in by_day.items():
+        path = base / f"{day}{columnar.COLUMNAR_SUFFIX}"
+        try:
+            base.mkdir(parents=True, exist_ok=True)
+            columnar.append_events(path, events, fsync=fsync)
+        except Exception as e:
+            print(f"[decision_logger] erreur lors de l'écriture dans {path}: {e}")
+
+
+class _AsyncDecisionWriter:
+    """
+    Écrivain en tâche de fond pour les décisions.
+
+    - `submit()` ne fait qu'un put_nowait dans une file bornée (jamais bloquant):
+      si la file est pleine, l'event est abandonné et compté dans `dropped`.
+    - Le thread regroupe les events (jusqu'à MAX_BATCH ou `flush_s`) et les
+      écrit en un seul append par fichier du jour.
+    - `flush()` attend que tout ce qui a été soumis soit sur disque;
+      `close()` est enregistré via atexit pour vider la file à l'arrêt.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_MAX, flush_s: float = DEFAULT_FLUSH_S, fsync: bool = False):
+        self.flush_s = max(0.0, float(flush_s))
+        self.fsync = fsync
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="kobe-decision-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ts_dt: datetime, data: Dict[str, Any]) -> bool:
+        if self._closed:
+            _write_batch([(ts_dt, data)], fsync=self.fsync)
+            return True
+        try:
+            self._queue.put_nowait((ts_dt, data))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"[decision_logger] file pleine, {self.dropped} event(s) abandonné(s)")
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Bloque jusqu'à ce que les events déjà soumis soient écrits."""
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Tuple[datetime, Dict[str, Any]]] = []
+            markers: List[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_s
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    # Demande de flush: on écrit le lot courant sans attendre.
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= MAX_BATCH:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                _write_batch(batch, fsync=self.fsync)
+            for m in markers:
+                m.set()
+            if stop:
+                return
+
+
+_WRITER: Optional[_AsyncDecisionWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def _get_writer() -> _AsyncDecisionWriter:
+    global _WRITER
+    w = _WRITER
+    if w is not None:
+        return w
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            try:
+                maxsize = int(os.getenv(_QUEUE_MAX_ENV, DEFAULT_QUEUE_MAX))
+            except ValueError:
+                maxsize = DEFAULT_QUEUE_MAX
+            try:
+                flush_s = float(os.getenv(_FLUSH_S_ENV, DEFAULT_FLUSH_S))
+            except ValueError:
+                flush_s = DEFAULT_FLUSH_S
+            fsync = os.getenv(_FSYNC_ENV, "none").strip().lower() == "batch"
+            _WRITER = _AsyncDecisionWriter(maxsize=maxsize, flush_s=flush_s, fsync=fsync)
+            atexit.register(_WRITER.close)
+        return _WRITER
+
+
+def flush_decisions(timeout: Optional[float] = 5.0) -> bool:
+    """Force l'écriture des décisions en attente (tests, fin de scan, arrêt)."""
+    w = _WRITER
+    ok = w.flush(timeout) if w is not None else True
+    _decisions_sink().flush()
+    return ok
 
 
 def log_decision(event: Mapping[str, Any]) -> None:
@@ -42,6 +222,10 @@ def log_decision(event: Mapping[str, Any]) -> None:
     Ajoute un événement de décision dans un fichier JSONL.
 
     - Ajoute un timestamp 'ts' en UTC si absent.
+    - L'écriture est asynchrone (thread dédié, file bornée): l'appelant ne
+      paie qu'une copie superficielle + un put_nowait. La sérialisation JSON
+      a lieu dans le thread d'écriture: ne pas muter les objets imbriqués
+      après l'appel.
     - Ne lève jamais d'exception vers l'appelant (sécurité du runner).
     """
     try:
@@ -68,15 +252,13 @@ def log_decision(event: Mapping[str, Any]) -> None:
         ts_dt = datetime.now(timezone.utc)
         data["ts"] = ts_dt.isoformat()
 
-    path = _get_decisions_log_path(ts_dt)
-
     try:
-        line = json.dumps(data, ensure_ascii=False, default=str)
-        with path.open("a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        if os.getenv(_SYNC_ENV) == "1":
+            _write_batch([(ts_dt, data)])
+        else:
+            _get_writer().submit(ts_dt, data)
     except Exception as e:
-        # On log l'erreur mais on ne casse pas la boucle d'appel.
-        print(f"[decision_logger] erreur lors de l'écriture dans {path}: {e}")
+        print(f"[decision_logger] erreur lors de la mise en file: {e}")
 
 
 def log_autosignal_no_signal(
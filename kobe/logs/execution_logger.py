@@ -8,6 +8,8 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Mapping, Optional
 
+from kobe.logs.sink import JsonlSink, get_sink
+
 # Permet de surcharger le dossier de logs (même logique que decision_logger)
 _LOGS_DIR_ENV = "KOBE_LOGS_DIR"
 
@@ -29,17 +31,20 @@ class ExecutionStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+EXECUTIONS_PATTERN = "%Y-%m-%d_executions.jsonl"
+
+
+def _executions_sink() -> JsonlSink:
+    base_dir = os.getenv(_LOGS_DIR_ENV, "logs")
+    return get_sink(Path(base_dir) / "executions", EXECUTIONS_PATTERN)
+
+
 def _get_executions_log_path(ts: Optional[datetime] = None) -> Path:
     """
     Retourne le chemin vers le fichier JSONL des exécutions pour la date donnée.
-    Crée le dossier logs/executions si nécessaire.
+    Le dossier logs/executions est créé à la première utilisation du sink.
     """
-    ts = ts or datetime.now(timezone.utc)
-    base_dir = os.getenv(_LOGS_DIR_ENV, "logs")
-    executions_dir = Path(base_dir) / "executions"
-    executions_dir.mkdir(parents=True, exist_ok=True)
-    filename = ts.strftime("%Y-%m-%d_executions.jsonl")
-    return executions_dir / filename
+    return _executions_sink().path_for(ts)
 
 
 @dataclass
@@ -99,11 +104,7 @@ def log_execution_event(event: ExecutionEvent) -> None:
     toute erreur de fichier est attrapée et ignorée.
     """
     try:
-        path = _get_executions_log_path()
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("a", encoding="utf-8") as f:
-            json.dump(_serialize_event(event), f, ensure_ascii=False)
-            f.write("\n")
+        _executions_sink().write(json.dumps(_serialize_event(event), ensure_ascii=False))
     except Exception:
         # On ne veut pas que des problèmes de disque / droits cassent un trade.
         return
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Dict, Iterable, Optional, Tuple
+
+# Politique de durabilité commune aux journaux JSONL (décisions, exécutions, exécuteur):
+# - "buffered" : write() bufferisé, vidé à la rotation / flush() / arrêt du process
+# - "flush"    : flush() après chaque écriture (défaut: lisible immédiatement par un tail)
+# - "fsync"    : flush() + os.fsync() après chaque écriture
+_DURABILITY_ENV = "KOBE_LOG_DURABILITY"
+DURABILITY_MODES = ("buffered", "flush", "fsync")
+DEFAULT_DURABILITY = "flush"
+
+# Nombre de fichiers du jour gardés ouverts par sink (jour courant + retardataires).
+MAX_OPEN_FILES = 2
+
+
+def _durability_from_env() -> str:
+    mode = os.getenv(_DURABILITY_ENV, DEFAULT_DURABILITY).strip().lower()
+    return mode if mode in DURABILITY_MODES else DEFAULT_DURABILITY
+
+
+class JsonlSink:
+    """
+    Sink JSONL en append avec handles de fichiers mis en cache.
+
+    - Le dossier est créé une seule fois (à la construction).
+    - `pattern` est un nom de fichier strftime évalué en UTC
+      (ex: "%Y-%m-%d_decisions.jsonl"); sans code de date, le fichier est fixe.
+    - Le handle du fichier courant reste ouvert; au passage de minuit UTC le
+      nom change, l'ancien handle est fermé et le nouveau fichier ouvert.
+    - Une écriture = un write() bufferisé (+ flush/fsync selon la durabilité).
+
+    Limite connue: un fichier supprimé/renommé par un outil externe continue
+    d'être alimenté via l'ancien handle jusqu'à `close()` ou la rotation.
+    """
+
+    def __init__(self, directory: Path | str, pattern: str, durability: Optional[str] = None):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.durability = durability if durability in DURABILITY_MODES else _durability_from_env()
+        self._lock = threading.Lock()
+        self._handles: "OrderedDict[str, IO[str]]" = OrderedDict()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            # On ne casse jamais le runner pour un problème de dossier de logs.
+            print(f"[log_sink] impossible de créer le dossier de logs {self.directory}: {e}")
+
+    def path_for(self, ts: Optional[datetime] = None) -> Path:
+        ts = ts or datetime.now(timezone.utc)
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc)
+        return self.directory / ts.strftime(self.pattern)
+
+    def _handle(self, name: str) -> IO[str]:
+        f = self._handles.get(name)
+        if f is not None:
+            self._handles.move_to_end(name)
+            return f
+        f = (self.directory / name).open("a", encoding="utf-8")
+        self._handles[name] = f
+        while len(self._handles) > MAX_OPEN_FILES:
+            _, old = self._handles.popitem(last=False)
+            try:
+                old.close()
+            except Exception:
+                pass
+        return f
+
+    def write_lines(self, lines: Iterable[str], ts: Optional[datetime] = None, fsync: bool = False) -> Path:
+        """Ajoute des lignes JSON (sans '\\n') au fichier du jour de `ts` (UTC)."""
+        ts = ts or datetime.now(timezone.utc)
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc)
+        name = ts.strftime(self.pattern)
+        payload = "".join(line + "\n" for line in lines)
+        with self._lock:
+            f = self._handle(name)
+            f.write(payload)
+            if self.durability != "buffered" or fsync:
+                f.flush()
+            if self.durability == "fsync" or fsync:
+                os.fsync(f.fileno())
+        return self.directory / name
+
+    def write(self, line: str, ts: Optional[datetime] = None) -> Path:
+        return self.write_lines((line,), ts)
+
+    def flush(self) -> None:
+        with self._lock:
+            for f in self._handles.values():
+                try:
+                    f.flush()
+                except Exception:
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            while self._handles:
+                _, f = self._handles.popitem(last=False)
+                try:
+                    f.close()
+                except Exception:
+                    pass
+
+
+_SINKS: Dict[Tuple[str, str], JsonlSink] = {}
+_SINKS_LOCK = threading.Lock()
+
+
+def get_sink(directory: Path | str, pattern: str) -> JsonlSink:
+    """Retourne le sink partagé pour (dossier, motif de nom de fichier)."""
+    key = (str(directory), pattern)
+    sink = _SINKS.get(key)
+    if sink is not None:
+        return sink
+    with _SINKS_LOCK:
+        sink = _SINKS.get(key)
+        if sink is None:
+            sink = JsonlSink(directory, pattern)
+            _SINKS[key] = sink
+        return sink
+
+
+def get_file_sink(path: Path | str) -> JsonlSink:
+    """Sink sur un fichier fixe (ex: logs/executor.jsonl)."""
+    p = Path(path)
+    # '%' échappé: le nom ne doit pas être interprété par strftime.
+    return get_sink(p.parent, p.name.replace("%", "%%"))
+
+
+def flush_all() -> None:
+    for sink in list(_SINKS.values()):
+        sink.flush()
+
+
+def close_all() -> None:
+    with _SINKS_LOCK:
+        sinks = list(_SINKS.values())
+        _SINKS.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_all)
@@ -3,13 +3,26 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
 
+from kobe.logs import columnar
+
+try:  # Décodeur JSON rapide si disponible (optionnel)
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    _orjson = None
+
 
 DECISIONS_DIR_DEFAULT = "logs/decisions"
+CHECKPOINT_DEFAULT = "logs/decisions_checkpoint.json"
+CHECKPOINT_VERSION = 1
 
 
 @dataclass(frozen=True)
@@ -33,12 +46,42 @@ def _parse_ts(ts_str: str) -> datetime:
 
 
 def _iter_decision_files(log_dir: Path) -> Iterator[Path]:
-    """Itère sur les fichiers *_decisions.jsonl dans le dossier donné."""
-    if not log_dir.exists():
-        return
-    for p in sorted(log_dir.glob("*_decisions.jsonl")):
-        if p.is_file():
-            yield p
+    """Itère sur les fichiers *_decisions.jsonl / *_decisions.kcol du dossier donné."""
+    yield from columnar.iter_decision_files(log_dir)
+
+
+def _iter_path_events(
+    path: Path,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield les events d'un fichier (JSONL ou .kcol) filtrés par date."""
+    # Date de fallback basée sur le nom de fichier: 2025-11-27_decisions.jsonl
+    fallback_day = columnar.day_from_filename(path)
+
+    # Lignes corrompues ignorées par le lecteur.
+    for evt in columnar.iter_file_events(path):
+        ts_raw = evt.get("ts")
+        day: Optional[date] = None
+        if isinstance(ts_raw, str):
+            try:
+                day = _parse_ts(ts_raw).date()
+            except Exception:
+                day = fallback_day
+        else:
+            day = fallback_day
+
+        if day is None:
+            # Impossible de déterminer une date: on ignore l'event.
+            continue
+
+        if since is not None and day < since:
+            continue
+        if until is not None and day > until:
+            continue
+
+        evt["_day"] = day.isoformat()
+        yield evt
 
 
 def _iter_events(
@@ -52,60 +95,119 @@ def _iter_events(
       sinon sur la date déduite du nom de fichier).
     """
     for path in _iter_decision_files(log_dir):
-        # Date de fallback basée sur le nom de fichier: 2025-11-27_decisions.jsonl
-        fallback_day: Optional[date] = None
+        yield from _iter_path_events(path, since=since, until=until)
+
+
+# Colonnes .kcol nécessaires à une DecisionKey (lecture sans reconstruire les events)
+_KEY_COLUMNS = (
+    "symbol",
+    "decision_stage",
+    "context.regime.trend",
+    "context.regime.volatility",
+    "setup.id",
+)
+# Clé JSON de chaque champ telle qu'elle apparaîtrait dans la colonne "extra"
+_KEY_LEAVES = tuple('"%s":' % c.rsplit(".", 1)[-1] for c in _KEY_COLUMNS)
+
+
+def _key_defaults_apply(row: Tuple[Any, ...], extra: str) -> bool:
+    """Ligne (jour, champs de clé) comptable en colonnes: champ None = absent, valeur par défaut.
+
+    Un champ None dont la clé figure dans `extra` peut être une valeur non
+    textuelle (ex: id numérique): la ligne passe alors par l'event reconstruit.
+    """
+    if row[0] is None:
+        return False
+    return all(v is not None or leaf not in extra for v, leaf in zip(row[1:], _KEY_LEAVES))
+
+
+def _aggregate_columnar(
+    path: Path,
+    counts: Dict[DecisionKey, int],
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> None:
+    """Chemin rapide .kcol: compte directement depuis les colonnes dictionnaire.
+
+    Un champ de clé absent prend sa valeur par défaut comme dans _key_fields.
+    Seules les lignes dont le jour ou un champ de clé n'est pas en colonne
+    (ts non UTC, valeur non textuelle...) repassent par l'event reconstruit.
+    """
+    lo = since.toordinal() if since is not None else None
+    hi = until.toordinal() if until is not None else None
+    for chunk, _ in columnar.iter_chunks(path):
+        cols = [chunk.day_ordinals()] + [chunk.column(c) for c in _KEY_COLUMNS]
+        # Comptage sur des tuples (colonnes zippées), DecisionKey construite une fois par clé distincte.
+        tuples = Counter(zip(*cols))
+        if any(None in t for t in tuples):
+            extras = chunk.column("extra")
+            for i, row in enumerate(zip(*cols)):
+                if None in row and not _key_defaults_apply(row, extras[i]):
+                    tuples[row] -= 1
+                    for evt in _filter_day(chunk.event(i), path, since, until):
+                        key = _build_key(evt)
+                        counts[key] = counts.get(key, 0) + 1
+        for (d, symbol, stage, trend, vol, setup_id), n in tuples.items():
+            if n <= 0:
+                continue
+            if (lo is not None and d < lo) or (hi is not None and d > hi):
+                continue
+            key = DecisionKey(
+                day=date.fromordinal(d),
+                symbol=symbol or "UNKNOWN",
+                regime_trend=trend or "unknown",
+                regime_volatility=vol or "unknown",
+                decision_stage=stage or "unknown",
+                setup_id=setup_id or "none",
+            )
+            counts[key] = counts.get(key, 0) + n
+
+
+def _event_day(evt: Dict[str, Any], fallback_day: Optional[date]) -> Optional[date]:
+    """Jour de l'event: date du ts ISO si lisible, sinon date du nom de fichier."""
+    ts_raw = evt.get("ts")
+    if isinstance(ts_raw, str):
         try:
-            stem = path.name.split("_decisions", 1)[0]
-            fallback_day = date.fromisoformat(stem)
+            return _parse_ts(ts_raw).date()
         except Exception:
-            fallback_day = None
-
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    evt = json.loads(line)
-                except Exception:
-                    # Ligne corrompue: on l'ignore.
-                    continue
-
-                ts_raw = evt.get("ts")
-                day: Optional[date] = None
-                if isinstance(ts_raw, str):
-                    try:
-                        day = _parse_ts(ts_raw).date()
-                    except Exception:
-                        day = fallback_day
-                else:
-                    day = fallback_day
-
-                if day is None:
-                    # Impossible de déterminer une date: on ignore l'event.
-                    continue
-
-                if since is not None and day < since:
-                    continue
-                if until is not None and day > until:
-                    continue
-
-                evt["_day"] = day.isoformat()
-                yield evt
-
+            return fallback_day
+    return fallback_day
 
-def _build_key(evt: Dict[str, Any]) -> DecisionKey:
-    day = date.fromisoformat(str(evt.get("_day")))
-    symbol = str(evt.get("symbol") or "UNKNOWN")
-    stage = str(evt.get("decision_stage") or "unknown")
 
+def _key_fields(evt: Dict[str, Any]) -> Tuple[str, str, str, str, str]:
+    """(symbol, regime_trend, regime_volatility, decision_stage, setup_id) normalisés."""
     context = evt.get("context") or {}
     regime = context.get("regime") or {}
-    regime_trend = str(regime.get("trend") or "unknown")
-    regime_volatility = str(regime.get("volatility") or "unknown")
-
     setup = evt.get("setup") or {}
-    setup_id = str(setup.get("id") or "none")
+    return (
+        str(evt.get("symbol") or "UNKNOWN"),
+        str(regime.get("trend") or "unknown"),
+        str(regime.get("volatility") or "unknown"),
+        str(evt.get("decision_stage") or "unknown"),
+        str(setup.get("id") or "none"),
+    )
+
+
+def _filter_day(
+    evt: Dict[str, Any],
+    path: Path,
+    since: Optional[date],
+    until: Optional[date],
+    fallback_day: Optional[date] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Applique à un event isolé la même logique de date que _iter_path_events."""
+    day = _event_day(evt, fallback_day if fallback_day is not None else columnar.day_from_filename(path))
+    if day is None:
+        return
+    if (since is not None and day < since) or (until is not None and day > until):
+        return
+    evt["_day"] = day.isoformat()
+    yield evt
+
+
+def _build_key(evt: Dict[str, Any]) -> DecisionKey:
+    day = date.fromisoformat(str(evt.get("_day")))
+    symbol, regime_trend, regime_volatility, stage, setup_id = _key_fields(evt)
 
     return DecisionKey(
         day=day,
@@ -117,16 +219,223 @@ def _build_key(evt: Dict[str, Any]) -> DecisionKey:
     )
 
 
+def _loads(raw: bytes) -> Any:
+    """Décode une ligne JSON (orjson si présent, repli json pour NaN/Infinity)."""
+    if _orjson is not None:
+        try:
+            return _orjson.loads(raw)
+        except Exception:
+            pass
+    return json.loads(raw)
+
+
+def _aggregate_jsonl(
+    path: Path,
+    counts: Dict[DecisionKey, int],
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> None:
+    """Agrège un fichier JSONL (lecture binaire, sans passer par des dicts intermédiaires)."""
+    fallback_day = columnar.day_from_filename(path)
+    tuples: Counter = Counter()
+    with path.open("rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                evt = _loads(line)
+            except Exception:
+                # Ligne corrompue: on l'ignore.
+                continue
+            if not isinstance(evt, dict):
+                continue
+            day = _event_day(evt, fallback_day)
+            if day is None:
+                continue
+            if (since is not None and day < since) or (until is not None and day > until):
+                continue
+            tuples[(day,) + _key_fields(evt)] += 1
+    # DecisionKey construite une seule fois par clé distincte
+    for (day, symbol, trend, vol, stage, setup_id), n in tuples.items():
+        key = DecisionKey(day, symbol, trend, vol, stage, setup_id)
+        counts[key] = counts.get(key, 0) + n
+
+
+def _file_in_range(path: Path, since: Optional[date], until: Optional[date]) -> bool:
+    """Élagage par la date du nom de fichier.
+
+    Le fichier d'un jour contient les events dont le ts UTC tombe ce jour-là;
+    le jour retenu à l'agrégation est celui du ts dans son propre fuseau, donc
+    on garde une marge d'un jour de chaque côté.
+    """
+    day = columnar.day_from_filename(path)
+    if day is None:
+        return True
+    if since is not None and day < since - timedelta(days=1):
+        return False
+    if until is not None and day > until + timedelta(days=1):
+        return False
+    return True
+
+
+def aggregate_file(
+    path: Path | str,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> Dict[DecisionKey, int]:
+    """Agrégat partiel d'un fichier de décisions (JSONL ou .kcol), fusionnable via merge_counts."""
+    path = Path(path)
+    counts: Dict[DecisionKey, int] = {}
+    if path.name.endswith(columnar.COLUMNAR_SUFFIX):
+        _aggregate_columnar(path, counts, since=since, until=until)
+    else:
+        _aggregate_jsonl(path, counts, since=since, until=until)
+    return counts
+
+
+def _aggregate_task(task: Tuple[str, Optional[date], Optional[date]]) -> Dict[DecisionKey, int]:
+    # Point d'entrée picklable pour le pool de processus.
+    return aggregate_file(*task)
+
+
+def merge_counts(into: Dict[DecisionKey, int], part: Dict[DecisionKey, int]) -> Dict[DecisionKey, int]:
+    """Fusionne un agrégat partiel dans `into` (associatif, ordre indifférent)."""
+    for key, value in part.items():
+        into[key] = into.get(key, 0) + value
+    return into
+
+
+def _run_tasks(
+    tasks: List[Tuple[str, Optional[date], Optional[date]]],
+    workers: Optional[int],
+) -> Iterator[Dict[DecisionKey, int]]:
+    """Agrégats partiels des tâches, dans l'ordre, en séquentiel ou via un pool."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(int(workers), len(tasks)))
+    if workers <= 1:
+        for task in tasks:
+            yield _aggregate_task(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_aggregate_task, tasks)
+
+
+def _load_checkpoint(path: Path, log_dir: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CHECKPOINT_VERSION
+            and data.get("log_dir") == str(log_dir.resolve())
+        ):
+            return data
+    except Exception:
+        pass
+    return {"version": CHECKPOINT_VERSION, "log_dir": str(log_dir.resolve()), "files": {}}
+
+
+def _save_checkpoint(path: Path, data: Dict[str, Any]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        # Le checkpoint n'est qu'un accélérateur: le résultat reste valide sans lui.
+        print(f"[aggregate_decisions] écriture du checkpoint impossible {path}: {e}")
+
+
+def _counts_to_rows(counts: Dict[DecisionKey, int]) -> List[List[Any]]:
+    return [
+        [k.day.isoformat(), k.symbol, k.regime_trend, k.regime_volatility, k.decision_stage, k.setup_id, n]
+        for k, n in counts.items()
+    ]
+
+
+def _rows_to_counts(rows: List[List[Any]]) -> Dict[DecisionKey, int]:
+    return {
+        DecisionKey(date.fromisoformat(d), sym, trend, vol, stage, setup_id): int(n)
+        for d, sym, trend, vol, stage, setup_id, n in rows
+    }
+
+
+def _aggregate_with_checkpoint(
+    files: List[Path],
+    log_dir: Path,
+    checkpoint: Path,
+    since: Optional[date],
+    until: Optional[date],
+    workers: Optional[int],
+) -> Dict[DecisionKey, int]:
+    """Agrégation incrémentale: seuls les fichiers nouveaux ou modifiés sont relus.
+
+    Le checkpoint garde, par fichier, l'agrégat complet (sans filtre de date)
+    avec la taille et le mtime observés avant lecture; le filtre since/until
+    est appliqué ensuite sur DecisionKey.day.
+    """
+    state = _load_checkpoint(checkpoint, log_dir)
+    entries: Dict[str, Any] = state["files"]
+
+    parts: Dict[str, Dict[DecisionKey, int]] = {}
+    stale: List[Tuple[Path, os.stat_result]] = []
+    for p in files:
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entry = entries.get(p.name)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            parts[p.name] = _rows_to_counts(entry["counts"])
+        else:
+            stale.append((p, st))
+
+    tasks = [(str(p), None, None) for p, _ in stale]
+    for (p, st), part in zip(stale, _run_tasks(tasks, workers)):
+        parts[p.name] = part
+        entries[p.name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "counts": _counts_to_rows(part)}
+
+    # Fichiers disparus du dossier: on les retire du checkpoint.
+    present = {p.name for p in _iter_decision_files(log_dir)}
+    removed = [name for name in entries if name not in present]
+    for name in removed:
+        del entries[name]
+    if stale or removed:
+        _save_checkpoint(checkpoint, state)
+
+    counts: Dict[DecisionKey, int] = {}
+    for part in parts.values():
+        for key, value in part.items():
+            if (since is not None and key.day < since) or (until is not None and key.day > until):
+                continue
+            counts[key] = counts.get(key, 0) + value
+    return counts
+
+
 def aggregate_decisions(
     log_dir: Path,
     since: Optional[date] = None,
     until: Optional[date] = None,
+    workers: Optional[int] = None,
+    checkpoint: Optional[Path] = None,
 ) -> Dict[DecisionKey, int]:
-    """Agrège les events en comptant les occurrences par (jour, symbol, stage, setup_id)."""
+    """Agrège les events en comptant les occurrences par (jour, symbol, stage, setup_id).
+
+    - Les fichiers hors de [since, until] (date du nom de fichier) ne sont pas ouverts.
+    - Un agrégat partiel par fichier, calculé dans un pool de processus
+      (`workers`, défaut: nombre de cœurs; 1 = séquentiel), puis fusionné.
+    - Avec `checkpoint`, les agrégats par fichier sont persistés (taille + mtime)
+      et seuls les fichiers nouveaux ou modifiés sont relus.
+    """
+    files = [p for p in _iter_decision_files(log_dir) if _file_in_range(p, since, until)]
+    if checkpoint is not None:
+        return _aggregate_with_checkpoint(files, log_dir, Path(checkpoint), since, until, workers)
+
     counts: Dict[DecisionKey, int] = {}
-    for evt in _iter_events(log_dir, since=since, until=until):
-        key = _build_key(evt)
-        counts[key] = counts.get(key, 0) + 1
+    for part in _run_tasks([(str(p), since, until) for p in files], workers):
+        merge_counts(counts, part)
     return counts
 
 
@@ -201,6 +510,23 @@ def main(argv: Optional[List[str]] = None) -> int:
         default=None,
         help="Date maximale (incluse) au format YYYY-MM-DD.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Nombre de processus d'agrégation (défaut: nombre de cœurs, 1 = séquentiel).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=CHECKPOINT_DEFAULT,
+        help="Checkpoint des agrégats par fichier (défaut: logs/decisions_checkpoint.json).",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Recalcule tout l'historique sans lire ni écrire de checkpoint.",
+    )
     parser.add_argument(
         "--output-csv",
         type=str,
@@ -215,7 +541,11 @@ def main(argv: Optional[List[str]] = None) -> int:
     until = _parse_date(args.until)
     output_csv = Path(args.output_csv)
 
-    counts = aggregate_decisions(log_dir, since=since, until=until)
+    checkpoint = None if args.no_checkpoint else Path(args.checkpoint)
+
+    counts = aggregate_decisions(
+        log_dir, since=since, until=until, workers=args.workers, checkpoint=checkpoint
+    )
 
     if not counts:
         print("Aucun event trouvé dans la plage demandée.")
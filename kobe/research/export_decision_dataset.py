@@ -3,11 +3,43 @@ from __future__ import annotations
 import argparse
 import csv
 import json
+import os
+import tempfile
 from datetime import date, datetime
 from pathlib import Path
 from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
+from kobe.logs import columnar
+
 DECISIONS_DIR_DEFAULT = "logs/decisions"
+FRAMES_DEFAULT = "logs/decisions_dataset.parquet"
+FRAMES_CHUNK_ROWS = 50_000  # = une row group parquet
+
+# Types de l'export colonnaire (les colonnes timeframes sont numériques si possible)
+CATEGORY_COLS = [
+    "day",
+    "symbol",
+    "decision_stage",
+    "strategy_version",
+    "regime_trend",
+    "regime_volatility",
+    "setup_id",
+    "setup_side",
+    "execution_status",
+    "execution_mode",
+    "execution_exchange",
+]
+FLOAT_COLS = [
+    "setup_quality",
+    "proposal_entry",
+    "proposal_stop",
+    "proposal_take",
+    "proposal_risk_pct",
+    "proposal_rr",
+    "execution_price",
+    "execution_qty",
+]
+INT_COLS = ["proposal_num_reasons"]
 
 
 def _parse_ts(ts_str: str) -> datetime:
@@ -19,12 +51,8 @@ def _parse_ts(ts_str: str) -> datetime:
 
 
 def _iter_decision_files(log_dir: Path) -> Iterator[Path]:
-    """Itère sur les fichiers *_decisions.jsonl du dossier."""
-    if not log_dir.exists():
-        return
-    for p in sorted(log_dir.glob("*_decisions.jsonl")):
-        if p.is_file():
-            yield p
+    """Itère sur les fichiers *_decisions.jsonl / *_decisions.kcol du dossier."""
+    yield from columnar.iter_decision_files(log_dir)
 
 
 def _iter_events(
@@ -47,42 +75,33 @@ def _iter_events(
         except Exception:
             fallback_day = None
 
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+        # Lignes illisibles → skip proprement (géré par le lecteur).
+        for evt in columnar.iter_file_events(path):
+            ts_raw = evt.get("ts")
+            day: Optional[date] = None
+            if isinstance(ts_raw, str):
                 try:
-                    evt = json.loads(line)
+                    day = _parse_ts(ts_raw).date()
                 except Exception:
-                    # Ligne illisible → on skip proprement.
-                    continue
-
-                ts_raw = evt.get("ts")
-                day: Optional[date] = None
-                if isinstance(ts_raw, str):
-                    try:
-                        day = _parse_ts(ts_raw).date()
-                    except Exception:
-                        day = fallback_day
-                else:
                     day = fallback_day
+            else:
+                day = fallback_day
 
-                if day is None:
-                    # Pas de date exploitable → on ignore l'event.
-                    continue
+            if day is None:
+                # Pas de date exploitable → on ignore l'event.
+                continue
 
-                if since is not None and day < since:
-                    continue
-                if until is not None and day > until:
-                    continue
+            if since is not None and day < since:
+                continue
+            if until is not None and day > until:
+                continue
 
-                stage = str(evt.get("decision_stage") or "unknown")
-                if stages_filter is not None and stage not in stages_filter:
-                    continue
+            stage = str(evt.get("decision_stage") or "unknown")
+            if stages_filter is not None and stage not in stages_filter:
+                continue
 
-                evt["_day"] = day.isoformat()
-                yield evt
+            evt["_day"] = day.isoformat()
+            yield evt
 
 
 def _compute_rr(entry: Optional[float], stop: Optional[float], take: Optional[float], side: Optional[str]) -> Optional[float]:
@@ -192,6 +211,17 @@ def _flatten_event(evt: Dict[str, Any]) -> Dict[str, Any]:
     return row
 
 
+def iter_dataset(
+    log_dir: Path,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    stages_filter: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield les lignes 'flat' une par une (sans matérialiser tout l'historique)."""
+    for evt in _iter_events(log_dir, since=since, until=until, stages_filter=stages_filter):
+        yield _flatten_event(evt)
+
+
 def build_dataset(
     log_dir: Path,
     since: Optional[date] = None,
@@ -199,11 +229,159 @@ def build_dataset(
     stages_filter: Optional[Set[str]] = None,
 ) -> List[Dict[str, Any]]:
     """Construit une liste de lignes 'flat' à partir des logs de décisions."""
-    rows: List[Dict[str, Any]] = []
-    for evt in _iter_events(log_dir, since=since, until=until, stages_filter=stages_filter):
-        flat = _flatten_event(evt)
-        rows.append(flat)
-    return rows
+    return list(iter_dataset(log_dir, since=since, until=until, stages_filter=stages_filter))
+
+
+def rows_to_frame(rows: List[Dict[str, Any]]):
+    """Convertit des lignes 'flat' en DataFrame typé (cf. type_frame)."""
+    import pandas as pd
+
+    return type_frame(pd.DataFrame.from_records(rows))
+
+
+def type_frame(df):
+    """Type un DataFrame de lignes 'flat' (conversions vectorisées, en place).
+
+    - catégories pour les identifiants (symbol, stage, setup_id, regime...),
+    - float64 / Int64 pour les colonnes numériques connues,
+    - ts en datetime64 UTC, colonnes timeframes en float64 quand elles sont numériques.
+    """
+    import pandas as pd
+
+    if "ts" in df:
+        df["ts"] = pd.to_datetime(df["ts"], utc=True, format="ISO8601", errors="coerce")
+    for col in df.columns:
+        if col in CATEGORY_COLS:
+            df[col] = df[col].astype("category")
+        elif col in FLOAT_COLS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif col in INT_COLS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+        elif col != "ts" and df[col].dtype == object:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def _arrow_schema(df):
+    """Schéma parquet figé sur le premier bloc + colonnes connues (types stables d'une row group à l'autre)."""
+    import pandas as pd
+    import pyarrow as pa
+
+    cols = [str(c) for c in df.columns]
+    cols += [c for c in ["ts"] + CATEGORY_COLS + FLOAT_COLS + INT_COLS if c not in cols]
+    fields = []
+    for col in cols:
+        if col == "ts":
+            typ = pa.timestamp("ns", tz="UTC")
+        elif col in CATEGORY_COLS:
+            typ = pa.dictionary(pa.int32(), pa.string())
+        elif col in INT_COLS:
+            typ = pa.int64()
+        elif col in FLOAT_COLS or (col in df and pd.api.types.is_numeric_dtype(df[col])):
+            typ = pa.float64()
+        else:
+            typ = pa.string()
+        fields.append(pa.field(str(col), typ))
+    return pa.schema(fields)
+
+
+def _arrow_chunk(df, schema):
+    """Bloc typé → table au schéma du fichier (colonnes absentes = null)."""
+    import pandas as pd
+    import pyarrow as pa
+
+    df = df.reindex(columns=schema.names)
+    for field in schema:
+        col = field.name
+        if field.name == "ts":
+            df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+        elif pa.types.is_floating(field.type):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif pa.types.is_integer(field.type):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+        else:
+            values = df[col].astype(object)
+            df[col] = values.where(values.notna(), None).map(lambda v: v if v is None else str(v))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def write_dataset_frames(
+    rows: Iterable[Dict[str, Any]],
+    output_path: Path,
+    chunk_rows: int = FRAMES_CHUNK_ROWS,
+) -> int:
+    """Écrit le dataset en flux, par blocs de `chunk_rows` lignes (mémoire bornée).
+
+    - `.parquet`: colonnaire typé (pyarrow requis), une row group par bloc via
+      ParquetWriter. Schéma fixé au premier bloc (colonnes connues incluses):
+      colonnes absentes d'un bloc = null, colonnes inconnues apparues plus
+      tard ignorées (signalées).
+    - `.jsonl`: une ligne 'flat' par event (sans dépendance), typée à la
+      lecture par analyze_decisions.load_dataset_frame.
+    Retourne le nombre de lignes écrites.
+    """
+    parquet = output_path.suffix == ".parquet"
+    if not parquet and output_path.suffix != ".jsonl":
+        raise ValueError(f"format non supporté: {output_path.suffix} (.parquet ou .jsonl)")
+    if parquet:
+        import pyarrow.parquet as pq
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{output_path.name}.", dir=str(output_path.parent))
+    total = 0
+    writer = None
+    dropped: Set[str] = set()
+    try:
+        with os.fdopen(fd, "wb" if parquet else "w", **({} if parquet else {"encoding": "utf-8"})) as f:
+            buf: List[Dict[str, Any]] = []
+
+            def _flush() -> None:
+                nonlocal writer
+                if parquet:
+                    df = rows_to_frame(buf)
+                    if writer is None:
+                        writer = pq.ParquetWriter(f, _arrow_schema(df))
+                    dropped.update(str(c) for c in df.columns if str(c) not in writer.schema.names)
+                    writer.write_table(_arrow_chunk(df, writer.schema))
+                else:
+                    f.writelines(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in buf)
+                buf.clear()
+
+            for row in rows:
+                buf.append(row)
+                total += 1
+                if len(buf) >= chunk_rows:
+                    _flush()
+            if buf:
+                _flush()
+            if writer is not None:
+                writer.close()
+        os.replace(tmp, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if dropped:
+        print(f"[export] colonnes absentes du premier bloc, ignorées: {', '.join(sorted(dropped))}")
+    return total
+
+
+def _frames_output(path: Path) -> Path:
+    """Sortie .parquet si pyarrow est installé, sinon repli JSONL au même nom."""
+    if path.suffix != ".parquet":
+        return path
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        fallback = path.with_suffix(".jsonl")
+        print(f"pyarrow absent: export JSONL dans {fallback} (pip install pyarrow pour le parquet)")
+        return fallback
+    return path
 
 
 def _parse_date(value: Optional[str]) -> Optional[date]:
@@ -316,6 +494,18 @@ def main(argv: Optional[List[str]] = None) -> int:
         default="logs/decisions_dataset.csv",
         help="Chemin du CSV de sortie (défaut: logs/decisions_dataset.csv).",
     )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "frames"],
+        default="csv",
+        help="csv (défaut) ou frames: export en flux .parquet (pyarrow) ou .jsonl, relu typé par pandas.",
+    )
+    parser.add_argument(
+        "--output-frames",
+        type=str,
+        default=FRAMES_DEFAULT,
+        help="Chemin de l'export frames (défaut: logs/decisions_dataset.parquet, .jsonl sans pyarrow).",
+    )
 
     args = parser.parse_args(argv)
 
@@ -325,6 +515,19 @@ def main(argv: Optional[List[str]] = None) -> int:
     stages_filter = _parse_stage_filters(args.stage)
     output_csv = Path(args.output_csv)
 
+    if args.format == "frames":
+        output_frames = _frames_output(Path(args.output_frames))
+        n = write_dataset_frames(
+            iter_dataset(log_dir, since=since, until=until, stages_filter=stages_filter),
+            output_frames,
+        )
+        if not n:
+            print("Aucun event trouvé dans la plage/stages demandés.")
+            return 0
+        print(f"Dataset colonnaire écrit dans: {output_frames}")
+        print(f"Nombre de lignes: {n}")
+        return 0
+
     rows = build_dataset(log_dir, since=since, until=until, stages_filter=stages_filter)
 
     if not rows:
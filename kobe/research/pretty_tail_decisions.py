@@ -3,7 +3,8 @@ import glob
 import json
 import os
 import time
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
 
@@ -121,29 +122,132 @@ def _format_event(event: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
-def _iter_events(path: str, follow: bool = False):
-    with open(path, "r", encoding="utf-8") as f:
-        while True:
-            line = f.readline()
-            if not line:
-                if not follow:
-                    break
-                time.sleep(0.5)
-                continue
+# Mode suivi: après un réveil, on laisse les écritures voisines s'accumuler
+# avant de relire (un réveil par lot d'events plutôt qu'un par ligne).
+FOLLOW_COALESCE_S = 0.2
+# Taille des blocs lus d'un coup (lecture initiale d'un gros fichier du jour)
+READ_BLOCK_BYTES = 1 << 20
+# Réveil de sécurité sans notification (montage réseau, inotify épuisé...):
+# on revérifie alors le fichier courant et la présence d'un fichier plus récent.
+FOLLOW_IDLE_TIMEOUT_S = 5.0
+
+
+def _print_event(event: Dict[str, Any]) -> None:
+    print(_format_event(event))
+    print("-" * 80)
 
-            line = line.strip()
+
+def _read_jsonl_from(path: str, offset: int) -> int:
+    """Affiche les lignes complètes ajoutées depuis `offset`, retourne le nouvel offset."""
+    from kobe.core.jsonl_tail import read_appended_lines
+
+    while True:
+        lines, new_offset, truncated = read_appended_lines(Path(path), offset, READ_BLOCK_BYTES)
+        if truncated:
+            print(f"⚠️  fichier tronqué, relecture depuis le début: {path}")
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace").strip()
             if not line:
                 continue
-
             try:
                 event = json.loads(line)
             except json.JSONDecodeError:
                 print(f"⚠️  ligne JSON illisible: {line}")
                 print("-" * 80)
                 continue
+            _print_event(event)
+        if new_offset == offset and not truncated:
+            return offset
+        offset = new_offset
 
-            print(_format_event(event))
-            print("-" * 80)
+
+def _read_columnar_from(path: str, offset: int) -> int:
+    """Variante .kcol: affiche les chunks complets écrits depuis `offset`."""
+    from kobe.logs import columnar
+
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return offset
+    if size < offset:
+        print(f"⚠️  fichier tronqué, relecture depuis le début: {path}")
+        offset = 0
+    if size == offset:
+        return offset
+    for chunk, offset in columnar.iter_chunks(path, offset):
+        for event in chunk.events():
+            _print_event(event)
+    return offset
+
+
+def _read_from(path: str, offset: int) -> int:
+    if path.endswith(".kcol"):
+        return _read_columnar_from(path, offset)
+    return _read_jsonl_from(path, offset)
+
+
+def _newer_file(current: str, candidates) -> Optional[str]:
+    """Fichier de décisions d'un jour postérieur à `current` (le plus récent), sinon None."""
+    from kobe.logs.columnar import day_from_filename
+
+    cur_day = day_from_filename(current)
+    if cur_day is None:
+        return None
+    best: Optional[str] = None
+    for name in candidates:
+        day = day_from_filename(name)
+        if day is None or day <= cur_day:
+            continue
+        if not (name.endswith(".jsonl") or name.endswith(".kcol")):
+            continue
+        if best is None or os.path.basename(name) > os.path.basename(best):
+            best = name
+    return best
+
+
+def follow(path: str, log_dir: Optional[str] = None, watcher=None, stop=None,
+           idle_timeout: float = FOLLOW_IDLE_TIMEOUT_S, coalesce_s: float = FOLLOW_COALESCE_S) -> None:
+    """
+    Affiche `path` puis le suit comme `tail -F`, sans rescanner:
+
+    - on garde l'offset et on ne relit que les octets ajoutés (lignes/chunks complets),
+    - on dort sur les notifications du dossier (inotify, sinon scrutation stat()),
+    - si `log_dir` est fourni, on bascule sur le fichier du jour suivant dès sa
+      création (rotation à minuit UTC), après avoir vidé l'ancien,
+    - une troncature du fichier relance la lecture depuis le début.
+
+    `stop` (callable) permet d'interrompre la boucle (tests); sinon Ctrl+C.
+    """
+    from kobe.core.file_watch import UNKNOWN, DirWatcher
+
+    offset = _read_from(path, 0)
+    own = watcher is None
+    if own:
+        watcher = DirWatcher(os.path.dirname(path) or ".")
+    watcher.track(os.path.basename(path))
+    try:
+        while stop is None or not stop():
+            changed = watcher.wait(idle_timeout)
+            if changed and coalesce_s > 0:
+                time.sleep(coalesce_s)
+            offset = _read_from(path, offset)
+            if log_dir is None:
+                continue
+            if not changed or UNKNOWN in changed:
+                # Réveil sans détail: un seul listage du dossier.
+                candidates = [os.path.join(log_dir, n) for n in os.listdir(log_dir)]
+            else:
+                candidates = [os.path.join(log_dir, n) for n in changed]
+            nxt = _newer_file(path, candidates)
+            if nxt is None:
+                continue
+            print(f"📂 Nouveau fichier de décisions: {nxt}")
+            path = nxt
+            watcher.track(os.path.basename(path))
+            offset = _read_from(path, 0)
+    finally:
+        if own:
+            watcher.close()
 
 
 def main(argv=None):
@@ -157,7 +261,7 @@ def main(argv=None):
     )
     parser.add_argument(
         "--file",
-        help="Fichier JSONL spécifique à lire. Si non fourni, utilise le dernier fichier dans log-dir.",
+        help="Fichier JSONL (ou .kcol) spécifique à lire. Si non fourni, utilise le dernier fichier dans log-dir.",
     )
     parser.add_argument(
         "--follow",
@@ -170,8 +274,10 @@ def main(argv=None):
     if args.file:
         path = args.file
     else:
-        pattern = os.path.join(args.log_dir, "*.jsonl")
-        files = sorted(glob.glob(pattern))
+        files = sorted(
+            glob.glob(os.path.join(args.log_dir, "*.jsonl"))
+            + glob.glob(os.path.join(args.log_dir, "*.kcol"))
+        )
         if not files:
             print(f"⚠️  Aucun fichier trouvé dans {args.log_dir}")
             return 1
@@ -187,7 +293,14 @@ def main(argv=None):
     else:
         print("📄 Mode lecture simple\n")
 
-    _iter_events(path, follow=args.follow)
+    if args.follow:
+        try:
+            # Rotation quotidienne suivie uniquement quand on lit le dossier de logs.
+            follow(path, log_dir=None if args.file else args.log_dir)
+        except KeyboardInterrupt:
+            pass
+    else:
+        _read_from(path, 0)
     return 0
 
 
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Requêtes filtrées sur les logs de décisions (logs/decisions).
+
+Exemple: tous les `proposal_built` SOLUSDC en régime bear/storm sur octobre:
+    python -m kobe.research.query_decisions --since 2025-10-01 --until 2025-10-31 \\
+        --symbol SOLUSDC --stage proposal_built --trend bear --volatility storm
+
+Index persistant (`_query_index.json` dans le dossier des logs), par fichier:
+- taille / mtime / inode (mise à jour incrémentale: seuls les octets ajoutés
+  sont indexés, un fichier réécrit est réindexé),
+- jour min/max et ensembles de valeurs (symbol, stage, setup_id, régime),
+- mêmes statistiques par groupe de lignes (JSONL) ou par chunk (.kcol).
+
+Les fichiers puis les groupes dont les statistiques excluent le filtre ne
+sont pas lus. Les règles de jour et de valeurs par défaut sont celles de
+aggregate_decisions (UNKNOWN / unknown / none).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+from kobe.logs import columnar
+from kobe.research.aggregate_decisions import _event_day, _key_fields, _loads
+
+DECISIONS_DIR_DEFAULT = "logs/decisions"
+INDEX_NAME = "_query_index.json"
+INDEX_VERSION = 1
+
+# Nombre de lignes JSONL par groupe indexé
+GROUP_ROWS = 2000
+# Au-delà, l'ensemble de valeurs n'est pas stocké (pas d'élagage sur ce champ)
+MAX_SET_VALUES = 64
+
+# Champs filtrables, dans l'ordre de _key_fields
+FIELDS = ("symbol", "regime_trend", "regime_volatility", "decision_stage", "setup_id")
+
+
+@dataclass(frozen=True)
+class DecisionQuery:
+    since: Optional[date] = None
+    until: Optional[date] = None
+    symbols: Optional[FrozenSet[str]] = None
+    regime_trends: Optional[FrozenSet[str]] = None
+    regime_volatilities: Optional[FrozenSet[str]] = None
+    stages: Optional[FrozenSet[str]] = None
+    setup_ids: Optional[FrozenSet[str]] = None
+
+    def _sets(self) -> Tuple[Optional[FrozenSet[str]], ...]:
+        return (self.symbols, self.regime_trends, self.regime_volatilities, self.stages, self.setup_ids)
+
+    def match_row(self, day: date, fields: Sequence[str]) -> bool:
+        if (self.since is not None and day < self.since) or (self.until is not None and day > self.until):
+            return False
+        return all(wanted is None or value in wanted for wanted, value in zip(self._sets(), fields))
+
+    def match_stats(self, stats: Dict[str, Any]) -> bool:
+        """False si les statistiques (min/max, ensembles) garantissent qu'aucune ligne ne matche."""
+        if not stats.get("rows"):
+            return False
+        lo, hi = stats.get("min_day"), stats.get("max_day")
+        if lo is None or hi is None:
+            # Aucune ligne datée: rien ne peut être retenu.
+            return False
+        if self.until is not None and date.fromisoformat(lo) > self.until:
+            return False
+        if self.since is not None and date.fromisoformat(hi) < self.since:
+            return False
+        sets = stats.get("sets") or {}
+        for name, wanted in zip(FIELDS, self._sets()):
+            values = sets.get(name)
+            if wanted is not None and values is not None and not wanted.intersection(values):
+                return False
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Statistiques
+# ---------------------------------------------------------------------------
+
+class _Stats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.min_day: Optional[date] = None
+        self.max_day: Optional[date] = None
+        self.sets: List[Optional[set]] = [set() for _ in FIELDS]
+
+    def add(self, day: Optional[date], fields: Sequence[str]) -> None:
+        self.rows += 1
+        if day is not None:
+            self.min_day = day if self.min_day is None or day < self.min_day else self.min_day
+            self.max_day = day if self.max_day is None or day > self.max_day else self.max_day
+        for i, value in enumerate(fields):
+            s = self.sets[i]
+            if s is not None:
+                s.add(value)
+                if len(s) > MAX_SET_VALUES:
+                    self.sets[i] = None
+
+    def to_json(self, **extra: Any) -> Dict[str, Any]:
+        return dict(
+            extra,
+            rows=self.rows,
+            min_day=self.min_day.isoformat() if self.min_day else None,
+            max_day=self.max_day.isoformat() if self.max_day else None,
+            sets={n: (sorted(s) if s is not None else None) for n, s in zip(FIELDS, self.sets)},
+        )
+
+
+def _merge_stats(groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+    days = [g[k] for g in groups for k in ("min_day", "max_day") if g.get(k)]
+    sets: Dict[str, Optional[List[str]]] = {}
+    for name in FIELDS:
+        acc: Optional[set] = set()
+        for g in groups:
+            values = (g.get("sets") or {}).get(name)
+            if values is None or acc is None:
+                acc = None
+                break
+            acc.update(values)
+        sets[name] = sorted(acc) if acc is not None and len(acc) <= MAX_SET_VALUES else None
+    return {
+        "rows": sum(int(g.get("rows", 0)) for g in groups),
+        "min_day": min(days) if days else None,
+        "max_day": max(days) if days else None,
+        "sets": sets,
+    }
+
+
+def _iter_jsonl_rows(path: Path, start: int, end: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(offset de fin de ligne, event) des lignes complètes entre start et end."""
+    with path.open("rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Ligne en cours d'écriture: elle sera indexée au prochain passage.
+                return
+            pos += len(line)
+            line = line.strip()
+            if line:
+                try:
+                    evt = _loads(line)
+                except Exception:
+                    evt = None
+                if isinstance(evt, dict):
+                    yield pos, evt
+            if end is not None and pos >= end:
+                return
+
+
+def _index_jsonl(path: Path, start: int, fallback_day: Optional[date]) -> Tuple[List[Dict[str, Any]], int]:
+    groups: List[Dict[str, Any]] = []
+    stats, offset, pos = _Stats(), start, start
+    for pos, evt in _iter_jsonl_rows(path, start):
+        stats.add(_event_day(evt, fallback_day), _key_fields(evt))
+        if stats.rows >= GROUP_ROWS:
+            groups.append(stats.to_json(offset=offset, end=pos))
+            stats, offset = _Stats(), pos
+    if stats.rows:
+        groups.append(stats.to_json(offset=offset, end=pos))
+    return groups, pos
+
+
+def _columnar_rows(chunk: "columnar.Chunk", fallback_day: Optional[date]) -> Iterator[Tuple[int, Optional[date], Tuple[str, ...]]]:
+    """(index, jour, champs) des lignes d'un chunk, depuis les colonnes si possible."""
+    days = chunk.day_ordinals()
+    cols = [chunk.column(c) for c in ("symbol", "context.regime.trend", "context.regime.volatility",
+                                      "decision_stage", "setup.id")]
+    defaults = ("UNKNOWN", "unknown", "unknown", "unknown", "none")
+    for i in range(chunk.n):
+        values = [c[i] for c in cols]
+        if days[i] is None or None in values:
+            evt = chunk.event(i)
+            yield i, _event_day(evt, fallback_day), _key_fields(evt)
+        else:
+            yield i, date.fromordinal(days[i]), tuple(v or d for v, d in zip(values, defaults))
+
+
+def _index_columnar(path: Path, start: int, fallback_day: Optional[date]) -> Tuple[List[Dict[str, Any]], int]:
+    groups: List[Dict[str, Any]] = []
+    offset = end = start
+    for chunk, end in columnar.iter_chunks(path, start):
+        stats = _Stats()
+        for _, day, fields in _columnar_rows(chunk, fallback_day):
+            stats.add(day, fields)
+        groups.append(stats.to_json(offset=offset, end=end))
+        offset = end
+    return groups, end
+
+
+# ---------------------------------------------------------------------------
+# Index persistant
+# ---------------------------------------------------------------------------
+
+def index_path_for(log_dir: Path) -> Path:
+    return log_dir / INDEX_NAME
+
+
+def _load_index(path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+            return data
+    except Exception:
+        pass
+    return {"version": INDEX_VERSION, "files": {}}
+
+
+def _save_index(path: Path, data: Dict[str, Any]) -> None:
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        # L'index n'est qu'un accélérateur: la requête reste correcte sans lui.
+        print(f"[query_decisions] écriture de l'index impossible {path}: {e}", file=sys.stderr)
+
+
+def refresh_index(log_dir: Path, index_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Met l'index à jour: octets ajoutés indexés, fichiers réécrits réindexés."""
+    index_path = index_path or index_path_for(log_dir)
+    data = _load_index(index_path)
+    files: Dict[str, Any] = data["files"]
+    changed = False
+    present = set()
+
+    for path in columnar.iter_decision_files(log_dir):
+        present.add(path.name)
+        st = path.stat()
+        entry = files.get(path.name)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns and entry["ino"] == st.st_ino:
+            continue
+        if not entry or entry["ino"] != st.st_ino or st.st_size < entry["indexed"]:
+            entry = {"groups": [], "indexed": 0}
+        index_fn = _index_columnar if path.name.endswith(columnar.COLUMNAR_SUFFIX) else _index_jsonl
+        groups, indexed = index_fn(path, entry["indexed"], columnar.day_from_filename(path))
+        entry["groups"] = entry["groups"] + groups
+        entry.update(
+            size=st.st_size, mtime_ns=st.st_mtime_ns, ino=st.st_ino, indexed=max(indexed, entry["indexed"]),
+            stats=_merge_stats(entry["groups"]),
+        )
+        files[path.name] = entry
+        changed = True
+
+    for name in [n for n in files if n not in present]:
+        del files[name]
+        changed = True
+    if changed and log_dir.exists():
+        _save_index(index_path, data)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Exécution
+# ---------------------------------------------------------------------------
+
+def _scan_group(path: Path, group: Dict[str, Any], query: DecisionQuery, fallback_day: Optional[date]) -> Iterator[Dict[str, Any]]:
+    if path.name.endswith(columnar.COLUMNAR_SUFFIX):
+        for chunk, _ in columnar.iter_chunks(path, group["offset"], group["end"]):
+            for i, day, fields in _columnar_rows(chunk, fallback_day):
+                if day is not None and query.match_row(day, fields):
+                    evt = chunk.event(i)
+                    evt["_day"] = day.isoformat()
+                    yield evt
+            return
+    for _, evt in _iter_jsonl_rows(path, group["offset"], group["end"]):
+        day = _event_day(evt, fallback_day)
+        if day is not None and query.match_row(day, _key_fields(evt)):
+            evt["_day"] = day.isoformat()
+            yield evt
+
+
+def query_decisions(
+    log_dir: Path,
+    query: DecisionQuery,
+    index_path: Optional[Path] = None,
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield les events (avec `_day`) qui satisfont la requête, dans l'ordre des fichiers.
+
+    `stats` (optionnel) reçoit les compteurs files_scanned / groups_scanned / groups_skipped.
+    """
+    log_dir = Path(log_dir)
+    index = refresh_index(log_dir, index_path)
+    counters = stats if stats is not None else {}
+    for key in ("files_scanned", "files_skipped", "groups_scanned", "groups_skipped"):
+        counters.setdefault(key, 0)
+
+    for name in sorted(index["files"]):
+        entry = index["files"][name]
+        if not query.match_stats(entry["stats"]):
+            counters["files_skipped"] += 1
+            continue
+        counters["files_scanned"] += 1
+        path = log_dir / name
+        fallback_day = columnar.day_from_filename(path)
+        for group in entry["groups"]:
+            if not query.match_stats(group):
+                counters["groups_skipped"] += 1
+                continue
+            counters["groups_scanned"] += 1
+            yield from _scan_group(path, group, query, fallback_day)
+
+
+def _set(values: Optional[List[str]]) -> Optional[FrozenSet[str]]:
+    return frozenset(values) if values else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Requêtes filtrées (jour/symbol/stage/setup/régime) sur les logs de décisions.",
+    )
+    parser.add_argument("--log-dir", default=DECISIONS_DIR_DEFAULT,
+                        help="Dossier des fichiers *_decisions.jsonl / .kcol (défaut: logs/decisions).")
+    parser.add_argument("--since", default=None, help="Date minimale (incluse) YYYY-MM-DD.")
+    parser.add_argument("--until", default=None, help="Date maximale (incluse) YYYY-MM-DD.")
+    parser.add_argument("--symbol", action="append", help="Symbole (répétable).")
+    parser.add_argument("--stage", action="append", help="decision_stage (répétable).")
+    parser.add_argument("--setup-id", action="append", help="setup.id (répétable).")
+    parser.add_argument("--trend", action="append", help="context.regime.trend (répétable).")
+    parser.add_argument("--volatility", action="append", help="context.regime.volatility (répétable).")
+    parser.add_argument("--limit", type=int, default=None, help="Nombre max d'events affichés.")
+    parser.add_argument("--count", action="store_true", help="Affiche uniquement le nombre d'events.")
+    parser.add_argument("--pretty", action="store_true", help="Affichage lisible (format pretty_tail_decisions).")
+    args = parser.parse_args(argv)
+
+    query = DecisionQuery(
+        since=date.fromisoformat(args.since) if args.since else None,
+        until=date.fromisoformat(args.until) if args.until else None,
+        symbols=_set(args.symbol),
+        regime_trends=_set(args.trend),
+        regime_volatilities=_set(args.volatility),
+        stages=_set(args.stage),
+        setup_ids=_set(args.setup_id),
+    )
+    stats: Dict[str, int] = {}
+    n = 0
+    for evt in query_decisions(Path(args.log_dir), query, stats=stats):
+        n += 1
+        if not args.count:
+            if args.pretty:
+                from kobe.research.pretty_tail_decisions import _format_event
+
+                print(_format_event(evt))
+                print("-" * 80)
+            else:
+                print(json.dumps(evt, ensure_ascii=False, default=str))
+        if args.limit is not None and n >= args.limit:
+            break
+    if args.count:
+        print(n)
+    print(
+        f"[query_decisions] {n} events — fichiers lus {stats['files_scanned']} / ignorés {stats['files_skipped']}, "
+        f"groupes lus {stats['groups_scanned']} / ignorés {stats['groups_skipped']}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
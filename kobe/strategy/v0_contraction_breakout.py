@@ -8,9 +8,12 @@ Stratégie v0 — Breakout de contraction (barres 1m)
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-import json, math
+import math
+
+from kobe.core.state_store import get_state_store
 
 STATE_PATH = Path.home() / ".kobe_state.json"
+STRATEGY_ID = "v0_contraction_breakout"
 
 @dataclass
 class Bar:
@@ -18,23 +21,17 @@ class Bar:
     ts_open: int
     o: float; h: float; l: float; c: float; v: float
 
-def _read_state():
-    try:
-        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-def _write_state(st: dict):
-    STATE_PATH.write_text(json.dumps(st), encoding="utf-8")
+def _state():
+    # Ancien ~/.kobe_state.json plat ({"last_date": ...}) migré sous STRATEGY_ID
+    return get_state_store(STATE_PATH, legacy_strategy=STRATEGY_ID)
 
 def _clamped_today() -> bool:
-    st = _read_state()
-    return st.get("last_date") == date.today().isoformat()
+    # État chargé une seule fois puis servi depuis la mémoire (pas de lecture disque par signal)
+    return _state().get(STRATEGY_ID, "last_date") == date.today().isoformat()
 
 def _persist_today():
-    st = _read_state()
-    st["last_date"] = date.today().isoformat()
-    _write_state(st)
+    # Écriture atomique, uniquement si la date change
+    _state().set(STRATEGY_ID, "last_date", date.today().isoformat())
 
 def _true_range(prev_c, h, l):
     return max(h - l, abs(h - prev_c), abs(l - prev_c))
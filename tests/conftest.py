@@ -1,3 +1,39 @@
 import sys, os
 # Ajoute la racine du repo au chemin d'import pour que `import kobe` marche en tests
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _reset_order_index():
+    # Index des ordres partagé par le process: isolé entre les tests
+    from kobe.execution.order_state import ORDER_INDEX
+    ORDER_INDEX.clear()
+    yield
+    ORDER_INDEX.clear()
+
+
+@pytest.fixture
+def exchange(request, monkeypatch, tmp_path):
+    """
+    Exchange local (kobe.execution.mock_exchange) sur lequel pointe BinanceSpot.
+
+    Paramétrable en indirect: {"balances": {...}, "prices": [...]} (ticks BTCUSDC
+    à 1 s d'intervalle). Par défaut seul le quote est crédité: la quantité de
+    base vient uniquement des achats du test.
+    """
+    from kobe.core.feed import Tick
+    from kobe.execution.mock_exchange import MatchingEngine, MockBinanceServer
+
+    opts = getattr(request, "param", None) or {}
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    engine = MatchingEngine(balances=dict(opts.get("balances", {"USDC": 1000.0})))
+    engine.replay([Tick(symbol="BTCUSDC", price=p, qty=0.1, ts=1_764_237_600_000 + i * 1000, is_buyer_maker=False)
+                   for i, p in enumerate(opts.get("prices", [100.0]))])
+    with MockBinanceServer(engine, api_secret="s") as srv:
+        monkeypatch.setenv("BINANCE_BASE_URL", srv.http_url)
+        yield srv
@@ -1,4 +1,5 @@
-import os
+import json
+
 from kobe.execution.binance_spot import BinanceSpot
 
 
@@ -96,38 +97,124 @@ def test_execute_order_plan_full_tp_sl(monkeypatch):
     assert "orders" in res
     assert res["orders"]["entry"] is not None
 
-    # On doit avoir jusqu'à 3 appels: entry, TP, SL
-    assert 1 <= len(calls) <= 3
+    # Deux appels: entry, puis TP + SL en une liste OCO
+    assert [path for path, _ in calls] == ["/api/v3/order", "/api/v3/orderList/oco"]
 
     # 1) Entry
-    entry_call = calls[0]
-    assert entry_call[0] == "/api/v3/order"
-    entry_params = entry_call[1]
+    entry_params = calls[0][1]
     assert entry_params["symbol"] == "BTCUSDC"
     assert entry_params["side"] == "BUY"
     assert entry_params["type"] == "MARKET"
     assert entry_params["quantity"] == 0.01
 
-    # 2) TP: LIMIT SELL @ 52000
-    if len(calls) >= 2:
-        tp_call = calls[1]
-        tp_params = tp_call[1]
-        assert tp_params["symbol"] == "BTCUSDC"
-        assert tp_params["side"] == "SELL"
-        assert tp_params["type"] == "LIMIT"
-        assert tp_params["quantity"] == 0.01
-        if "price" in tp_params:
-            assert tp_params["price"] == 52000.0
-
-    # 3) SL: STOP_LOSS_LIMIT SELL @ 49000
-    if len(calls) >= 3:
-        sl_call = calls[2]
-        sl_params = sl_call[1]
-        assert sl_params["symbol"] == "BTCUSDC"
-        assert sl_params["side"] == "SELL"
-        assert sl_params["type"] == "STOP_LOSS_LIMIT"
-        assert sl_params["quantity"] == 0.01
-        if "price" in sl_params:
-            assert sl_params["price"] == 49000.0
-        if "stopPrice" in sl_params:
-            assert sl_params["stopPrice"] == 49000.0
+    # 2) OCO SELL: TP LIMIT_MAKER @ 52000 au-dessus, SL STOP_LOSS_LIMIT @ 49000 en dessous
+    oco = calls[1][1]
+    assert oco["symbol"] == "BTCUSDC" and oco["side"] == "SELL" and oco["quantity"] == 0.01
+    assert oco["aboveType"] == "LIMIT_MAKER" and oco["abovePrice"] == 52000.0
+    assert oco["belowType"] == "STOP_LOSS_LIMIT"
+    assert oco["belowPrice"] == 49000.0 and oco["belowStopPrice"] == 49000.0
+
+
+PLAN = {
+    "symbol": "BTCUSDC",
+    "side": "BUY",
+    "qty_rounded": 0.01,
+    "valid": True,
+    "entry": {"type": "MARKET"},
+    "take_profit": {"type": "LIMIT", "price": 52000.0},
+    "stop_loss": {"type": "STOP_LIMIT", "price": 49000.0},
+}
+
+
+def _exit_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    monkeypatch.delenv("KOBE_DAILY_LOSS_EUR", raising=False)
+    log = tmp_path / "executor.jsonl"
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(log))
+    return log
+
+
+def test_execute_order_plan_oco_retries_transient_failure(monkeypatch, tmp_path):
+    """TP + SL en une liste OCO; un 503 est retenté une fois."""
+    log = _exit_env(monkeypatch, tmp_path)
+    calls = []
+
+    def fake_signed_post(self, path, params=None, timeout=8):
+        calls.append(path)
+        if path == "/api/v3/order":
+            return {"orderId": 1}
+        if calls.count(path) == 1:
+            return {"error": 503, "message": "busy"}
+        return {"orderListId": 9}
+
+    monkeypatch.setattr(BinanceSpot, "_signed_post", fake_signed_post, raising=True)
+    res = BinanceSpot(key="dummy", secret="dummy").execute_order_plan(dict(PLAN))
+
+    prot = res["protection"]
+    assert prot["status"] == "protected" and prot["mode"] == "oco"
+    assert prot["legs"] == {"take_profit": "ok", "stop_loss": "ok"}
+    assert calls == ["/api/v3/order", "/api/v3/orderList/oco", "/api/v3/orderList/oco"]
+    assert res["orders"]["oco"] == {"orderListId": 9}
+    assert prot["entry_to_protected_ms"] >= 0
+
+    events = [json.loads(ln) for ln in log.read_text(encoding="utf-8").splitlines()]
+    assert [e["kind"] for e in events if e.get("retry")] == ["oco"]
+    assert events[-1]["kind"] == "protection" and "entry_to_protected_ms" in events[-1]
+
+
+def test_execute_order_plan_final_reject_and_entry_gate(monkeypatch, tmp_path):
+    _exit_env(monkeypatch, tmp_path)
+    calls = []
+
+    def fake_signed_post(self, path, params=None, timeout=8):
+        calls.append(path)
+        if path == "/api/v3/orderList/oco":
+            return {"error": 400, "message": '{"code": -2010, "msg": "insufficient balance"}'}
+        return {"orderId": len(calls)}
+
+    monkeypatch.setattr(BinanceSpot, "_signed_post", fake_signed_post, raising=True)
+    res = BinanceSpot(key="dummy", secret="dummy").execute_order_plan(dict(PLAN))
+    assert res["protection"]["status"] == "unprotected"
+    assert res["protection"]["failed_legs"] == ["take_profit", "stop_loss"]
+    # Rejet 4xx définitif: pas de nouvelle tentative
+    assert calls.count("/api/v3/orderList/oco") == 1
+
+    # Stop seul: ordre simple, rejet 4xx non retenté
+    calls.clear()
+    plan = {k: v for k, v in PLAN.items() if k != "take_profit"}
+    monkeypatch.setattr(BinanceSpot, "_signed_post",
+                        lambda self, path, params=None, timeout=8: calls.append(params["type"]) or (
+                            {"error": 400, "message": "bad stop"} if params["type"] == "STOP_LOSS_LIMIT"
+                            else {"orderId": 1}),
+                        raising=True)
+    res = BinanceSpot(key="dummy", secret="dummy").execute_order_plan(plan)
+    assert res["protection"]["status"] == "unprotected"
+    assert calls == ["MARKET", "STOP_LOSS_LIMIT"]
+
+    # Entrée refusée: aucune jambe de sortie envoyée
+    calls.clear()
+    monkeypatch.setattr(BinanceSpot, "_signed_post",
+                        lambda self, path, params=None, timeout=8: calls.append(params) or {"error": 400},
+                        raising=True)
+    res = BinanceSpot(key="dummy", secret="dummy").execute_order_plan(dict(PLAN))
+    assert res["protection"]["status"] == "entry_failed"
+    assert len(calls) == 1
+
+
+def test_execute_order_plan_sends_tp_and_sl_as_oco(monkeypatch, tmp_path):
+    _exit_env(monkeypatch, tmp_path)
+    calls = []
+
+    def fake_signed_post(self, path, params=None, timeout=8):
+        calls.append((path, dict(params)))
+        return {"orderListId": 9} if "oco" in path else {"orderId": 1}
+
+    monkeypatch.setattr(BinanceSpot, "_signed_post", fake_signed_post, raising=True)
+    res = BinanceSpot(key="dummy", secret="dummy").execute_order_plan(dict(PLAN))
+
+    assert [p for p, _ in calls] == ["/api/v3/order", "/api/v3/orderList/oco"]
+    oco = calls[1][1]
+    assert oco["side"] == "SELL" and oco["quantity"] == 0.01
+    assert oco["aboveType"] == "LIMIT_MAKER" and oco["abovePrice"] == 52000.0
+    assert oco["belowType"] == "STOP_LOSS_LIMIT" and oco["belowStopPrice"] == 49000.0
+    assert res["protection"]["status"] == "protected" and res["protection"]["mode"] == "oco"
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+
+import httpx
+
+from kobe.core import router
+from kobe.core.modes import Mode
+from kobe.execution.binance_spot_async import AsyncBinanceSpot
+from kobe.signals.proposal import Proposal
+
+BASE = "https://api.binance.test"
+
+
+def _exchange(calls, order_delay=0.0):
+    """MockTransport: vérifie la signature et simule la latence des ordres."""
+    exits_in_flight = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/api/v3/ticker/price":
+            return httpx.Response(200, json={"symbol": request.url.params["symbol"], "price": "100.0"})
+        query = request.url.query.decode()
+        payload, _, sig = query.rpartition("&signature=")
+        assert sig == hmac.new(b"s", payload.encode(), hashlib.sha256).hexdigest()
+        assert request.headers["X-MBX-APIKEY"] == "k"
+        params = dict(urllib.parse.parse_qsl(payload))
+        calls.append((request.method, path, params, time.perf_counter()))
+        if path == "/api/v3/account":
+            return httpx.Response(200, json={"balances": [{"asset": "USDC", "free": "1000"}]})
+        if request.method == "GET" and path == "/api/v3/orderList":
+            # Recherche par id client après le 503: la liste n'a pas été créée
+            return httpx.Response(400, json={"code": -2013, "msg": "Order list does not exist."})
+        if path == "/api/v3/orderList/oco" and not exits_in_flight:
+            exits_in_flight.append(1)
+            return httpx.Response(503, json={"code": -1001, "msg": "busy"})
+        await asyncio.sleep(order_delay)
+        return httpx.Response(200, json={"orderId": len(calls), "status": "NEW", "symbol": params.get("symbol")})
+
+    return httpx.MockTransport(handler)
+
+
+def test_async_plan_execution_retries_and_protects(monkeypatch, tmp_path):
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    calls = []
+
+    async def run():
+        async with AsyncBinanceSpot(key="k", secret="s", base=BASE, transport=_exchange(calls, 0.1)) as ex:
+            plan = ex.build_order_plan("BTCUSDC", "BUY", 0.01234, 100.0, take_price=110.0, stop_price=95.0)
+            return await ex.execute_order_plan(plan)
+
+    res = asyncio.run(run())
+    assert res["protection"]["status"] == "protected"
+    posts = [c for c in calls if c[0] == "POST"]
+    assert [c[1] for c in posts].count("/api/v3/orderList/oco") == 2  # 503, recherche, puis rejeu
+    list_ids = {c[2]["listClientOrderId"] for c in posts if c[1] == "/api/v3/orderList/oco"}
+    lookups = [c[2] for c in calls if c[0] == "GET" and c[1] == "/api/v3/orderList"]
+    assert len(list_ids) == 1 and [q["origClientOrderId"] for q in lookups] == list(list_ids)
+    entry, *exits = posts
+    assert entry[2]["type"] == "MARKET" and entry[2]["quantity"] == "0.012"
+    assert {c[2]["side"] for c in exits} == {"SELL"}
+    assert all("recvWindow" in c[2] for c in calls)
+
+
+def test_async_market_entry_not_found_is_never_resubmitted(monkeypatch, tmp_path):
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    monkeypatch.setattr("kobe.execution.binance_spot_async.ORDER_LOOKUP_DELAY_S", 0.0)
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.method == "GET":
+            return httpx.Response(400, json={"code": -2013, "msg": "Order does not exist."})
+        return httpx.Response(503, json={"code": -1001, "msg": "busy"})
+
+    async def run():
+        async with AsyncBinanceSpot(key="k", secret="s", base=BASE, transport=httpx.MockTransport(handler)) as ex:
+            return await ex.create_order("BTCUSDC", "BUY", 0.01, client_order_id="kobe-en-x")
+
+    res = asyncio.run(run())
+    assert res["outcome"] == "unknown" and res["clientOrderId"] == "kobe-en-x"
+    assert calls == [("POST", "/api/v3/order"), ("GET", "/api/v3/order")]
+
+
+def test_router_fans_out_live_proposals(monkeypatch, tmp_path):
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    monkeypatch.delenv("KOBE_EXECUTE_PLAN", raising=False)
+    monkeypatch.delenv("EXECUTE_ORDER_PLAN", raising=False)
+    events = []
+    calls = []
+    monkeypatch.setattr(router, "_append_order", events.append)
+    monkeypatch.setattr(router, "current_mode", lambda cfg: Mode.LIVE)
+    monkeypatch.setattr(router, "load_config", lambda path="config.yaml": {})
+    monkeypatch.setattr(router, "position_size", lambda *a, **k: 0.5)
+    transport = _exchange(calls, order_delay=0.3)
+    monkeypatch.setattr(router, "AsyncBinanceSpot",
+                        lambda: AsyncBinanceSpot(key="k", secret="s", base=BASE, transport=transport))
+
+    proposals = [Proposal(symbol=s, side="long", entry=100.0, stop=98.0, take=104.0, risk_pct=0.25,
+                          size_pct=5.0, reasons=["a", "b", "c"]) for s in ("BTCUSDC", "ETHUSDC", "SOLUSDC")]
+    t0 = time.perf_counter()
+    out = router.place_from_proposals(proposals, balance_usd=1000.0)
+    elapsed = time.perf_counter() - t0
+
+    # 3 ordres à 300 ms chacun: en séquentiel >= 0.9 s
+    assert elapsed < 0.8
+    assert [m for m, _ in out] == [Mode.LIVE] * 3
+    assert [e["symbol"] for _, e in out] == ["BTCUSDC", "ETHUSDC", "SOLUSDC"]
+    assert all(e["router_action"] == "create_order" and e["status"] == "NEW" for _, e in out)
+    # solde lu une seule fois pour tout le lot
+    assert [c[1] for c in calls].count("/api/v3/account") == 1
+    assert sum(1 for e in events if e.get("router_action") == "create_order") == 3
+    json.dumps([e for _, e in out])  # events sérialisables (journal orders)
+
+
+def test_router_reserves_balance_across_tick_proposals(monkeypatch, tmp_path):
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    monkeypatch.delenv("MAX_DAILY_LOSS_EUR", raising=False)
+    monkeypatch.delenv("KOBE_EXECUTE_PLAN", raising=False)
+    monkeypatch.delenv("EXECUTE_ORDER_PLAN", raising=False)
+    monkeypatch.setattr(router, "_append_order", lambda evt: None)
+    monkeypatch.setattr(router, "current_mode", lambda cfg: Mode.LIVE)
+    monkeypatch.setattr(router, "load_config", lambda path="config.yaml": {})
+    sized_on = []
+    monkeypatch.setattr(router, "position_size", lambda balance, *a, **k: sized_on.append(balance) or 4.5)
+    calls = []
+    transport = _exchange(calls)
+    monkeypatch.setattr(router, "AsyncBinanceSpot",
+                        lambda: AsyncBinanceSpot(key="k", secret="s", base=BASE, transport=transport))
+
+    proposals = [Proposal(symbol=s, side="long", entry=100.0, stop=98.0, take=104.0, risk_pct=0.25,
+                          size_pct=5.0, reasons=["a", "b", "c"])
+                 for s in ("BTCUSDC", "ETHUSDC", "SOLUSDC", "BNBUSDC")]
+    out = router.place_from_proposals(proposals, balance_usd=10_000.0)
+
+    # Solde libre 1000 USDC: 450 + 450, le reste (100) plafonne la 3e, plus rien pour la 4e
+    assert sized_on == [1000.0, 550.0, 100.0, 0.0]
+    assert [(e["symbol"], e["qty"], e["status"]) for _, e in out] == [
+        ("BTCUSDC", 4.5, "NEW"), ("ETHUSDC", 4.5, "NEW"), ("SOLUSDC", 1.0, "NEW"), ("BNBUSDC", 4.5, "NO_BALANCE")]
+    orders = [c[2] for c in calls if c[1] == "/api/v3/order"]
+    assert sorted(o["symbol"] for o in orders) == ["BTCUSDC", "ETHUSDC", "SOLUSDC"]
@@ -0,0 +1,101 @@
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from kobe.core import router
+from kobe.core.modes import Mode
+from kobe.execution import binance_spot
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.client_ids import client_order_id, proposal_key
+from kobe.execution.order_state import ORDER_INDEX, OrderStatus
+from kobe.signals.proposal import Proposal
+
+
+def _proposal(**kw):
+    base = dict(symbol="BTCUSDC", side="long", entry=100.0, stop=95.0, take=110.0, risk_pct=0.25,
+                size_pct=5.0, reasons=["a", "b", "c"], created_at=datetime(2026, 1, 5, tzinfo=timezone.utc))
+    base.update(kw)
+    return Proposal(**base)
+
+
+def test_client_ids_are_deterministic_and_binance_compatible():
+    key = proposal_key(_proposal())
+    assert key == proposal_key(_proposal())
+    assert key != proposal_key(_proposal(stop=96.0))
+    ids = {leg: client_order_id(key, leg) for leg in ("entry", "take_profit", "stop_loss", "oco")}
+    assert ids == {leg: client_order_id(key, leg) for leg in ids}
+    assert len(set(ids.values())) == 4
+    assert ids["entry"].startswith("kobe-en-")
+    assert all(re.fullmatch(r"[.A-Z:/a-z0-9_-]{1,36}", cid) for cid in ids.values())
+
+
+@pytest.fixture
+def fast_retry(monkeypatch):
+    monkeypatch.setattr(binance_spot, "ORDER_TIMEOUT_S", 0.3)
+    monkeypatch.setattr(binance_spot, "ORDER_LOOKUP_DELAY_S", 0.01)
+
+
+def test_lost_response_is_recovered_without_duplicate(exchange, fast_retry):
+    client = BinanceSpot(key="k", secret="s")
+    exchange.inject_delay("/api/v3/order", delay_ms=800, times=1)
+    resp = client.create_order("BTCUSDC", "BUY", 0.1, client_order_id="kobe-en-test")
+
+    assert resp["recovered"] is True and resp["status"] == "FILLED"
+    assert resp["clientOrderId"] == "kobe-en-test"
+    assert [o.client_id for o in exchange.engine.orders.values()] == ["kobe-en-test"]
+    assert exchange.requests[("POST", "/api/v3/order")] == 1
+    assert exchange.requests[("GET", "/api/v3/order")] == 1
+    assert ORDER_INDEX.get(client_order_id="kobe-en-test").status is OrderStatus.FILLED
+
+
+def test_server_error_resubmits_once_after_lookup(exchange, fast_retry):
+    client = BinanceSpot(key="k", secret="s")
+    plan = client.build_order_plan("BTCUSDC", "BUY", 0.5, 100.0, take_price=110.0, stop_price=95.0,
+                                   order_type="LIMIT", client_key="plan-1")
+    exchange.inject_error("/api/v3/order", status=503, times=1)
+    exchange.inject_error("/api/v3/orderList/oco", status=503, times=1)
+    res = client.execute_order_plan(plan)
+
+    assert res["protection"]["status"] == "protected"
+    # 503 => recherche (-2013, absent) => un seul renvoi avec le même id
+    assert exchange.requests[("POST", "/api/v3/order")] == 2
+    assert exchange.requests[("GET", "/api/v3/order")] == 1
+    assert exchange.requests[("GET", "/api/v3/orderList")] == 1
+    ids = sorted(o.client_id for o in exchange.engine.orders.values())
+    assert ids == sorted(client_order_id("plan-1", leg) for leg in ("entry", "take_profit", "stop_loss"))
+    (info,) = exchange.engine.list_info.values()
+    assert info[1] == client_order_id(client_order_id("plan-1", "stop_loss"), "oco")
+
+
+def test_market_entry_not_found_is_never_resubmitted(exchange, fast_retry):
+    client = BinanceSpot(key="k", secret="s")
+    plan = client.build_order_plan("BTCUSDC", "BUY", 0.5, 100.0, take_price=110.0, stop_price=95.0,
+                                   client_key="plan-2")
+    exchange.inject_error("/api/v3/order", status=503, times=1)
+    res = client.execute_order_plan(plan)
+
+    # Un MARKET exécuté ne réserve plus son id: l'envoi d'origine pourrait encore passer
+    assert res["orders"]["entry"]["outcome"] == "unknown"
+    assert res["orders"]["entry"]["clientOrderId"] == client_order_id("plan-2", "entry")
+    assert res["protection"]["status"] == "entry_failed"
+    assert exchange.requests[("POST", "/api/v3/order")] == 1
+    assert exchange.requests[("GET", "/api/v3/order")] == 1
+    assert not exchange.engine.orders
+
+
+def test_router_skips_proposal_already_sent(monkeypatch):
+    events = []
+    monkeypatch.setattr(router, "_append_order", events.append)
+    monkeypatch.setattr(router, "current_mode", lambda cfg: Mode.LIVE)
+    monkeypatch.setattr(router, "load_config", lambda path="config.yaml": {})
+    monkeypatch.setattr(router, "position_size", lambda *a, **k: 0.5)
+    monkeypatch.setattr(router, "BinanceSpot", lambda: BinanceSpot(key="", secret=""))
+    p = _proposal()
+    cid = client_order_id(proposal_key(p), "entry")
+    ORDER_INDEX.on_response({"symbol": "BTCUSDC", "orderId": 9, "clientOrderId": cid, "status": "FILLED",
+                             "type": "MARKET", "side": "BUY"}, kind="entry")
+
+    mode, evt = router.place_from_proposal(p, balance_usd=1000.0)
+    assert (evt["router_action"], evt["status"], evt["order_id"]) == ("skip_duplicate", "DUPLICATE", "9")
+    assert events == [evt]
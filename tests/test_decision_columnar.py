@@ -0,0 +1,115 @@
+import json
+
+from kobe.logs import columnar
+from kobe.logs import decision_logger as dl
+from kobe.research.aggregate_decisions import aggregate_decisions
+from kobe.research.export_decision_dataset import build_dataset
+
+
+def _events():
+    tfs = {tf: {"close": 100.5 + i, "atr_pct_14": 0.5 * (i + 1), "volume": 1200 + i}
+           for i, tf in enumerate(["15m", "1h", "4h", "1d"])}
+    return [
+        {
+            "ts": "2025-11-27T10:00:00.123456+00:00",
+            "symbol": "BTCUSDC",
+            "decision_stage": "setup_detected",
+            "context": {"regime": {"trend": "bull", "volatility": "normal"}, "timeframes": tfs,
+                        "market_features": {}},
+            "setup": {"id": "trend_breakout_15m_long", "side": "long", "quality": 0.75},
+            "meta": {"strategy_id": "v0", "strategy_version": "v4.3"},
+        },
+        {
+            "ts": "2025-11-27T11:00:00+00:00",
+            "symbol": "BTCUSDC",
+            "decision_stage": "proposal_built",
+            "context": {"regime": {"trend": "bull", "volatility": "normal"}, "timeframes": tfs},
+            "setup": {"id": "trend_breakout_15m_long", "side": "long", "quality": 0.75},
+            "proposal": {"entry": 100.0, "stop": 99.0, "take": 103.0, "risk_pct": 0.25,
+                         "reasons": ["A", "B"]},
+        },
+        # ts non UTC, valeurs non float et None: restent dans la colonne JSON "extra"
+        {"ts": "2025-11-27T23:30:00+02:00", "symbol": "ETHUSDC", "source": "autosignal",
+         "stage": "no_signal", "reason": "no_candidates", "setup": {"quality": 1, "id": None}},
+        {"symbol": "ETHUSDC", "decision_stage": "unknown", "value": float("nan")},
+    ]
+
+
+def _norm(evts):
+    return [json.loads(json.dumps(e, sort_keys=True, default=str)) for e in evts]
+
+
+def test_chunks_roundtrip_lossless_and_partial_chunk_ignored(tmp_path):
+    path = tmp_path / "2025-11-27_decisions.kcol"
+    evts = _events()
+    columnar.append_events(path, evts[:2])
+    columnar.append_events(path, evts[2:])
+    assert _norm(columnar.read_events(path)) == _norm(evts)
+
+    cols = columnar.read_columns(path, ["symbol", "context.timeframes.1h.close", "_day"])
+    assert cols["symbol"] == ["BTCUSDC", "BTCUSDC", "ETHUSDC", "ETHUSDC"]
+    assert cols["context.timeframes.1h.close"][:2] == [101.5, 101.5]
+    assert cols["_day"][2] is None  # ts non UTC → pas de colonne, event complet dans extra
+
+    # Chunk en cours d'écriture: ignoré jusqu'à ce qu'il soit complet
+    size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(columnar.encode_chunk(evts[:1])[:20])
+    chunks = list(columnar.iter_chunks(path))
+    assert len(chunks) == 2 and chunks[-1][1] == size
+
+
+def test_compact_keeps_research_tools_equivalent(tmp_path):
+    jsonl_dir = tmp_path / "jsonl"
+    jsonl_dir.mkdir()
+    lines = "\n".join(json.dumps(e) for e in _events()) + "\nligne corrompue\n"
+    (jsonl_dir / "2025-11-27_decisions.jsonl").write_text(lines, encoding="utf-8")
+    kcol_dir = tmp_path / "kcol"
+    kcol_dir.mkdir()
+    (kcol_dir / "2025-11-27_decisions.jsonl").write_text(lines, encoding="utf-8")
+
+    assert columnar.main(["compact", "--log-dir", str(kcol_dir)]) == 0
+    assert [p.name for p in kcol_dir.iterdir()] == ["2025-11-27_decisions.kcol"]
+
+    assert aggregate_decisions(kcol_dir) == aggregate_decisions(jsonl_dir)
+    assert build_dataset(kcol_dir) == build_dataset(jsonl_dir)
+
+    out = tmp_path / "back.jsonl"
+    assert columnar.main(["to-jsonl", str(kcol_dir / "2025-11-27_decisions.kcol"), "--out", str(out)]) == 0
+    back = [json.loads(l) for l in out.read_text(encoding="utf-8").splitlines()]
+    assert _norm(back) == _norm(_events())
+
+
+def test_decision_logger_columnar_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    monkeypatch.setenv("KOBE_DECISION_FORMAT", "columnar")
+    for e in _events()[:2]:
+        dl.log_decision(e)
+    assert dl.flush_decisions()
+    path = tmp_path / "2025-11-27_decisions.kcol"
+    assert _norm(columnar.read_events(path)) == _norm(_events()[:2])
+
+
+def test_aggregate_applies_key_defaults_without_rebuilding_events(tmp_path, monkeypatch):
+    evts = [
+        {"ts": "2025-11-27T10:00:00+00:00", "symbol": "BTCUSDC", "decision_stage": "no_proposal",
+         "meta": {"strategy_version": "v4.3"}},
+        {"ts": "2025-11-27T10:05:00+00:00", "decision_stage": "no_proposal", "setup": {"side": "long"}},
+        {"ts": "2025-11-27T10:10:00+00:00", "symbol": "BTCUSDC", "decision_stage": "setup_detected",
+         "setup": {"id": 7}},
+    ]
+    jsonl_dir, kcol_dir = tmp_path / "jsonl", tmp_path / "kcol"
+    jsonl_dir.mkdir()
+    kcol_dir.mkdir()
+    (jsonl_dir / "2025-11-27_decisions.jsonl").write_text("\n".join(json.dumps(e) for e in evts) + "\n",
+                                                         encoding="utf-8")
+    columnar.append_events(kcol_dir / "2025-11-27_decisions.kcol", evts)
+
+    rebuilt = []
+    event = columnar.Chunk.event
+    monkeypatch.setattr(columnar.Chunk, "event", lambda self, i: rebuilt.append(i) or event(self, i))
+    counts = aggregate_decisions(kcol_dir, workers=1)
+    assert counts == aggregate_decisions(jsonl_dir, workers=1)
+    # Champs absents: valeurs par défaut en colonnes; seul l'id numérique (colonne extra) est relu
+    assert rebuilt == [2]
+    assert {(k.symbol, k.setup_id) for k in counts} == {("BTCUSDC", "none"), ("UNKNOWN", "none"), ("BTCUSDC", "7")}
@@ -0,0 +1,49 @@
+import json
+import threading
+
+from kobe.logs import decision_logger as dl
+
+
+def _read(tmp_path):
+    files = sorted(tmp_path.glob("*_decisions.jsonl"))
+    return [json.loads(l) for f in files for l in f.read_text(encoding="utf-8").splitlines()]
+
+
+def test_log_decision_async_then_flush(tmp_path, monkeypatch):
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    monkeypatch.delenv("KOBE_DECISION_SYNC", raising=False)
+    for i in range(50):
+        dl.log_decision({"symbol": "BTCUSDC", "i": i, "ts": "2025-11-27T10:00:00+00:00"})
+    dl.log_decision({"symbol": "ETHUSDC", "ts": "2025-11-28T00:00:01+00:00"})
+    assert dl.flush_decisions()
+
+    rows = _read(tmp_path)
+    assert [r["i"] for r in rows if "i" in r] == list(range(50))
+    assert (tmp_path / "2025-11-28_decisions.jsonl").exists()
+
+
+def test_writer_batches_and_drops_when_full(tmp_path, monkeypatch):
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    calls = []
+    gate = threading.Event()
+    orig = dl._write_batch
+
+    def slow_write(items, fsync=False):
+        gate.wait(5)
+        calls.append(len(items))
+        orig(items, fsync=fsync)
+
+    monkeypatch.setattr(dl, "_write_batch", slow_write)
+    w = dl._AsyncDecisionWriter(maxsize=4, flush_s=0.05)
+    ts = dl.datetime.now(dl.timezone.utc)
+    # Le thread bloque sur le 1er lot: la file se remplit puis abandonne sans bloquer.
+    results = [w.submit(ts, {"i": i}) for i in range(20)]
+    assert results.count(False) == w.dropped > 0
+
+    gate.set()
+    w.close()
+    assert sum(calls) == results.count(True)
+    assert len(calls) < results.count(True)  # écritures regroupées
+    # Après close(), l'écriture repasse en synchrone
+    w.submit(ts, {"i": "late"})
+    assert _read(tmp_path)[-1] == {"i": "late"}
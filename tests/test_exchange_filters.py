@@ -0,0 +1,76 @@
+import json
+import threading
+
+from kobe.execution import exchange_filters
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.exchange_filters import ExchangeFilters
+
+EXCHANGE_INFO = {"symbols": [
+    {"symbol": "BTCUSDC", "filters": [
+        {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "1000000.00", "tickSize": "0.01000000"},
+        {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"},
+        {"filterType": "NOTIONAL", "minNotional": "5.00000000", "applyMinToMarket": True},
+    ]},
+    {"symbol": "DOGEUSDC", "filters": [
+        {"filterType": "PRICE_FILTER", "minPrice": "0.00001000", "tickSize": "0.00001000"},
+        {"filterType": "LOT_SIZE", "minQty": "1.00000000", "maxQty": "9000000.00000000", "stepSize": "1.00000000"},
+        {"filterType": "NOTIONAL", "minNotional": "1.00000000"},
+    ]},
+]}
+
+
+def test_filters_cache_snapshot_and_ttl(tmp_path):
+    snap = tmp_path / "exchange_info.json"
+    fetches = []
+    gate = threading.Event()
+
+    def fetch():
+        fetches.append(1)
+        if len(fetches) > 1:
+            gate.wait(2)
+        return EXCHANGE_INFO
+
+    cache = ExchangeFilters(snapshot_path=snap, ttl_s=3600, fetch=fetch)
+    assert cache.get("BTCUSDC") is None  # vide, aucun appel réseau implicite
+    cache.ensure_fresh()  # cache vide: chargement synchrone
+    btc = cache.get("BTCUSDC")
+    assert (btc.step_size, btc.tick_size, btc.min_notional) == ("0.00001000", "0.01000000", "5.00000000")
+    assert btc.round_qty(0.0123456) == 0.01234
+    assert btc.round_price(67234.5678) == 67234.57
+    assert cache.get("DOGEUSDC").round_qty(12.9) == 12.0
+    assert btc.check(0.00005, 67000.0) == "min_notional"
+    assert btc.check(0.001, 67000.0) is None
+
+    # Un autre process repart du snapshot sans refetch
+    other = ExchangeFilters(snapshot_path=snap, ttl_s=3600, fetch=lambda: 1 / 0)
+    assert other.get("BTCUSDC") == btc
+    other.ensure_fresh()
+    assert len(fetches) == 1
+
+    # TTL dépassé: rafraîchissement en arrière-plan, un seul à la fois, cache servi entre-temps
+    cache.ttl_s = 0
+    cache.ensure_fresh()
+    cache.ensure_fresh()
+    assert cache.get("BTCUSDC") == btc
+    gate.set()
+    cache._refreshing.join(2)
+    assert len(fetches) == 2
+    assert json.loads(snap.read_text(encoding="utf-8"))["symbols"]["DOGEUSDC"]["min_notional"] == "1.00000000"
+
+
+def test_order_plan_rounds_per_symbol(tmp_path, monkeypatch):
+    monkeypatch.setattr(exchange_filters, "SNAPSHOT_PATH", tmp_path / "exchange_info.json")
+    ExchangeFilters(snapshot_path=tmp_path / "exchange_info.json", fetch=lambda: EXCHANGE_INFO).refresh()
+    b = BinanceSpot(key="dummy", secret="dummy")
+
+    plan = b.build_order_plan("BTCUSDC", "BUY", 0.0123456, 68000.004, take_price=69600.126, stop_price=67200.999)
+    assert plan["valid"] is True
+    assert plan["qty_rounded"] == 0.01234
+    assert plan["take_profit"]["price"] == 69600.13 and plan["stop_loss"]["price"] == 67201.0
+
+    plan = b.build_order_plan("DOGEUSDC", "BUY", 30.7, 0.12345678)
+    assert plan["qty_rounded"] == 30.0 and plan["entry"]["price"] == 0.12346
+
+    # Rejet anticipé sous minNotional, sans aller-retour exchange
+    plan = b.build_order_plan("BTCUSDC", "BUY", 0.00005, 68000.0)
+    assert plan["valid"] is False and plan["reason"] == "min_notional"
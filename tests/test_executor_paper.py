@@ -19,6 +19,9 @@ def test_long_tp_positive_pnl(tmp_path, monkeypatch):
     open_evt = ex.simulate_open(p, balance_usd=10_000.0, leverage=2.0)
     closed_evt = ex.simulate_close(open_evt, price=p.take, reason="hit_tp")
 
+    assert (tmp_path / "trades.db").exists()
+    # Vues d'export CSV/JSONL générées depuis le store
+    assert ex.export_positions() == 2
     assert (tmp_path / "positions.csv").exists()
     assert (tmp_path / "positions.jsonl").exists()
     assert float(closed_evt["realized_pnl_usd"]) > 0.0
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from kobe.cli import import_time
+from kobe.core import router
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_parse_importtime_output():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:      1200 |       1200 |   yaml.reader\n"
+        "import time:       300 |       4500 | kobe.cli.schedule\n"
+    )
+    rows = import_time.parse_importtime(stderr)
+    assert [(r["module"], r["self_us"], r["cumulative_us"], r["depth"]) for r in rows] == [
+        ("yaml.reader", 1200, 1200, 1), ("kobe.cli.schedule", 300, 4500, 0)]
+
+
+@pytest.mark.parametrize("module", import_time.ONE_SHOT_ENTRYPOINTS)
+def test_one_shot_entrypoint_import_budget(module):
+    res = import_time.measure(module, runs=2)
+    assert import_time.check([res]) == [], res
+
+
+def test_router_and_adapter_defer_exchange_clients():
+    for module in ("kobe.core.router", "kobe.core.adapter.binance"):
+        res = import_time.measure(module, runs=1)
+        assert set(res["heavy"]) <= {"pydantic"}, res
+    # Proxy: nom module conservé, classe réelle au premier accès
+    assert router.AsyncBinanceSpot.resolve().__name__ == "AsyncBinanceSpot"
+
+
+def test_deepseek_client_import_has_no_side_effects(tmp_path):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    subprocess.run([sys.executable, "-c", "import kobe.llm.deepseek_client, sys; assert 'httpx' not in sys.modules"],
+                   cwd=tmp_path, env=env, check=True, timeout=5)
+    assert not (tmp_path / "logs").exists()
@@ -1,13 +1,14 @@
 import json, csv
 from pathlib import Path
 from kobe.signals.proposal import Proposal
-from kobe.core.journal import log_proposal, LOG_DIR, CSV_PATH, JSONL_PATH
+from kobe.core.journal import log_proposal, export_proposals
 
 def test_log_proposal_creates_files(tmp_path, monkeypatch):
     # Redirige les logs vers un dossier temporaire
     monkeypatch.setattr("kobe.core.journal.LOG_DIR", tmp_path)
-    monkeypatch.setattr("kobe.core.journal.CSV_PATH", tmp_path / "journal.csv")
     monkeypatch.setattr("kobe.core.journal.JSONL_PATH", tmp_path / "journal.jsonl")
+    monkeypatch.setattr("kobe.core.journal.PROPOSALS_CSV_PATH", tmp_path / "proposals.csv")
+    monkeypatch.setattr("kobe.core.journal.PROPOSALS_JSONL_PATH", tmp_path / "proposals.jsonl")
 
     p = Proposal(
         symbol="BTCUSDC",
@@ -21,19 +22,25 @@ def test_log_proposal_creates_files(tmp_path, monkeypatch):
     )
 
     log_proposal(p.model_dump())
+    assert (tmp_path / "trades.db").exists()
 
-    # Vérifie existence des fichiers
-    assert (tmp_path / "journal.csv").exists()
-    assert (tmp_path / "journal.jsonl").exists()
+    # Toujours visible dans le journal lu par `kobe show-log`
+    journal = [json.loads(l) for l in (tmp_path / "journal.jsonl").read_text().splitlines()]
+    assert [(e["symbol"], e["result"]) for e in journal] == [("BTCUSDC", "pending")]
+
+    # Vues d'export depuis le store
+    assert export_proposals() == 1
+    assert (tmp_path / "proposals.csv").exists()
+    assert (tmp_path / "proposals.jsonl").exists()
 
     # Vérifie contenu JSONL
-    data_json = [json.loads(l) for l in (tmp_path / "journal.jsonl").read_text().splitlines()]
+    data_json = [json.loads(l) for l in (tmp_path / "proposals.jsonl").read_text().splitlines()]
     assert data_json and isinstance(data_json[0], dict)
     assert "symbol" in data_json[0]
     assert data_json[0]["symbol"] == "BTCUSDC"
 
     # Vérifie contenu CSV
-    with open(tmp_path / "journal.csv", newline="", encoding="utf-8") as f:
+    with open(tmp_path / "proposals.csv", newline="", encoding="utf-8") as f:
         reader = list(csv.DictReader(f))
     assert len(reader) == 1
     row = reader[0]
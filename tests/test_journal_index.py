@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import kobe.core.clamp as clamp
+import kobe.core.journal as journal
+from kobe.core import journal_index
+
+
+def _redirect(tmp_path, monkeypatch) -> Path:
+    path = tmp_path / "journal.jsonl"
+    monkeypatch.setattr(journal, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(journal, "JSONL_PATH", path)
+    monkeypatch.setattr(clamp, "JSONL_PATH", path)
+    return path
+
+
+def test_append_event_updates_index_and_clamp(tmp_path, monkeypatch):
+    path = _redirect(tmp_path, monkeypatch)
+    journal.append_event({"type": "decision", "result": "none"})
+    assert clamp.emitted_signal_today() is False
+
+    evt = journal.append_event({"type": "signal", "symbol": "BTCUSDT"})
+    assert "ts" in evt
+    assert clamp.emitted_signal_today() is True
+
+    idx = json.loads(journal_index.index_path_for(path).read_text(encoding="utf-8"))
+    today = datetime.now(timezone.utc).date().isoformat()
+    assert idx["days"][today] == {"decision": 1, "signal": 1}
+    assert idx["offset"] == path.stat().st_size
+
+
+def test_clamp_does_not_reread_journal_when_unchanged(tmp_path, monkeypatch):
+    path = _redirect(tmp_path, monkeypatch)
+    journal.append_event({"type": "signal", "symbol": "ETHUSDT"})
+    assert clamp.emitted_signal_today() is True
+    assert journal_index.index_path_for(path).exists()
+
+    def boom(self, *a, **kw):
+        raise AssertionError("le journal ne doit pas être relu")
+
+    monkeypatch.setattr(Path, "open", boom)
+    monkeypatch.setattr(Path, "read_text", boom)
+    for _ in range(10):
+        assert clamp.emitted_signal_today() is True
+
+
+def test_rebuild_index_from_jsonl(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    yday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    rows = [
+        {"type": "signal", "ts": yday},
+        {"type": "signal", "ts": yday},
+        {"type": "paper", "ts": 1_700_000_000_000},
+        {"type": "signal"},  # sans ts: non daté, ignoré
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n{corrompu\n", encoding="utf-8")
+
+    idx = journal_index.rebuild_index(path)
+    assert idx["days"][yday[:10]]["signal"] == 2
+    assert idx["days"]["2023-11-14"]["paper"] == 1
+    assert idx["offset"] == path.stat().st_size
+
+    # Journal tronqué → l'index repart de zéro
+    path.write_text(json.dumps({"type": "signal", "ts": yday}) + "\n", encoding="utf-8")
+    day = datetime.fromisoformat(yday).date()
+    assert journal_index.count_for_day(path, day, "signal") == 1
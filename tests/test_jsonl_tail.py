@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from kobe.core import journal_index
+from kobe.core.jsonl_tail import iter_records, read_appended, tail_lines
+
+
+def _write(path, n):
+    lines = [json.dumps({"type": "signal", "i": i, "ts": "2025-11-27T10:00:00Z"}) for i in range(n)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return [ln.encode() for ln in lines]
+
+
+@pytest.mark.parametrize("block_size", [7, 64, 1 << 16])
+def test_tail_lines_matches_splitlines(tmp_path, block_size):
+    path = tmp_path / "journal.jsonl"
+    lines = _write(path, 50)
+    for n in (1, 3, 20, 50, 80):
+        assert tail_lines(path, n, block_size=block_size) == lines[-n:]
+    assert tail_lines(path, 0) == []
+
+
+def test_tail_lines_skips_blanks_and_keeps_unterminated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_bytes(b'{"a": 1}\n\n\n{"b": 2}\n   \n{"c": 3')
+    assert tail_lines(path, 2, block_size=4) == [b'{"b": 2}', b'{"c": 3']
+    assert tail_lines(path, 10, block_size=4) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3']
+    (tmp_path / "empty.jsonl").write_bytes(b"")
+    assert tail_lines(tmp_path / "empty.jsonl", 5) == []
+
+
+def test_iter_records_streams_and_skips_corrupted(tmp_path):
+    path = tmp_path / "positions.jsonl"
+    path.write_text('{"id": 1}\nnot json\n\n[1, 2]\n{"id": 2}\n', encoding="utf-8")
+    assert list(iter_records(path)) == [{"id": 1}, {"id": 2}]
+
+
+def test_read_appended_block_cap_and_index_catch_up(tmp_path, monkeypatch):
+    path = tmp_path / "journal.jsonl"
+    _write(path, 30)
+    records, offset, _ = read_appended(path, 0, max_bytes=100)
+    assert 0 < len(records) < 30 and offset <= 100
+
+    # Rattrapage par petits blocs: même résultat qu'une lecture d'un seul tenant
+    monkeypatch.setattr(journal_index, "CATCH_UP_BLOCK_BYTES", 100)
+    idx = journal_index.rebuild_index(path)
+    assert idx["days"]["2025-11-27"] == {"signal": 30}
+    assert idx["offset"] == path.stat().st_size
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from kobe.logs.sink import JsonlSink, get_file_sink
+from kobe.logs import execution_logger as el
+
+
+def test_sink_reuses_handle_and_rolls_over_at_utc_midnight(tmp_path, monkeypatch):
+    opens = []
+    orig_open = Path.open
+
+    def counting_open(self, *a, **kw):
+        opens.append(self.name)
+        return orig_open(self, *a, **kw)
+
+    monkeypatch.setattr(Path, "open", counting_open)
+    sink = JsonlSink(tmp_path / "decisions", "%Y-%m-%d_decisions.jsonl", durability="flush")
+    before = datetime(2025, 11, 27, 23, 59, 59, tzinfo=timezone.utc)
+    for i in range(10):
+        sink.write(json.dumps({"i": i}), ts=before)
+    # Minuit UTC (ts exprimé dans un autre fuseau)
+    after = (before + timedelta(seconds=2)).astimezone(timezone(timedelta(hours=-5)))
+    sink.write(json.dumps({"i": "next"}), ts=after)
+
+    assert opens == ["2025-11-27_decisions.jsonl", "2025-11-28_decisions.jsonl"]
+    assert len((tmp_path / "decisions" / "2025-11-27_decisions.jsonl").read_text().splitlines()) == 10
+    assert (tmp_path / "decisions" / "2025-11-28_decisions.jsonl").read_text() == '{"i": "next"}\n'
+    sink.close()
+
+
+def test_buffered_sink_flushes_on_demand(tmp_path):
+    sink = JsonlSink(tmp_path, "fixed.jsonl", durability="buffered")
+    path = sink.write('{"a": 1}')
+    assert path.read_text() == ""
+    sink.flush()
+    assert path.read_text() == '{"a": 1}\n'
+    sink.close()
+
+
+def test_execution_logger_and_file_sink_share_cached_sinks(tmp_path, monkeypatch):
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    el.log_execution_attempt(symbol="BTCUSDC", side="BUY", exchange="binance", mode="paper")
+    el.log_execution_attempt(symbol="ETHUSDC", side="BUY", exchange="binance", mode="paper")
+    rows = [json.loads(l) for l in el._get_executions_log_path().read_text().splitlines()]
+    assert [r["symbol"] for r in rows] == ["BTCUSDC", "ETHUSDC"]
+    assert el._executions_sink() is el._executions_sink()
+
+    exe = tmp_path / "sub" / "executor.jsonl"
+    assert get_file_sink(exe) is get_file_sink(str(exe))
+    get_file_sink(exe).write('{"x": 1}')
+    assert exe.read_text() == '{"x": 1}\n'
@@ -0,0 +1,102 @@
+import queue
+import time
+
+import pytest
+import requests
+
+from kobe.core.feed import Tick
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.user_stream import UserDataStream
+
+
+def _ticks(symbol, prices, t0=1_764_237_600_000):
+    return [Tick(symbol=symbol, price=p, qty=0.1, ts=t0 + i * 1000, is_buyer_maker=False)
+            for i, p in enumerate(prices)]
+
+
+pytestmark = pytest.mark.parametrize("exchange", [{"prices": [100.0, 100.5, 100.0]}], indirect=True)
+
+
+def _balances(client):
+    return {b["asset"]: (float(b["free"]), float(b["locked"])) for b in client.check_account()["balances"]}
+
+
+def test_order_plan_round_trip_against_local_exchange(exchange):
+    client = BinanceSpot(key="k", secret="s")
+    plan = client.build_order_plan("BTCUSDC", "BUY", 0.5, 100.0, take_price=110.0, stop_price=95.0)
+    res = client.execute_order_plan(plan)
+
+    assert res["protection"]["status"] == "protected"
+    assert res["orders"]["entry"]["status"] == "FILLED"
+    # Quantité de la position bloquée par l'OCO
+    assert _balances(client)["BTC"] == pytest.approx((0.0, 0.5))
+    assert _balances(client)["USDC"][0] == pytest.approx(950.0)
+
+    exchange.engine.replay(_ticks("BTCUSDC", [104.0, 111.0], t0=1_764_237_660_000))
+
+    assert client._signed_get("/api/v3/openOrders", {"symbol": "BTCUSDC"}) == []
+    assert _balances(client)["USDC"][0] == pytest.approx(1005.0)  # TP rempli au prix limite
+    statuses = sorted(o.status for o in exchange.engine.orders.values())
+    assert statuses == ["CANCELED", "FILLED", "FILLED"]
+    assert client.get_price("BTCUSDC")["price"] == "111.00000000"
+    klines = requests.get(f"{exchange.http_url}/api/v3/klines",
+                          params={"symbol": "BTCUSDC", "interval": "1m"}, timeout=5).json()
+    assert [(k[1], k[2], k[4]) for k in klines] == [("100.00000000", "100.50000000", "100.00000000"),
+                                                    ("104.00000000", "111.00000000", "111.00000000")]
+
+
+def test_rejections_use_binance_error_codes(exchange):
+    client = BinanceSpot(key="k", secret="s")
+    # Solde insuffisant
+    resp = client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET",
+                                                 "quantity": 50})
+    assert resp["error"] == 400 and '"code": -2010' in resp["message"]
+    # Mauvaise signature
+    resp = BinanceSpot(key="k", secret="autre")._signed_post(
+        "/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET", "quantity": 0.1})
+    assert '"code": -1022' in resp["message"]
+    # LIMIT_MAKER exécutable immédiatement
+    resp = client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "LIMIT_MAKER",
+                                                 "quantity": 0.1, "price": 101})
+    assert '"code": -2010' in resp["message"]
+
+
+def test_injected_errors_and_latency(exchange):
+    client = BinanceSpot(key="k", secret="s")
+    exchange.inject_error("/api/v3/order", status=503, times=1)
+    first = client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET",
+                                                  "quantity": 0.1})
+    second = client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET",
+                                                   "quantity": 0.1})
+    assert first["error"] == 503 and second["status"] == "FILLED"
+    assert exchange.requests[("POST", "/api/v3/order")] == 2
+
+    exchange.latency_ms = 150
+    t0 = time.perf_counter()
+    client.get_price("BTCUSDC")
+    assert time.perf_counter() - t0 >= 0.15
+
+
+def test_user_stream_receives_execution_reports(exchange, monkeypatch):
+    monkeypatch.setenv("BINANCE_WS_BASE", exchange.ws_url)
+    client = BinanceSpot(key="k", secret="s")
+    client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET", "quantity": 0.1})
+    events = queue.Queue()
+    stream = UserDataStream(client=BinanceSpot(key="k", secret="s"), apply_fills=False,
+                            on_event=lambda kind, msg: events.put((kind, msg)))
+    stream.start()
+    try:
+        deadline = time.monotonic() + 3
+        while not exchange._user_conns and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "SELL", "type": "LIMIT",
+                                              "quantity": 0.1, "price": 120, "timeInForce": "GTC"})
+        exchange.engine.replay(_ticks("BTCUSDC", [121.0], t0=1_764_237_720_000))
+        reports = []
+        while len(reports) < 2:
+            kind, msg = events.get(timeout=3)
+            if kind == "executionReport":
+                reports.append((msg["x"], msg["X"]))
+    finally:
+        stream.stop()
+    assert reports == [("NEW", "NEW"), ("TRADE", "FILLED")]
@@ -0,0 +1,137 @@
+import pytest
+
+from kobe.core import router
+from kobe.core.feed import Tick
+from kobe.core.modes import Mode
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.order_state import ORDER_INDEX, OrderIndex, OrderStatus
+from kobe.signals.proposal import Proposal
+
+
+def _report(status, z, Z, c="kobe-1", x="TRADE", **kw):
+    return {"e": "executionReport", "E": 1_764_237_600_000, "s": "BTCUSDC", "c": c, "S": "BUY",
+            "o": "LIMIT", "q": "1.0", "p": "100", "P": "0", "x": x, "X": status, "i": 11,
+            "z": z, "Z": Z, "r": "NONE", **kw}
+
+
+def test_state_machine_ignores_late_and_regressing_updates():
+    idx = OrderIndex()
+    idx.on_response({"symbol": "BTCUSDC", "orderId": 11, "clientOrderId": "kobe-1", "status": "NEW",
+                     "type": "LIMIT", "side": "BUY", "origQty": "1.0", "executedQty": "0"},
+                    kind="entry")
+    assert [o.client_order_id for o in idx.live("BTCUSDC", kind="entry")] == ["kobe-1"]
+
+    idx.on_execution_report(_report("PARTIALLY_FILLED", "0.4", "40"))
+    idx.on_execution_report(_report("FILLED", "1.0", "101"))
+    # Ack REST en retard et rejeu d'un event partiel: sans effet
+    idx.on_response({"symbol": "BTCUSDC", "orderId": 11, "clientOrderId": "kobe-1", "status": "NEW",
+                     "executedQty": "0"})
+    idx.on_execution_report(_report("PARTIALLY_FILLED", "0.4", "40"))
+
+    rec = idx.get(client_order_id="kobe-1")
+    assert rec.status is OrderStatus.FILLED and not rec.is_live
+    assert rec.executed_qty == 1.0 and rec.avg_price == pytest.approx(101.0)
+    assert rec.kind == "entry"
+    assert idx.live() == [] and idx.summary()["live"] == 0
+    assert idx.get("BTCUSDC", order_id="11").client_order_id == "kobe-1"
+
+    # Annulation: "c" = id de la requête d'annulation, "C" = id d'origine
+    idx.on_response({"symbol": "BTCUSDC", "orderId": 12, "clientOrderId": "kobe-2", "status": "NEW",
+                     "type": "STOP_LOSS_LIMIT", "side": "SELL"})
+    idx.on_execution_report(_report("CANCELED", "0", "0", c="cancel-xyz", C="kobe-2", x="CANCELED",
+                                    i=12, o="STOP_LOSS_LIMIT"))
+    assert idx.get(client_order_id="kobe-2").status is OrderStatus.CANCELED
+    # Erreur REST avec newClientOrderId: ordre REJECTED
+    idx.on_response({"error": 400, "message": "insufficient balance"},
+                    {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET", "newClientOrderId": "kobe-3"},
+                    kind="entry")
+    assert idx.get(client_order_id="kobe-3").status is OrderStatus.REJECTED
+
+
+def test_oco_cancel_replace_and_reconcile():
+    idx = OrderIndex()
+    idx.on_response({"orderListId": 5, "orderReports": [
+        {"symbol": "ETHUSDC", "orderId": 1, "orderListId": 5, "clientOrderId": "tp", "status": "NEW",
+         "type": "LIMIT_MAKER", "side": "SELL"},
+        {"symbol": "ETHUSDC", "orderId": 2, "orderListId": 5, "clientOrderId": "sl", "status": "NEW",
+         "type": "STOP_LOSS_LIMIT", "side": "SELL"},
+    ]}, kind="oco")
+    assert idx.summary()["by_kind"] == {"take_profit": 1, "stop_loss": 1}
+
+    idx.on_response({"symbol": "BTCUSDC", "orderId": 3, "clientOrderId": "sl-b", "status": "NEW",
+                     "type": "STOP_LOSS_LIMIT", "side": "SELL"})
+    idx.on_response({"cancelResult": "SUCCESS", "newOrderResult": "SUCCESS",
+                     "cancelResponse": {"symbol": "BTCUSDC", "orderId": 3, "clientOrderId": "sl-b",
+                                        "status": "CANCELED"},
+                     "newOrderResponse": {"symbol": "BTCUSDC", "orderId": 4, "clientOrderId": "sl-b2",
+                                          "status": "NEW", "type": "STOP_LOSS_LIMIT", "side": "SELL"}})
+    assert [o.order_id for o in idx.live("BTCUSDC", kind="stop_loss")] == [4]
+
+    # openOrders ne contient plus le SL de l'OCO: retiré (issue inconnue)
+    gone = idx.reconcile("ETHUSDC", [{"symbol": "ETHUSDC", "orderId": 1, "orderListId": 5,
+                                      "clientOrderId": "tp", "status": "NEW", "type": "LIMIT_MAKER",
+                                      "side": "SELL"}])
+    assert [o.order_id for o in gone] == [2]
+    assert [o.order_id for o in idx.live("ETHUSDC")] == [1]
+
+
+def test_stop_replace_uses_index_and_falls_back_when_stale(exchange):
+    client = BinanceSpot(key="k", secret="s")
+    plan = client.build_order_plan("BTCUSDC", "BUY", 0.5, 100.0, take_price=110.0, stop_price=95.0)
+    prot = client.execute_order_plan(plan)["protection"]
+    assert (prot["status"], prot["mode"]) == ("protected", "oco")
+    stop = ORDER_INDEX.live("BTCUSDC", kind="stop_loss")[0]
+    assert {o.kind for o in ORDER_INDEX.live("BTCUSDC")} == {"take_profit", "stop_loss"}
+
+    res = client.replace_stop_order("BTCUSDC", "SELL", 0.5, 99.0, take=110.0)
+    assert res["status"] == "ok" and res["method"] == "oco_reissue"
+    # Stop courant connu de l'index: aucun GET openOrders
+    assert exchange.requests[("GET", "/api/v3/openOrders")] == 0
+    assert ORDER_INDEX.get("BTCUSDC", order_id=stop.order_id).status is OrderStatus.CANCELED
+    new_stop = ORDER_INDEX.live("BTCUSDC", kind="stop_loss")[0]
+    assert new_stop.stop_price == 99.0
+
+    # Liste annulée hors de notre vue (pas de flux user data): index périmé
+    exchange.engine.cancel_order({"symbol": "BTCUSDC", "orderId": new_stop.order_id})
+    res = client.replace_stop_order("BTCUSDC", "SELL", 0.5, 99.5, take=110.0)
+    assert res["status"] == "ok" and res["method"] == "new"
+    assert exchange.requests[("GET", "/api/v3/openOrders")] == 1
+    assert [o.stop_price for o in ORDER_INDEX.live("BTCUSDC", kind="stop_loss")] == [99.5]
+
+
+def test_router_skips_symbol_with_live_entry(monkeypatch):
+    events = []
+    monkeypatch.setattr(router, "_append_order", events.append)
+    monkeypatch.setattr(router, "current_mode", lambda cfg: Mode.LIVE)
+    monkeypatch.setattr(router, "load_config", lambda path="config.yaml": {})
+    monkeypatch.setattr(router, "position_size", lambda *a, **k: 0.5)
+    monkeypatch.setattr(router, "BinanceSpot", lambda: BinanceSpot(key="", secret=""))
+    ORDER_INDEX.on_response({"symbol": "BTCUSDC", "orderId": 7, "clientOrderId": "kobe-e", "status": "NEW",
+                             "type": "LIMIT", "side": "BUY"}, kind="entry")
+
+    p = Proposal(symbol="BTCUSDC", side="long", entry=100.0, stop=98.0, take=104.0, risk_pct=0.25,
+                 size_pct=5.0, reasons=["a", "b", "c"])
+    mode, evt = router.place_from_proposal(p, balance_usd=1000.0)
+    assert mode is Mode.LIVE
+    assert (evt["router_action"], evt["status"], evt["order_id"]) == ("skip_entry_live", "ENTRY_LIVE", "7")
+    assert events == [evt]
+
+
+def test_oco_stop_replace_reuses_list_take_and_requires_cancel(exchange):
+    client = BinanceSpot(key="k", secret="s")
+    plan = client.build_order_plan("BTCUSDC", "BUY", 0.5, 100.0, take_price=110.0, stop_price=95.0)
+    assert client.execute_order_plan(plan)["protection"]["mode"] == "oco"
+
+    # Sans `take`: TP repris de la jambe limite de la liste, pas de second stop isolé
+    res = client.replace_stop_order("BTCUSDC", "SELL", 0.5, 99.0)
+    assert res["status"] == "ok" and res["method"] == "oco_reissue"
+    (tp,) = ORDER_INDEX.live("BTCUSDC", kind="take_profit")
+    assert tp.price == 110.0 and tp.order_list_id != -1
+    assert [o.stop_price for o in ORDER_INDEX.live("BTCUSDC", kind="stop_loss")] == [99.0]
+
+    # Liste exécutée hors de notre vue: annulation refusée => aucune ré-émission de l'OCO
+    exchange.engine.on_tick(Tick(symbol="BTCUSDC", price=111.0, qty=1.0, ts=1_764_237_660_000,
+                                 is_buyer_maker=False))
+    client.replace_stop_order("BTCUSDC", "SELL", 0.5, 99.5)
+    assert exchange.requests[("DELETE", "/api/v3/orderList")] == 2
+    assert exchange.requests[("POST", "/api/v3/orderList/oco")] == 2
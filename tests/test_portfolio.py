@@ -0,0 +1,156 @@
+import json
+import time
+
+import pytest
+
+from kobe.core import executor, portfolio, trailing_stop
+from kobe.core.feed import Tick
+from kobe.core.portfolio import PortfolioTracker
+from kobe.execution.binance_spot import BinanceSpot
+
+
+def _open(pid, symbol, side, qty, entry):
+    return {"id": pid, "symbol": symbol, "side": side, "qty": qty, "entry": entry,
+            "status": "open", "mode": "paper", "ts_open": 1}
+
+
+@pytest.fixture(autouse=True)
+def _no_tracker(monkeypatch):
+    monkeypatch.delenv("KOBE_DAILY_LOSS_EUR", raising=False)
+    portfolio.stop_portfolio()
+    yield
+    portfolio.stop_portfolio()
+
+
+def test_tracker_marks_positions_on_ticks_and_realizes_on_close():
+    snaps = []
+    t = PortfolioTracker(publish_interval_s=0)
+    t.subscribe(snaps.append)
+    t.on_position_event(_open("a", "BTCUSDC", "long", 0.5, 100.0))
+    t.on_position_event(_open("b", "BTCUSDC", "short", 0.2, 110.0))
+    t.on_position_event(_open("c", "ETHUSDC", "long", 2.0, 10.0))
+
+    t.on_tick(Tick(symbol="BTCUSDC", price=120.0, qty=1.0, ts=0, is_buyer_maker=False))
+    t.on_prices({"ETHUSDC": 9.0, "SOLUSDC": 1.0})
+    # 0.5*(120-100) - 0.2*(120-110) + 2*(9-10)
+    assert t.unrealized_usd == pytest.approx(10.0 - 2.0 - 2.0)
+
+    snap = snaps[-1]
+    by_id = {p["id"]: p for p in snap["positions"]}
+    assert by_id["b"]["unrealized_pnl_usd"] == pytest.approx(-2.0)
+    assert by_id["c"]["price"] == 9.0
+
+    t.on_position_event({**_open("a", "BTCUSDC", "long", 0.5, 100.0), "status": "closed",
+                         "ts_close": int(time.time() * 1000), "realized_pnl_usd": 9.5})
+    snap = snaps[-1]
+    assert snap["open_positions"] == 2
+    assert snap["realized_pnl_day_usd"] == 9.5 and snap["trades_day"] == 1
+    assert snap["daily_pnl_usd"] == pytest.approx(9.5 - 2.0 - 2.0)
+
+
+def test_kill_switch_fed_by_tracker(tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    monkeypatch.setenv("MAX_DAILY_LOSS_EUR", "25")
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    sent = []
+    monkeypatch.setattr(BinanceSpot, "_signed_post", lambda self, path, params=None, **k: sent.append(params) or {"orderId": 1})
+    snap_path = tmp_path / "portfolio.json"
+
+    # Position ouverte aujourd'hui avant le démarrage: reprise depuis le trade store
+    executor._append_row({**_open("p1", "BTCUSDC", "long", 1.0, 100.0), "ts_open": int(time.time() * 1000)})
+    tracker = portfolio.start_portfolio(db_path=tmp_path / "trades.db", snapshot_path=snap_path)
+    tracker.publish_interval_s = 0
+    assert tracker.snapshot()["open_positions"] == 1
+
+    portfolio.on_price("BTCUSDC", 90.0)
+    assert portfolio.current_daily_loss_eur() == pytest.approx(-10.0)
+    assert BinanceSpot(key="k", secret="s").create_order("BTCUSDC", "BUY", 0.01).get("error") is None
+    assert len(sent) == 1
+
+    portfolio.on_price("BTCUSDC", 70.0)
+    assert portfolio.current_daily_loss_eur() == pytest.approx(-30.0)
+    assert BinanceSpot(key="k", secret="s").create_order("BTCUSDC", "BUY", 0.01)["error"] == "kill_switch"
+    assert len(sent) == 1
+
+    # Autre process: pas de tracker local, lecture du snapshot publié
+    assert json.loads(snap_path.read_text(encoding="utf-8"))["daily_pnl_eur"] == pytest.approx(-30.0)
+    portfolio.stop_portfolio()
+    assert portfolio.current_daily_loss_eur(snap_path) == pytest.approx(-30.0)
+    # La surcharge manuelle reste prise en compte (valeur la plus pénalisante)
+    monkeypatch.setenv("KOBE_DAILY_LOSS_EUR", "-40")
+    assert portfolio.current_daily_loss_eur(snap_path) == -40.0
+
+
+def test_daily_pnl_counts_only_the_move_since_utc_midnight(tmp_path):
+    day1 = 1_700_000_000_000 - 1_700_000_000_000 % 86_400_000  # 00:00 UTC
+    now = {"ms": day1 + 3_600_000}
+    snap_path = tmp_path / "portfolio.json"
+    t = PortfolioTracker(publish_interval_s=0, snapshot_path=snap_path, clock=lambda: now["ms"])
+    t.on_position_event(_open("a", "BTCUSDC", "long", 1.0, 100.0))
+    t.on_position_event(_open("b", "ETHUSDC", "short", 2.0, 10.0))
+    t.on_prices({"BTCUSDC": 80.0, "ETHUSDC": 11.0})
+    assert t.daily_pnl_usd() == pytest.approx(-20.0 - 2.0)
+
+    # Jour suivant: les marks de 00:00 UTC deviennent la base, la perte d'hier n'est plus comptée
+    now["ms"] = day1 + 86_400_000 + 60_000
+    assert t.daily_pnl_usd() == 0.0
+    t.on_price("BTCUSDC", 85.0)
+    assert t.daily_pnl_usd() == pytest.approx(5.0)
+    assert t.unrealized_usd == pytest.approx(-15.0 - 2.0)
+    # Clôture: seule la part courue depuis 00:00 UTC entre dans le réalisé du jour
+    t.on_position_event({**_open("a", "BTCUSDC", "long", 1.0, 100.0), "status": "closed",
+                         "ts_close": now["ms"], "realized_pnl_usd": -15.0})
+    snap = t.snapshot()
+    assert snap["realized_pnl_day_usd"] == pytest.approx(5.0)
+    assert snap["realized_pnl_total_usd"] == pytest.approx(-15.0)
+    assert snap["daily_pnl_usd"] == pytest.approx(5.0)
+    assert snap["positions"][0]["day_base"] == 11.0
+
+
+def test_restarted_tracker_reuses_day_base_from_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    snap_path = tmp_path / "portfolio.json"
+    executor._append_row(_open("p1", "BTCUSDC", "long", 1.0, 100.0))  # ouverte un jour précédent
+    executor._append_row(_open("p2", "ETHUSDC", "long", 1.0, 10.0))
+
+    first = portfolio.start_portfolio(db_path=tmp_path / "trades.db", snapshot_path=snap_path)
+    first.publish_interval_s = 0
+    # Sans base connue, le premier prix observé sert de base du jour
+    first.on_prices({"BTCUSDC": 90.0})
+    first.on_price("BTCUSDC", 95.0)
+    assert first.daily_pnl_usd() == pytest.approx(5.0)
+    portfolio.stop_portfolio()
+
+    again = portfolio.start_portfolio(db_path=tmp_path / "trades.db", snapshot_path=snap_path)
+    again.on_prices({"BTCUSDC": 92.0, "ETHUSDC": 8.0})
+    assert again.daily_pnl_usd() == pytest.approx(2.0)
+    assert again.unrealized_usd == pytest.approx(-8.0 - 2.0)
+
+
+def test_scheduler_tracker_priced_by_trailing_cycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    executor._append_row(_open("p1", "BTCUSDC", "long", 1.0, 100.0))
+    # Démarrage tel que kobe.cli.schedule: amorcé depuis logs/trades.db
+    tracker = portfolio.start_portfolio(db_path=executor.POS_LOG_DIR / "trades.db", snapshot_path=None)
+
+    assert trailing_stop._parse_price("BTCUSDC", {"symbol": "BTCUSDC", "price": "95.0"}) == 95.0
+    assert tracker.unrealized_usd == pytest.approx(-5.0)
+    assert trailing_stop._parse_price("BTCUSDC", {"error": "timeout"}) is None
+    assert tracker.unrealized_usd == pytest.approx(-5.0)
+
+
+@pytest.mark.parametrize("exchange", [{"prices": [100.0, 104.0]}], indirect=True)
+def test_scheduler_prices_paper_positions_in_bulk(exchange, tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    executor._append_row({**_open("p1", "BTCUSDC", "long", 0.5, 100.0), "ts_open": int(time.time() * 1000)})
+    tracker = portfolio.start_portfolio(db_path=tmp_path / "trades.db", snapshot_path=None)
+    assert tracker.open_symbols() == ["BTCUSDC"]
+
+    # Une seule requête ticker/price pour tous les symboles ouverts, position paper comprise
+    assert portfolio.refresh_prices() == 1
+    assert tracker.unrealized_usd == pytest.approx(2.0)
+    assert tracker.daily_pnl_usd() == pytest.approx(2.0)
+    assert BinanceSpot().get_prices(["BTCUSDC", "XYZUSDC"])["XYZUSDC"]["error"] == "exception"
+
+    portfolio.stop_portfolio()
+    assert portfolio.refresh_prices() == 0
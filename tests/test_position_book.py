@@ -0,0 +1,91 @@
+import json
+
+from kobe.signals.proposal import Proposal
+from kobe.core import executor as ex
+from kobe.core.position_book import PositionBook
+from kobe.core.trade_store import TradeStore, get_trade_store
+
+
+def _setup_tmp_logs(tmp_path, monkeypatch):
+    monkeypatch.setattr("kobe.core.executor.POS_LOG_DIR", tmp_path)
+    monkeypatch.setattr("kobe.core.executor.POS_CSV_PATH", tmp_path / "positions.csv")
+    monkeypatch.setattr("kobe.core.executor.POS_JSONL_PATH", tmp_path / "positions.jsonl")
+
+
+def _proposal(symbol="BTCUSDC", side="long"):
+    return Proposal(
+        symbol=symbol, side=side,
+        entry=68000.0, stop=67200.0, take=69600.0,
+        risk_pct=0.25, size_pct=5.0,
+        reasons=["A", "B", "C"],
+    )
+
+
+def test_open_positions_lookup_and_close(tmp_path, monkeypatch):
+    _setup_tmp_logs(tmp_path, monkeypatch)
+    btc = ex.simulate_open(_proposal("BTCUSDC"), balance_usd=10_000.0)
+    eth = ex.simulate_open(_proposal("ETHUSDC"), balance_usd=10_000.0)
+
+    assert {p["id"] for p in ex.get_open_positions()} == {btc["id"], eth["id"]}
+    assert [p["id"] for p in ex.get_open_positions(symbol="ETHUSDC")] == [eth["id"]]
+    assert ex.get_open_positions(mode="live") == []
+    assert ex.get_position(btc["id"])["symbol"] == "BTCUSDC"
+
+    ex.simulate_close(btc, price=69600.0, reason="hit_tp")
+    assert [p["id"] for p in ex.get_open_positions(mode="paper")] == [eth["id"]]
+    assert ex.get_position(btc["id"]) is None
+
+
+def test_update_position_stop_appends_compact_event(tmp_path, monkeypatch):
+    _setup_tmp_logs(tmp_path, monkeypatch)
+    pos = ex.simulate_open(_proposal(), balance_usd=10_000.0)
+
+    updated = ex.update_position_stop(pos["id"], 67900.0)
+    assert updated["stop"] == 67900.0
+    assert ex.get_open_positions()[0]["stop"] == 67900.0
+    assert ex.update_position_stop("pos-inconnue", 1.0) is None
+
+    rows = get_trade_store(tmp_path / "trades.db").query("positions")
+    assert len(rows) == 2
+    last = rows[-1]
+    assert last == {"ts": last["ts"], "event": "stop_update", "id": pos["id"], "stop": 67900.0}
+
+
+def test_book_rebuilt_from_log_then_incremental(tmp_path, monkeypatch):
+    _setup_tmp_logs(tmp_path, monkeypatch)
+    pos = ex.simulate_open(_proposal(), balance_usd=10_000.0)
+    ex.update_position_stop(pos["id"], 67500.0)
+
+    # Nouveau carnet (≈ redémarrage du process): état rejoué depuis le journal
+    book = PositionBook(get_trade_store(tmp_path / "trades.db"))
+    assert book.get(pos["id"])["stop"] == 67500.0
+
+    fetched = []
+    orig_rows_since = TradeStore.rows_since
+
+    def counting_rows_since(self, table, seq):
+        rows = orig_rows_since(self, table, seq)
+        fetched.extend(rows)
+        return rows
+
+    monkeypatch.setattr(TradeStore, "rows_since", counting_rows_since)
+    for _ in range(20):
+        book.open_positions(symbol="BTCUSDC")
+    # Aucune ligne relue tant que la table n'a pas bougé
+    assert fetched == []
+
+    ex.simulate_close(pos, price=69600.0, reason="hit_tp")
+    assert book.open_positions() == []
+    assert len(fetched) == 1
+
+
+
+def test_legacy_positions_jsonl_visible_after_store_creation(tmp_path, monkeypatch):
+    _setup_tmp_logs(tmp_path, monkeypatch)
+    legacy = {"id": "pos-paper-solusdc-1", "mode": "paper", "symbol": "SOLUSDC", "side": "long",
+              "status": "open", "ts_open": 1}
+    (tmp_path / "positions.jsonl").write_text(json.dumps(legacy) + "\n", encoding="utf-8")
+
+    # trades.db créé par la première écriture: l'historique JSONL y est repris
+    new = ex.simulate_open(_proposal("BTCUSDC"), balance_usd=10_000.0)
+    assert [p["id"] for p in ex.get_open_positions()] == [legacy["id"], new["id"]]
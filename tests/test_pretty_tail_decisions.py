@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from kobe.core.file_watch import DirWatcher
+from kobe.logs import columnar
+from kobe.research import pretty_tail_decisions as ptd
+
+
+def _evt(symbol, stage="setup_detected"):
+    return {"ts": "2025-11-27T10:00:00+00:00", "symbol": symbol, "decision_stage": stage}
+
+
+def _append(path, *events, raw=""):
+    with path.open("a", encoding="utf-8") as f:
+        for e in events:
+            f.write(json.dumps(e) + "\n")
+        f.write(raw)
+
+
+def _run_follow(path, log_dir, steps, use_inotify):
+    """Exécute `follow` en jouant un scénario: une étape par tour de boucle."""
+    steps = list(steps)
+
+    def stop():
+        if not steps:
+            return True
+        steps.pop(0)()
+        return False
+
+    with DirWatcher(log_dir, poll_s=0.01, use_inotify=use_inotify) as watcher:
+        ptd.follow(str(path), log_dir=str(log_dir), watcher=watcher, stop=stop,
+                   idle_timeout=0.05, coalesce_s=0)
+        return watcher.mode
+
+
+def _symbols(out):
+    return [line.split("symbol=")[1] for line in out.splitlines() if "symbol=" in line]
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_follow_reads_appended_lines_and_rolls_over(tmp_path, capsys, use_inotify):
+    day1 = tmp_path / "2025-11-27_decisions.jsonl"
+    day2 = tmp_path / "2025-11-28_decisions.jsonl"
+    _append(day1, _evt("A"))
+
+    mode = _run_follow(day1, tmp_path, [
+        # ligne complète + ligne en cours d'écriture (pas encore de '\n')
+        lambda: _append(day1, _evt("B"), raw='{"symbol": "C", "decision_'),
+        lambda: _append(day1, raw='stage": "no_proposal"}\n'),
+        lambda: None,
+        # rotation: nouveau fichier du jour suivant
+        lambda: _append(day2, _evt("D")),
+        lambda: None,
+        lambda: _append(day2, _evt("E")),
+        lambda: None,
+    ], use_inotify)
+    if use_inotify and mode != "inotify":
+        pytest.skip("inotify indisponible")
+
+    out = capsys.readouterr().out
+    assert _symbols(out) == ["A", "B", "C", "D", "E"]
+    assert "Nouveau fichier de décisions" in out
+    assert "illisible" not in out
+
+
+def test_follow_restarts_on_truncation(tmp_path, capsys):
+    path = tmp_path / "2025-11-27_decisions.jsonl"
+    _append(path, _evt("A"), _evt("B"))
+
+    _run_follow(path, tmp_path, [
+        lambda: path.write_text(json.dumps(_evt("Z")) + "\n", encoding="utf-8"),
+        lambda: None,
+    ], use_inotify=False)
+
+    out = capsys.readouterr().out
+    assert _symbols(out) == ["A", "B", "Z"]
+    assert "tronqué" in out
+
+
+def test_follow_columnar_reads_new_chunks_only(tmp_path, capsys):
+    path = tmp_path / "2025-11-27_decisions.kcol"
+    columnar.append_events(path, [_evt("A")])
+
+    _run_follow(path, tmp_path, [
+        lambda: columnar.append_events(path, [_evt("B"), _evt("C")]),
+        lambda: None,
+    ], use_inotify=False)
+
+    assert _symbols(capsys.readouterr().out) == ["A", "B", "C"]
@@ -0,0 +1,84 @@
+import json
+from datetime import date
+from pathlib import Path
+
+from kobe.logs import columnar
+from kobe.research import query_decisions as qd
+from kobe.research.query_decisions import DecisionQuery, query_decisions
+
+
+def _evt(day, symbol, stage, trend="bull", vol="normal", i=0):
+    return {
+        "ts": f"{day}T10:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+        "symbol": symbol,
+        "decision_stage": stage,
+        "context": {"regime": {"trend": trend, "volatility": vol}},
+        "setup": {"id": "breakout", "quality": 0.7},
+        "i": i,
+    }
+
+
+def _write(log_dir: Path, day: str, events) -> Path:
+    path = log_dir / f"{day}_decisions.jsonl"
+    with path.open("a", encoding="utf-8") as f:
+        for e in events:
+            f.write(json.dumps(e) + "\n")
+    return path
+
+
+def _brute(log_dir: Path, q: DecisionQuery):
+    from kobe.research.aggregate_decisions import _iter_events, _key_fields
+
+    out = []
+    for evt in _iter_events(log_dir):
+        if q.match_row(date.fromisoformat(evt["_day"]), _key_fields(evt)):
+            out.append(evt)
+    return out
+
+
+def test_query_prunes_files_and_groups(tmp_path, monkeypatch):
+    monkeypatch.setattr(qd, "GROUP_ROWS", 10)
+    log_dir = tmp_path / "decisions"
+    log_dir.mkdir()
+    for d in ("2025-10-01", "2025-10-02", "2025-11-01"):
+        _write(log_dir, d, [_evt(d, "BTCUSDC", "setup_detected", i=i) for i in range(30)])
+    # Un seul groupe de la journée contient SOLUSDC en bear/storm
+    _write(log_dir, "2025-10-02", [_evt("2025-10-02", "SOLUSDC", "proposal_built", "bear", "storm", i=100 + i)
+                                    for i in range(3)])
+
+    q = DecisionQuery(
+        since=date(2025, 10, 1), until=date(2025, 10, 31),
+        symbols=frozenset({"SOLUSDC"}), stages=frozenset({"proposal_built"}),
+        regime_trends=frozenset({"bear"}), regime_volatilities=frozenset({"storm"}),
+    )
+    stats = {}
+    got = list(query_decisions(log_dir, q, stats=stats))
+    assert [e["i"] for e in got] == [100, 101, 102]
+    assert got == _brute(log_dir, q)
+    assert stats == {"files_scanned": 1, "files_skipped": 2, "groups_scanned": 1, "groups_skipped": 3}
+    assert (log_dir / "_query_index.json").exists()
+
+
+def test_index_is_incremental_and_handles_columnar(tmp_path, monkeypatch):
+    log_dir = tmp_path / "decisions"
+    log_dir.mkdir()
+    path = _write(log_dir, "2025-10-01", [_evt("2025-10-01", "BTCUSDC", "setup_detected", i=i) for i in range(5)])
+    q = DecisionQuery(symbols=frozenset({"ETHUSDC"}))
+    assert list(query_decisions(log_dir, q)) == []
+
+    indexed = []
+    orig = qd._index_jsonl
+    monkeypatch.setattr(qd, "_index_jsonl", lambda p, start, fb: indexed.append(start) or orig(p, start, fb))
+    _write(log_dir, "2025-10-01", [_evt("2025-10-01", "ETHUSDC", "no_proposal", i=9)])
+    assert [e["i"] for e in query_decisions(log_dir, q)] == [9]
+    # Seuls les octets ajoutés ont été indexés
+    assert indexed and indexed[0] > 0
+
+    columnar.compact_day(log_dir, date(2025, 10, 1))
+    assert not path.exists()
+    q2 = DecisionQuery(since=date(2025, 10, 1), stages=frozenset({"setup_detected"}))
+    got = list(query_decisions(log_dir, q2))
+    assert [e["i"] for e in got] == [0, 1, 2, 3, 4]
+    assert got == _brute(log_dir, q2)
+
+    assert qd.main(["--log-dir", str(log_dir), "--symbol", "ETHUSDC", "--count"]) == 0
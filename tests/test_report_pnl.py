@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from kobe.cli import report
+from kobe.core.trade_store import get_trade_store
+
+
+def _ms(day, hour=12):
+    return int(datetime.fromisoformat(f"{day}T{hour:02d}:00:00").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _closed(pid, symbol, day, pnl):
+    return {"id": pid, "symbol": symbol, "status": "closed", "ts_open": _ms(day, 1),
+            "ts_close": _ms(day), "realized_pnl_usd": pnl}
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    for name in ("POS_DB_PATH", "POS_CSV_PATH", "POS_JSONL_PATH", "PNL_CSV_PATH", "PNL_JSONL_PATH",
+                 "PNL_SYMBOLS_CSV_PATH", "PNL_SYMBOLS_JSONL_PATH", "PNL_STATE_PATH"):
+        monkeypatch.setattr(report, name, tmp_path / getattr(report, name).name)
+    monkeypatch.setattr(report, "POS_LOG_DIR", tmp_path)
+    return tmp_path
+
+
+def test_incremental_report_reads_only_new_positions(logs, monkeypatch):
+    store = get_trade_store(report.POS_DB_PATH)
+    store.append_many("positions", [
+        {"id": "p1", "symbol": "BTCUSDC", "status": "open", "ts_open": _ms("2025-11-27", 1)},
+        _closed("p1", "BTCUSDC", "2025-11-27", 10.0),
+        _closed("p2", "ETHUSDC", "2025-11-27", -4.0),
+        _closed("p3", "BTCUSDC", "2025-11-28", -12.0),
+    ])
+    first = report.update_report()
+    assert first["touched_days"] == ["2025-11-27", "2025-11-28"]
+    assert [(d["date"], d["trades"], d["total_pnl_usd"], d["equity_usd"], d["drawdown_usd"])
+            for d in first["daily"]] == [("2025-11-27", 2, 6.0, 6.0, 0.0),
+                                         ("2025-11-28", 1, -12.0, -6.0, -12.0)]
+
+    # Nouveau passage: seules les lignes après le high-water mark sont relues
+    seen = []
+    rows_since = store.rows_since
+    monkeypatch.setattr(store, "rows_since", lambda t, seq: seen.append(seq) or rows_since(t, seq))
+    store.append_many("positions", [
+        _closed("p4", "SOLUSDC", "2025-11-28", 20.0),
+        _closed("p5", "ETHUSDC", "2025-11-27", 1.5),  # clôture tardive d'un jour déjà agrégé
+    ])
+    second = report.update_report()
+    assert seen == [4]
+    assert second["touched_days"] == ["2025-11-27", "2025-11-28"]
+    assert [(d["date"], d["trades"], d["equity_usd"], d["drawdown_usd"]) for d in second["daily"]] == [
+        ("2025-11-27", 3, 7.5, 0.0), ("2025-11-28", 2, 15.5, 0.0)]
+
+    by_symbol = {r["symbol"]: r for r in second["symbols"]}
+    assert by_symbol["ETHUSDC"]["trades"] == 2 and by_symbol["ETHUSDC"]["total_pnl_usd"] == -2.5
+    assert by_symbol["BTCUSDC"]["win_rate"] == 50.0
+
+    assert report.update_report()["touched_days"] == []
+    rebuilt = report.update_report(rebuild=True)
+    assert rebuilt["daily"] == second["daily"] and rebuilt["symbols"] == second["symbols"]
+    lines = report.PNL_JSONL_PATH.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(ln) for ln in lines] == second["daily"]
+    assert report.PNL_SYMBOLS_CSV_PATH.read_text(encoding="utf-8").startswith("symbol,trades,")
+
+
+def test_legacy_jsonl_source_resumes_from_offset_and_resets_on_truncation(logs):
+    path = report.POS_JSONL_PATH
+    path.write_text(json.dumps(_closed("p1", "BTCUSDC", "2025-11-27", 5.0)) + "\n", encoding="utf-8")
+    assert report.run_report(print_last=False) == (1, 5.0)
+
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(_closed("p2", "BTCUSDC", "2025-11-27", 2.0)) + "\n")
+    assert report.run_report(print_last=False) == (2, 7.0)
+
+    # Fichier réécrit plus court (même inode): troncature détectée, réagrégation
+    path.write_text(json.dumps(_closed("p9", "ETHUSDC", "2025-11-29", -1.0)) + "\n", encoding="utf-8")
+    out = report.update_report()
+    assert [(d["date"], d["trades"]) for d in out["daily"]] == [("2025-11-29", 1)]
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import json
+from datetime import date
 from math import isclose
 from pathlib import Path
 from typing import Dict, Any, List
 
+import pytest
+
 from kobe.research.aggregate_decisions import aggregate_decisions
 from kobe.research.export_decision_dataset import build_dataset
-from kobe.research.analyze_decisions import build_families
+from kobe.research.analyze_decisions import analyze_frame
 
 
 def _write_sample_decisions(tmp_dir: Path) -> Path:
@@ -101,6 +104,62 @@ def test_aggregate_decisions_counts_and_regime(tmp_path: Path) -> None:
     assert counts[no_prop_key] == 1
 
 
+def test_aggregate_decisions_parallel_and_filename_pruning(tmp_path: Path) -> None:
+    log_dir = _write_sample_decisions(tmp_path)
+    evt = {"ts": "2025-11-27T12:00:00+00:00", "symbol": "ETHUSDC", "decision_stage": "no_proposal"}
+    for day in ("2025-11-26", "2025-11-28"):
+        (log_dir / f"{day}_decisions.jsonl").write_text(
+            json.dumps(dict(evt, ts=f"{day}T12:00:00+00:00")) + "\n", encoding="utf-8"
+        )
+    # Fichier très éloigné de la plage: jamais ouvert, même si son contenu y tomberait.
+    (log_dir / "2025-01-01_decisions.jsonl").write_text(json.dumps(evt) + "\n", encoding="utf-8")
+
+    serial = aggregate_decisions(log_dir, workers=1)
+    assert aggregate_decisions(log_dir, workers=3) == serial
+    assert sum(serial.values()) == 6
+
+    day = date(2025, 11, 27)
+    window = aggregate_decisions(log_dir, since=day, until=day, workers=2)
+    assert {k.day for k in window} == {day}
+    assert sum(window.values()) == 3
+
+
+def test_aggregate_decisions_checkpoint_only_rereads_changed_files(tmp_path: Path, monkeypatch) -> None:
+    import kobe.research.aggregate_decisions as agg
+
+    log_dir = _write_sample_decisions(tmp_path)
+    other = log_dir / "2025-11-28_decisions.jsonl"
+    evt = {"ts": "2025-11-28T09:00:00+00:00", "symbol": "ETHUSDC", "decision_stage": "no_proposal"}
+    other.write_text(json.dumps(evt) + "\n", encoding="utf-8")
+    ckpt = tmp_path / "ckpt.json"
+
+    read = []
+    orig = agg.aggregate_file
+    monkeypatch.setattr(agg, "aggregate_file", lambda path, *a: read.append(Path(path).name) or orig(path, *a))
+
+    first = aggregate_decisions(log_dir, workers=1, checkpoint=ckpt)
+    assert first == aggregate_decisions(log_dir, workers=1)
+    assert sorted(read) == ["2025-11-27_decisions.jsonl"] * 2 + ["2025-11-28_decisions.jsonl"] * 2
+
+    read.clear()
+    assert aggregate_decisions(log_dir, workers=1, checkpoint=ckpt) == first
+    assert read == []
+    # Filtre de dates appliqué sur les agrégats en cache
+    day = date(2025, 11, 28)
+    assert sum(aggregate_decisions(log_dir, since=day, workers=1, checkpoint=ckpt).values()) == 1
+    assert read == []
+
+    with other.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(evt) + "\n")
+    again = aggregate_decisions(log_dir, workers=1, checkpoint=ckpt)
+    assert read == ["2025-11-28_decisions.jsonl"]
+    assert sum(again.values()) == sum(first.values()) + 1
+
+    other.unlink()
+    aggregate_decisions(log_dir, workers=1, checkpoint=ckpt)
+    assert list(json.loads(ckpt.read_text())["files"]) == ["2025-11-27_decisions.jsonl"]
+
+
 def test_export_decision_dataset_flatten_and_rr(tmp_path: Path) -> None:
     log_dir = _write_sample_decisions(tmp_path)
     rows = build_dataset(log_dir)
@@ -164,29 +223,73 @@ def test_analyze_decisions_family_stats_basic() -> None:
         },
     ]
 
-    from kobe.research.analyze_decisions import build_families  # import local pour éviter cycles
+    import pandas as pd
 
-    families = build_families(rows)
+    families = analyze_frame(pd.DataFrame(rows)).set_index("setup_id")
     assert len(families) == 2
 
-    breakout_stats = None
-    none_stats = None
-
-    for key, stats in families.items():
-        if key.setup_id == "trend_breakout_15m_long":
-            breakout_stats = stats
-        if key.setup_id == "none":
-            none_stats = stats
-
-    assert breakout_stats is not None, "famille trend_breakout_15m_long manquante"
-    assert breakout_stats.total_events == 2
-    assert breakout_stats.by_stage.get("proposal_built", 0) == 1
-    assert breakout_stats.by_stage.get("setup_detected", 0) == 1
-    assert len(breakout_stats.qualities or []) == 2
-    assert len(breakout_stats.rr_values or []) == 2
-    avg_quality = sum(breakout_stats.qualities or []) / len(breakout_stats.qualities or [1.0])
-    assert isclose(avg_quality, 0.7, rel_tol=1e-6)
-
-    assert none_stats is not None, "famille 'none' manquante"
-    assert none_stats.total_events == 1
-    assert none_stats.by_stage.get("no_proposal", 0) == 1
+    assert "trend_breakout_15m_long" in families.index, "famille trend_breakout_15m_long manquante"
+    breakout_stats = families.loc["trend_breakout_15m_long"]
+    assert breakout_stats["total_events"] == 2
+    assert breakout_stats["count_proposal_built"] == 1
+    assert breakout_stats["count_setup_detected"] == 1
+    assert breakout_stats["count_no_proposal"] == 0
+    assert breakout_stats["num_quality_samples"] == 2
+    assert breakout_stats["num_rr_samples"] == 2
+    assert isclose(breakout_stats["avg_setup_quality"], 0.7, rel_tol=1e-6)
+    assert isclose(breakout_stats["avg_proposal_rr"], 2.25, rel_tol=1e-6)
+
+    assert "none" in families.index, "famille 'none' manquante"
+    none_stats = families.loc["none"]
+    assert none_stats["total_events"] == 1
+    assert none_stats["count_no_proposal"] == 1
+    assert none_stats["num_quality_samples"] == 0
+    assert pd.isna(none_stats["avg_setup_quality"])
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".parquet"])
+def test_frames_export_and_groupby_analysis_match_csv_path(tmp_path: Path, suffix: str) -> None:
+    import csv as _csv
+
+    from kobe.research.analyze_decisions import load_dataset_frame, write_analysis_frame
+    from kobe.research.export_decision_dataset import iter_dataset, write_dataset_csv, write_dataset_frames
+
+    log_dir = _write_sample_decisions(tmp_path)
+    frames_path = tmp_path / f"dataset{suffix}"
+    # chunk_rows=2 → plusieurs blocs (row groups parquet) écrits en flux
+    assert write_dataset_frames(iter_dataset(log_dir), frames_path, chunk_rows=2) == 3
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        assert pq.ParquetFile(frames_path).num_row_groups == 2
+    csv_path = tmp_path / "dataset.csv"
+    write_dataset_csv(build_dataset(log_dir), csv_path)
+
+    df = load_dataset_frame(frames_path)
+    assert len(df) == 3
+    assert str(df["15m_close"].dtype) == "float64"
+    assert str(df["setup_quality"].dtype) == "float64"
+    assert str(df["ts"].dtype) == "datetime64[ns, UTC]"
+
+    def _read(path: Path):
+        with path.open(newline="", encoding="utf-8") as f:
+            return list(_csv.DictReader(f))
+
+    # Référence: l'analyse du CSV (chemin historique); l'export frames doit donner le même rapport.
+    ref = tmp_path / "ref.csv"
+    write_analysis_frame(analyze_frame(load_dataset_frame(csv_path)), ref)
+    expected = _read(ref)
+    assert [(r["setup_id"], r["total_events"]) for r in expected] == [
+        ("none", "1"),
+        ("trend_breakout_15m_long", "2"),
+    ]
+    out = tmp_path / f"analysis_{suffix[1:]}.csv"
+    write_analysis_frame(analyze_frame(load_dataset_frame(frames_path)), out)
+    got = _read(out)
+    assert [list(r) for r in got] == [list(r) for r in expected]
+    for g, e in zip(got, expected):
+        for col, value in e.items():
+            if value and col.startswith("avg_"):
+                assert isclose(float(g[col]), float(value))
+            else:
+                assert g[col] == value, col
@@ -47,7 +47,8 @@ def test_router_builds_order_plan_in_live(monkeypatch):
         def get_price(self, symbol):
             return {"symbol": symbol, "price": "68000.0"}
 
-        def create_order(self, symbol, side, quantity, order_type="MARKET", take_price=None, stop_price=None):
+        def create_order(self, symbol, side, quantity, order_type="MARKET", take_price=None, stop_price=None,
+                         client_order_id=None):
             # Simule un ordre MARKET accepté
             return {"orderId": "12345", "status": "NEW", "symbol": symbol}
 
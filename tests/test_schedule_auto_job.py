@@ -1,6 +1,4 @@
-import pytest
-
-from kobe.cli.schedule import run_auto_proposal_job
+from kobe.cli.schedule import run_auto_proposal_job, run_auto_proposals_job
 from kobe.signals.proposal import Proposal
 
 
@@ -106,3 +104,56 @@ def test_auto_job_referee_take_enriches_reasons(monkeypatch):
     p = captured["p"]
     assert any("Referee LLM" in r for r in p.reasons)
     assert len(p.reasons) <= 5
+
+
+def test_auto_job_routes_tick_proposals_as_one_batch(monkeypatch):
+    from kobe.core.modes import Mode
+
+    batches, executions = [], []
+
+    def fake_generator(snapshot):
+        p = _make_dummy_proposal()
+        p.symbol = snapshot["symbol"]
+        return p
+
+    def fake_place(proposals, *, balance_usd, leverage):
+        batches.append([p.symbol for p in proposals])
+        return [(Mode.LIVE, {"symbol": proposals[0].symbol, "status": "NEW"}), RuntimeError("risk guard")]
+
+    monkeypatch.setattr("kobe.cli.schedule.get_market_snapshot", lambda symbol: {"symbol": symbol})
+    monkeypatch.setattr("kobe.cli.schedule.generate_proposal_from_factors", fake_generator)
+    monkeypatch.setattr("kobe.cli.schedule.log_proposal", lambda d: None)
+    monkeypatch.setattr("kobe.cli.schedule.log_decision", lambda d: None)
+    monkeypatch.setattr("kobe.cli.schedule.place_from_proposals", fake_place)
+    monkeypatch.setattr("kobe.cli.schedule.send_execution_event",
+                        lambda notifier, p, evt, **kw: executions.append((p.symbol, evt["status"])))
+    monkeypatch.setattr("kobe.cli.schedule.send_trade", lambda notifier, p, **kw: True)
+
+    produced = run_auto_proposals_job(["BTCUSDC", "ETHUSDC"], notifier=object(), trades_alerts_enabled=True)
+
+    # Un seul appel au router pour tout le tick; l'échec d'une proposal retombe en simple signal
+    assert batches == [["BTCUSDC", "ETHUSDC"]]
+    assert executions == [("BTCUSDC", "NEW")]
+    assert produced == ["BTCUSDC", "ETHUSDC"]
+
+
+def test_user_stream_started_only_with_live_keys(monkeypatch, tmp_path):
+    from kobe.cli.schedule import _start_user_stream
+    from kobe.execution import user_stream
+
+    monkeypatch.chdir(tmp_path)  # pas de .env local
+    started = []
+
+    class FakeStream:
+        def start(self):
+            started.append(self)
+            return self
+
+    monkeypatch.setattr(user_stream, "UserDataStream", FakeStream)
+    monkeypatch.delenv("BINANCE_API_KEY", raising=False)
+    monkeypatch.delenv("BINANCE_API_SECRET", raising=False)
+    assert _start_user_stream() is None and started == []
+
+    monkeypatch.setenv("BINANCE_API_KEY", "k")
+    monkeypatch.setenv("BINANCE_API_SECRET", "s")
+    assert _start_user_stream() is started[0]
@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kobe.execution import signing
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.signing import RequestSigner, get_server_clock
+
+SKEW_MS = 10_000  # le serveur est 10 s en avance sur l'horloge locale
+
+
+@pytest.fixture
+def skewed_server():
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _signed(self):
+            path, _, query = self.path.partition("?")
+            calls.append((self.command, path, query))
+            payload, _, sig = query.rpartition("&signature=")
+            expected = hmac.new(b"s3cret", payload.encode(), hashlib.sha256).hexdigest()
+            if sig != expected:
+                return self._reply(400, {"code": -1022, "msg": "Signature for this request is not valid."})
+            q = dict(urllib.parse.parse_qsl(payload))
+            server_now = int(time.time() * 1000) + SKEW_MS
+            if abs(server_now - int(q["timestamp"])) > int(q["recvWindow"]):
+                return self._reply(400, {"code": -1021, "msg": "Timestamp for this request is outside of the recvWindow."})
+            return self._reply(200, {"orderId": 1, "echo": q})
+
+        def do_GET(self):
+            if self.path.startswith("/api/v3/time"):
+                calls.append((self.command, "/api/v3/time", ""))
+                return self._reply(200, {"serverTime": int(time.time() * 1000) + SKEW_MS})
+            return self._signed()
+
+        def do_POST(self):
+            return self._signed()
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}", calls
+    srv.shutdown()
+
+
+def test_signer_matches_plain_hmac():
+    signer = RequestSigner("s3cret", recv_window_ms=7000)
+    query = signer.build({"symbol": "BTCUSDC", "quantity": 0.01, "note": "a b/c"}, 1700000000000)
+    payload, _, sig = query.rpartition("&signature=")
+    assert payload == "symbol=BTCUSDC&quantity=0.01&note=a+b%2Fc&recvWindow=7000&timestamp=1700000000000"
+    assert sig == hmac.new(b"s3cret", payload.encode(), hashlib.sha256).hexdigest()
+    # Deux signatures successives partent du même état HMAC initial
+    assert signer.build({"symbol": "BTCUSDC"}, 1) == signer.build({"symbol": "BTCUSDC"}, 1)
+
+
+def test_clock_skew_resync_and_single_replay(skewed_server, monkeypatch):
+    base, calls = skewed_server
+    monkeypatch.setenv("BINANCE_BASE_URL", base)
+    b = BinanceSpot(key="k", secret="s3cret")
+
+    resp = b._signed_post("/api/v3/order", {"symbol": "BTCUSDC", "side": "BUY", "type": "MARKET", "quantity": 0.01})
+    assert resp["orderId"] == 1
+    # rejet -1021, mesure de l'écart, rejeu unique
+    assert [(m, p) for m, p, _ in calls] == [("POST", "/api/v3/order"), ("GET", "/api/v3/time"),
+                                             ("POST", "/api/v3/order")]
+    clock = get_server_clock(base)
+    assert abs(clock.offset_ms - SKEW_MS) < 1000
+
+    # Horloge déjà corrigée: plus de rejet pour les requêtes suivantes (GET inclus)
+    calls.clear()
+    assert b._signed_get("/api/v3/openOrders", {"symbol": "BTCUSDC"})["echo"]["symbol"] == "BTCUSDC"
+    assert [p for _, p, _ in calls] == ["/api/v3/openOrders"]
+
+
+def test_bench_reports_both_paths():
+    res = signing.bench(200)
+    assert res["n"] == 200 and res["legacy_us"] > 0 and res["cached_us"] > 0
@@ -0,0 +1,72 @@
+import json
+from datetime import date
+
+from kobe.core.state_store import StateStore
+import kobe.strategy.v0_contraction_breakout as strat
+
+
+def test_state_store_loads_once_and_writes_only_on_change(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({"s1": {"*": {"last_date": "2025-01-01"}}}), encoding="utf-8")
+    store = StateStore(path)
+
+    reads = {"n": 0}
+    orig_read = type(path).read_text
+
+    def counting_read(self, *a, **kw):
+        reads["n"] += 1
+        return orig_read(self, *a, **kw)
+
+    monkeypatch.setattr(type(path), "read_text", counting_read)
+
+    for _ in range(50):
+        assert store.get("s1", "last_date") == "2025-01-01"
+    assert reads["n"] == 1
+
+    mtime = path.stat().st_mtime_ns
+    assert store.set("s1", "last_date", "2025-01-01") is False
+    assert path.stat().st_mtime_ns == mtime
+
+    assert store.set("s1", "last_date", "2025-01-02") is True
+    assert json.loads(orig_read(path, encoding="utf-8"))["s1"]["*"]["last_date"] == "2025-01-02"
+    # Aucun fichier temporaire ne traîne après l'écriture atomique
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_state_store_scopes_strategies_and_symbols(tmp_path):
+    store = StateStore(tmp_path / "state.json")
+    store.set("breakout", "last_date", "2025-01-01", symbol="BTCUSDC")
+    store.set("breakout", "last_date", "2025-01-02", symbol="ETHUSDC")
+    store.set("meanrev", "last_date", "2025-01-03", symbol="BTCUSDC")
+
+    reloaded = StateStore(tmp_path / "state.json")
+    assert reloaded.get("breakout", "last_date", symbol="BTCUSDC") == "2025-01-01"
+    assert reloaded.get("breakout", "last_date", symbol="ETHUSDC") == "2025-01-02"
+    assert reloaded.get("meanrev", "last_date", symbol="BTCUSDC") == "2025-01-03"
+    assert reloaded.get("meanrev", "last_date", symbol="ETHUSDC") is None
+
+
+def test_contraction_breakout_clamp_uses_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(strat, "STATE_PATH", tmp_path / ".kobe_state.json")
+    assert strat._clamped_today() is False
+    strat._persist_today()
+    assert strat._clamped_today() is True
+    data = json.loads((tmp_path / ".kobe_state.json").read_text(encoding="utf-8"))
+    assert data[strat.STRATEGY_ID]["*"]["last_date"] == date.today().isoformat()
+
+
+def test_legacy_flat_state_migrated_under_strategy(tmp_path, monkeypatch):
+    path = tmp_path / ".kobe_state.json"
+    today = date.today().isoformat()
+    path.write_text(json.dumps({"last_date": today}), encoding="utf-8")
+    monkeypatch.setattr(strat, "STATE_PATH", path)
+
+    # Clamp déjà posé aujourd'hui par l'ancien format: toujours respecté
+    assert strat._clamped_today() is True
+    assert json.loads(path.read_text(encoding="utf-8")) == {strat.STRATEGY_ID: {"*": {"last_date": today}}}
+
+    # Sans stratégie de reprise, le store générique ne touche pas au format plat
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps({"last_date": today}), encoding="utf-8")
+    assert StateStore(other).get(strat.STRATEGY_ID, "last_date") is None
+    assert json.loads(other.read_text(encoding="utf-8")) == {"last_date": today}
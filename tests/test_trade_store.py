@@ -0,0 +1,123 @@
+import csv
+import json
+
+import pytest
+
+from kobe.core import trade_store
+from kobe.core.trade_store import TradeStore, main
+
+
+def test_wal_batch_and_indexed_query(tmp_path):
+    store = TradeStore(tmp_path / "trades.db")
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with store.batch():
+        store.append("orders", {"ts": 1, "symbol": "BTCUSDC", "side": "BUY", "status": "FILLED"})
+        store.append("orders", {"ts": 2, "symbol": "ETHUSDC", "side": "SELL", "status": "NEW"})
+        store.append("orders", {"ts": 3, "symbol": "BTCUSDC", "side": "SELL", "status": "NEW",
+                                "extra": {"k": 1}})
+
+    rows = store.query("orders", "symbol = ?", ("BTCUSDC",))
+    assert [r["ts"] for r in rows] == [1, 3]
+    assert rows[1]["extra"] == {"k": 1}
+    assert store.query("orders", "status = ?", ("NEW",), order_by="ts DESC", limit=1)[0]["ts"] == 3
+
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT data FROM orders WHERE symbol = ?", ("BTCUSDC",)
+    ).fetchall()
+    assert "ix_orders_symbol" in " ".join(str(r) for r in plan)
+
+    assert store.max_seq("orders") == 3
+    assert [e["ts"] for _, e in store.rows_since("orders", 2)] == [3]
+
+
+def test_batch_rolls_back_on_exception(tmp_path):
+    store = TradeStore(tmp_path / "trades.db")
+    store.append("orders", {"ts": 1, "symbol": "BTCUSDC", "status": "FILLED"})
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.append("orders", {"ts": 2, "symbol": "BTCUSDC", "status": "NEW"})
+            with store.batch():
+                store.append("orders", {"ts": 3, "symbol": "BTCUSDC", "status": "NEW"})
+            raise RuntimeError("boom")
+    assert [r["ts"] for r in store.query("orders")] == [1]
+
+    store.append("orders", {"ts": 4, "symbol": "BTCUSDC", "status": "NEW"})
+    assert [r["ts"] for r in TradeStore(tmp_path / "trades.db").query("orders")] == [1, 4]
+
+
+def test_export_and_import_roundtrip(tmp_path):
+    legacy = tmp_path / "positions.jsonl"
+    legacy.write_text(
+        json.dumps({"id": "p1", "symbol": "BTCUSDC", "status": "open", "entry": 100.0}) + "\n"
+        + "ligne corrompue\n"
+        + json.dumps({"id": "p1", "symbol": "BTCUSDC", "status": "closed", "exit_price": 110.0}) + "\n",
+        encoding="utf-8",
+    )
+    db = tmp_path / "db" / "trades.db"  # hors du dossier du journal: pas de reprise automatique
+    assert main(["--db", str(db), "import", "positions", str(legacy)]) == 0
+
+    out = tmp_path / "views"
+    assert main(["--db", str(db), "export", "--out-dir", str(out)]) == 0
+
+    lines = (out / "positions.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["status"] for l in lines] == ["open", "closed"]
+    with open(out / "positions.csv", newline="", encoding="utf-8") as f:
+        reader = list(csv.DictReader(f))
+    assert reader[0]["id"] == "p1" and reader[1]["exit_price"] == "110.0"
+    assert (out / "orders.csv").read_text(encoding="utf-8").startswith("ts,mode,symbol")
+    assert not list(out.glob(".*"))  # réécriture atomique: aucun fichier temporaire
+
+
+def test_new_store_imports_legacy_logs_once(tmp_path):
+    (tmp_path / "positions.jsonl").write_text(
+        json.dumps({"id": "p1", "symbol": "BTCUSDC", "status": "open", "entry": 100.0}) + "\n", encoding="utf-8")
+    (tmp_path / "positions.csv").write_text("id,status\nignored,open\n", encoding="utf-8")  # JSONL prioritaire
+    (tmp_path / "orders.csv").write_text("ts,symbol,qty,status\n5,BTCUSDC,0.5,FILLED\n", encoding="utf-8")
+    proposal = {"ts": 3, "signal_id": "p-1", "symbol": "BTCUSDC", "result": "pending"}
+    (tmp_path / "journal.jsonl").write_text(
+        json.dumps({"ts": 1, "type": "signal"}) + "\n" + json.dumps(proposal) + "\n", encoding="utf-8")
+
+    store = TradeStore(tmp_path / "trades.db")
+    assert [p["id"] for p in store.query("positions")] == ["p1"]
+    assert store.query("proposals") == [proposal]  # seules les proposals du journal brut
+    assert store.query("orders") == [{"ts": 5, "symbol": "BTCUSDC", "qty": 0.5, "status": "FILLED"}]
+    store.close()
+
+    # Base existante: jamais réimporté
+    assert len(TradeStore(tmp_path / "trades.db").query("positions")) == 1
+
+
+def test_legacy_import_retried_until_it_succeeds(tmp_path, monkeypatch):
+    db = tmp_path / "trades.db"
+    exported = {"id": "p1", "symbol": "BTCUSDC", "status": "open"}
+    old = TradeStore(db)
+    old.append("positions", exported)
+    # Base d'avant le marqueur de reprise
+    old._conn.execute('DELETE FROM "_meta"')
+    old._conn.commit()
+    old.close()
+    older = {"id": "p0", "symbol": "ETHUSDC", "status": "closed"}
+    (tmp_path / "positions.jsonl").write_text(json.dumps(older) + "\n" + json.dumps(exported) + "\n",
+                                              encoding="utf-8")
+
+    calls = {"n": 0}
+    read = trade_store._read_jsonl
+
+    def flaky(path):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise OSError("disque indisponible")
+        return read(path)
+
+    monkeypatch.setattr(trade_store, "_read_jsonl", flaky)
+    monkeypatch.setattr(trade_store, "LEGACY_RETRY_S", 0.0)
+    store = TradeStore(db)
+    assert [p["id"] for p in store.query("positions")] == ["p1"]  # échec: pas de marqueur
+
+    # Retenté à l'écriture suivante; l'event déjà en base (vue exportée) n'est pas doublé
+    store.append("positions", {"id": "p2", "symbol": "SOLUSDC", "status": "open"})
+    assert [p["id"] for p in store.query("positions")] == ["p1", "p0", "p2"]
+    store.close()
+    assert len(TradeStore(db).query("positions")) == 3
+    assert calls["n"] == 2
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from kobe.core import executor, trailing_stop
+from kobe.execution.binance_spot_async import AsyncBinanceSpot
+
+
+def _live(pid, symbol, entry, stop, take):
+    return {"id": pid, "mode": "live", "symbol": symbol, "side": "long", "qty": 0.5,
+            "entry": entry, "stop": stop, "take": take, "status": "open", "ts_open": 1}
+
+
+@pytest.fixture
+def fake_exchange(tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    monkeypatch.setenv("KOBE_EXECUTOR_LOG", str(tmp_path / "executor.jsonl"))
+    calls = []
+    prices = {"BTCUSDC": "110.0", "ETHUSDC": "22.0", "SOLUSDC": "10.0"}
+    open_orders = {
+        # SL simple -> cancelReplace
+        "BTCUSDC": [{"symbol": "BTCUSDC", "orderId": 21, "orderListId": -1, "type": "LIMIT", "side": "SELL"},
+                    {"symbol": "BTCUSDC", "orderId": 22, "orderListId": -1, "type": "STOP_LOSS_LIMIT", "side": "SELL"}],
+        # SL dans une liste OCO -> ré-émission de l'OCO
+        "ETHUSDC": [{"symbol": "ETHUSDC", "orderId": 31, "orderListId": 7, "type": "STOP_LOSS_LIMIT", "side": "SELL"}],
+    }
+
+    def record(method, path, params):
+        calls.append((method, path, dict(params or {})))
+
+    async def get_price(self, symbol):
+        await asyncio.sleep(0.2)  # latence réseau simulée
+        record("GET", "/api/v3/ticker/price", {"symbol": symbol})
+        return {"symbol": symbol, "price": prices[symbol]}
+
+    async def signed_get(self, path, params=None):
+        record("GET", path, params)
+        return open_orders.get(params["symbol"], [])
+
+    async def signed_post(self, path, params=None):
+        await asyncio.sleep(0.2)
+        record("POST", path, params)
+        return {"orderId": 99}
+
+    async def signed_delete(self, path, params=None):
+        record("DELETE", path, params)
+        return {}
+
+    monkeypatch.setattr(AsyncBinanceSpot, "get_price", get_price)
+    monkeypatch.setattr(AsyncBinanceSpot, "_signed_get", signed_get)
+    monkeypatch.setattr(AsyncBinanceSpot, "_signed_post", signed_post)
+    monkeypatch.setattr(AsyncBinanceSpot, "_signed_delete", signed_delete)
+    return calls
+
+
+def test_trailing_stops_replace_concurrently_without_global_cancel(fake_exchange, tmp_path):
+    executor._append_row(_live("a", "BTCUSDC", 100.0, 95.0, 120.0))
+    executor._append_row(_live("b", "ETHUSDC", 20.0, 19.0, 25.0))
+    executor._append_row(_live("c", "SOLUSDC", 10.0, 9.5, 12.0))  # pas de profit: inchangé
+
+    metrics = trailing_stop.process_trailing_stops()
+
+    # 3 prix + 2 remplacements à 200 ms chacun: séquentiel >= 1 s, concurrent ~0.4 s
+    assert metrics["cycle_ms"] < 900
+    assert metrics["positions"] == 3 and metrics["updated"] == 2 and metrics["failed"] == 0
+    assert {u["id"]: u["method"] for u in metrics["updates"]} == {"a": "cancel_replace", "b": "oco_reissue"}
+    assert metrics["exposure_ms_max"] >= 200
+
+    # Jamais d'annulation globale des ordres du symbole
+    assert not any(path == "/api/v3/openOrders" for m, path, _ in fake_exchange if m == "DELETE")
+    replace = next(p for m, path, p in fake_exchange if path == "/api/v3/order/cancelReplace")
+    assert replace["cancelOrderId"] == 22 and replace["cancelReplaceMode"] == "STOP_ON_FAILURE"
+    assert replace["stopPrice"] == 108.9 and replace["type"] == "STOP_LOSS_LIMIT"
+    oco = next(p for m, path, p in fake_exchange if path == "/api/v3/orderList/oco")
+    assert oco["abovePrice"] == 25.0 and oco["belowStopPrice"] == 21.78
+    assert ("DELETE", "/api/v3/orderList", {"symbol": "ETHUSDC", "orderListId": 7}) in fake_exchange
+
+    assert executor.get_position("a")["stop"] == 108.9
+    assert executor.get_position("c")["stop"] == 9.5
+    events = [json.loads(ln) for ln in (tmp_path / "executor.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert events[-1]["kind"] == "trailing_cycle"
+    assert sum(e["kind"] == "stop_replace" for e in events) == 2
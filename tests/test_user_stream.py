@@ -0,0 +1,124 @@
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from websockets.sync.server import serve
+
+from kobe.core import executor
+from kobe.execution.binance_spot import BinanceSpot
+from kobe.execution.user_stream import UserDataStream
+
+
+def _report(order_id, order_type, side, status, qty, quote, trade_id):
+    return {"e": "executionReport", "E": 1764237600000, "T": 1764237600000, "s": "BTCUSDC",
+            "c": f"kobe-{order_id}", "S": side, "o": order_type, "q": str(qty), "p": "0",
+            "x": "TRADE" if status == "FILLED" else status, "X": status, "i": order_id,
+            "l": str(qty), "L": str(quote / qty if qty else 0), "z": str(qty), "Z": str(quote),
+            "t": trade_id, "n": "0", "N": "USDC", "r": "NONE"}
+
+
+TP_FILL = _report(12, "LIMIT", "SELL", "FILLED", 0.5, 55.0, 7)
+# Par connexion WS: messages envoyés puis fermeture côté serveur
+SCRIPT = [
+    [_report(11, "MARKET", "BUY", "FILLED", 0.5, 50.0, 6), TP_FILL],
+    [{"e": "listenKeyExpired", "E": 1764237600001}],
+    [TP_FILL, _report(13, "STOP_LOSS_LIMIT", "SELL", "CANCELED", 0.0, 0.0, -1)],
+]
+
+
+@pytest.fixture
+def stub_binance():
+    calls = []
+    keys = iter(["key-1", "key-2", "key-3"])
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, body):
+            calls.append((self.command, self.path))
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self._reply({"listenKey": next(keys)})
+
+        def do_PUT(self):
+            self._reply({})
+
+        def do_DELETE(self):
+            self._reply({})
+
+        def log_message(self, *args):
+            pass
+
+    paths = []
+    script = list(SCRIPT)
+
+    def ws_handler(conn):
+        paths.append(conn.request.path)
+        for msg in (script.pop(0) if script else []):
+            conn.send(json.dumps(msg))
+        if not script:
+            conn.recv()  # dernière connexion: reste ouverte jusqu'à l'arrêt du client
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    ws = serve(ws_handler, "127.0.0.1", 0)
+    for srv in (http.serve_forever, ws.serve_forever):
+        threading.Thread(target=srv, daemon=True).start()
+    yield {"http": f"http://127.0.0.1:{http.server_address[1]}",
+           "ws": f"ws://127.0.0.1:{ws.socket.getsockname()[1]}", "calls": calls, "paths": paths}
+    http.shutdown()
+    ws.shutdown()
+
+
+def test_user_stream_closes_position_on_tp_fill(stub_binance, tmp_path, monkeypatch):
+    monkeypatch.setattr(executor, "POS_LOG_DIR", tmp_path)
+    monkeypatch.setenv("KOBE_LOGS_DIR", str(tmp_path))
+    monkeypatch.setenv("BINANCE_BASE_URL", stub_binance["http"])
+    executor._append_row({"id": "p1", "mode": "live", "symbol": "BTCUSDC", "side": "long", "qty": 0.5,
+                          "entry": 100.0, "stop": 95.0, "take": 110.0, "status": "open",
+                          "ts_open": 1, "exchange_order_id": "11"})
+
+    events = queue.Queue()
+    stream = UserDataStream(client=BinanceSpot(key="k", secret="s"), ws_base=stub_binance["ws"],
+                            on_event=lambda kind, msg: events.put((kind, msg)),
+                            keepalive_s=0.05, reconnect_min_s=0.01, reconnect_max_s=0.05)
+    stream.start()
+    try:
+        got = [events.get(timeout=5) for _ in range(4)]
+        deadline = time.monotonic() + 2
+        while not any(m == "PUT" for m, _ in stub_binance["calls"]) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stream.stop()
+
+    kinds = [k for k, _ in got]
+    # Le doublon du TP reçu après reconnexion est ignoré (ni callback, ni clôture)
+    assert kinds == ["executionReport", "executionReport", "listenKeyExpired", "executionReport"]
+    assert got[3][1]["X"] == "CANCELED"
+    # Seul le TP (ordre de sortie) clôture, pas l'entrée MARKET
+    assert got[1][1]["_closed_position"] == "p1"
+    assert "_closed_position" not in got[0][1] and "_closed_position" not in got[3][1]
+    assert executor.get_position("p1") is None
+    closed = [e for _, e in executor._book().store.rows_since("positions", 0) if e.get("status") == "closed"]
+    assert len(closed) == 1
+    assert closed[0]["exit_price"] == pytest.approx(110.0)
+    assert closed[0]["realized_pnl_usd"] == pytest.approx(5.0)
+    assert closed[0]["reason"] == "take_profit"
+
+    # listenKey: création, nouvelle clé après expiration, keep-alive, suppression à l'arrêt
+    methods = [m for m, _ in stub_binance["calls"]]
+    assert methods.count("POST") == 2 and "PUT" in methods and methods[-1] == "DELETE"
+    assert stub_binance["paths"] == ["/ws/key-1", "/ws/key-1", "/ws/key-2"]
+    assert stream.connects == 3
+
+    lines = [json.loads(ln) for f in (tmp_path / "executions").glob("*.jsonl")
+             for ln in f.read_text(encoding="utf-8").splitlines()]
+    fills = [e for e in lines if e["stage"] == "fill"]
+    assert [(e["order_kind"], e["status"]) for e in fills] == [
+        (None, "SUCCESS"), ("take_profit", "SUCCESS"), ("stop_loss", "CANCELLED")]